@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Account Router
+Maps a SevenSYS alert (by ticker or strategy) to the OANDA accounts that mirror it, sizes
+the order for each account from its own sizing rule, and places all orders concurrently so
+one webhook costs about as long as the slowest account rather than the sum of them.
+
+Routing file (ACCOUNT_ROUTES_PATH, default account_routes.json). Credentials are read from
+the named environment variables, never from the file:
+
+    {
+      "accounts": {
+        "practice": {"api_key_env": "OANDA_API_KEY", "account_id_env": "OANDA_ACCOUNT_ID",
+                     "sizing": {"mode": "risk", "balance": "live", "risk_percent": 2.0, "max_units": 1000}},
+        "prop":     {"api_key_env": "PROP_API_KEY", "account_id_env": "PROP_ACCOUNT_ID",
+                     "sizing": {"mode": "risk", "balance": 10000, "risk_percent": 2.0}},
+        "live":     {"api_key_env": "LIVE_API_KEY", "account_id_env": "LIVE_ACCOUNT_ID",
+                     "sizing": {"mode": "fixed", "units": 100}}
+      },
+      "routes": {"EUR_USD": ["practice", "prop", "live"], "SevenSYS": ["practice"], "default": ["practice"]}
+    }
+
+A "balance" of "live" sizes from the account's cached balance (account_state.AccountState,
+kept current in the background), falling back to fallback_balance until the cache is ready.
+"""
+
+import os
+import json
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import latency_trace
+from account_state import AccountState
+from instrument_metadata import get_instrument_metadata, normalize_instrument
+from lazy_imports import lazy_module
+
+np = lazy_module('numpy')  # Only needed once an order is sized
+
+logger = logging.getLogger(__name__)
+
+ACCOUNT_ROUTING_CONFIG = {
+    'routes_path': os.getenv('ACCOUNT_ROUTES_PATH', 'account_routes.json'),
+    'max_workers': 8,
+}
+
+# 2% of the live balance capped at 1000 units; 45 USD was the balance hard-coded before the cache
+DEFAULT_SIZING = {'mode': 'risk', 'balance': 'live', 'fallback_balance': 45.0, 'risk_percent': 2.0,
+                  'max_units': 1000}
+
+
+class AccountRouter:
+    """Routes alerts to accounts and fans orders out to them in parallel"""
+
+    def __init__(self, accounts: Dict[str, Dict], routes: Dict[str, List[str]],
+                 max_workers: Optional[int] = None):
+        """
+        Args:
+            accounts: name -> {'client': OandaClient-like, 'sizing': sizing rule}
+            routes: ticker/strategy/'default' -> account names
+        """
+        unknown = {name for names in routes.values() for name in names} - set(accounts)
+        if unknown:
+            raise ValueError(f"Routes reference unknown accounts: {sorted(unknown)}")
+        self.accounts = accounts
+        self.routes = {self._route_key(k): v for k, v in routes.items()}
+        self.states = {name: AccountState(spec['client']) for name, spec in accounts.items()
+                       if spec['sizing'].get('balance') == 'live'}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers or ACCOUNT_ROUTING_CONFIG['max_workers'],
+                                        thread_name_prefix='account-fanout')
+
+    @staticmethod
+    def _route_key(key: str) -> str:
+        return key if key == 'default' else key.replace('/', '_').upper()
+
+    @classmethod
+    def single(cls, client, sizing: Optional[Dict] = None) -> 'AccountRouter':
+        """One 'default' account, the behaviour without a routing file"""
+        return cls({'default': {'client': client, 'sizing': dict(sizing or DEFAULT_SIZING)}},
+                   {'default': ['default']})
+
+    @classmethod
+    def load(cls, default_client, path: Optional[str] = None) -> 'AccountRouter':
+        """Routing file if present, else the env-configured client alone"""
+        path = path or ACCOUNT_ROUTING_CONFIG['routes_path']
+        if not os.path.exists(path):
+            return cls.single(default_client)
+
+        from oanda_client import OandaClient
+        with open(path) as f:
+            config = json.load(f)
+        accounts = {}
+        for name, spec in config['accounts'].items():
+            api_key = os.getenv(spec.get('api_key_env', 'OANDA_API_KEY'))
+            account_id = os.getenv(spec.get('account_id_env', 'OANDA_ACCOUNT_ID'))
+            if account_id == default_client.account_id:
+                client = default_client  # Share the app's client for the env-configured account
+            else:
+                client = OandaClient(api_key=api_key, account_id=account_id)
+            accounts[name] = {'client': client, 'sizing': dict(DEFAULT_SIZING, **spec.get('sizing', {}))}
+        routes = config.get('routes') or {'default': list(accounts)}
+        logger.info(f"Account routing: {len(accounts)} accounts, {len(routes)} routes from {path}")
+        return cls(accounts, routes)
+
+    def accounts_for(self, ticker: str, strategy: Optional[str] = None) -> List[str]:
+        """Ticker route first, then strategy route, then 'default'"""
+        for key in (normalize_instrument(ticker) if ticker else None, strategy, 'default'):
+            if key and self._route_key(key) in self.routes:
+                return self.routes[self._route_key(key)]
+        return []
+
+    def start_account_sync(self):
+        """Keep the cached balance of every 'live' sized account current in the background"""
+        for state in self.states.values():
+            state.start()
+
+    def close(self):
+        """Stop the account sync threads and the fan-out pool"""
+        for state in self.states.values():
+            state.stop()
+        self._pool.shutdown(wait=True)
+
+    def balance(self, name: str) -> float:
+        """Sizing balance for an account: fixed, live from the cache, or the fallback"""
+        sizing = self.accounts[name]['sizing']
+        if sizing['balance'] != 'live':
+            return float(sizing['balance'])
+        state = self.states[name]
+        if state.ready():
+            return state.balance
+        fallback = sizing.get('fallback_balance', DEFAULT_SIZING['fallback_balance'])
+        logger.warning(f"No live balance for {name} yet; sizing from {fallback}")
+        return float(fallback)
+
+    def size_units(self, names: List[str], instrument: str, price: float, stop_loss: float) -> Dict[str, int]:
+        """Unsigned units per account; all 'risk' accounts are sized in one batch"""
+        units = {}
+        risk = [n for n in names if self.accounts[n]['sizing']['mode'] == 'risk']
+        for name in names:
+            sizing = self.accounts[name]['sizing']
+            if sizing['mode'] == 'fixed':
+                units[name] = int(sizing['units'])
+            elif sizing['mode'] != 'risk':
+                raise ValueError(f"Unknown sizing mode for {name}: {sizing['mode']}")
+        if risk:
+            if price == stop_loss:
+                units.update({name: 500 for name in risk})  # Conservative default, as before routing
+            else:
+                rules = [self.accounts[n]['sizing'] for n in risk]
+                sizes = get_instrument_metadata().position_sizes(
+                    [instrument] * len(risk), [price] * len(risk), [stop_loss] * len(risk),
+                    np.array([self.balance(n) * r['risk_percent'] / 100 for n, r in zip(risk, rules)]),
+                    max_units=np.array([r.get('max_units') or np.inf for r in rules]))
+                units.update({name: max(1, int(size)) for name, size in zip(risk, sizes)})
+        return units
+
+    def execute(self, trade: Dict, ticker: str, strategy: Optional[str] = None) -> List[Dict]:
+        """
+        Place `trade` (symbol, action, close_price, stop_loss, take_profit) on every routed account
+
+        Returns:
+            One dict per account: account, account_id, units, elapsed_ms and either result or error
+        """
+        names = self.accounts_for(ticker, strategy)
+        if not names:
+            return []
+        units = self.size_units(names, trade['symbol'], trade['close_price'], trade['stop_loss'])
+        sign = 1 if trade['action'] == 'buy' else -1
+        trace = latency_trace.current()
+
+        def place(name: str) -> Dict:
+            client = self.accounts[name]['client']
+            order = {k: trade[k] for k in ('symbol', 'close_price', 'stop_loss', 'take_profit')}
+            order['units'] = sign * units[name]
+            outcome = {'account': name, 'account_id': client.account_id, 'units': order['units']}
+            start = time.perf_counter()
+            try:
+                # Broker spans from the pool thread land in the webhook's trace, per account
+                with latency_trace.activate(trace, prefix=f"{name}." if len(names) > 1 else ''):
+                    outcome['result'] = client.place_trade(order)
+                if outcome['result'].get('status') != 'success':
+                    outcome['error'] = outcome['result'].get('error', 'Unknown error')
+            except Exception as e:
+                outcome['error'] = str(e)
+            outcome['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 1)
+            return outcome
+
+        return list(self._pool.map(place, names))
+
+    def flatten(self, names: Optional[List[str]] = None, instruments: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """
+        Flatten the named accounts (all by default) in parallel; name -> flatten_account result
+
+        Args:
+            instruments: Only these instruments on each account; the whole account by default
+        """
+        names = names or list(self.accounts)
+
+        def flatten_one(name: str) -> Dict:
+            try:
+                return self.accounts[name]['client'].flatten_account(instruments)
+            except Exception as e:
+                return {'status': 'error', 'error': str(e)}
+
+        return dict(zip(names, self._pool.map(flatten_one, names)))
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Account State Cache
+Local copy of an OANDA account's balance, NAV, margin and net positions. It is bootstrapped
+with one AccountDetails request and then kept current from AccountChanges (fills and other
+balance-moving transactions, plus the server's NAV/margin state) on a background thread, so
+readers such as webhook position sizing get the live balance without a round trip.
+"""
+
+import time
+import logging
+import threading
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+ACCOUNT_STATE_CONFIG = {
+    'refresh_interval': 5.0,   # Seconds between AccountChanges polls
+    'max_staleness': 60.0,     # Older snapshots report ready() == False
+}
+
+
+class AccountState:
+    """
+    Balance, NAV, margin and net units per instrument for one account
+
+    Reads are plain attribute lookups under a lock; writes come only from refresh()
+    positions: instrument -> net units (positive long, negative short)
+    """
+
+    def __init__(self, oanda, config: Optional[Dict] = None):
+        self.oanda = oanda
+        self.config = dict(ACCOUNT_STATE_CONFIG, **(config or {}))
+        self.currency = None
+        self.balance = None
+        self.nav = None
+        self.unrealized_pl = None
+        self.margin_used = None
+        self.margin_available = None
+        self.positions = {}
+        self.last_transaction_id = None
+        self.updated_at = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats = {'refreshes': 0, 'api_calls': 0, 'transactions': 0, 'errors': 0}
+
+    def ready(self) -> bool:
+        updated = self.updated_at
+        return updated is not None and time.time() - updated < self.config['max_staleness']
+
+    def position(self, instrument: str) -> float:
+        return self.positions.get(instrument, 0.0)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'account_id': self.oanda.account_id,
+                'currency': self.currency,
+                'balance': self.balance,
+                'nav': self.nav,
+                'unrealized_pl': self.unrealized_pl,
+                'margin_used': self.margin_used,
+                'margin_available': self.margin_available,
+                'positions': dict(self.positions),
+                'last_transaction_id': self.last_transaction_id,
+                'updated_at': self.updated_at,
+            }
+
+    # ------------------------------------------------------------------ updates
+
+    def refresh(self) -> 'AccountState':
+        """Bootstrap on the first call, then apply one AccountChanges response"""
+        with self._lock:
+            self.stats['refreshes'] += 1
+            if self.last_transaction_id is None:
+                self._bootstrap()
+            else:
+                response = self.oanda.get_account_changes(self.last_transaction_id)
+                self.stats['api_calls'] += 1
+                self.apply_transactions(response.get('changes', {}).get('transactions', []))
+                self._apply_state(response.get('state', {}))
+                self.last_transaction_id = response.get('lastTransactionID', self.last_transaction_id)
+            self.updated_at = time.time()
+        return self
+
+    def _bootstrap(self):
+        account = self.oanda.get_account_snapshot()
+        self.stats['api_calls'] += 1
+        self.currency = account.get('currency')
+        self.balance = float(account['balance'])
+        self._apply_state(account)
+        self.positions = {}
+        for position in account.get('positions', []):
+            units = float(position['long']['units']) + float(position['short']['units'])
+            if units:
+                self.positions[position['instrument']] = units
+        self.last_transaction_id = account.get('lastTransactionID')
+        logger.info(f"Account {self.oanda.account_id} state: balance {self.balance} {self.currency}, "
+                    f"{len(self.positions)} positions, transaction {self.last_transaction_id}")
+
+    def _apply_state(self, state: Dict):
+        """NAV and margin as calculated by OANDA (AccountChangesState or AccountDetails)"""
+        for attr, key in (('nav', 'NAV'), ('unrealized_pl', 'unrealizedPL'),
+                          ('margin_used', 'marginUsed'), ('margin_available', 'marginAvailable')):
+            if key in state:
+                setattr(self, attr, float(state[key]))
+
+    def apply_transactions(self, transactions):
+        """Balance from every transaction that reports one; net units from fills"""
+        for txn in sorted(transactions, key=lambda t: int(t['id'])):
+            self.stats['transactions'] += 1
+            if 'accountBalance' in txn:
+                self.balance = float(txn['accountBalance'])
+            if txn.get('type') == 'ORDER_FILL':
+                instrument = txn['instrument']
+                units = self.positions.get(instrument, 0.0) + float(txn['units'])
+                if units:
+                    self.positions[instrument] = units
+                else:
+                    self.positions.pop(instrument, None)
+
+    # ------------------------------------------------------------------ background sync
+
+    def start(self):
+        """Refresh every refresh_interval seconds in a daemon thread (the first refresh bootstraps)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name='account-state')
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.error(f"Account state refresh failed for {self.oanda.account_id}: {e}")
+            self._stop.wait(self.config['refresh_interval'])
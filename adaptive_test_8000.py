@@ -2,15 +2,16 @@ import logging
 import random
 import math
 from datetime import datetime, timedelta
-import time
+from sim_clock import simulation_clock
 
 class TradeSimulator:
-    def __init__(self):
+    def __init__(self, clock=None):
         self.performance_history = []
         self.total_trades = 0
         self.total_wins = 0
         self.learning_factor = 5.0  # Start with 5%
-        self.base_time = datetime.now()
+        self.clock = clock or simulation_clock()
+        self.base_time = self.clock.now()
         
     def generate_market_conditions(self, learning_factor_decimal):
         """Generate simulated market conditions influenced by learning factor."""
@@ -157,12 +158,13 @@ if __name__ == "__main__":
     simulator.simulate_trades(8000)
 
 class AdaptiveTradeSimulator:
-    def __init__(self):
+    def __init__(self, clock=None):
         logger.info("🔄 Initializing Trade Simulator...")
         self.analyzer = TradeAnalyzer()
         self.model_trainer = ModelTrainer()
         self.performance_history = []
-        self.base_time = datetime.now()
+        self.clock = clock or simulation_clock()
+        self.base_time = self.clock.now()
         self.total_wins = 0
         self.total_trades = 0
         self.learning_factor = 0.0
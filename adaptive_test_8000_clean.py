@@ -2,15 +2,16 @@ import logging
 import random
 import math
 from datetime import datetime, timedelta
-import time
+from sim_clock import simulation_clock
 
 class TradeSimulator:
-    def __init__(self):
+    def __init__(self, clock=None):
         self.performance_history = []
         self.total_trades = 0
         self.total_wins = 0
         self.learning_factor = 5.0  # Start with 5%
-        self.base_time = datetime.now()
+        self.clock = clock or simulation_clock()
+        self.base_time = self.clock.now()
         
     def generate_market_conditions(self, learning_factor_decimal):
         """Generate simulated market conditions influenced by learning factor."""
@@ -172,7 +173,7 @@ class TradeSimulator:
                 f"Learning: {learning_factor_decimal*100:.2f}%")
             
             # Add significant delay between trades for detailed analysis
-            time.sleep(10)  # 10 second delay between trades
+            self.clock.sleep(10)  # 10 second delay between trades
             
             # Update learning factor for next trade
             learning_factor_decimal = self.calculate_learning_factor()
@@ -2,27 +2,153 @@
 """
 Advanced Risk Management System
 Implements portfolio heat, correlation monitoring, and dynamic position sizing
+on top of an exponentially weighted covariance matrix of instrument returns
 """
 
 import numpy as np
 from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
 import random
 
+from candle_cache import GRANULARITY_SECONDS
+
+# Prior daily volatilities, used until candle returns arrive
+PRIOR_DAILY_VOLATILITY = {
+    'EUR/USD': 0.008, 'GBP/USD': 0.012, 'USD/JPY': 0.009,
+    'USD/CHF': 0.007, 'AUD/USD': 0.011, 'USD/CAD': 0.009,
+    'NZD/USD': 0.013, 'EUR/GBP': 0.010
+}
+DEFAULT_DAILY_VOLATILITY = 0.010
+
+EWMA_CONFIG = {
+    'decay': 0.97,          # Per-bar lambda (RiskMetrics uses 0.94 on daily bars)
+    'granularity': 'H1',    # Bar size of the returns fed to update(); variances are kept per day
+}
+
+
+def _pair_key(pair: str) -> str:
+    """'EUR_USD' and 'eur/usd' both map to 'EUR/USD'"""
+    return pair.replace('_', '/').upper()
+
+
+class EWMACovariance:
+    """
+    Exponentially weighted covariance of instrument log returns, in daily units
+    Each bar costs O(k^2) for k instruments: S = decay * S + (1 - decay) * r r^T
+    """
+
+    def __init__(self, instruments: Iterable[str] = (), decay: float = EWMA_CONFIG['decay'],
+                 granularity: str = EWMA_CONFIG['granularity'], prior_correlations: Optional[Dict] = None):
+        self.decay = decay
+        self.bars_per_day = 86400.0 / GRANULARITY_SECONDS[granularity]
+        self.index = {}
+        self.covariance = np.zeros((0, 0))
+        self.last_prices = {}
+        self.observations = 0
+        self.version = 0
+        for pair in instruments:
+            self.add_instrument(pair)
+
+        # Seed the off-diagonal terms from prior correlations
+        for (pair1, pair2), rho in (prior_correlations or {}).items():
+            i, j = self.add_instrument(pair1), self.add_instrument(pair2)
+            cov = rho * np.sqrt(self.covariance[i, i] * self.covariance[j, j])
+            self.covariance[i, j] = self.covariance[j, i] = cov
+
+    def add_instrument(self, pair: str) -> int:
+        """Index of pair in the matrix, growing it with the prior volatility if it is new"""
+        pair = _pair_key(pair)
+        if pair not in self.index:
+            k = len(self.index)
+            grown = np.zeros((k + 1, k + 1))
+            grown[:k, :k] = self.covariance
+            grown[k, k] = PRIOR_DAILY_VOLATILITY.get(pair, DEFAULT_DAILY_VOLATILITY) ** 2
+            self.covariance = grown
+            self.index[pair] = k
+            self.version += 1
+        return self.index[pair]
+
+    def update(self, returns: Dict[str, float]):
+        """Fold in one bar of log returns; instruments missing from the bar keep their estimates"""
+        idx = np.array([self.add_instrument(pair) for pair in returns], dtype=int)
+        if len(idx) == 0:
+            return
+        r = np.fromiter(returns.values(), dtype=np.float64, count=len(idx))
+        block = np.ix_(idx, idx)
+        self.covariance[block] = self.decay * self.covariance[block] + \
+            (1.0 - self.decay) * self.bars_per_day * np.outer(r, r)
+        self.observations += 1
+        self.version += 1
+
+    def update_prices(self, prices: Dict[str, float]):
+        """Fold in one bar of closing prices; the first price of each instrument only sets its anchor"""
+        returns = {}
+        for pair, price in prices.items():
+            pair = _pair_key(pair)
+            previous = self.last_prices.get(pair)
+            if previous and price > 0:
+                returns[pair] = float(np.log(price / previous))
+            self.last_prices[pair] = price
+        self.update(returns)
+
+    def fit(self, closes: Dict[str, np.ndarray]):
+        """
+        Warm up from aligned close series (one array per instrument, same bars)
+        Equivalent to calling update_prices bar by bar, as a single weighted matrix product
+        """
+        pairs = [_pair_key(p) for p in closes]
+        idx = np.array([self.add_instrument(p) for p in pairs], dtype=int)
+        prices = np.column_stack([np.asarray(c, dtype=np.float64) for c in closes.values()])
+        returns = np.diff(np.log(prices), axis=0)
+        n = len(returns)
+        if n == 0:
+            return
+        weights = (1.0 - self.decay) * self.decay ** np.arange(n - 1, -1, -1) * self.bars_per_day
+        block = np.ix_(idx, idx)
+        self.covariance[block] = self.decay ** n * self.covariance[block] + (returns * weights[:, None]).T @ returns
+        self.last_prices.update(zip(pairs, prices[-1]))
+        self.observations += n
+        self.version += 1
+
+    def volatility(self, pair: str) -> float:
+        """Daily volatility of pair (prior estimate for instruments never seen)"""
+        i = self.index.get(_pair_key(pair))
+        if i is None:
+            return PRIOR_DAILY_VOLATILITY.get(_pair_key(pair), DEFAULT_DAILY_VOLATILITY)
+        return float(np.sqrt(self.covariance[i, i]))
+
+    def correlation(self, pair1: str, pair2: str) -> float:
+        i, j = self.index.get(_pair_key(pair1)), self.index.get(_pair_key(pair2))
+        if i is None or j is None:
+            return 0.0
+        denom = np.sqrt(self.covariance[i, i] * self.covariance[j, j])
+        return float(self.covariance[i, j] / denom) if denom > 0 else 0.0
+
+    def correlation_matrix(self) -> np.ndarray:
+        std = np.sqrt(np.diag(self.covariance))
+        std[std == 0] = 1.0
+        return np.clip(self.covariance / np.outer(std, std), -1.0, 1.0)
+
+
 class AdvancedRiskManager:
     """
     Sophisticated risk management with portfolio heat monitoring,
     correlation analysis, and dynamic position sizing
     """
-    
-    def __init__(self):
+
+    def __init__(self, decay: float = EWMA_CONFIG['decay'], granularity: str = EWMA_CONFIG['granularity']):
         self.max_portfolio_heat = 0.06  # 6% max total risk
         self.max_correlation_exposure = 0.03  # 3% max correlated risk
-        self.correlation_matrix = self.build_correlation_matrix()
+        self.high_correlation = 0.7
+        self.covariance = EWMACovariance(list(PRIOR_DAILY_VOLATILITY), decay, granularity,
+                                         prior_correlations=self.build_correlation_matrix())
         self.active_positions = {}
         self.portfolio_var = 0.0
-        
+        self._exposure_version = None
+        self.stats = {'exposure_refreshes': 0}
+
     def build_correlation_matrix(self):
-        """Build realistic currency correlation matrix"""
+        """Prior currency correlations, used until candle returns arrive"""
         return {
             ('EUR/USD', 'GBP/USD'): 0.75,
             ('EUR/USD', 'AUD/USD'): 0.65,
@@ -32,142 +158,155 @@ class AdvancedRiskManager:
             ('GBP/USD', 'EUR/GBP'): -0.80,
             ('USD/JPY', 'USD/CHF'): 0.60,
             ('AUD/USD', 'NZD/USD'): 0.85,
-            # Add more correlations as needed
         }
-    
+
+    def update_market_data(self, prices: Dict[str, float]):
+        """Feed one bar of closing prices (e.g. {'EUR_USD': 1.0842, ...}) into the covariance"""
+        self.covariance.update_prices(prices)
+
+    def warm_up(self, closes: Dict[str, np.ndarray]):
+        """Initialise the covariance from aligned close series, e.g. CandleCache mid_c columns"""
+        self.covariance.fit(closes)
+
+    def _refresh_exposure(self):
+        """
+        Cache the heat weights W r and the correlated risk for the open-position risk vector r
+        Rebuilt only when the covariance or the positions change, so each sizing decision is O(1)
+        """
+        if self._exposure_version == self.covariance.version:
+            return
+        abs_corr = np.abs(self.covariance.correlation_matrix())
+        risk = np.zeros(len(abs_corr))
+        for pair, position in self.active_positions.items():
+            risk[self.covariance.add_instrument(pair)] += position['risk']
+
+        high_corr = np.where(abs_corr > self.high_correlation, abs_corr, 0.0)
+        np.fill_diagonal(high_corr, 0.0)
+        # Significantly correlated positions count at |correlation|, the rest at half their risk
+        heat_weights = np.where(abs_corr > 0.5, abs_corr, 0.5)
+        self._heat_vector = heat_weights @ risk
+        self._correlated_risk = high_corr @ risk
+        self._exposure_version = self.covariance.version
+        self.stats['exposure_refreshes'] += 1
+
+    def _invalidate_exposure(self):
+        self._exposure_version = None
+
     def get_correlation(self, pair1, pair2):
         """Get correlation between two pairs"""
-        key = (pair1, pair2) if pair1 < pair2 else (pair2, pair1)
-        return self.correlation_matrix.get(key, 0.0)
-    
+        return self.covariance.correlation(pair1, pair2)
+
     def calculate_portfolio_heat(self, new_pair, new_size, new_risk):
-        """Calculate total portfolio heat including correlations"""
-        total_heat = new_risk
-        
-        # Add existing position risks
-        for pair, position in self.active_positions.items():
-            correlation = self.get_correlation(new_pair, pair)
-            
-            if abs(correlation) > 0.5:  # Significant correlation
-                # Add correlated risk
-                correlated_risk = position['risk'] * abs(correlation)
-                total_heat += correlated_risk
-            else:
-                # Add uncorrelated risk (diversification benefit)
-                total_heat += position['risk'] * 0.5
-        
-        return total_heat
-    
+        """
+        Total portfolio heat including correlations: new_risk + sum_j w_ij * risk_j, where
+        w_ij is |correlation| from the EWMA matrix above 0.5 and 0.5 otherwise (hedges are not netted)
+        """
+        i = self.covariance.add_instrument(new_pair)
+        self._refresh_exposure()
+        return float(new_risk + self._heat_vector[i])
+
     def calculate_var_95(self, pair, size, confidence_score):
         """Calculate Value at Risk (95% confidence)"""
-        # Estimate daily volatility by pair
-        daily_volatility = {
-            'EUR/USD': 0.008, 'GBP/USD': 0.012, 'USD/JPY': 0.009,
-            'USD/CHF': 0.007, 'AUD/USD': 0.011, 'USD/CAD': 0.009,
-            'NZD/USD': 0.013, 'EUR/GBP': 0.010
-        }
-        
-        vol = daily_volatility.get(pair, 0.010)
-        
-        # Adjust volatility based on market conditions
+        vol = self.covariance.volatility(pair)
+        return 1.645 * vol * self._confidence_vol_factor(confidence_score) * size
+
+    def _confidence_vol_factor(self, confidence_score):
         if confidence_score < 0.5:
-            vol *= 1.3  # Higher uncertainty = higher VaR
-        elif confidence_score > 0.8:
-            vol *= 0.8  # High confidence = lower VaR
-        
-        # 95% VaR calculation (1.645 * volatility * position size)
-        var_95 = 1.645 * vol * size
-        return var_95
-    
+            return 1.3  # Higher uncertainty = higher VaR
+        if confidence_score > 0.8:
+            return 0.8  # High confidence = lower VaR
+        return 1.0
+
     def optimize_position_size(self, pair, intended_size, confidence_score, market_condition):
         """Optimize position size based on risk constraints"""
         base_risk = intended_size * 0.02  # 2% risk assumption
-        
+
         # Calculate portfolio heat
         total_heat = self.calculate_portfolio_heat(pair, intended_size, base_risk)
-        
+
         # Check portfolio heat limit
         if total_heat > self.max_portfolio_heat:
             reduction_factor = self.max_portfolio_heat / total_heat
             intended_size *= reduction_factor
             base_risk *= reduction_factor
-        
-        # Check correlation limits
-        correlated_risk = 0
-        for existing_pair, position in self.active_positions.items():
-            correlation = abs(self.get_correlation(pair, existing_pair))
-            if correlation > 0.7:  # High correlation
-                correlated_risk += position['risk'] * correlation
-        
+
+        # Check correlation limits (risk of open positions correlated above high_correlation)
+        correlated_risk = self._correlated_risk[self.covariance.index[_pair_key(pair)]]
+
         if correlated_risk > self.max_correlation_exposure:
             correlation_reduction = self.max_correlation_exposure / (correlated_risk + base_risk)
             intended_size *= correlation_reduction
             base_risk *= correlation_reduction
-        
+
         # VaR-based sizing
         var_95 = self.calculate_var_95(pair, intended_size, confidence_score)
         if var_95 > intended_size * 0.03:  # VaR > 3% of position
             var_reduction = (intended_size * 0.03) / var_95
             intended_size *= var_reduction
-        
+
         # Confidence-based adjustment
         if confidence_score > 0.85:
             intended_size *= 1.2  # Increase size for high confidence
         elif confidence_score < 0.4:
             intended_size *= 0.6  # Reduce size for low confidence
-        
+
         return intended_size
-    
+
     def should_take_position(self, pair, size, confidence_score, market_condition):
         """Final risk check before taking position"""
         # Check maximum positions limit
         if len(self.active_positions) >= 5:
             return False, "Maximum positions reached"
-        
+
         # Check if pair already has position
         if pair in self.active_positions:
             return False, f"Already have position in {pair}"
-        
+
         # Check market condition risks
         if market_condition == 'volatile' and confidence_score < 0.7:
             return False, "High volatility requires higher confidence"
-        
+
         # Check portfolio heat
         risk = size * 0.02
         total_heat = self.calculate_portfolio_heat(pair, size, risk)
         if total_heat > self.max_portfolio_heat:
             return False, f"Portfolio heat too high: {total_heat:.3f}"
-        
+
         return True, "Position approved"
-    
-    def add_position(self, pair, size, entry_price, confidence_score):
-        """Add position to portfolio tracking"""
+
+    def add_position(self, pair, size, entry_price, confidence_score, direction=1):
+        """Add position to portfolio tracking (direction: 1 long, -1 short)"""
         risk = size * 0.02
         self.active_positions[pair] = {
             'size': size,
+            'direction': direction,
             'entry_price': entry_price,
             'risk': risk,
             'confidence': confidence_score,
             'entry_time': datetime.now()
         }
-        
+
         # Update portfolio VaR
+        self._invalidate_exposure()
         self.portfolio_var = self.calculate_portfolio_var()
-    
+
     def remove_position(self, pair):
         """Remove position from portfolio tracking"""
         if pair in self.active_positions:
             del self.active_positions[pair]
+            self._invalidate_exposure()
             self.portfolio_var = self.calculate_portfolio_var()
-    
+
     def calculate_portfolio_var(self):
-        """Calculate total portfolio VaR"""
+        """Portfolio VaR (95%) as the quadratic form 1.645 * sqrt(w^T S w) over signed position sizes"""
         if not self.active_positions:
             return 0.0
-        
-        total_var = 0
-        for pair, position in self.active_positions.items():
-            var_95 = self.calculate_var_95(pair, position['size'], position['confidence'])
-            total_var += var_95 ** 2  # Square for portfolio calculation
-        
-        return np.sqrt(total_var)  # Portfolio VaR with correlation effects
+
+        idx = [self.covariance.add_instrument(pair) for pair in self.active_positions]
+        weights = np.zeros(len(self.covariance.index))
+        for i, position in zip(idx, self.active_positions.values()):
+            weights[i] += position['size'] * position.get('direction', 1) * \
+                self._confidence_vol_factor(position['confidence'])
+
+        variance = float(weights @ self.covariance.covariance @ weights)
+        return 1.645 * np.sqrt(max(variance, 0.0))
@@ -1,47 +1,147 @@
 import logging
-import json
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
 from oanda_client import OandaClient
 from datetime import datetime
 import traceback
 from dotenv import load_dotenv
 from memory_logger import SevenSYSMemoryLogger
+from account_router import AccountRouter
+from instrument_metadata import get_instrument_metadata, normalize_instrument
+import latency_trace
+from latency_trace import span
+import metrics
+from structured_logging import configure_logging
 import uuid
+import os
+import time
+import threading
 
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
+# Configure logging once for the process: JSON lines written by a background listener
+configure_logging()
 
 # Initialize Flask app
 app = Flask(__name__)
 
-# Initialize OANDA client
-oanda = OandaClient()
+# Per-worker state (connections, background threads, session id), built by init_worker()
+oanda = None
+account_router = None
+memory_logger = None
+session_id = None
 
-# Initialize SevenSYS Memory Logger
-memory_logger = SevenSYSMemoryLogger()
+# Readiness: the process reports ready once the OANDA connection and the memory logger
+# database have both answered. Everything else (numpy sizing tables, pandas/sklearn code)
+# is imported on first use, see test_import_time.py for the budget.
+WARM_UP_CONFIG = {
+    'retry_interval': 2.0,   # Seconds between OANDA attempts, doubled up to max_retry_interval
+    'max_retry_interval': 60.0,
+}
+readiness = {"oanda": False, "memory_logger": False, "ready_ms": None, "errors": {}}
+_warm_up = {"pid": None, "thread": None, "started": time.monotonic()}
 
-# Generate session ID for this app instance
-session_id = str(uuid.uuid4())[:8]
-logging.info(f"Starting new SevenSYS session: {session_id}")
+def warm_up():
+    """Open the logger database and the OANDA keep-alive connection, retrying until both answer"""
+    checks = {
+        "memory_logger": lambda: memory_logger.get_system_status().get("database_status") == "HEALTHY",
+        "oanda": lambda: bool(oanda.get_account_summary()),
+    }
+    delay = WARM_UP_CONFIG['retry_interval']
+    while not all(readiness[name] for name in checks):
+        for name, check in checks.items():
+            if readiness[name]:
+                continue
+            try:
+                readiness[name] = check()
+                readiness["errors"].pop(name, None)
+            except Exception as e:
+                readiness["errors"][name] = str(e)
+        if not all(readiness[name] for name in checks):
+            time.sleep(delay)
+            delay = min(delay * 2, WARM_UP_CONFIG['max_retry_interval'])
+    readiness["ready_ms"] = round((time.monotonic() - _warm_up["started"]) * 1000, 1)
+    logging.info("Ready to accept alerts after %.0f ms", readiness["ready_ms"])
+
+def start_warm_up():
+    """Run warm_up in the background, once per process (a forked worker starts its own)"""
+    if _warm_up["pid"] == os.getpid():
+        return
+    _warm_up["pid"] = os.getpid()
+    _warm_up["thread"] = threading.Thread(target=warm_up, daemon=True, name="warm-up")
+    _warm_up["thread"].start()
+
+def init_worker():
+    """
+    Build this process's mutable state: OANDA connection, account sync, memory logger,
+    metrics flusher and session id. Runs at import for a single process, and from the
+    gunicorn post_fork hook when the app is preloaded in the master (gunicorn.conf.py)
+    """
+    global oanda, account_router, memory_logger, session_id
+    configure_logging()  # The master's listener thread does not survive the fork
+    _warm_up["started"] = time.monotonic()
+    readiness.update(oanda=False, memory_logger=False, ready_ms=None, errors={})
+
+    # Initialize OANDA client
+    oanda = OandaClient()
+
+    # Route each alert to one or more accounts (account_routes.json, else the env account alone)
+    account_router = AccountRouter.load(oanda)
+    account_router.start_account_sync()  # Live balances for sizing, refreshed off the request path
+
+    # Initialize SevenSYS Memory Logger
+    memory_logger = SevenSYSMemoryLogger()
 
-def calculate_position_size(price, stop_loss, account_balance=25000, risk_percent=4.0):
+    # Share metrics across gunicorn workers when METRICS_MULTIPROC_DIR is set
+    metrics.registry.start_flusher()
+
+    # Generate session ID for this worker
+    session_id = str(uuid.uuid4())[:8]
+    logging.info(f"Starting new SevenSYS session: {session_id} (pid {os.getpid()})")
+
+    start_warm_up()
+
+def preload_shared():
+    """
+    Load read-only artifacts in the gunicorn master before it forks, so every worker shares
+    the same pages instead of building its own copy on the first alert
+    """
+    metadata = get_instrument_metadata()  # Imports numpy and builds the sizing arrays
+    return {"instruments": len(metadata.names)}
+
+# With PRELOAD_APP=1 (set by gunicorn.conf.py when preload_app is on) the master only
+# imports this module; each worker calls init_worker() after the fork
+if os.getenv("PRELOAD_APP") != "1":
+    init_worker()
+
+def calculate_position_size(price, stop_loss, account_balance=25000, risk_percent=4.0, instrument="EUR_USD"):
     try:
         risk_amount = account_balance * (risk_percent / 100)
         price_difference = abs(float(price) - float(stop_loss))
         if price_difference == 0:
             return 500  # Conservative default for small account
-        position_size = round(risk_amount / price_difference)
-        return max(1, min(position_size, 1000))  # Cap at 1000 for small account
+        # Stop distance is converted from the quote currency (e.g. JPY) into account currency
+        position_size = get_instrument_metadata().position_sizes(
+            [instrument], [float(price)], [float(stop_loss)], risk_amount, max_units=1000)[0]
+        return max(1, int(position_size))  # Cap at 1000 for small account
     except Exception as e:
         logging.error(f"Error calculating position size: {e}")
         return 500
 
+@app.before_request
+def start_webhook_trace():
+    if request.path == "/webhook":
+        latency_trace.start_trace()
+
+@app.after_request
+def finish_webhook_trace(response):
+    trace = latency_trace.finish_trace("webhook.total") if request.path == "/webhook" else None
+    if trace:
+        response.headers["X-Trace-Id"] = trace.trace_id
+        metrics.WEBHOOK_LATENCY.observe((trace.finished - trace.started) / 1e9)
+        metrics.WEBHOOK_REQUESTS.labels(response.status_code).inc()
+    return response
+
 @app.route("/")
 def home():
     return jsonify({
@@ -51,38 +151,54 @@ def home():
         "account": oanda.account_id
     })
 
+@app.route("/health", methods=["GET"])
+def health():
+    """Liveness: the process is up and serving requests"""
+    return jsonify({"status": "online", "session_id": session_id})
+
+@app.route("/ready", methods=["GET"])
+def ready():
+    """Readiness: 200 once OANDA and the memory logger are warm, 503 until then"""
+    is_ready = readiness["oanda"] and readiness["memory_logger"]
+    return jsonify({"ready": is_ready, **readiness}), 200 if is_ready else 503
+
 @app.route("/webhook", methods=["POST"])
 def webhook():
     webhook_id = None
     try:
-        data = request.get_json()
+        with span("webhook.parse"):
+            data = request.get_json()
         if not data:
             return jsonify({"error": "No JSON data received"}), 400
             
-        logging.info(f"Received webhook data: {json.dumps(data, indent=2)}")
+        logging.debug("Received webhook data: %s", data)
 
         # Handle both JARVIS Live format and TradingView SevenSYS format
-        if 'pair' in data and 'action' in data and 'entry' in data:
-            # JARVIS Live Pine Script format
-            symbol = data.get("pair", "").upper()
-            action = data.get("action", "").lower()  
-            price = data.get("entry", 0)
-            stop_loss = data.get("stop_loss", 0)
-            take_profit = data.get("take_profit", 0)
-            logging.info(f"JARVIS Live format detected: {symbol} {action}")
-        else:
-            # TradingView SevenSYS format (fallback) - LOG THIS WEBHOOK
-            symbol = data.get("ticker") or data.get("symbol", "")
-            action = data.get("strategy.order.action") or data.get("action", "")
-            price = data.get("close") or data.get("price", 0)
-            stop_loss = data.get("stop_loss", 0)
-            take_profit = data.get("take_profit", 0)
-            logging.info(f"TradingView SevenSYS format detected: {symbol} {action}")
+        with span("webhook.detect_format"):
+            jarvis_format = 'pair' in data and 'action' in data and 'entry' in data
+            if jarvis_format:
+                # JARVIS Live Pine Script format
+                symbol = data.get("pair", "").upper()
+                action = data.get("action", "").lower()  
+                price = data.get("entry", 0)
+                stop_loss = data.get("stop_loss", 0)
+                take_profit = data.get("take_profit", 0)
+                logging.info(f"JARVIS Live format detected: {symbol} {action}")
+            else:
+                # TradingView SevenSYS format (fallback) - LOG THIS WEBHOOK
+                symbol = data.get("ticker") or data.get("symbol", "")
+                action = data.get("strategy.order.action") or data.get("action", "")
+                price = data.get("close") or data.get("price", 0)
+                stop_loss = data.get("stop_loss", 0)
+                take_profit = data.get("take_profit", 0)
+                logging.info(f"TradingView SevenSYS format detected: {symbol} {action}")
             
-            # Log SevenSYS webhook alert to memory
-            if symbol and action and price:
+        # Log SevenSYS webhook alert to memory
+        if not jarvis_format and symbol and action and price:
+            with span("webhook.log_alert"):
                 webhook_id = memory_logger.log_webhook_alert(data, session_id)
-                logging.info(f"SevenSYS webhook logged with ID: {webhook_id}")
+            latency_trace.current().webhook_id = webhook_id
+            logging.info(f"SevenSYS webhook logged with ID: {webhook_id}")
         
         # Validate required fields based on action type
         if action == "close_all":
@@ -105,14 +221,21 @@ def webhook():
             logging.info(f"Processing close_all request for {symbol}")
             
             try:
-                # TODO: Implement close_all functionality
-                logging.info("Close all positions request processed")
+                # SevenSYS sends close_all per chart: flatten this instrument on every routed account
+                strategy = data.get("strategy") or data.get("strategy_name")
+                results = account_router.flatten(account_router.accounts_for(symbol, strategy),
+                                                 instruments=[normalize_instrument(symbol)])
+                flat = all(r.get('status') == 'flat' for r in results.values())
+                logging.info(f"Close all positions: " +
+                             ", ".join(f"{name} {r.get('status')}" for name, r in results.items()))
                 
                 return jsonify({
-                    "status": "success", 
-                    "message": "Close all positions request processed",
-                    "action": "close_all"
-                }), 200
+                    "status": "success" if flat else "error", 
+                    "message": f"{normalize_instrument(symbol)} closed" if flat else
+                               f"{normalize_instrument(symbol)} not flat after close_all",
+                    "action": "close_all",
+                    "accounts": results
+                }), 200 if flat else 500
                 
             except Exception as e:
                 logging.error(f"Error processing close_all: {str(e)}")
@@ -141,20 +264,14 @@ def webhook():
         stop_loss_float = float(stop_loss) 
         take_profit_float = float(take_profit)
         
-        logging.info(f"SevenSYS Signal Analysis:")
-        logging.info(f"  Action: {action}")
-        logging.info(f"  Entry (close): {price_float}")
-        logging.info(f"  Stop Loss: {stop_loss_float}")
-        logging.info(f"  Take Profit: {take_profit_float}")
-        
         # Calculate distances for validation
         sl_distance = abs(stop_loss_float - price_float)
         tp_distance = abs(take_profit_float - price_float)
         tp_sl_ratio = tp_distance / sl_distance if sl_distance > 0 else 0
         
-        logging.info(f"  SL Distance: {sl_distance:.5f} ({sl_distance * 10000:.1f} pips)")
-        logging.info(f"  TP Distance: {tp_distance:.5f} ({tp_distance * 10000:.1f} pips)")
-        logging.info(f"  Risk/Reward: 1:{tp_sl_ratio:.2f}")
+        logging.info("SevenSYS signal: %s entry=%s sl=%s (%.1f pips) tp=%s (%.1f pips) rr=1:%.2f",
+                     action, price_float, stop_loss_float, sl_distance * 10000,
+                     take_profit_float, tp_distance * 10000, tp_sl_ratio)
         
         # Warning for extremely large TP/SL distances (but don't reject)
         if sl_distance * 10000 > 200:  # More than 200 pips
@@ -162,64 +279,70 @@ def webhook():
         if tp_distance * 10000 > 800:  # More than 800 pips  
             logging.warning(f"Large take profit: {tp_distance * 10000:.1f} pips - check SevenSYS settings")
 
-        # Calculate position size (conservative for small account)
-        position_size = calculate_position_size(price, stop_loss, account_balance=45.0, risk_percent=2.0)
-        units = position_size if action.lower() == "buy" else -position_size
-        
         # Convert symbol to OANDA format (EURUSD -> EUR_USD)
-        oanda_symbol = symbol
-        if len(symbol) == 6 and '_' not in symbol:
-            # Convert EURUSD to EUR_USD
-            oanda_symbol = symbol[:3] + '_' + symbol[3:]
+        oanda_symbol = normalize_instrument(symbol)
         
+        instruments = get_instrument_metadata()
         trade_data = {
             "symbol": oanda_symbol,
-            "units": units,
+            "action": action.lower(),
             "close_price": price_float,  # Original SevenSYS close price
-            "stop_loss": round(stop_loss_float, 5),  # Round to 5 decimal places for OANDA
-            "take_profit": round(take_profit_float, 5)  # Round to 5 decimal places for OANDA
+            "stop_loss": instruments.round_price(oanda_symbol, stop_loss_float),  # Instrument display precision
+            "take_profit": instruments.round_price(oanda_symbol, take_profit_float)
         }
 
-        logging.info(f"Placing trade: {action} {abs(units)} units of {symbol} -> {oanda_symbol}")
+        # Each routed account is sized by its own rule and all orders go out at once
+        strategy = data.get("strategy") or data.get("strategy_name")
+        with span("webhook.execute"):
+            fills = account_router.execute(trade_data, symbol, strategy)
+        if not fills:
+            return jsonify({"status": "error", "message": f"No accounts routed for {symbol}"}), 400
+        logging.info(f"Placed {action} {oanda_symbol} on {len(fills)} account(s): " +
+                     ", ".join(f"{f['account']} {f['units']} units in {f['elapsed_ms']:.0f}ms" for f in fills))
         
-        trade_result = oanda.place_trade(trade_data)
+        # Log each account's fill or failure to memory (SevenSYS only), with the stages so far
+        if webhook_id:
+            stage_timings = latency_trace.current().breakdown()
+            with span("webhook.log_execution"):
+                for fill in fills:
+                    if 'error' in fill:
+                        memory_logger.log_execution_failure(webhook_id, {
+                            'ticker': symbol,
+                            'action': action,
+                            'entry_price': price_float,
+                            'error': fill['error'],
+                            'account_id': fill['account_id'],
+                            'stage_timings': stage_timings
+                        }, session_id)
+                    else:
+                        trade_id = memory_logger.log_trade_execution(webhook_id, {
+                            'ticker': symbol,
+                            'action': action,
+                            'entry_price': price_float,
+                            'position_size': abs(fill['units']),
+                            'stop_loss': stop_loss_float,
+                            'take_profit': take_profit_float,
+                            'status': 'EXECUTED',
+                            'order_id': fill['result'].get('order_id'),
+                            'account_id': fill['account_id'],
+                            'stage_timings': stage_timings
+                        }, session_id)
+                        logging.info(f"SevenSYS trade execution logged with ID: {trade_id} ({fill['account']})")
         
-        if isinstance(trade_result, dict) and "error" not in trade_result and trade_result.get('status') == 'success':
-            logging.info("Trade placed successfully")
-            
-            # Log successful trade execution to memory (SevenSYS only)
-            if webhook_id:
-                trade_id = memory_logger.log_trade_execution(webhook_id, {
-                    'ticker': symbol,
-                    'action': action,
-                    'entry_price': price_float,
-                    'position_size': abs(units),
-                    'stop_loss': stop_loss_float,
-                    'take_profit': take_profit_float,
-                    'status': 'EXECUTED',
-                    'order_id': trade_result.get('order_id')  # Fixed: use correct field name
-                }, session_id)
-                logging.info(f"SevenSYS trade execution logged with ID: {trade_id}")
-            
+        failed = [f for f in fills if 'error' in f]
+        if len(failed) < len(fills):
+            placed = next(f for f in fills if 'error' not in f)
             return jsonify({
-                "status": "success", 
-                "message": "Trade placed successfully",
-                "trade_data": trade_result
+                "status": "success" if not failed else "partial",
+                "message": "Trade placed successfully" if not failed else
+                           f"Trade placed on {len(fills) - len(failed)} of {len(fills)} accounts",
+                "trade_data": placed['result'],
+                "accounts": fills
             }), 200
         else:
-            error_msg = trade_result.get("error", "Unknown error") if isinstance(trade_result, dict) else "Invalid response"
-            logging.error(f"Trade failed: {error_msg}")
-            
-            # Log execution failure to memory (SevenSYS only)
-            if webhook_id:
-                memory_logger.log_execution_failure(webhook_id, {
-                    'ticker': symbol,
-                    'action': action,
-                    'entry_price': price_float,
-                    'error': error_msg
-                }, session_id)
-            
-            return jsonify({"status": "error", "message": error_msg}), 500
+            error_msg = failed[0]['error']
+            logging.error(f"Trade failed on every account: {error_msg}")
+            return jsonify({"status": "error", "message": error_msg, "accounts": fills}), 500
             
     except Exception as e:
         logging.error(f"Error processing webhook: {str(e)}")
@@ -236,6 +359,28 @@ def webhook():
         
         return jsonify({"status": "error", "message": str(e)}), 500
 
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """Prometheus text exposition, merged across gunicorn workers"""
+    return Response(metrics.registry.render(), mimetype="text/plain; version=0.0.4")
+
+@app.route("/debug/trace", methods=["GET"])
+def debug_stage_summary():
+    """Per-stage latency histograms for this process"""
+    return jsonify(latency_trace.stage_summary())
+
+@app.route("/debug/trace/<webhook_id>", methods=["GET"])
+def debug_trace(webhook_id):
+    """Stage breakdown for one alert (webhook id or X-Trace-Id), from memory or the execution rows"""
+    trace = latency_trace.get_trace(webhook_id)
+    if trace:
+        return jsonify(trace)
+    if webhook_id.isdigit():
+        executions = memory_logger.get_stage_timings(int(webhook_id))
+        if executions:
+            return jsonify({"webhook_id": int(webhook_id), "executions": executions})
+    return jsonify({"error": f"No trace for {webhook_id}"}), 404
+
 if __name__ == "__main__":
     print("\nOANDA Configuration:")
     print(f"  - Account: {oanda.account_id}")
@@ -245,7 +390,11 @@ if __name__ == "__main__":
     print("\nStarting Jarvis Trading Bot...")
     print("Routes configured:")
     print("  - GET  /")
+    print("  - GET  /health")
+    print("  - GET  /ready")
     print("  - POST /webhook")
+    print("  - GET  /metrics")
+    print("  - GET  /debug/trace/<webhook_id>")
     
     print("\nConfiguration:")
     print("  - Host: 0.0.0.0")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Async OANDA Client
+Coroutine versions of the OandaClient calls for the async components (PositionManager,
+TradingFailsafe, ...). Requests run on a bounded worker pool sharing one keep-alive
+connection pool, so independent calls issued together with asyncio.gather overlap
+instead of queueing behind each other.
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import oandapyV20.endpoints.pricing as pricing
+from requests.adapters import HTTPAdapter
+
+from oanda_client import OandaClient
+
+logger = logging.getLogger(__name__)
+
+ASYNC_CLIENT_CONFIG = {
+    'max_connections': 16,  # Concurrent requests (and pooled keep-alive connections) per client
+}
+
+
+class AsyncOandaClient:
+    """OandaClient's surface as coroutines, plus batch helpers that fan out concurrently"""
+
+    def __init__(self, client: Optional[OandaClient] = None, max_connections: Optional[int] = None):
+        """
+        Args:
+            client: Configured OandaClient to wrap (built from env vars if omitted)
+            max_connections: Concurrency limit, default ASYNC_CLIENT_CONFIG['max_connections']
+        """
+        self.sync = client or OandaClient()
+        self.account_id = self.sync.account_id
+        self.environment = self.sync.environment
+        self.max_connections = max_connections or ASYNC_CLIENT_CONFIG['max_connections']
+
+        # requests keeps 10 connections per host by default; match the pool to the concurrency
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=self.max_connections)
+        self.sync.client.client.mount('https://', adapter)
+        self.sync.client.client.mount('http://', adapter)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_connections, thread_name_prefix='oanda-async')
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: func(*args, **kwargs))
+
+    async def request(self, endpoint) -> Dict:
+        """Send any oandapyV20 endpoint request"""
+        return await self._run(self.sync.client.request, endpoint)
+
+    # ------------------------------------------------------------------ OandaClient surface
+
+    async def place_trade(self, trade_data: Dict) -> Dict:
+        return await self._run(self.sync.place_trade, trade_data)
+
+    async def close_trade(self, trade_id: str) -> Dict:
+        return await self._run(self.sync.close_trade, trade_id)
+
+    async def modify_trade(self, trade_id: str, stop_loss: Optional[float] = None,
+                           take_profit: Optional[float] = None) -> Dict:
+        return await self._run(self.sync.modify_trade, trade_id, stop_loss, take_profit)
+
+    async def get_current_price(self, pair: str) -> Dict:
+        return await self._run(self.sync.get_current_price, pair)
+
+    async def get_account_details(self) -> Dict:
+        return await self._run(self.sync.get_account_details)
+
+    async def get_open_trades(self) -> Dict:
+        return await self._run(self.sync.get_open_trades)
+
+    async def get_account_changes(self, since_transaction_id: str) -> Dict:
+        return await self._run(self.sync.get_account_changes, since_transaction_id)
+
+    # ------------------------------------------------------------------ batch helpers
+
+    async def get_prices(self, pairs: List[str]) -> Dict[str, Dict]:
+        """Bid/ask for every pair from a single PricingInfo request"""
+        instruments = [p.replace('/', '_').upper() for p in pairs]
+        response = await self.request(pricing.PricingInfo(accountID=self.account_id,
+                                                          params={'instruments': ','.join(instruments)}))
+        return {
+            price['instrument']: {
+                'bid': float(price['bids'][0]['price']),
+                'ask': float(price['asks'][0]['price']),
+                'timestamp': price['time'],
+            }
+            for price in response.get('prices', [])
+        }
+
+    async def close_trades(self, trade_ids: List[str]) -> Dict[str, Dict]:
+        """Close trades concurrently; failures come back as {'status': 'error', 'error': ...}"""
+        results = await asyncio.gather(*(self.close_trade(t) for t in trade_ids), return_exceptions=True)
+        return {
+            trade_id: {'status': 'error', 'error': str(result)} if isinstance(result, Exception) else result
+            for trade_id, result in zip(trade_ids, results)
+        }
+
+    async def close_all_trades(self) -> Dict[str, Dict]:
+        """Flatten the account: one OpenTrades request, then every close in parallel"""
+        open_trades = (await self.get_open_trades()).get('trades', [])
+        return await self.close_trades([t['id'] for t in open_trades])
+
+    def close(self):
+        self._executor.shutdown(wait=False)
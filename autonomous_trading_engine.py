@@ -11,6 +11,7 @@ from typing import Dict, List, Optional
 import pandas as pd
 import numpy as np
 from threading import Thread
+from concurrent.futures import ThreadPoolExecutor, wait
 import json
 import os
 
@@ -18,6 +19,8 @@ from enhanced_trading_strategy import trading_strategy
 from oanda_client import OandaClient
 from trade_analyzer import TradeAnalyzer
 from market_data import MarketData
+from trade_reconciler import TradeReconciler
+from trading_scheduler import TradingScheduler
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -41,12 +44,20 @@ class AutonomousTradingEngine:
             'max_daily_trades': 20,
             'max_daily_loss': 500.0,  # USD
             'max_account_risk': 0.10,  # 10% of account
-            'scan_interval': 60,  # seconds
+            'scan_granularity': 'M1',  # Scan when a candle of this granularity closes
             'active_pairs': ['EUR_USD', 'GBP_USD', 'USD_JPY', 'AUD_USD', 'USD_CAD'],
             'trade_hours': {'start': 1, 'end': 23},  # UTC hours
-            'emergency_stop': False
+            'emergency_stop': False,
+            'scan_workers': 8,  # Pairs scanned concurrently (price fetch + signal + analysis)
+            'scan_deadline': 20.0,  # seconds; pairs still running at the deadline are dropped from the scan
+            'reconcile_interval': 5.0  # Minimum seconds between trade reconciliations while trades are open
         }
         
+        self._scan_pool = ThreadPoolExecutor(max_workers=self.config['scan_workers'],
+                                             thread_name_prefix='pair-scan')
+        self._scan_inflight = {}  # pair -> future still running from an earlier scan
+        self.last_scan = {}
+        
         self.active_trades = {}
         self.daily_stats = {
             'trades_count': 0,
@@ -58,6 +69,14 @@ class AutonomousTradingEngine:
         
         self.is_running = False
         
+        # Candle-close scans and price ticks for pairs with open trades replace the sleep loops
+        self.reconciler = TradeReconciler(self.oanda_client)
+        self._last_reconcile = 0.0
+        self.scheduler = TradingScheduler(oanda=self.oanda_client)
+        self.scheduler.on_candle_close(self.config['active_pairs'], self.config['scan_granularity'],
+                                       self._on_candle_close)
+        self.scheduler.on_tick(lambda: {t['pair'] for t in list(self.active_trades.values())}, self._on_price_tick)
+        
     def start_trading(self):
         """Start the autonomous trading engine"""
         logger.info("🚀 Starting Autonomous Trading Engine...")
@@ -67,6 +86,14 @@ class AutonomousTradingEngine:
             logger.error("❌ System health check failed. Cannot start trading.")
             return False
             
+        # Baseline the reconciler before anything can place orders, so a trade that fills and
+        # closes before the first price tick still produces its close event
+        try:
+            self.reconciler.sync()
+        except Exception as e:
+            logger.error(f"❌ Could not load open trades from OANDA: {e}")
+            return False
+        
         self.is_running = True
         self.daily_stats['start_time'] = datetime.now()
         
@@ -74,9 +101,8 @@ class AutonomousTradingEngine:
         trading_thread = Thread(target=self._trading_loop, daemon=True)
         trading_thread.start()
         
-        # Start trade monitoring
-        monitor_thread = Thread(target=self._monitor_trades, daemon=True)
-        monitor_thread.start()
+        # Start price ticks for trade monitoring
+        self.scheduler.start_ticks()
         
         logger.info("✅ Autonomous Trading Engine started successfully")
         return True
@@ -85,6 +111,7 @@ class AutonomousTradingEngine:
         """Stop the trading engine safely"""
         logger.info("🛑 Stopping Autonomous Trading Engine...")
         self.is_running = False
+        self.scheduler.stop()
         
         # Close all open positions if emergency stop
         if self.config['emergency_stop']:
@@ -130,64 +157,111 @@ class AutonomousTradingEngine:
             return False
     
     def _trading_loop(self):
-        """Main trading loop"""
+        """Main trading loop: idle until the next candle close, open-position tick or stop"""
         logger.info("🔄 Starting main trading loop...")
-        
-        while self.is_running:
-            try:
-                # Check if we should trade
-                if not self._should_continue_trading():
-                    time.sleep(self.config['scan_interval'])
-                    continue
-                
-                # Scan all pairs for opportunities
-                opportunities = self._scan_market_opportunities()
-                
-                # Process opportunities
-                for opportunity in opportunities:
-                    if self._can_take_new_trade():
-                        self._execute_trade_opportunity(opportunity)
+        self.scheduler.run()
+    
+    def _on_candle_close(self, pairs: List[str], granularity: str, close_time: datetime):
+        """Scan all pairs once per closed candle"""
+        try:
+            # Check if we should trade
+            if not self._should_continue_trading():
+                return
+            
+            # Scan all pairs for opportunities
+            opportunities = self._scan_market_opportunities()
+            
+            # Process opportunities
+            for opportunity in opportunities:
+                if self._can_take_new_trade():
+                    self._execute_trade_opportunity(opportunity)
                     
-                # Wait before next scan
-                time.sleep(self.config['scan_interval'])
-                
-            except Exception as e:
-                logger.error(f"❌ Error in trading loop: {e}")
-                time.sleep(self.config['scan_interval'] * 2)  # Extended wait on error
+        except Exception as e:
+            logger.error(f"❌ Error in trading loop: {e}")
     
-    def _monitor_trades(self):
-        """Monitor active trades and manage them"""
-        logger.info("👁️ Starting trade monitor...")
-        
-        while self.is_running:
-            try:
-                if self.active_trades:
-                    self._update_active_trades()
-                    self._check_trade_management()
-                
-                time.sleep(30)  # Check every 30 seconds
-                
-            except Exception as e:
-                logger.error(f"❌ Error in trade monitor: {e}")
-                time.sleep(60)
+    def _on_price_tick(self, pair: str, price: Dict):
+        """Manage trades on a pair as its prices move"""
+        try:
+            if time.monotonic() - self._last_reconcile >= self.config['reconcile_interval']:
+                self._last_reconcile = time.monotonic()
+                self._update_active_trades()
+            self._check_trade_management({pair: price})
+        except Exception as e:
+            logger.error(f"❌ Error in trade monitor: {e}")
     
     def _scan_market_opportunities(self) -> List[Dict]:
-        """Scan all currency pairs for trading opportunities"""
+        """Scan all currency pairs for trading opportunities concurrently, within scan_deadline"""
         opportunities = []
+        started = time.perf_counter()
+        timings = {}
         
+        futures = {}
         for pair in self.config['active_pairs']:
-            try:
-                # Get market data
-                price_data = self._get_market_data(pair)
-                if price_data is None or len(price_data) < 50:
-                    continue
-                
+            previous = self._scan_inflight.get(pair)
+            if previous is not None and not previous.done():
+                # A dropped scan of this pair is still holding a worker; don't queue another behind it
+                timings[pair] = {'status': 'busy'}
+                continue
+            futures[self._scan_pool.submit(self._scan_pair, pair)] = pair
+        
+        done, not_done = wait(futures, timeout=self.config['scan_deadline'])
+        
+        for future in done:
+            pair = futures[future]
+            opportunity, timings[pair] = future.result()
+            if opportunity:
+                opportunities.append(opportunity)
+        
+        for future in not_done:
+            pair = futures[future]
+            if not future.cancel():
+                self._scan_inflight[pair] = future
+            timings[pair] = {'status': 'timeout'}
+            logger.warning(f"⏱️ Dropped {pair} from scan: missed {self.config['scan_deadline']:g}s deadline")
+        
+        duration = time.perf_counter() - started
+        self.last_scan = {
+            'time': datetime.now().isoformat(),
+            'duration_ms': round(duration * 1000, 1),
+            'pairs': timings,
+            'dropped': sorted(p for p, t in timings.items() if t['status'] in ('timeout', 'busy')),
+            'opportunities': len(opportunities)
+        }
+        logger.info(f"🔎 Scanned {len(futures)} pairs in {duration * 1000:.0f}ms: " +
+                    ", ".join(f"{p} {t.get('total_ms', t['status'])}" for p, t in timings.items()))
+        
+        # Sort opportunities by confidence
+        opportunities.sort(key=lambda x: x['confidence'], reverse=True)
+        
+        return opportunities[:3]  # Return top 3 opportunities
+    
+    def _scan_pair(self, pair: str):
+        """Scan one pair (runs in the scan pool); returns (opportunity or None, stage timings in ms)"""
+        timings = {'status': 'ok'}
+        stage_start = pair_start = time.perf_counter()
+        
+        def lap(stage):
+            nonlocal stage_start
+            now = time.perf_counter()
+            timings[f"{stage}_ms"] = round((now - stage_start) * 1000, 1)
+            stage_start = now
+        
+        opportunity = None
+        try:
+            # Get market data
+            price_data = self._get_market_data(pair)
+            lap('market_data')
+            if price_data is None or len(price_data) < 50:
+                timings['status'] = 'no_data'
+            else:
                 # Generate trading signal
                 signal = trading_strategy.generate_trade_signal(pair, price_data)
+                lap('signal')
                 
                 if signal['signal'] != 'no_signal' and signal['confidence'] >= 0.7:
                     # Get additional analysis
                     analysis = self.trade_analyzer.analyze_trade(pair, signal)
+                    lap('analysis')
                     
                     # Check if analysis supports the trade
                     if analysis.get('prediction', {}).get('recommended', False):
@@ -196,18 +270,15 @@ class AutonomousTradingEngine:
                             'analysis': analysis,
                             'market_data': price_data.tail(5).to_dict('records')  # Last 5 candles
                         }
-                        opportunities.append(opportunity)
                         
                         logger.info(f"📊 Found opportunity: {pair} {signal['signal']} (confidence: {signal['confidence']:.2f})")
                 
-            except Exception as e:
-                logger.error(f"❌ Error scanning {pair}: {e}")
-                continue
-        
-        # Sort opportunities by confidence
-        opportunities.sort(key=lambda x: x['confidence'], reverse=True)
+        except Exception as e:
+            logger.error(f"❌ Error scanning {pair}: {e}")
+            timings['status'] = 'error'
         
-        return opportunities[:3]  # Return top 3 opportunities
+        timings['total_ms'] = round((time.perf_counter() - pair_start) * 1000, 1)
+        return opportunity, timings
     
     def _execute_trade_opportunity(self, opportunity: Dict):
         """Execute a trading opportunity"""
@@ -234,8 +305,8 @@ class AutonomousTradingEngine:
             result = self.oanda_client.place_trade(trade_data)
             
             if result['status'] == 'success':
-                # Store trade information
-                trade_id = result['order_id']
+                # Store trade information (OANDA trade IDs, as reported by the reconciler)
+                trade_id = result.get('trade_id') or result['order_id']
                 self.active_trades[trade_id] = {
                     **trade_data,
                     'order_id': trade_id,
@@ -251,6 +322,7 @@ class AutonomousTradingEngine:
                 
                 # Log to journal
                 self._log_trade(self.active_trades[trade_id])
+                self.scheduler.notify_positions_changed()
                 
             else:
                 logger.error(f"❌ Trade execution failed: {result}")
@@ -269,10 +341,10 @@ class AutonomousTradingEngine:
             current_price_data = self.oanda_client.get_current_price(pair)
             base_price = current_price_data['bid']
             
-            # Generate realistic OHLC data
-            np.random.seed(int(time.time()) % 1000)  # Semi-random but consistent
+            # Generate realistic OHLC data (own RNG so concurrent scans don't share global state)
+            rng = np.random.RandomState(int(time.time()) % 1000)  # Semi-random but consistent
             
-            returns = np.random.normal(0, 0.0001, periods)  # Small random returns
+            returns = rng.normal(0, 0.0001, periods)  # Small random returns
             prices = [base_price]
             
             for r in returns[1:]:
@@ -281,7 +353,7 @@ class AutonomousTradingEngine:
             # Create OHLC from prices
             data = []
             for i, price in enumerate(prices):
-                volatility = abs(np.random.normal(0, 0.0005))
+                volatility = abs(rng.normal(0, 0.0005))
                 high = price + volatility
                 low = price - volatility
                 open_price = prices[i-1] if i > 0 else price
@@ -293,7 +365,7 @@ class AutonomousTradingEngine:
                     'high': high,
                     'low': low,
                     'close': close,
-                    'volume': np.random.randint(1000, 10000)
+                    'volume': rng.randint(1000, 10000)
                 })
             
             df = pd.DataFrame(data)
@@ -347,53 +419,36 @@ class AutonomousTradingEngine:
             return current_hour >= start_hour or current_hour <= end_hour
     
     def _update_active_trades(self):
-        """Update status of active trades"""
-        for trade_id in list(self.active_trades.keys()):
-            try:
-                trade = self.active_trades[trade_id]
-                # In a real implementation, you'd check trade status via API
-                # For now, simulate trade outcomes based on time and randomness
-                
-                time_open = (datetime.now() - trade['open_time']).seconds
-                
-                # Simulate trade closure after some time (simplified)
-                if time_open > 3600:  # 1 hour
-                    self._close_simulated_trade(trade_id)
-                    
-            except Exception as e:
-                logger.error(f"Error updating trade {trade_id}: {e}")
-    
-    def _close_simulated_trade(self, trade_id: str):
-        """Simulate trade closure (for testing)"""
-        try:
-            trade = self.active_trades[trade_id]
-            
-            # Simple simulation: 60% win rate
-            is_winner = np.random.random() < 0.6
-            
-            if is_winner:
-                profit = abs(trade['take_profit'] - trade['entry']) * trade['units'] * 0.8
+        """Reconcile active trades against OANDA in one request and record closures"""
+        for event in self.reconciler.sync():
+            trade_id = event['trade_id']
+            if trade_id not in self.active_trades:
+                continue
+            profit = event['realized_pl']
+            if profit > 0:
                 self.daily_stats['wins'] += 1
-                logger.info(f"✅ Trade {trade_id} closed: +${profit:.2f}")
+                logger.info(f"✅ Trade {trade_id} closed ({event['reason']}): +${profit:.2f}")
             else:
-                profit = -abs(trade['entry'] - trade['stop_loss']) * trade['units'] * 0.8
                 self.daily_stats['losses'] += 1
-                logger.info(f"❌ Trade {trade_id} closed: ${profit:.2f}")
+                logger.info(f"❌ Trade {trade_id} closed ({event['reason']}): ${profit:.2f}")
             
             self.daily_stats['profit_loss'] += profit
             
             # Remove from active trades
             del self.active_trades[trade_id]
-            
-        except Exception as e:
-            logger.error(f"Error closing simulated trade {trade_id}: {e}")
+            self.scheduler.notify_positions_changed()
     
-    def _check_trade_management(self):
-        """Check if any trades need management (trailing stops, partial profits, etc.)"""
-        for trade_id, trade in self.active_trades.items():
+    def _check_trade_management(self, prices: Optional[Dict[str, Dict]] = None):
+        """
+        Check if any trades need management (trailing stops, partial profits, etc.)
+        With `prices` (pair -> tick), only trades on those pairs are checked, using the tick
+        """
+        for trade_id, trade in list(self.active_trades.items()):
             try:
+                if prices is not None and trade['pair'] not in prices:
+                    continue
                 # Get current price
-                current_price_data = self.oanda_client.get_current_price(trade['pair'])
+                current_price_data = prices[trade['pair']] if prices else self.oanda_client.get_current_price(trade['pair'])
                 current_price = current_price_data['bid'] if trade['action'] == 'sell' else current_price_data['ask']
                 
                 # Simple trailing stop logic
@@ -479,7 +534,8 @@ class AutonomousTradingEngine:
             'active_trades': len(self.active_trades),
             'daily_stats': self.daily_stats.copy(),
             'config': self.config.copy(),
-            'trading_hours': self._is_trading_hours()
+            'trading_hours': self._is_trading_hours(),
+            'last_scan': self.last_scan
         }
 
 # Global instance
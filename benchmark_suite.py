@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite
+Repeatable timings for the project's hot paths with fixed seeds and fixed synthetic data:
+webhook ingress against the stub broker, memory logger writes, technical indicators,
+AI feature generation and prediction, model training, million-trade generation and the
+JSON trade store. Results are written as JSON and compared with a stored baseline; a
+benchmark more than `tolerance` worse than its baseline is reported as a regression.
+
+Usage:
+    python benchmark_suite.py [--only webhook,memory_logger,...] [--repeat N]
+                              [--output benchmark_results.json] [--baseline benchmark_baseline.json]
+                              [--save-baseline]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import logging
+import platform
+import tempfile
+import statistics
+import contextlib
+import subprocess
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+BENCHMARK_CONFIG = {
+    'seed': 42,
+    'repeat': 3,                    # Runs per benchmark; the median is reported
+    'tolerance': 0.25,              # Fraction worse than baseline that counts as a regression
+    'baseline_path': 'benchmark_baseline.json',
+    'output_path': 'benchmark_results.json',
+    'sizes': {
+        'webhook_alerts': 200,
+        'memory_writes': 500,
+        'indicator_bars': 5000,
+        'signals': 1000,
+        'train_samples': 4000,
+        'million_trades': 10000,
+        'store_trades': 100000,
+    },
+}
+
+PAIRS = ['EUR/USD', 'GBP/USD', 'USD/JPY', 'USD/CHF', 'AUD/USD', 'USD/CAD', 'NZD/USD', 'EUR/GBP']
+
+
+def _seed(seed: int):
+    import numpy as np
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+@contextlib.contextmanager
+def _scratch_dir():
+    """Run in a throwaway working directory so model, memory and JSON files never touch the repo"""
+    previous = os.getcwd()
+    path = tempfile.mkdtemp(prefix="benchmark_")
+    os.chdir(path)
+    try:
+        yield path
+    finally:
+        os.chdir(previous)
+
+
+@contextlib.contextmanager
+def _quiet():
+    """Silence the prints and INFO logging of the training scripts while they are timed"""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        previous = logging.root.manager.disable
+        logging.disable(logging.INFO)
+        try:
+            yield
+        finally:
+            logging.disable(previous)
+
+
+def _signals(n: int, seed: int) -> List[tuple]:
+    """(market_data, trade_signal) pairs with the fields ContinuousTrainingSystem reads"""
+    rng = random.Random(seed)
+    conditions = ['trending', 'ranging', 'volatile', 'quiet']
+    signals = []
+    for _ in range(n):
+        market_data = {
+            'trend_strength': rng.random(), 'rsi_normalized': rng.random(),
+            'macd_signal_strength': rng.random(), 'volume_surge_factor': rng.uniform(0.5, 2.0),
+            'support_resistance_clarity': rng.random(), 'market_structure_score': rng.random(),
+            'session_quality_score': rng.random(), 'volatility_score': rng.random(),
+            'market_condition': rng.choice(conditions), 'session': rng.choice(['london', 'overlap', 'asian']),
+            'time_quality_score': rng.random(),
+        }
+        trade_signal = {'pair': rng.choice(PAIRS), 'risk_reward_ratio': rng.uniform(1.5, 4.0),
+                        'base_confidence': rng.uniform(0.4, 0.9)}
+        signals.append((market_data, trade_signal))
+    return signals
+
+
+def _training_system(seed: int):
+    """ContinuousTrainingSystem in simulation mode (no OANDA connection test) with a fresh model"""
+    import train_and_trade_100_sessions as training
+    training.OANDA_AVAILABLE = False
+    _seed(seed)
+    with _quiet():
+        return training.ContinuousTrainingSystem()
+
+
+def _training_data(system, n: int, seed: int) -> List[Dict]:
+    """Feature rows labelled from a noisy function of the features, so the model has signal to fit"""
+    rng = random.Random(seed)
+    _seed(seed)
+    rows = []
+    for market_data, trade_signal in _signals(n, seed):
+        features = system.generate_ai_features(market_data, trade_signal)[0]
+        score = market_data['trend_strength'] + trade_signal['base_confidence'] + rng.gauss(0, 0.3)
+        rows.append({'features': features.tolist(), 'outcome': int(score > 1.0)})
+    return rows
+
+
+# ------------------------------------------------------------------ benchmarks
+# Each returns {'value', 'unit', 'higher_is_better', ...details} for one run
+
+
+def bench_webhook(sizes: Dict, seed: int) -> Dict:
+    """/webhook end to end through the Flask test client against a zero-latency stub broker"""
+    from webhook_replay import WebhookReplayer, StubOandaClient, synthetic_alerts
+    broker = StubOandaClient(latency_ms=0.0, latency_jitter=0.0, seed=seed)
+    replayer = WebhookReplayer({'concurrency': 1, 'speed': 'max'}, broker=broker)
+    with _scratch_dir(), _quiet():  # Importing app opens its default memory database in the cwd
+        report = replayer.replay(synthetic_alerts(sizes['webhook_alerts'], seed=seed))
+    return {'value': report['latency_ms']['p50'], 'unit': 'ms p50', 'higher_is_better': False,
+            'p95_ms': report['latency_ms']['p95'], 'throughput_rps': report['throughput_rps'],
+            'error_rate': report['error_rate']}
+
+
+def bench_memory_logger(sizes: Dict, seed: int) -> Dict:
+    """SevenSYSMemoryLogger.log_webhook_alert inserts per second into a fresh database"""
+    from memory_logger import SevenSYSMemoryLogger
+    from webhook_replay import synthetic_alerts
+    alerts = [a['payload'] for a in synthetic_alerts(sizes['memory_writes'], seed=seed)]
+    with _scratch_dir():
+        memory_logger = SevenSYSMemoryLogger('benchmark_memory.db')
+        start = time.perf_counter()
+        for alert in alerts:
+            memory_logger.log_webhook_alert(alert, 'benchmark')
+        elapsed = time.perf_counter() - start
+    return {'value': len(alerts) / elapsed, 'unit': 'writes/s', 'higher_is_better': True}
+
+
+def bench_technical_indicators(sizes: Dict, seed: int) -> Dict:
+    """OandaHistoricalData.add_technical_indicators over seeded synthetic M5 bars"""
+    from candle_cache import candles_to_dataframe, generate_synthetic_candles
+    from oanda_historical_data import OandaHistoricalData
+    candles = candles_to_dataframe(generate_synthetic_candles(sizes['indicator_bars'], seed=seed))
+    df = candles.rename(columns={'mid_o': 'open', 'mid_h': 'high', 'mid_l': 'low', 'mid_c': 'close'})
+    with _quiet():
+        data = OandaHistoricalData(api_key='benchmark', account_id='101-000-00000000-001')
+    start = time.perf_counter()
+    data.add_technical_indicators(df.copy())
+    elapsed = time.perf_counter() - start
+    return {'value': elapsed * 1000.0, 'unit': 'ms', 'higher_is_better': False}
+
+
+def bench_ai_features(sizes: Dict, seed: int) -> Dict:
+    """generate_ai_features and ai_predict_outcome per 1k signals with a trained model"""
+    with _scratch_dir():
+        system = _training_system(seed)
+        system.training_data = _training_data(system, 500, seed)
+        with _quiet():
+            system.train_ai_model()
+        signals = _signals(sizes['signals'], seed + 1)
+        _seed(seed)
+
+        start = time.perf_counter()
+        for market_data, trade_signal in signals:
+            system.generate_ai_features(market_data, trade_signal)
+        features_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with _quiet():
+            for market_data, trade_signal in signals:
+                system.ai_predict_outcome(market_data, trade_signal)
+        predict_elapsed = time.perf_counter() - start
+    per_1k = 1000.0 / len(signals)
+    return {'value': predict_elapsed * per_1k * 1000.0, 'unit': 'ms per 1k predictions', 'higher_is_better': False,
+            'features_ms_per_1k': round(features_elapsed * per_1k * 1000.0, 3)}
+
+
+def bench_train_model(sizes: Dict, seed: int) -> Dict:
+    """ContinuousTrainingSystem.train_ai_model on a fixed labelled sample"""
+    with _scratch_dir():
+        system = _training_system(seed)
+        system.training_data = _training_data(system, sizes['train_samples'], seed)
+        start = time.perf_counter()
+        with _quiet():
+            system.train_ai_model()
+        elapsed = time.perf_counter() - start
+    return {'value': elapsed, 'unit': 's', 'higher_is_better': False,
+            'accuracy': round(system.model_performance_history[-1]['accuracy'], 4)}
+
+
+def bench_million_trades(sizes: Dict, seed: int) -> Dict:
+    """MillionTradeSystem.generate_pair_trades, including its batched JSON saves"""
+    from million_trade_training import MillionTradeSystem
+    with _scratch_dir():
+        with _quiet():
+            system = MillionTradeSystem()
+        _seed(seed)
+        start = time.perf_counter()
+        with _quiet():
+            generated, _ = system.generate_pair_trades('EUR_USD', sizes['million_trades'])
+        elapsed = time.perf_counter() - start
+    return {'value': generated / elapsed, 'unit': 'trades/s', 'higher_is_better': True}
+
+
+def bench_trade_store(sizes: Dict, seed: int) -> Dict:
+    """Loading the JSON trade store ({"trades": [...]}) written by the training scripts"""
+    rng = random.Random(seed)
+    trades = [{
+        'timestamp': f"2024-01-{1 + i % 28:02d}T{i % 24:02d}:00:00", 'pair': rng.choice(PAIRS),
+        'direction': rng.choice(['BUY', 'SELL']), 'confidence': round(rng.uniform(0.55, 0.9), 4),
+        'risk_reward': round(rng.uniform(1.8, 3.5), 2), 'trend_strength': round(rng.random(), 4),
+        'volatility': round(rng.random(), 4), 'spread': round(rng.uniform(0.5, 3.0), 2),
+        'session': rng.choice(['london', 'newyork', 'overlap']), 'outcome': int(rng.random() < 0.65),
+        'source': 'benchmark',
+    } for i in range(sizes['store_trades'])]
+    with _scratch_dir():
+        with open('jarvis_ai_memory.json', 'w') as f:
+            json.dump({'trades': trades, 'metadata': {}}, f, indent=2)
+        start = time.perf_counter()
+        with open('jarvis_ai_memory.json') as f:
+            loaded = json.load(f)['trades']
+        elapsed = time.perf_counter() - start
+        size_mb = os.path.getsize('jarvis_ai_memory.json') / 1e6
+    assert len(loaded) == len(trades)
+    return {'value': elapsed * 1000.0, 'unit': 'ms', 'higher_is_better': False, 'file_mb': round(size_mb, 1)}
+
+
+BENCHMARKS: Dict[str, Callable[[Dict, int], Dict]] = {
+    'webhook': bench_webhook,
+    'memory_logger': bench_memory_logger,
+    'technical_indicators': bench_technical_indicators,
+    'ai_features': bench_ai_features,
+    'train_model': bench_train_model,
+    'million_trades': bench_million_trades,
+    'trade_store': bench_trade_store,
+}
+
+
+# ------------------------------------------------------------------ running and comparing
+
+
+def run_benchmarks(names: Optional[List[str]] = None, config: Optional[Dict] = None) -> Dict:
+    """Run the selected benchmarks `repeat` times each; returns the machine-readable results"""
+    config = dict(BENCHMARK_CONFIG, **(config or {}))
+    sizes = dict(BENCHMARK_CONFIG['sizes'], **config.get('sizes', {}))
+    results = {}
+    for name in names or list(BENCHMARKS):
+        runs = [BENCHMARKS[name](sizes, config['seed']) for _ in range(config['repeat'])]
+        values = [run['value'] for run in runs]
+        median_run = runs[values.index(sorted(values)[len(values) // 2])]
+        results[name] = dict(median_run, value=round(statistics.median(values), 4),
+                             runs=[round(v, 4) for v in values])
+        logger.info("%s: %.4g %s", name, results[name]['value'], results[name]['unit'])
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'seed': config['seed'],
+        'repeat': config['repeat'],
+        'sizes': sizes,
+        'results': results,
+    }
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float = BENCHMARK_CONFIG['tolerance']) -> List[Dict]:
+    """Per-benchmark change against the baseline; 'regression' is set when worse by more than tolerance"""
+    comparisons = []
+    for name, current in results['results'].items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous or not previous['value']:
+            continue
+        change = (current['value'] - previous['value']) / previous['value']
+        worse_by = -change if current['higher_is_better'] else change
+        comparisons.append({
+            'name': name,
+            'baseline': previous['value'],
+            'current': current['value'],
+            'unit': current['unit'],
+            'change': round(change, 4),
+            'regression': worse_by > tolerance,
+            'sizes_match': baseline.get('sizes') == results.get('sizes'),
+        })
+    return comparisons
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _option(args: List[str], name: str, default):
+    if name in args and args.index(name) + 1 < len(args):
+        return args[args.index(name) + 1]
+    return default
+
+
+def main():
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')  # app's JSON logging would otherwise interleave with the table
+    logging.basicConfig(level=logging.WARNING)
+    args = sys.argv[1:]
+    only = _option(args, '--only', None)
+    names = only.split(',') if only else None
+    unknown = [n for n in names or [] if n not in BENCHMARKS]
+    if unknown:
+        print(f"❌ Unknown benchmark(s): {', '.join(unknown)} (available: {', '.join(BENCHMARKS)})")
+        return 2
+
+    config = {'repeat': int(_option(args, '--repeat', BENCHMARK_CONFIG['repeat']))}
+    print(f"⏱️  Running {len(names or BENCHMARKS)} benchmark(s), {config['repeat']} run(s) each...")
+    results = run_benchmarks(names, config)
+
+    output = _option(args, '--output', BENCHMARK_CONFIG['output_path'])
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    baseline_path = _option(args, '--baseline', BENCHMARK_CONFIG['baseline_path'])
+    baseline = None
+    if os.path.exists(baseline_path) and '--save-baseline' not in args:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+    comparisons = {c['name']: c for c in compare(results, baseline)} if baseline else {}
+
+    print("=" * 72)
+    print(f"{'Benchmark':<22} {'Value':>12}  {'Unit':<22} {'vs baseline':>12}")
+    for name, result in results['results'].items():
+        comparison = comparisons.get(name)
+        delta = f"{comparison['change']:+.1%}" if comparison else "-"
+        flag = " ❌" if comparison and comparison['regression'] else ""
+        print(f"{name:<22} {result['value']:>12.4g}  {result['unit']:<22} {delta:>12}{flag}")
+    print(f"📄 Results saved: {output}")
+
+    if '--save-baseline' in args:
+        with open(baseline_path, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"📌 Baseline saved: {baseline_path}")
+        return 0
+
+    regressions = [c for c in comparisons.values() if c['regression']]
+    if any(not c['sizes_match'] for c in comparisons.values()):
+        print("⚠️ Benchmark sizes differ from the baseline; comparisons are indicative only")
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s) beyond {BENCHMARK_CONFIG['tolerance']:.0%}: "
+              f"{', '.join(c['name'] for c in regressions)}")
+        return 1
+    if baseline:
+        print("✅ No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
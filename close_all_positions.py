@@ -1,6 +1,7 @@
-import os
+import sys
 import logging
 from oanda_client import OandaClient
+from account_router import AccountRouter
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -9,36 +10,42 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def close_all_positions():
-    """Emergency function to close all open positions"""
+def close_all_positions(all_accounts=False):
+    """
+    Emergency function to close all open positions and cancel pending orders
+    
+    Every position is closed with one PositionClose per instrument, all sent at once, and the
+    result is verified with a single account summary. With all_accounts, every account in the
+    routing file is flattened in parallel.
+    """
     try:
         logger.info("Initiating emergency position closure...")
         
         # Initialize OANDA client
         oanda = OandaClient()
+        if all_accounts:
+            results = AccountRouter.load(oanda).flatten()
+        else:
+            results = {'default': oanda.flatten_account()}
         
-        # Get all open positions
-        positions = oanda.get_open_positions()
+        for name, result in results.items():
+            if 'error' in result:
+                print(f"❌ {name}: {result['error']}")
+                continue
+            icon = "✅" if result['status'] == 'flat' else "⚠️"
+            print(f"{icon} {name}: {result['status']} in {result['elapsed_ms']:.0f}ms - "
+                  f"{len(result['closed'])} positions closed, {len(result['cancelled'])} orders cancelled")
+            for key, error in result['errors'].items():
+                print(f"   ❌ {key}: {error}")
         
-        closed_positions = 0
-        for position in positions:
-            try:
-                # Close position
-                result = oanda.close_position(position['id'])
-                if result.get('status') == 'closed':
-                    closed_positions += 1
-                    logger.info(f"Closed position {position['id']}")
-                else:
-                    logger.warning(f"Failed to close position {position['id']}: {result}")
-            except Exception as e:
-                logger.error(f"Error closing position {position['id']}: {str(e)}")
-        
-        logger.info(f"Emergency closure completed. Closed {closed_positions} positions")
-        return True
+        flat = all(r.get('status') == 'flat' for r in results.values())
+        logger.info(f"Emergency closure completed: {'flat' if flat else 'NOT flat'}")
+        return flat
         
     except Exception as e:
         logger.error(f"Emergency closure failed: {str(e)}")
         return False
 
 if __name__ == '__main__':
-    close_all_positions()
+    # python close_all_positions.py [--all-accounts]
+    sys.exit(0 if close_all_positions(all_accounts='--all-accounts' in sys.argv) else 1)
@@ -10,6 +10,8 @@ import logging
 from typing import Dict, List, Optional, Tuple
 import os
 
+from instrument_metadata import get_instrument_metadata
+
 class TradingSafetyFramework:
     def __init__(self):
         self.setup_logging()
@@ -91,17 +93,21 @@ class TradingSafetyFramework:
         
         return True, "Trade approved - all safety checks passed"
     
-    def calculate_safe_position_size(self, account_balance: float, stop_loss_pips: int, pair: str = "EUR_USD") -> Dict:
+    def calculate_safe_position_size(self, account_balance: float, stop_loss_pips: int, pair: str = "EUR_USD",
+                                     price: Optional[float] = None) -> Dict:
         """Calculate safe position size based on risk management rules"""
         
-        # Pip values for major pairs (approximate)
-        pip_values = {
-            "EUR_USD": 10, "GBP_USD": 10, "AUD_USD": 10, "NZD_USD": 10,
-            "USD_JPY": 9.09, "USD_CHF": 10.75, "USD_CAD": 7.81,
-            "EUR_GBP": 12.82, "EUR_JPY": 9.09, "GBP_JPY": 9.09
-        }
-        
-        pip_value = pip_values.get(pair, 10)
+        # Pip value per standard lot (100,000 units) from the instrument table at the current price
+        if price:
+            pip_value = float(get_instrument_metadata().pip_values([pair], [price])[0]) * 100000
+        else:
+            # Approximate values when no price is available
+            pip_values = {
+                "EUR_USD": 10, "GBP_USD": 10, "AUD_USD": 10, "NZD_USD": 10,
+                "USD_JPY": 9.09, "USD_CHF": 10.75, "USD_CAD": 7.81,
+                "EUR_GBP": 12.82, "EUR_JPY": 9.09, "GBP_JPY": 9.09
+            }
+            pip_value = pip_values.get(pair, 10)
         max_risk_amount = account_balance * self.safety_config["max_trade_risk"]
         
         # Calculate position size
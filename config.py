@@ -17,7 +17,8 @@ RISK_CONFIG = {
     'max_drawdown': 0.12,              # 12% maximum drawdown (stricter limits)
     'position_sizing_method': 'atr',    # ATR-based position sizing
     'risk_reward_min': 3.0,            # Minimum 3:1 risk:reward (INCREASED FOR REAL MARKET)
-    'confidence_threshold': 0.70       # 70% minimum confidence (INCREASED FOR REAL MARKET)
+    'confidence_threshold': 0.70,      # 70% minimum confidence (INCREASED FOR REAL MARKET)
+    'trade_history_limit': 1000        # Recent trades kept in RiskManager (peak/daily risk are tracked separately)
 }
 
 # ACTIVE TRADING PAIRS - OPTIMIZED FOR HIGH WIN RATES
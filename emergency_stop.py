@@ -59,18 +59,16 @@ class EmergencyStop:
             from oanda_client import OandaClient
             
             client = OandaClient()
-            positions = client.get_open_positions()
-            
-            if positions:
-                self.log_emergency(f"Found {len(positions)} open positions - closing all")
-                for position in positions:
-                    try:
-                        client.close_position(position['instrument'])
-                        self.log_emergency(f"Closed position: {position['instrument']}")
-                    except Exception as e:
-                        self.log_emergency(f"Failed to close {position['instrument']}: {e}")
-            else:
-                self.log_emergency("No open positions found")
+            result = client.flatten_account()
+            
+            for instrument in result['closed']:
+                self.log_emergency(f"Closed position: {instrument}")
+            for key, error in result['errors'].items():
+                self.log_emergency(f"Failed to close {key}: {error}")
+            if result['cancelled']:
+                self.log_emergency(f"Cancelled {len(result['cancelled'])} pending orders")
+            self.log_emergency(f"Account {result['status']} after {result['elapsed_ms']:.0f}ms "
+                               f"({result['summary'].get('openTradeCount')} trades open)")
                 
         except Exception as e:
             self.log_emergency(f"Failed to access OANDA client: {e}")
@@ -2,7 +2,6 @@ import logging
 import random
 import math
 from datetime import datetime, timedelta
-import time
 import numpy as np
 from market_conditions import MarketConditions
 from risk_manager import RiskManager
@@ -12,19 +11,21 @@ from system_monitor import SystemMonitor
 from trading_failsafe import TradingFailsafe
 from position_manager import PositionManager
 from performance_analyzer import PerformanceAnalyzer
+from sim_clock import simulation_clock
 import asyncio
 
 class TradeSimulator:
-    def __init__(self, initial_balance: float = 200.0):
+    def __init__(self, initial_balance: float = 200.0, clock=None):
         self.performance_history = []
         self.total_trades = 0
         self.total_wins = 0
         self.learning_factor = 5.0  # Start with 5%
-        self.base_time = datetime.now()
+        self.clock = clock or simulation_clock()  # Waits below advance simulated time, instantly outside demo mode
+        self.base_time = self.clock.now()
         
         # Initialize core components
-        self.market_conditions = MarketConditions()
-        self.risk_manager = RiskManager(initial_balance=initial_balance)
+        self.market_conditions = MarketConditions(clock=self.clock)
+        self.risk_manager = RiskManager(initial_balance=initial_balance, clock=self.clock)
         self.market_execution = MarketExecution()
         self.current_balance = initial_balance
         
@@ -48,7 +49,7 @@ class TradeSimulator:
         
     def generate_market_conditions(self, learning_factor_decimal):
         """Generate realistic market conditions matching live trading environment."""
-        current_time = datetime.now()
+        current_time = self.clock.now()
         current_hour = current_time.hour
         current_minute = current_time.minute
         
@@ -116,7 +117,7 @@ class TradeSimulator:
             win_rate_good_setup *= 0.9  # Reduce win rate in high volatility
         
         conditions = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': current_time.isoformat(),
             'pair': 'EUR_USD',
             'trend': random.choice(['uptrend', 'downtrend', 'sideways']),
             'volatility': volatility,
@@ -154,7 +155,7 @@ class TradeSimulator:
             # Skip if market is closed
             if conditions is None:
                 logger.info("Market is closed (weekend). Skipping trade...")
-                time.sleep(10)  # Wait 10 seconds before next attempt
+                self.clock.sleep(10)  # Wait 10 seconds before next attempt
                 continue
                 
             # Generate trade parameters with learning factor influence
@@ -196,17 +197,17 @@ class TradeSimulator:
             # Basic validation first
             if conditions['spread'] > 3.0:  # Skip if spread is too high
                 logger.info(f"Trade {trades_processed + 1:04d}/{num_trades} | Skipped: High spread {conditions['spread']:.1f}")
-                time.sleep(5)
+                self.clock.sleep(5)
                 continue
                 
             if conditions['volume'] < 0.3:  # Skip if volume is too low
                 logger.info(f"Trade {trades_processed + 1:04d}/{num_trades} | Skipped: Low volume {conditions['volume']:.1f}")
-                time.sleep(5)
+                self.clock.sleep(5)
                 continue
                 
             if position_size < 0.01:  # Skip if position size is too small
                 logger.info(f"Trade {trades_processed + 1:04d}/{num_trades} | Skipped: Position size too small")
-                time.sleep(5)
+                self.clock.sleep(5)
                 continue
                 
             # Risk management validation
@@ -227,7 +228,7 @@ class TradeSimulator:
             
             if market_quality < 0.3:  # Lower threshold for market quality
                 logger.info(f"Trade {trades_processed + 1:04d}/{num_trades} | Skipped: Poor market quality {market_quality:.2f}")
-                time.sleep(5)
+                self.clock.sleep(5)
                 continue
                 
             logger.debug(f"Market quality: {market_quality:.2f} (Spread: {spread_factor:.2f}, Volume: {volume_factor:.2f}, Vol: {volatility_factor:.2f})")
@@ -325,7 +326,7 @@ class TradeSimulator:
                 f"Learning: {learning_factor_decimal*100:.2f}%")
             
             # Add delay between trades
-            time.sleep(10)  # 10 second delay between trades
+            self.clock.sleep(10)  # 10 second delay between trades
             
             # Update learning factor for next trade
             learning_factor_decimal = self._calculate_learning_factor()
@@ -413,16 +414,6 @@ if __name__ == "__main__":
         format='%(message)s'
     )
     
-    # Create and run enhanced simulator
-    simulator = TradeSimulator(initial_balance=200.0)
-    simulator.simulate_trades(8000)
-if __name__ == "__main__":
-    # Configure logging
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(message)s'
-    )
-    
     # Create and run enhanced simulator with micro-account balance
     simulator = TradeSimulator(initial_balance=200.0)
     simulator.simulate_trades(8000)
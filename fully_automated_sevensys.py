@@ -9,13 +9,24 @@ import pandas as pd
 import numpy as np
 import requests
 import json
-import time
 from datetime import datetime, timedelta
 import threading
-import schedule
 import logging
 from oanda_client import OandaClient
 from memory_logger import SevenSYSMemoryLogger
+from trading_scheduler import TradingScheduler
+from candle_cache import GRANULARITY_SECONDS
+
+
+def cycle_granularity(cycle_minutes: int) -> str:
+    """OANDA granularity whose candles close every cycle_minutes (15 -> 'M15', 240 -> 'H4', 1440 -> 'D')"""
+    for granularity, seconds in GRANULARITY_SECONDS.items():
+        if granularity != 'W' and seconds == cycle_minutes * 60:
+            return granularity
+    supported = sorted(s // 60 for g, s in GRANULARITY_SECONDS.items() if s >= 60 and g != 'W')
+    raise ValueError(f"No OANDA candle closes every {cycle_minutes} minutes; "
+                     f"use one of {', '.join(map(str, supported))} or pass a granularity")
+
 
 class FullyAutomatedSevenSYS:
     def __init__(self):
@@ -421,32 +432,42 @@ class FullyAutomatedSevenSYS:
         except Exception as e:
             self.logger.error(f"Error in trading cycle: {e}")
     
-    def start_automated_trading(self, instruments=['EUR_USD'], cycle_minutes=15):
-        """Start fully automated trading system"""
+    def _on_candle_close(self, instruments, granularity, close_time):
+        """Run a trading cycle for each instrument whose candle just closed"""
+        for instrument in instruments:
+            self.trading_cycle(instrument)
+    
+    def start_automated_trading(self, instruments=['EUR_USD'], cycle_minutes=15, granularity=None):
+        """
+        Start fully automated trading system
+        Cycles run on each close of `granularity` (e.g. 'M15', 'H4'), by default the candle
+        matching cycle_minutes; anything OANDA does not publish is rejected before starting
+        """
+        granularity = granularity or cycle_granularity(cycle_minutes)
+        if granularity not in GRANULARITY_SECONDS or granularity == 'W':
+            raise ValueError(f"Unsupported granularity for trading cycles: {granularity}")
         self.logger.info("🚀 STARTING FULLY AUTOMATED SEVENSYS")
         self.logger.info(f"Instruments: {instruments}")
-        self.logger.info(f"Cycle interval: {cycle_minutes} minutes")
+        self.logger.info(f"Cycle: every {granularity} candle close")
         self.logger.info(f"News updates: Every 15 minutes")
         
         self.is_running = True
+        self.scheduler = TradingScheduler(oanda=self.oanda)
         
         try:
-            # Schedule trading cycles for each instrument
-            for instrument in instruments:
-                schedule.every(cycle_minutes).minutes.do(self.trading_cycle, instrument)
+            # Trading cycles run when each candle closes rather than on a free-running timer
+            self.scheduler.on_candle_close(instruments, granularity, self._on_candle_close)
             
             # Schedule news updates
-            schedule.every(15).minutes.do(self.fetch_and_analyze_news)
+            self.scheduler.every(15 * 60, self.fetch_and_analyze_news)
             
             # Initial run
             self.fetch_and_analyze_news()
             for instrument in instruments:
                 self.trading_cycle(instrument)
             
-            # Main loop
-            while self.is_running:
-                schedule.run_pending()
-                time.sleep(60)  # Check every minute
+            # Main loop: sleeps until the next candle close or news update
+            self.scheduler.run()
                 
         except KeyboardInterrupt:
             self.logger.info("🛑 Stopping automated trading...")
@@ -454,6 +475,12 @@ class FullyAutomatedSevenSYS:
         except Exception as e:
             self.logger.error(f"Critical error in automated trading: {e}")
             self.is_running = False
+    
+    def stop_automated_trading(self):
+        """Stop the scheduler loop from another thread"""
+        self.is_running = False
+        if getattr(self, 'scheduler', None):
+            self.scheduler.stop()
 
 def main():
     print("🤖 FULLY AUTOMATED SEVENSYS TRADING SYSTEM")
@@ -5,6 +5,7 @@ import os
 import random
 from market_data import MarketData
 from model_trainer import ModelTrainer
+from trade_dataset import write_dataset, load_dataset, export_csv
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -189,6 +190,17 @@ class TradeDataGenerator:
         
         return df
 
+    def generate_dataset(self, num_trades=1_000_000, path='data/historical_trades.npy', csv_path=None,
+                         seed=42, train=True):
+        """Vectorized generate_historical_trades for large datasets: seeded, chunked into a .npy file"""
+        records = load_dataset(write_dataset(num_trades, path, {'seed': seed}))
+        if csv_path:
+            export_csv(records, csv_path)
+        if train:
+            self.model_trainer.train_model(records)
+            logger.info("Initial model trained successfully")
+        return records
+
 if __name__ == '__main__':
     generator = TradeDataGenerator()
     historical_data = generator.generate_historical_trades(8000)
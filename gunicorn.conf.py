@@ -0,0 +1,53 @@
+"""
+Gunicorn settings for the webhook server, picked up automatically by `gunicorn app:app`
+
+With preload_app the master imports app.py and loads the read-only artifacts (instrument
+metadata arrays, numpy, flask, oandapyV20) once, then freezes the GC so the forked workers
+keep sharing those pages. Each worker builds its own connections, threads and session id in
+post_fork, so adding a worker costs little more than its per-request memory.
+
+    WEB_CONCURRENCY=4 gunicorn app:app          # 4 preloaded workers
+    PRELOAD_APP=0 gunicorn app:app              # every worker imports and loads on its own
+"""
+
+import gc
+import os
+import tempfile
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+threads = int(os.getenv('GUNICORN_THREADS', '1'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+preload_app = os.getenv('PRELOAD_APP', '1') == '1'
+
+# app.py skips its per-process setup at import and waits for post_fork
+os.environ['PRELOAD_APP'] = '1' if preload_app else '0'
+
+# Several workers: /metrics merges the per-worker snapshots written here
+if workers > 1:
+    os.environ.setdefault('METRICS_MULTIPROC_DIR',
+                          os.path.join(tempfile.gettempdir(), f"jarvis-metrics-{os.getpid()}"))
+
+
+def on_starting(server):
+    """Master, at start: drop metrics snapshots left in a reused METRICS_MULTIPROC_DIR by earlier runs"""
+    if os.getenv('METRICS_MULTIPROC_DIR'):
+        from metrics import MetricsRegistry
+        MetricsRegistry(os.environ['METRICS_MULTIPROC_DIR']).clear_directory()
+
+
+def when_ready(server):
+    """Master, before the first fork: load shared artifacts, then move them out of the GC's reach"""
+    if not preload_app:
+        return
+    import app
+    shared = app.preload_shared()
+    gc.freeze()  # Collections in the workers no longer write to (and so copy) these objects' pages
+    server.log.info("Preloaded shared artifacts: %s", shared)
+
+
+def post_fork(server, worker):
+    """Worker, right after the fork: connections, background threads and session id"""
+    if preload_app:
+        import app
+        app.init_worker()
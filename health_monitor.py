@@ -11,6 +11,7 @@ import psutil
 import logging
 from datetime import datetime, timedelta
 from colorama import Fore, Style, init
+from log_watcher import LogWatcher
 
 # Initialize colorama
 init(autoreset=True)
@@ -23,10 +24,21 @@ class HealthMonitor:
     
     def __init__(self):
         self.health_log = "logs/health_monitor.log"
+        self.log_files = [
+            "logs/trading_system.log",
+            "logs/error.log",
+            "logs/performance.log",
+            "live_trading.log",
+            "massive_training.log",
+            "million_trade_training.log"
+        ]
         self.alerts_sent = {}
         self.monitoring = True
         self.ensure_directories()
         
+        # Error counts are kept incrementally across checks
+        self.log_watcher = LogWatcher(self.log_files)
+        
         # Health thresholds
         self.thresholds = {
             'cpu_usage': 85.0,
@@ -161,7 +173,7 @@ class HealthMonitor:
             oanda_health = {
                 'status': 'connected',
                 'response_time': response_time,
-                'account_balance': account_info.get('balance', 0)
+                'account_balance': float(account_info.get('balance', 0))
             }
             
             alerts = []
@@ -175,35 +187,15 @@ class HealthMonitor:
             return {'status': 'disconnected', 'response_time': 0}, ["OANDA connection failed"]
             
     def check_log_files(self):
-        """Monitor log files for errors"""
+        """Monitor log files for errors (only bytes written since the last check are read)"""
         try:
-            log_files = [
-                "logs/trading_system.log",
-                "logs/error.log",
-                "logs/performance.log"
-            ]
-            
-            recent_errors = 0
-            cutoff_time = datetime.now() - timedelta(minutes=30)
+            self.log_watcher.poll()
+            recent_errors = self.log_watcher.errors_since(30 * 60)
             
-            for log_file in log_files:
-                if os.path.exists(log_file):
-                    with open(log_file, 'r') as f:
-                        lines = f.readlines()
-                        for line in lines[-100:]:  # Check last 100 lines
-                            if 'ERROR' in line or 'CRITICAL' in line:
-                                try:
-                                    # Extract timestamp and check if recent
-                                    timestamp_str = line.split(']')[0][1:]
-                                    log_time = datetime.fromisoformat(timestamp_str.replace(',', '.'))
-                                    if log_time > cutoff_time:
-                                        recent_errors += 1
-                                except:
-                                    continue
-                                    
             log_health = {
                 'recent_errors': recent_errors,
-                'error_rate': recent_errors / 30  # errors per minute
+                'error_rate': recent_errors / 30,  # errors per minute
+                'bytes_read': self.log_watcher.stats['bytes_read']
             }
             
             alerts = []
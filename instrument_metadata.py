@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Instrument Metadata
+Pip location, display precision, minimum trade size and margin rate for every tradeable
+instrument, loaded once from the OANDA account instruments endpoint (or its cached JSON
+copy) into NumPy arrays. Replaces the per-call `endswith('JPY')` checks and hard-coded
+5-decimal rounding, and sizes whole batches of candidate trades at once.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import json
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from lazy_imports import lazy_module
+
+np = lazy_module('numpy')  # Imported on first sizing call, not at web process start
+
+logger = logging.getLogger(__name__)
+
+INSTRUMENT_METADATA_CONFIG = {
+    'cache_path': 'data/instruments.json',
+    'account_currency': 'USD',
+}
+
+# Offline defaults in the OANDA AccountInstruments format, used when no cache or API is available
+DEFAULT_INSTRUMENTS = [
+    {'name': name, 'type': 'CURRENCY', 'pipLocation': pip, 'displayPrecision': precision,
+     'tradeUnitsPrecision': 0, 'minimumTradeSize': '1', 'marginRate': margin}
+    for name, pip, precision, margin in [
+        ('EUR_USD', -4, 5, '0.02'), ('GBP_USD', -4, 5, '0.05'), ('USD_JPY', -2, 3, '0.04'),
+        ('USD_CHF', -4, 5, '0.03'), ('AUD_USD', -4, 5, '0.03'), ('USD_CAD', -4, 5, '0.02'),
+        ('NZD_USD', -4, 5, '0.03'), ('EUR_GBP', -4, 5, '0.05'), ('EUR_JPY', -2, 3, '0.04'),
+        ('GBP_JPY', -2, 3, '0.05'), ('AUD_JPY', -2, 3, '0.04'), ('EUR_AUD', -4, 5, '0.03'),
+        ('EUR_CHF', -4, 5, '0.03'), ('GBP_CHF', -4, 5, '0.05'), ('XAU_USD', -2, 3, '0.05'),
+    ]
+]
+
+
+def normalize_instrument(symbol: str) -> str:
+    """'EURUSD', 'eur/usd' and 'EUR_USD' all map to 'EUR_USD'"""
+    symbol = symbol.replace('/', '_').upper()
+    if len(symbol) == 6 and '_' not in symbol:
+        symbol = symbol[:3] + '_' + symbol[3:]
+    return symbol
+
+
+class InstrumentMetadata:
+    """Array-backed instrument table; row i of every array describes names[i]"""
+
+    def __init__(self, instruments: List[Dict]):
+        self._lock = threading.Lock()
+        self.raw = {}
+        self.names = []
+        self.index = {}
+        self.pip_location = np.zeros(0, dtype=np.int8)
+        self.display_precision = np.zeros(0, dtype=np.int8)
+        self.units_precision = np.zeros(0, dtype=np.int8)
+        self.min_trade_size = np.zeros(0, dtype=np.float64)
+        self.margin_rate = np.zeros(0, dtype=np.float64)
+        self.base = np.zeros(0, dtype='U8')
+        self.quote = np.zeros(0, dtype='U8')
+        self._extend(instruments)
+
+    def _extend(self, instruments: List[Dict]):
+        rows = [i for i in instruments if i['name'] not in self.index]
+        if not rows:
+            return
+        # Readers look names up in self.index without the lock: grow every array (and names) first,
+        # so an index entry never points past the end of an array
+        pip_location = np.append(self.pip_location, [int(r['pipLocation']) for r in rows]).astype(np.int8)
+        self.display_precision = np.append(self.display_precision,
+                                           [int(r['displayPrecision']) for r in rows]).astype(np.int8)
+        self.units_precision = np.append(self.units_precision,
+                                         [int(r.get('tradeUnitsPrecision', 0)) for r in rows]).astype(np.int8)
+        self.min_trade_size = np.append(self.min_trade_size, [float(r.get('minimumTradeSize', 1)) for r in rows])
+        self.margin_rate = np.append(self.margin_rate, [float(r.get('marginRate', 0.02)) for r in rows])
+        self.base = np.append(self.base, [r['name'].partition('_')[0] for r in rows])
+        self.quote = np.append(self.quote, [r['name'].partition('_')[2] for r in rows])
+        self.pip_size = 1.0 / 10.0 ** -pip_location.astype(np.float64)  # Exact 0.0001, not 9.99e-05
+        self.pip_location = pip_location
+        start = len(self.names)
+        for row in rows:
+            self.raw[row['name']] = row
+        self.names.extend(row['name'] for row in rows)
+        for offset, row in enumerate(rows):
+            self.index[row['name']] = start + offset
+
+    @classmethod
+    def from_oanda(cls, client=None) -> 'InstrumentMetadata':
+        """Fetch the account's tradeable instruments (client: OandaClient, built from env if omitted)"""
+        import oandapyV20.endpoints.accounts as accounts
+        if client is None:
+            from oanda_client import OandaClient
+            client = OandaClient()
+        response = client.client.request(accounts.AccountInstruments(accountID=client.account_id))
+        return cls(response.get('instruments', []))
+
+    @classmethod
+    def load(cls, cache_path: Optional[str] = None, client=None) -> 'InstrumentMetadata':
+        """Cached JSON file if present, else the OANDA endpoint (when a client is given), else defaults"""
+        cache_path = cache_path or INSTRUMENT_METADATA_CONFIG['cache_path']
+        if os.path.exists(cache_path):
+            with open(cache_path) as f:
+                return cls(json.load(f)['instruments'])
+        if client is not None:
+            try:
+                metadata = cls.from_oanda(client)
+                metadata.save(cache_path)
+                return metadata
+            except Exception as e:
+                logger.warning(f"Could not fetch OANDA instruments, using defaults: {e}")
+        return cls(DEFAULT_INSTRUMENTS)
+
+    def save(self, cache_path: Optional[str] = None):
+        cache_path = cache_path or INSTRUMENT_METADATA_CONFIG['cache_path']
+        os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+        with open(cache_path, 'w') as f:
+            json.dump({'fetched': datetime.now().isoformat(),
+                       'instruments': [self.raw[name] for name in self.names]}, f, indent=2)
+
+    def indices(self, instruments) -> np.ndarray:
+        """Row index of each instrument; instruments missing from the table get a derived default row"""
+        if isinstance(instruments, str):
+            instruments = [instruments]
+        names = [normalize_instrument(i) for i in instruments]
+        missing = [n for n in dict.fromkeys(names) if n not in self.index]
+        if missing:
+            with self._lock:
+                self._extend([self._default_row(n) for n in missing if n not in self.index])
+        return np.fromiter((self.index[n] for n in names), dtype=np.int64, count=len(names))
+
+    def _default_row(self, name: str) -> Dict:
+        logger.warning(f"No metadata for {name}, assuming {'JPY' if name.endswith('_JPY') else 'standard'} pip")
+        jpy = name.endswith('_JPY')
+        return {'name': name, 'type': 'CURRENCY', 'pipLocation': -2 if jpy else -4,
+                'displayPrecision': 3 if jpy else 5, 'tradeUnitsPrecision': 0,
+                'minimumTradeSize': '1', 'marginRate': '0.05'}
+
+    def get(self, instrument: str) -> Dict:
+        i = self.indices(instrument)[0]
+        return {
+            'name': self.names[i],
+            'pip_location': int(self.pip_location[i]),
+            'pip_size': float(self.pip_size[i]),
+            'display_precision': int(self.display_precision[i]),
+            'min_trade_size': float(self.min_trade_size[i]),
+            'margin_rate': float(self.margin_rate[i]),
+        }
+
+    def pip_size_of(self, instrument: str) -> float:
+        i = self.indices(instrument)[0]  # May grow the arrays, so index before reading them
+        return float(self.pip_size[i])
+
+    def precision_of(self, instrument: str) -> int:
+        i = self.indices(instrument)[0]
+        return int(self.display_precision[i])
+
+    def round_price(self, instrument: str, price: float) -> float:
+        """Round a price to the instrument's display precision (what OANDA accepts for TP/SL)"""
+        return round(float(price), self.precision_of(instrument))
+
+    def quote_conversion(self, idx: np.ndarray, prices: np.ndarray, account_currency: str,
+                         quote_rates: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """
+        Factor converting quote-currency amounts into the account currency
+        Crosses use quote_rates[quote] when given; otherwise 1/price for 2-decimal-pip
+        quotes (JPY-style) and 1.0 for the rest
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        conversion = np.where(self.pip_location[idx] >= -2, 1.0 / prices, 1.0)
+        if quote_rates:
+            known = np.array([quote_rates.get(q, np.nan) for q in self.quote[idx]], dtype=np.float64)
+            conversion = np.where(np.isnan(known), conversion, known)
+        conversion = np.where(self.base[idx] == account_currency, 1.0 / prices, conversion)
+        return np.where(self.quote[idx] == account_currency, 1.0, conversion)
+
+    def pip_values(self, instruments: Sequence[str], prices, account_currency: Optional[str] = None,
+                   quote_rates: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """Account-currency value of one pip per unit for each instrument"""
+        idx = self.indices(instruments)
+        account_currency = account_currency or INSTRUMENT_METADATA_CONFIG['account_currency']
+        return self.pip_size[idx] * self.quote_conversion(idx, prices, account_currency, quote_rates)
+
+    def position_sizes(self, instruments: Sequence[str], entries, stops, risk_amounts,
+                       account_currency: Optional[str] = None, max_units=None,
+                       quote_rates: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """
+        Vectorized risk-based sizing for a batch of candidate trades
+
+        Args:
+            instruments, entries, stops: One element per candidate trade
+            risk_amounts: Account-currency amount to lose at the stop (scalar or per trade)
+            max_units: Optional cap on units (scalar or per trade)
+
+        Returns:
+            Unsigned units, floored to each instrument's units precision; 0 where the stop
+            distance is zero or the size falls below the minimum trade size
+        """
+        idx = self.indices(instruments)
+        entries = np.asarray(entries, dtype=np.float64)
+        stops = np.asarray(stops, dtype=np.float64)
+        account_currency = account_currency or INSTRUMENT_METADATA_CONFIG['account_currency']
+
+        risk_per_unit = np.abs(entries - stops) * self.quote_conversion(idx, entries, account_currency, quote_rates)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            units = np.where(risk_per_unit > 0, np.asarray(risk_amounts, dtype=np.float64) / risk_per_unit, 0.0)
+        if max_units is not None:
+            units = np.minimum(units, max_units)
+        scale = 10.0 ** self.units_precision[idx]
+        units = np.floor(units * scale + 1e-9) / scale  # Tolerate float noise in the stop distance
+        return np.where(units >= self.min_trade_size[idx], units, 0.0)
+
+
+_metadata = None
+_metadata_lock = threading.Lock()
+
+
+def get_instrument_metadata() -> InstrumentMetadata:
+    """Process-wide table, loaded once from the cache file (or defaults)"""
+    global _metadata
+    if _metadata is None:
+        with _metadata_lock:
+            if _metadata is None:
+                _metadata = InstrumentMetadata.load()
+    return _metadata
+
+
+def main():
+    """python instrument_metadata.py [refresh]  - refresh pulls the table from OANDA into the cache"""
+    logging.basicConfig(level=logging.INFO)
+    cache_path = INSTRUMENT_METADATA_CONFIG['cache_path']
+    if len(sys.argv) > 1 and sys.argv[1] == 'refresh':
+        metadata = InstrumentMetadata.from_oanda()
+        metadata.save(cache_path)
+        print(f"✅ Cached {len(metadata.names)} instruments to {cache_path}")
+    else:
+        metadata = InstrumentMetadata.load(cache_path)
+
+    print(f"\n📐 {'Instrument':<12} {'Pip':>8} {'Precision':>10} {'Min Size':>9} {'Margin':>7}")
+    for name in metadata.names:
+        info = metadata.get(name)
+        print(f"   {name:<12} {info['pip_size']:>8g} {info['display_precision']:>10} "
+              f"{info['min_trade_size']:>9g} {info['margin_rate']:>7.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Latency Tracing
+Monotonic-clock spans for the webhook pipeline. A Trace collects named stage durations for
+one alert; every span also lands in a per-stage fixed-bucket histogram for the whole
+process. The active trace is thread-local, so OandaClient can add spans without being
+passed a trace, and recording a span costs two perf_counter_ns calls and a list append.
+"""
+
+import time
+import uuid
+import bisect
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+TRACE_CONFIG = {
+    'max_traces': 2000,   # Most recent traces kept for /debug/trace
+    'buckets_ms': [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000],
+}
+
+
+class StageHistogram:
+    """Count, sum, min, max and fixed-bucket counts of one stage's durations"""
+
+    def __init__(self, buckets_ms: List[float]):
+        self.bounds = buckets_ms
+        self.counts = [0] * (len(buckets_ms) + 1)  # Last bucket is +Inf
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = None
+        self.max_ms = 0.0
+
+    def observe(self, ms: float):
+        self.counts[bisect.bisect_left(self.bounds, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.min_ms = ms if self.min_ms is None or ms < self.min_ms else self.min_ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th observation"""
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return self.bounds[i] if i < len(self.bounds) else self.max_ms
+        return self.max_ms
+
+    def summary(self) -> Dict:
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total_ms / self.count, 3) if self.count else None,
+            'min_ms': self.min_ms,
+            'max_ms': self.max_ms,
+            'p50_ms': self.quantile(0.5),
+            'p99_ms': self.quantile(0.99),
+        }
+
+
+class Trace:
+    """Stage spans for one alert, in the order they finished"""
+
+    def __init__(self, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or uuid.uuid4().hex[:12]
+        self.webhook_id = None  # Set once the alert is logged, so the trace can be found by it
+        self.started = time.perf_counter_ns()
+        self.finished = None
+        self.spans = []  # (stage, start offset ms, duration ms)
+
+    def add(self, stage: str, start_ns: int, end_ns: int):
+        self.spans.append((stage, (start_ns - self.started) / 1e6, (end_ns - start_ns) / 1e6))
+
+    def breakdown(self) -> Dict:
+        return {
+            'trace_id': self.trace_id,
+            'elapsed_ms': round(((self.finished or time.perf_counter_ns()) - self.started) / 1e6, 3),
+            'spans': [{'stage': stage, 'start_ms': round(start, 3), 'duration_ms': round(duration, 3)}
+                      for stage, start, duration in self.spans],
+        }
+
+
+_local = threading.local()
+_histograms = {}
+_histogram_lock = threading.Lock()
+_traces = OrderedDict()
+_traces_lock = threading.Lock()
+
+
+def current() -> Optional[Trace]:
+    return getattr(_local, 'trace', None)
+
+
+@contextmanager
+def activate(trace: Optional[Trace], prefix: str = ''):
+    """Make `trace` the current thread's trace; span names get `prefix` (e.g. per account)"""
+    previous = getattr(_local, 'trace', None), getattr(_local, 'prefix', '')
+    _local.trace, _local.prefix = trace, prefix
+    try:
+        yield trace
+    finally:
+        _local.trace, _local.prefix = previous
+
+
+def _observe(stage: str, ms: float):
+    histogram = _histograms.get(stage)
+    if histogram is None:
+        with _histogram_lock:
+            histogram = _histograms.setdefault(stage, StageHistogram(TRACE_CONFIG['buckets_ms']))
+    histogram.observe(ms)
+
+
+@contextmanager
+def span(stage: str):
+    """Time the block into the stage histogram and, if one is active, the current trace"""
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        end = time.perf_counter_ns()
+        _observe(stage, (end - start) / 1e6)
+        trace = getattr(_local, 'trace', None)
+        if trace is not None:
+            trace.add(_local.prefix + stage, start, end)
+
+
+def start_trace(trace_id: Optional[str] = None) -> Trace:
+    """Begin a trace on this thread (Flask before_request); pair with finish_trace"""
+    trace = Trace(trace_id)
+    _local.trace, _local.prefix = trace, ''
+    return trace
+
+
+def finish_trace(stage: str = 'total') -> Optional[Trace]:
+    """Record the trace's total as `stage`, store it under its ids and deactivate it"""
+    trace = getattr(_local, 'trace', None)
+    _local.trace = None
+    if trace is None:
+        return None
+    end = time.perf_counter_ns()
+    _observe(stage, (end - trace.started) / 1e6)
+    trace.add(stage, trace.started, end)
+    trace.finished = end
+    store(trace.trace_id, trace)
+    if trace.webhook_id is not None:
+        store(trace.webhook_id, trace)
+    return trace
+
+
+def store(key, trace: Trace):
+    """Keep a finished trace for lookup by webhook id (oldest dropped beyond max_traces)"""
+    with _traces_lock:
+        _traces[str(key)] = trace
+        _traces.move_to_end(str(key))
+        while len(_traces) > TRACE_CONFIG['max_traces']:
+            _traces.popitem(last=False)
+
+
+def get_trace(key) -> Optional[Dict]:
+    with _traces_lock:
+        trace = _traces.get(str(key))
+    return trace.breakdown() if trace else None
+
+
+def stage_summary() -> Dict[str, Dict]:
+    with _histogram_lock:
+        histograms = dict(_histograms)
+    return {stage: h.summary() for stage, h in sorted(histograms.items())}
+
+
+def histograms() -> Dict[str, StageHistogram]:
+    with _histogram_lock:
+        return dict(_histograms)
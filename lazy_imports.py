@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Lazy Imports
+Module stand-ins that import the real module on first attribute access, so heavy libraries
+(numpy, pandas, scikit-learn) stay out of the web process's cold start until a code path
+actually needs them.
+
+    np = lazy_module('numpy')   # nothing imported yet
+    np.zeros(3)                 # numpy imported here, then attributes are cached
+"""
+
+import sys
+import types
+import importlib
+
+
+class _LazyModule(types.ModuleType):
+    def __getattr__(self, attr):
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)  # Later lookups skip __getattr__ entirely
+        return getattr(module, attr)
+
+    def __repr__(self):
+        state = 'loaded' if self.__name__ in sys.modules else 'not loaded'
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_module(name: str) -> types.ModuleType:
+    """The module itself if already imported, else a stand-in that imports it on first use"""
+    if name in sys.modules:
+        return sys.modules[name]
+    return _LazyModule(name)
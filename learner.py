@@ -8,7 +8,14 @@ import joblib
 
 MODEL_PATH = "ai_model.pkl"
 
-def load_data():
+def load_data(dataset_path=None):
+    if dataset_path:
+        # Synthetic trades from trade_dataset.py instead of the live journal
+        from trade_dataset import load_dataset, dataset_to_dataframe
+        df = dataset_to_dataframe(load_dataset(dataset_path))
+        df["action"] = df["action"].astype(str)
+        df["result"] = np.where(df["profitable"], "win", "loss")
+        return df
     with open("trade_journal.json", "r") as f:
         trades = json.load(f)
     return pd.DataFrame(trades)
@@ -20,8 +27,8 @@ def engineer_features(df):
     features = ["entry", "stop_loss", "take_profit", "confidence", "reward_risk", "direction"]
     return df[features], df["target"]
 
-def train_ai():
-    df = load_data()
+def train_ai(dataset_path=None):
+    df = load_data(dataset_path)
     if len(df) < 20:
         return "Not enough trades yet to train."
     
@@ -13,6 +13,9 @@ from typing import Dict, List, Optional
 import os
 from dotenv import load_dotenv
 
+from trade_reconciler import TradeReconciler
+from trading_scheduler import TradingScheduler
+
 # Load environment variables
 load_dotenv()
 
@@ -67,7 +70,8 @@ class LiveTradingSystem:
             'max_daily_trades': 10,
             'max_daily_loss': 50.0,  # $50 maximum daily loss
             'min_confidence': float(os.getenv('MIN_CONFIDENCE_THRESHOLD', '0.7')),
-            'scan_interval': 30,  # seconds
+            'scan_granularity': 'M1',  # Scan pairs when a candle of this granularity closes
+            'trade_check_interval': 5,  # Minimum seconds between reconciliations while trades are open
             'active_pairs': [
                 'EUR_USD', 'GBP_USD', 'USD_JPY', 'USD_CHF', 
                 'AUD_USD', 'USD_CAD', 'NZD_USD', 'EUR_GBP'
@@ -89,6 +93,14 @@ class LiveTradingSystem:
         
         # Active trades tracking
         self.active_trades = []
+        self._last_trade_check = 0.0
+        self.reconciler = TradeReconciler(self.oanda)
+        
+        # Candle-close scans and price ticks for pairs with open trades
+        self.scheduler = TradingScheduler(oanda=self.oanda)
+        self.scheduler.on_candle_close(self.config['active_pairs'], self.config['scan_granularity'],
+                                       self.on_candle_close)
+        self.scheduler.on_tick(lambda: {t['pair'] for t in self.active_trades}, self.on_price_tick)
         
         logger.info("Live trading system initialized")
     
@@ -180,7 +192,7 @@ class LiveTradingSystem:
             
             # Calculate position size
             position_info = self.safety.calculate_safe_position_size(
-                200.0, 50, pair  # $200 balance, 50 pip stop loss
+                200.0, 50, pair, entry_price  # $200 balance, 50 pip stop loss
             )
             
             executable_trade = {
@@ -236,17 +248,17 @@ class LiveTradingSystem:
             return False
     
     def update_active_trades(self):
-        """Update status of active trades and handle closures"""
+        """Reconcile active trades against OANDA in one request and handle closures"""
         try:
             trades_to_remove = []
+            closed = {event['trade_id']: event for event in self.reconciler.sync()}
             
             for i, trade in enumerate(self.active_trades):
-                # Check if trade is still open
-                trade_status = self.oanda.get_trade_status(trade['id'])
+                event = closed.get(trade['id'])
                 
-                if trade_status and trade_status.get('state') == 'CLOSED':
+                if event:
                     # Trade was closed, update statistics
-                    profit = trade_status.get('profit', 0.0)
+                    profit = event['realized_pl']
                     self.daily_stats['profit_loss'] += profit
                     
                     if profit > 0:
@@ -267,53 +279,56 @@ class LiveTradingSystem:
             # Remove closed trades from active list
             for i in reversed(trades_to_remove):
                 self.active_trades.pop(i)
+            if trades_to_remove:
+                self.scheduler.notify_positions_changed()
                 
         except Exception as e:
             logger.error(f"Error updating active trades: {e}")
     
+    def on_candle_close(self, pairs: List[str], granularity: str, close_time: datetime):
+        """Scan pairs for new trades once per closed candle"""
+        try:
+            # Reset daily stats if needed
+            self.reset_daily_stats_if_needed()
+            
+            # Check if we can place new trades
+            can_trade, reason = self.can_place_new_trade()
+            
+            if can_trade:
+                # Scan for trading opportunities
+                for pair in pairs:
+                    if len(self.active_trades) >= self.config['max_concurrent_trades']:
+                        break
+                    
+                    # Generate trade signal
+                    trade_signal = self.generate_trade_signal(pair)
+                    
+                    if trade_signal and trade_signal.get('confidence', 0) >= self.config['min_confidence']:
+                        logger.info(f"🎯 Trade opportunity found: {pair} "
+                                   f"(confidence: {trade_signal.get('confidence', 0):.2f})")
+                        
+                        # Execute the trade
+                        if self.execute_trade(trade_signal):
+                            self.scheduler.notify_positions_changed()
+            else:
+                if reason != "Outside trading hours":  # Don't spam log during off hours
+                    logger.info(f"⏸️ Trading paused: {reason}")
+                    
+        except Exception as e:
+            logger.error(f"Error scanning on {granularity} close {close_time:%H:%M}: {e}")
+    
+    def on_price_tick(self, pair: str, price: Dict):
+        """Reconcile trades as prices move on held pairs, at most once per trade_check_interval"""
+        now = time.monotonic()
+        if now - self._last_trade_check < self.config['trade_check_interval']:
+            return
+        self._last_trade_check = now
+        self.update_active_trades()
+    
     def trading_loop(self):
-        """Main trading loop"""
+        """Main trading loop: sleeps until the next candle close or stop request"""
         logger.info("🚀 Starting autonomous trading loop")
-        
-        while self.is_running:
-            try:
-                # Reset daily stats if needed
-                self.reset_daily_stats_if_needed()
-                
-                # Update active trades
-                self.update_active_trades()
-                
-                # Check if we can place new trades
-                can_trade, reason = self.can_place_new_trade()
-                
-                if can_trade:
-                    # Scan for trading opportunities
-                    for pair in self.config['active_pairs']:
-                        if len(self.active_trades) >= self.config['max_concurrent_trades']:
-                            break
-                        
-                        # Generate trade signal
-                        trade_signal = self.generate_trade_signal(pair)
-                        
-                        if trade_signal and trade_signal.get('confidence', 0) >= self.config['min_confidence']:
-                            logger.info(f"🎯 Trade opportunity found: {pair} "
-                                       f"(confidence: {trade_signal.get('confidence', 0):.2f})")
-                            
-                            # Execute the trade
-                            if self.execute_trade(trade_signal):
-                                # Wait a bit before looking for next trade
-                                time.sleep(5)
-                else:
-                    if reason != "Outside trading hours":  # Don't spam log during off hours
-                        logger.info(f"⏸️ Trading paused: {reason}")
-                
-                # Wait before next scan
-                time.sleep(self.config['scan_interval'])
-                
-            except Exception as e:
-                logger.error(f"Error in trading loop: {e}")
-                time.sleep(60)  # Wait longer on error
-        
+        self.scheduler.run()
         logger.info("🛑 Trading loop stopped")
     
     def start_trading(self) -> bool:
@@ -337,10 +352,15 @@ class LiveTradingSystem:
             logger.info("✅ OANDA connection verified - LIVE TRADING MODE")
             logger.info(f"Account Balance: ${account_info.get('balance', 'Unknown')}")
             
-            # Start trading thread
+            # Baseline the reconciler before anything can place orders, so a trade that fills and
+            # closes before the first price tick still produces its close event
+            self.reconciler.sync()
+            
+            # Start trading thread and the price-tick stream for open trades
             self.is_running = True
             self.trading_thread = threading.Thread(target=self.trading_loop, daemon=True)
             self.trading_thread.start()
+            self.scheduler.start_ticks()
             
             logger.info("🚀 Autonomous trading started!")
             return True
@@ -357,6 +377,7 @@ class LiveTradingSystem:
         
         logger.info("🛑 Stopping autonomous trading...")
         self.is_running = False
+        self.scheduler.stop()
         
         if self.trading_thread and self.trading_thread.is_alive():
             self.trading_thread.join(timeout=5)
@@ -374,10 +395,11 @@ class LiveTradingSystem:
                 'max_concurrent_trades': self.config['max_concurrent_trades'],
                 'max_daily_trades': self.config['max_daily_trades'],
                 'max_daily_loss': self.config['max_daily_loss'],
-                'scan_interval': self.config['scan_interval'],
+                'scan_granularity': self.config['scan_granularity'],
                 'active_pairs': self.config['active_pairs']
             },
-            'ai_system_available': AI_SYSTEM_AVAILABLE and self.ai_trader is not None
+            'ai_system_available': AI_SYSTEM_AVAILABLE and self.ai_trader is not None,
+            'scheduler': self.scheduler.stats.copy()
         }
 
 # Global instance for Flask app integration
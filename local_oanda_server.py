@@ -0,0 +1,1027 @@
+#!/usr/bin/env python3
+"""
+Local OANDA v20 Stand-in Server
+Implements the v20 REST endpoints this project uses (pricing, orders with on-fill TP/SL,
+trade details/close/CRCDO, account details/summary/instruments, transactions and candles) on top of
+an in-memory order book. Prices replay from the candle cache (or seeded synthetic candles)
+and every call can be delayed and failed on purpose, so OandaClient, OandaBalanceSync,
+CandleCache and the webhook can be load-tested offline.
+
+Point clients at it with:
+    OANDA_STANDIN_URL=http://127.0.0.1:8090
+
+Usage:
+    python local_oanda_server.py [--port 8090] [--latency-ms MS] [--error-rate P]
+                                 [--bars-per-second N] [--granularity M5]
+"""
+
+import sys
+import time
+import zlib
+import random
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from flask import Flask, g, jsonify, request
+
+from candle_cache import CandleCache, GRANULARITY_SECONDS, MAX_CANDLES_PER_REQUEST, generate_synthetic_candles
+from instrument_metadata import get_instrument_metadata
+from sevensys_backtester import quote_conversion
+
+logger = logging.getLogger(__name__)
+
+STANDIN_CONFIG = {
+    'host': '127.0.0.1',
+    'port': 8090,
+    'account_id': '101-000-00000000-001',
+    'auto_create_accounts': True,   # Any account ID in a URL gets its own fresh account
+    'initial_balance': 10000.0,
+    'currency': 'USD',
+    'margin_rate': 0.02,            # 50:1 leverage
+    'granularity': 'M5',            # Bars replayed by the price feed
+    'cache_dir': 'data/candles',
+    'synthetic_bars': 20000,        # Used when the cache has nothing for an instrument
+    'start_bar': 200,               # Replay starts here so candles have history behind them
+    'bars_per_second': 1.0,         # Wall-clock replay speed; 0 freezes prices until /standin/advance
+    'latency_distribution': 'lognormal',  # 'lognormal' or 'fixed'
+    'latency_ms': 0.0,              # Mean added latency per request
+    'latency_jitter': 0.5,          # Lognormal sigma
+    'endpoint_latency_ms': {},      # Per-group overrides, e.g. {'orders': 120, 'pricing': 15}
+    'error_rate': 0.0,              # Fraction of requests failed on purpose
+    'endpoint_error_rate': {},      # Per-group overrides
+    'error_status': 503,
+    'seed': 42,
+}
+
+# Synthetic start prices for instruments with no cached candles
+SYNTHETIC_START_PRICES = {
+    'XAU_USD': 2000.0, 'XAG_USD': 25.0, 'BTC_USD': 40000.0,
+    'GBP_USD': 1.27, 'AUD_USD': 0.66, 'NZD_USD': 0.61, 'USD_CAD': 1.35, 'USD_CHF': 0.88,
+    'EUR_GBP': 0.86, 'EUR_USD': 1.10,
+}
+
+
+def format_time(epoch_seconds) -> str:
+    """RFC3339 with nanoseconds, the format OANDA returns"""
+    return datetime.fromtimestamp(int(epoch_seconds), timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000000000Z')
+
+
+def parse_time(value: str) -> int:
+    """Epoch seconds from an RFC3339 or UNIX timestamp query parameter"""
+    try:
+        return int(float(value))
+    except ValueError:
+        return int(pd.Timestamp(value).timestamp())
+
+
+def price_precision(instrument: str) -> int:
+    return get_instrument_metadata().precision_of(instrument)
+
+
+class StandinError(Exception):
+    """Error returned to the client as an OANDA-style JSON body"""
+
+    def __init__(self, status: int, message: str, code: Optional[str] = None, body: Optional[Dict] = None):
+        super().__init__(message)
+        self.status = status
+        self.body = body or {}
+        self.body.setdefault('errorMessage', message)
+        if code:
+            self.body.setdefault('errorCode', code)
+
+
+class PriceFeed:
+    """Replays cached (or synthetic) MBA candles as the live price of each instrument"""
+
+    def __init__(self, config: Dict):
+        self.config = config
+        self.granularity = config['granularity']
+        self.cache = CandleCache(config['cache_dir'])
+        self._series = {}
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._advanced = 0
+
+    def series(self, instrument: str, granularity: Optional[str] = None) -> np.ndarray:
+        """Candles for an instrument, from the cache or generated on first use"""
+        granularity = granularity or self.granularity
+        key = (instrument, granularity)
+        with self._lock:
+            if key not in self._series:
+                candles = self.cache.load(instrument, granularity)
+                if candles is None or len(candles) == 0:
+                    candles = self._synthetic(instrument, granularity)
+                self._series[key] = candles
+            return self._series[key]
+
+    def _synthetic(self, instrument: str, granularity: str) -> np.ndarray:
+        if instrument.endswith('_JPY'):
+            start_price = 150.0
+        else:
+            start_price = SYNTHETIC_START_PRICES.get(instrument, 1.0)
+        scale = start_price / 1.1
+        seed = zlib.crc32(instrument.encode()) + self.config['seed']
+        logger.info(f"No cached {instrument} {granularity} candles, replaying synthetic prices")
+        return generate_synthetic_candles(n_bars=self.config['synthetic_bars'], granularity=granularity,
+                                          seed=seed, start_price=start_price,
+                                          spread=0.00012 * scale, volatility=0.0004)
+
+    def advance(self, bars: int):
+        with self._lock:
+            self._advanced += int(bars)
+
+    def bar_offset(self) -> int:
+        """Bars replayed since start-up"""
+        elapsed = time.monotonic() - self._started
+        return self._advanced + int(elapsed * self.config['bars_per_second'])
+
+    def index(self, instrument: str) -> int:
+        candles = self.series(instrument)
+        return min(len(candles) - 1, self.config['start_bar'] + self.bar_offset())
+
+    def quote(self, instrument: str) -> Dict:
+        """Current bid/ask: the close of the bar being replayed"""
+        candles = self.series(instrument)
+        bar = candles[self.index(instrument)]
+        return {'bid': float(bar['bid_c']), 'ask': float(bar['ask_c']), 'time': int(bar['time'])}
+
+    def bars_between(self, instrument: str, start: int, end: int) -> np.ndarray:
+        return self.series(instrument)[start:end + 1]
+
+    def candles(self, instrument: str, granularity: str, count: Optional[int],
+                start: Optional[int], end: Optional[int]) -> np.ndarray:
+        """Completed candles up to the replayed time, filtered like InstrumentsCandles"""
+        now = self.quote(instrument)['time']
+        candles = self.series(instrument, granularity)
+        stop = int(np.searchsorted(candles['time'], min(now, end) if end is not None else now, side='right'))
+        if start is not None:
+            first = int(np.searchsorted(candles['time'], start, side='left'))
+            if count is not None and end is None:
+                stop = min(stop, first + count)
+            return candles[first:stop]
+        count = count or 500
+        return candles[max(0, stop - count):stop]
+
+
+class StandinBroker:
+    """In-memory accounts, trades and dependent TP/SL orders matched against the price feed"""
+
+    def __init__(self, config: Dict, feed: PriceFeed):
+        self.config = config
+        self.feed = feed
+        self.accounts = {}
+        self._lock = threading.RLock()
+        self.account(config['account_id'])
+
+    # ------------------------------------------------------------------ accounts
+
+    def account(self, account_id: str) -> Dict:
+        with self._lock:
+            if account_id not in self.accounts:
+                if self.accounts and not self.config['auto_create_accounts']:
+                    raise StandinError(404, f"The Account specified [{account_id}] does not exist",
+                                       "NO_SUCH_ACCOUNT")
+                self.accounts[account_id] = {
+                    'id': account_id,
+                    'currency': self.config['currency'],
+                    'balance': float(self.config['initial_balance']),
+                    'pl': 0.0,
+                    'trades': {},
+                    'orders': {},
+                    'transactions': [],
+                    'last_id': 0,
+                    'created': time.time(),
+                }
+            return self.accounts[account_id]
+
+    def _transaction(self, account: Dict, txn_type: str, **fields) -> Dict:
+        account['last_id'] += 1
+        txn = {
+            'id': str(account['last_id']),
+            'accountID': account['id'],
+            'userID': 1,
+            'batchID': str(account['last_id']),
+            'time': format_time(time.time()),
+            'type': txn_type,
+        }
+        txn.update(fields)
+        account['transactions'].append(txn)
+        return txn
+
+    def _fmt(self, instrument: str, price: float) -> str:
+        return f"{price:.{price_precision(instrument)}f}"
+
+    def _conversion(self, account: Dict, instrument: str, price: float) -> float:
+        return quote_conversion(instrument, account['currency'], price)
+
+    def _unrealized(self, account: Dict, trade: Dict) -> float:
+        quote = self.feed.quote(trade['instrument'])
+        exit_price = quote['bid'] if trade['units'] > 0 else quote['ask']
+        return (exit_price - trade['price']) * trade['units'] * self._conversion(account, trade['instrument'], exit_price)
+
+    def _margin(self, account: Dict, instrument: str, units: float, price: float) -> float:
+        return abs(units) * price * self._conversion(account, instrument, price) * self.config['margin_rate']
+
+    def _margin_used(self, account: Dict) -> float:
+        return sum(self._margin(account, t['instrument'], t['units'], t['price']) for t in account['trades'].values())
+
+    def summary(self, account_id: str) -> Dict:
+        with self._lock:
+            account = self.account(account_id)
+            self.match(account)
+            unrealized = sum(self._unrealized(account, t) for t in account['trades'].values())
+            margin_used = self._margin_used(account)
+            nav = account['balance'] + unrealized
+            instruments = {t['instrument'] for t in account['trades'].values()}
+            return {
+                'id': account['id'],
+                'alias': 'Stand-in',
+                'currency': account['currency'],
+                'balance': f"{account['balance']:.4f}",
+                'NAV': f"{nav:.4f}",
+                'pl': f"{account['pl']:.4f}",
+                'unrealizedPL': f"{unrealized:.4f}",
+                'marginRate': str(self.config['margin_rate']),
+                'marginUsed': f"{margin_used:.4f}",
+                'marginAvailable': f"{max(0.0, nav - margin_used):.4f}",
+                'openTradeCount': len(account['trades']),
+                'openPositionCount': len(instruments),
+                'pendingOrderCount': len(account['orders']),
+                'hedgingEnabled': False,
+                'createdTime': format_time(account['created']),
+                'lastTransactionID': str(account['last_id']),
+            }
+
+    def details(self, account_id: str) -> Dict:
+        with self._lock:
+            details = self.summary(account_id)
+            account = self.accounts[account_id]
+            details['trades'] = self.open_trades(account_id)
+            details['positions'] = self.open_positions(account_id)
+            details['orders'] = [dict(o) for o in account['orders'].values()]
+            return details
+
+    def open_trades(self, account_id: str) -> List[Dict]:
+        with self._lock:
+            account = self.account(account_id)
+            self.match(account)
+            return [self._trade_json(account, t) for t in sorted(account['trades'].values(),
+                                                                 key=lambda t: -int(t['id']))]
+
+    def open_positions(self, account_id: str) -> List[Dict]:
+        with self._lock:
+            account = self.account(account_id)
+            self.match(account)
+            positions = {}
+            for trade in account['trades'].values():
+                side = 'long' if trade['units'] > 0 else 'short'
+                position = positions.setdefault(trade['instrument'], {
+                    'instrument': trade['instrument'],
+                    'long': {'units': 0.0, 'tradeIDs': [], 'unrealizedPL': 0.0, 'notional': 0.0},
+                    'short': {'units': 0.0, 'tradeIDs': [], 'unrealizedPL': 0.0, 'notional': 0.0},
+                })
+                position[side]['units'] += trade['units']
+                position[side]['tradeIDs'].append(trade['id'])
+                position[side]['unrealizedPL'] += self._unrealized(account, trade)
+                position[side]['notional'] += trade['units'] * trade['price']
+
+            result = []
+            for instrument, position in positions.items():
+                unrealized = 0.0
+                for side in ('long', 'short'):
+                    data = position[side]
+                    unrealized += data['unrealizedPL']
+                    if data['units']:
+                        data['averagePrice'] = self._fmt(instrument, data['notional'] / data['units'])
+                    del data['notional']
+                    data['units'] = str(int(data['units']))
+                    data['unrealizedPL'] = f"{data['unrealizedPL']:.4f}"
+                position['unrealizedPL'] = f"{unrealized:.4f}"
+                result.append(position)
+            return result
+
+    def transactions_since(self, account_id: str, since_id: int) -> Dict:
+        with self._lock:
+            account = self.account(account_id)
+            self.match(account)
+            return {
+                'transactions': [t for t in account['transactions'] if int(t['id']) > since_id],
+                'lastTransactionID': str(account['last_id']),
+            }
+
+    def changes(self, account_id: str, since_id: int) -> Dict:
+        """AccountChanges: trades opened/reduced/closed and transactions after since_id"""
+        with self._lock:
+            account = self.account(account_id)
+            self.match(account)
+            transactions = [t for t in account['transactions'] if int(t['id']) > since_id]
+            closed, reduced, opened = {}, set(), {}
+            for txn in transactions:
+                if txn['type'] != 'ORDER_FILL':
+                    continue
+                if txn.get('tradeOpened'):
+                    opened[txn['tradeOpened']['tradeID']] = txn
+                for trade in txn.get('tradesClosed', []):
+                    closed[trade['tradeID']] = {
+                        'id': trade['tradeID'], 'instrument': txn['instrument'], 'state': 'CLOSED',
+                        'realizedPL': trade['realizedPL'], 'averageClosePrice': trade['price'],
+                        'closeTime': txn['time'],
+                    }
+                if txn.get('tradeReduced'):
+                    reduced.add(txn['tradeReduced']['tradeID'])
+            # As on OANDA, a trade opened and closed inside the window is in tradesOpened and tradesClosed
+            for trade_id, txn in opened.items():
+                if trade_id in closed:
+                    closed[trade_id].update(price=txn['tradeOpened']['price'], openTime=txn['time'],
+                                            initialUnits=txn['tradeOpened']['units'], currentUnits='0')
+            trades = account['trades']
+            summary = self.summary(account_id)
+            return {
+                'changes': {
+                    'tradesOpened': [self._trade_json(account, t) for t in trades.values() if int(t['id']) > since_id] +
+                                    [closed[trade_id] for trade_id in opened if trade_id in closed],
+                    'tradesReduced': [self._trade_json(account, trades[i]) for i in reduced if i in trades],
+                    'tradesClosed': list(closed.values()),
+                    'transactions': transactions,
+                },
+                'state': {key: summary[key] for key in ('NAV', 'unrealizedPL', 'marginUsed', 'marginAvailable')},
+                'lastTransactionID': str(account['last_id']),
+            }
+
+    def pricing(self, account_id: str, instruments: List[str]) -> Dict:
+        self.account(account_id)
+        prices = []
+        for instrument in instruments:
+            quote = self.feed.quote(instrument)
+            prices.append({
+                'type': 'PRICE',
+                'instrument': instrument,
+                'time': format_time(quote['time']),
+                'bids': [{'price': self._fmt(instrument, quote['bid']), 'liquidity': 10000000}],
+                'asks': [{'price': self._fmt(instrument, quote['ask']), 'liquidity': 10000000}],
+                'closeoutBid': self._fmt(instrument, quote['bid']),
+                'closeoutAsk': self._fmt(instrument, quote['ask']),
+                'status': 'tradeable',
+                'tradeable': True,
+            })
+        return {'prices': prices, 'time': format_time(time.time())}
+
+    # ------------------------------------------------------------------ trades
+
+    def _trade(self, account: Dict, trade_id: str) -> Dict:
+        trade = account['trades'].get(str(trade_id))
+        if trade is None:
+            raise StandinError(404, f"The Trade or Order specified [{trade_id}] does not exist",
+                               "NO_SUCH_TRADE")
+        return trade
+
+    def _trade_json(self, account: Dict, trade: Dict) -> Dict:
+        instrument = trade['instrument']
+        data = {
+            'id': trade['id'],
+            'instrument': instrument,
+            'price': self._fmt(instrument, trade['price']),
+            'openTime': format_time(trade['open_time']),
+            'initialUnits': str(int(trade['initial_units'])),
+            'currentUnits': str(int(trade['units'])),
+            'state': 'OPEN',
+            'realizedPL': f"{trade['realized_pl']:.4f}",
+            'unrealizedPL': f"{self._unrealized(account, trade):.4f}",
+            'marginUsed': f"{self._margin(account, instrument, trade['units'], trade['price']):.4f}",
+            'financing': '0.0000',
+        }
+        for kind, key in (('STOP_LOSS', 'stopLossOrder'), ('TAKE_PROFIT', 'takeProfitOrder')):
+            order = self._dependent_order(account, trade, kind)
+            if order:
+                data[key] = dict(order)
+        return data
+
+    def trade_details(self, account_id: str, trade_id: str) -> Dict:
+        with self._lock:
+            account = self.account(account_id)
+            self.match(account)
+            trade = self._trade(account, trade_id)
+            return {'trade': self._trade_json(account, trade), 'lastTransactionID': str(account['last_id'])}
+
+    def _dependent_order(self, account: Dict, trade: Dict, kind: str) -> Optional[Dict]:
+        order_id = trade['orders'].get(kind)
+        return account['orders'].get(order_id) if order_id else None
+
+    def _add_dependent_order(self, account: Dict, trade: Dict, kind: str, price: float,
+                             reason: str = 'CLIENT_ORDER') -> Dict:
+        txn = self._transaction(account, f"{kind}_ORDER", tradeID=trade['id'],
+                                price=self._fmt(trade['instrument'], price), timeInForce='GTC',
+                                triggerCondition='DEFAULT', reason=reason)
+        account['orders'][txn['id']] = {
+            'id': txn['id'],
+            'type': kind,
+            'tradeID': trade['id'],
+            'price': txn['price'],
+            'timeInForce': 'GTC',
+            'triggerCondition': 'DEFAULT',
+            'state': 'PENDING',
+            'createTime': txn['time'],
+        }
+        trade['orders'][kind] = txn['id']
+        return txn
+
+    def _cancel_order(self, account: Dict, order_id: str, reason: str) -> Dict:
+        order = account['orders'].pop(order_id)
+        trade = account['trades'].get(order.get('tradeID'))
+        if trade and trade['orders'].get(order['type']) == order_id:
+            del trade['orders'][order['type']]
+        return self._transaction(account, 'ORDER_CANCEL', orderID=order_id, reason=reason)
+
+    def _close(self, account: Dict, trade: Dict, units: float, price: float, order_id: str,
+               reason: str) -> Dict:
+        """Fill `units` (same sign as the trade) of a trade at price and book the P&L"""
+        instrument = trade['instrument']
+        pl = (price - trade['price']) * units * self._conversion(account, instrument, price)
+        account['balance'] += pl
+        account['pl'] += pl
+        trade['units'] -= units
+        trade['realized_pl'] += pl
+
+        closed = {'tradeID': trade['id'], 'units': str(int(-units)), 'price': self._fmt(instrument, price),
+                  'realizedPL': f"{pl:.4f}", 'financing': '0.0000'}
+        if abs(trade['units']) < 1e-9:
+            for order_id_ in list(trade['orders'].values()):
+                if order_id_ in account['orders']:
+                    self._cancel_order(account, order_id_, 'LINKED_TRADE_CLOSED')
+            del account['trades'][trade['id']]
+            fill_key = 'tradesClosed'
+        else:
+            fill_key = 'tradeReduced'
+        return {'fill_key': fill_key, 'closed': closed, 'pl': pl, 'order_id': order_id, 'reason': reason}
+
+    def _fill(self, account: Dict, instrument: str, order_id: str, units: float, price: float,
+              reason: str, closes: List[Dict], opened: Optional[Dict]) -> Dict:
+        quote = self.feed.quote(instrument)
+        fill = {
+            'orderID': order_id,
+            'instrument': instrument,
+            'units': str(int(units)),
+            'price': self._fmt(instrument, price),
+            'fullVWAP': self._fmt(instrument, price),
+            'fullPrice': {
+                'bids': [{'price': self._fmt(instrument, quote['bid']), 'liquidity': 10000000}],
+                'asks': [{'price': self._fmt(instrument, quote['ask']), 'liquidity': 10000000}],
+                'closeoutBid': self._fmt(instrument, quote['bid']),
+                'closeoutAsk': self._fmt(instrument, quote['ask']),
+            },
+            'reason': reason,
+            'pl': f"{sum(c['pl'] for c in closes):.4f}",
+            'financing': '0.0000',
+            'commission': '0.0000',
+            'accountBalance': f"{account['balance']:.4f}",
+            'halfSpreadCost': '0.0000',
+        }
+        closed = [c['closed'] for c in closes if c['fill_key'] == 'tradesClosed']
+        reduced = [c['closed'] for c in closes if c['fill_key'] == 'tradeReduced']
+        if closed:
+            fill['tradesClosed'] = closed
+        if reduced:
+            fill['tradeReduced'] = reduced[0]
+        if opened:
+            fill['tradeOpened'] = opened
+        return self._transaction(account, 'ORDER_FILL', **fill)
+
+    def create_order(self, account_id: str, order: Dict) -> tuple:
+        """OrderCreate; returns (status_code, body)"""
+        with self._lock:
+            account = self.account(account_id)
+            self.match(account)
+            order_type = order.get('type', 'MARKET')
+            if order_type == 'MARKET':
+                return self._market_order(account, order)
+            if order_type in ('STOP_LOSS', 'TAKE_PROFIT'):
+                return self._dependent_order_create(account, order_type, order)
+            if order_type == 'LIMIT':
+                return self._entry_order_create(account, order)
+            raise StandinError(400, f"Order type {order_type} is not supported by the stand-in",
+                               "ORDER_TYPE_NOT_SUPPORTED")
+
+    def _entry_order_create(self, account: Dict, order: Dict) -> tuple:
+        """LIMIT entry order; it rests until cancelled (the stand-in never triggers entries)"""
+        instrument = order.get('instrument', '')
+        if '_' not in instrument or not order.get('units') or not order.get('price'):
+            raise StandinError(400, "Invalid value specified for 'instrument', 'units' or 'price'",
+                               "INVALID_ORDER")
+        txn = self._transaction(account, 'LIMIT_ORDER', instrument=instrument, units=str(order['units']),
+                                price=str(order['price']), timeInForce=order.get('timeInForce', 'GTC'),
+                                positionFill='DEFAULT', triggerCondition='DEFAULT', reason='CLIENT_ORDER')
+        account['orders'][txn['id']] = {
+            'id': txn['id'],
+            'type': 'LIMIT',
+            'instrument': instrument,
+            'units': txn['units'],
+            'price': txn['price'],
+            'timeInForce': txn['timeInForce'],
+            'triggerCondition': 'DEFAULT',
+            'state': 'PENDING',
+            'createTime': txn['time'],
+        }
+        return 201, {'orderCreateTransaction': txn, 'relatedTransactionIDs': [txn['id']],
+                     'lastTransactionID': txn['id']}
+
+    def _market_order(self, account: Dict, order: Dict) -> tuple:
+        instrument = order.get('instrument', '')
+        try:
+            units = int(float(order.get('units', 0)))
+        except ValueError:
+            units = 0
+        if '_' not in instrument or units == 0:
+            reject = self._transaction(account, 'MARKET_ORDER_REJECT', instrument=instrument,
+                                       units=str(order.get('units')), rejectReason='UNITS_INVALID'
+                                       if units == 0 else 'INSTRUMENT_UNKNOWN')
+            raise StandinError(400, "Invalid value specified for 'units'" if units == 0 else
+                               "Invalid value specified for 'instrument'", reject['rejectReason'],
+                               {'orderRejectTransaction': reject, 'lastTransactionID': reject['id']})
+
+        create = self._transaction(account, 'MARKET_ORDER', instrument=instrument, units=str(units),
+                                   timeInForce=order.get('timeInForce', 'FOK'),
+                                   positionFill=order.get('positionFill', 'DEFAULT'), reason='CLIENT_ORDER',
+                                   **{k: order[k] for k in ('takeProfitOnFill', 'stopLossOnFill')
+                                      if order.get(k)})
+        body = {'orderCreateTransaction': create}
+        quote = self.feed.quote(instrument)
+        price = quote['ask'] if units > 0 else quote['bid']
+
+        # On-fill TP/SL on the wrong side of the fill cancel the whole order, as on OANDA
+        levels = {}
+        for kind, key in (('TAKE_PROFIT', 'takeProfitOnFill'), ('STOP_LOSS', 'stopLossOnFill')):
+            spec = order.get(key)
+            if not spec:
+                continue
+            if 'price' in spec:
+                level = float(spec['price'])
+            else:
+                distance = float(spec['distance'])
+                level = price - distance if (kind == 'STOP_LOSS') == (units > 0) else price + distance
+            wrong_side = (level <= price) if (kind == 'TAKE_PROFIT') == (units > 0) else (level >= price)
+            if wrong_side:
+                return self._cancel_market(account, body, create, f"{kind}_ON_FILL_LOSS")
+            levels[kind] = level
+
+        # positionFill DEFAULT nets against opposite trades first-in first-out
+        closes = []
+        remaining = units
+        for trade in sorted(account['trades'].values(), key=lambda t: int(t['id'])):
+            if trade['instrument'] != instrument or (trade['units'] > 0) == (remaining > 0) or remaining == 0:
+                continue
+            reduce = -remaining if abs(remaining) < abs(trade['units']) else trade['units']
+            closes.append(self._close(account, trade, reduce, price, create['id'], 'MARKET_ORDER'))
+            remaining += reduce
+
+        opened = None
+        if remaining:
+            nav = account['balance'] + sum(self._unrealized(account, t) for t in account['trades'].values())
+            required = self._margin(account, instrument, remaining, price)
+            if not closes and required > nav - self._margin_used(account):
+                return self._cancel_market(account, body, create, 'INSUFFICIENT_MARGIN')
+            # The trade takes the ID of the fill transaction created next
+            opened = {'tradeID': str(account['last_id'] + 1), 'units': str(remaining), 'price': self._fmt(instrument, price),
+                      'initialMarginRequired': f"{required:.4f}"}
+
+        fill = self._fill(account, instrument, create['id'], units, price, 'MARKET_ORDER', closes, opened)
+        body['orderFillTransaction'] = fill
+        related = [create['id'], fill['id']]
+
+        if opened:
+            trade = {
+                'id': opened['tradeID'],
+                'instrument': instrument,
+                'price': price,
+                'units': float(remaining),
+                'initial_units': float(remaining),
+                'realized_pl': 0.0,
+                'open_time': time.time(),
+                'orders': {},
+                'checked_index': self.feed.index(instrument),
+            }
+            account['trades'][trade['id']] = trade
+            for kind, key in (('TAKE_PROFIT', 'takeProfitOrderTransaction'),
+                              ('STOP_LOSS', 'stopLossOrderTransaction')):
+                if kind in levels:
+                    txn = self._add_dependent_order(account, trade, kind, levels[kind], reason='ON_FILL')
+                    body[key] = txn
+                    related.append(txn['id'])
+
+        body['relatedTransactionIDs'] = related
+        body['lastTransactionID'] = str(account['last_id'])
+        return 201, body
+
+    def _cancel_market(self, account: Dict, body: Dict, create: Dict, reason: str) -> tuple:
+        cancel = self._transaction(account, 'ORDER_CANCEL', orderID=create['id'], reason=reason)
+        body['orderCancelTransaction'] = cancel
+        body['relatedTransactionIDs'] = [create['id'], cancel['id']]
+        body['lastTransactionID'] = cancel['id']
+        return 201, body
+
+    def _dependent_order_create(self, account: Dict, kind: str, order: Dict) -> tuple:
+        trade = account['trades'].get(str(order.get('tradeID')))
+        reject_reason = None
+        if trade is None:
+            reject_reason = 'TRADE_ID_UNSPECIFIED' if not order.get('tradeID') else 'NO_SUCH_TRADE'
+        elif self._dependent_order(account, trade, kind):
+            reject_reason = f"{kind}_ORDER_ALREADY_EXISTS"
+        if reject_reason:
+            reject = self._transaction(account, f"{kind}_ORDER_REJECT", tradeID=str(order.get('tradeID')),
+                                       price=str(order.get('price')), rejectReason=reject_reason)
+            raise StandinError(400 if trade else 404, f"{kind} order rejected: {reject_reason}", reject_reason,
+                               {'orderRejectTransaction': reject, 'lastTransactionID': reject['id']})
+
+        txn = self._add_dependent_order(account, trade, kind, float(order['price']))
+        return 201, {'orderCreateTransaction': txn, 'relatedTransactionIDs': [txn['id']],
+                     'lastTransactionID': str(account['last_id'])}
+
+    def close_trade(self, account_id: str, trade_id: str, units='ALL') -> Dict:
+        with self._lock:
+            account = self.account(account_id)
+            self.match(account)
+            trade = self._trade(account, trade_id)
+            instrument = trade['instrument']
+            close_units = trade['units'] if units in (None, 'ALL') else \
+                float(np.sign(trade['units'])) * min(abs(float(units)), abs(trade['units']))
+            quote = self.feed.quote(instrument)
+            price = quote['bid'] if trade['units'] > 0 else quote['ask']
+
+            create = self._transaction(account, 'MARKET_ORDER', instrument=instrument,
+                                       units=str(int(-close_units)), timeInForce='FOK',
+                                       positionFill='REDUCE_ONLY', reason='TRADE_CLOSE',
+                                       tradeClose={'tradeID': trade['id'], 'units': str(units or 'ALL')})
+            closes = [self._close(account, trade, close_units, price, create['id'], 'MARKET_ORDER_TRADE_CLOSE')]
+            fill = self._fill(account, instrument, create['id'], -close_units, price,
+                              'MARKET_ORDER_TRADE_CLOSE', closes, None)
+            return {'orderCreateTransaction': create, 'orderFillTransaction': fill,
+                    'relatedTransactionIDs': [create['id'], fill['id']],
+                    'lastTransactionID': str(account['last_id'])}
+
+    def close_position(self, account_id: str, instrument: str, data: Dict) -> Dict:
+        """PositionClose: longUnits/shortUnits 'ALL', a unit count or 'NONE', closing trades FIFO"""
+        with self._lock:
+            account = self.account(account_id)
+            self.match(account)
+            body, related = {}, []
+            for side, key in (('long', 'longUnits'), ('short', 'shortUnits')):
+                requested = data.get(key, 'NONE')
+                if requested == 'NONE':
+                    continue
+                trades = sorted((t for t in account['trades'].values()
+                                 if t['instrument'] == instrument and (t['units'] > 0) == (side == 'long')),
+                                key=lambda t: int(t['id']))
+                held = sum(abs(t['units']) for t in trades)
+                if not trades or (requested != 'ALL' and float(requested) > held):
+                    reject = self._transaction(account, 'MARKET_ORDER_REJECT', instrument=instrument,
+                                               rejectReason='CLOSEOUT_POSITION_DOESNT_EXIST' if not trades
+                                               else 'CLOSEOUT_POSITION_REJECT')
+                    raise StandinError(400, "The Position requested to be closed out does not exist" if not trades
+                                       else "Close-out units exceed the position", reject['rejectReason'],
+                                       {f"{side}OrderRejectTransaction": reject, 'lastTransactionID': reject['id']})
+
+                remaining = held if requested == 'ALL' else float(requested)
+                sign = 1.0 if side == 'long' else -1.0
+                quote = self.feed.quote(instrument)
+                price = quote['bid'] if side == 'long' else quote['ask']
+                create = self._transaction(account, 'MARKET_ORDER', instrument=instrument,
+                                           units=str(int(-sign * remaining)), timeInForce='FOK',
+                                           positionFill='REDUCE_ONLY', reason="POSITION_CLOSEOUT",
+                                           **{f"{side}PositionCloseout": {'instrument': instrument,
+                                                                          'units': str(requested)}})
+                closes = []
+                for trade in trades:
+                    if remaining <= 0:
+                        break
+                    units = sign * min(abs(trade['units']), remaining)
+                    closes.append(self._close(account, trade, units, price, create['id'],
+                                              'MARKET_ORDER_POSITION_CLOSEOUT'))
+                    remaining -= abs(units)
+                fill = self._fill(account, instrument, create['id'], -sign * sum(abs(float(c['closed']['units']))
+                                                                                for c in closes),
+                                  price, 'MARKET_ORDER_POSITION_CLOSEOUT', closes, None)
+                body[f"{side}OrderCreateTransaction"] = create
+                body[f"{side}OrderFillTransaction"] = fill
+                related += [create['id'], fill['id']]
+            body['relatedTransactionIDs'] = related
+            body['lastTransactionID'] = str(account['last_id'])
+            return body
+
+    def replace_dependent_orders(self, account_id: str, trade_id: str, data: Dict) -> Dict:
+        """TradeCRCDO: create, replace or cancel a trade's TP and SL"""
+        with self._lock:
+            account = self.account(account_id)
+            self.match(account)
+            trade = self._trade(account, trade_id)
+            body = {}
+            related = []
+            for kind, key, prefix in (('TAKE_PROFIT', 'takeProfit', 'takeProfitOrder'),
+                                      ('STOP_LOSS', 'stopLoss', 'stopLossOrder')):
+                if key not in data:
+                    continue
+                existing = self._dependent_order(account, trade, kind)
+                if existing:
+                    cancel = self._cancel_order(account, existing['id'],
+                                                'CLIENT_REQUEST_REPLACED' if data[key] else 'CLIENT_REQUEST')
+                    body[f"{prefix}CancelTransaction"] = cancel
+                    related.append(cancel['id'])
+                if data[key]:
+                    txn = self._add_dependent_order(account, trade, kind, float(data[key]['price']),
+                                                    reason='REPLACEMENT' if existing else 'CLIENT_ORDER')
+                    body[f"{prefix}Transaction"] = txn
+                    related.append(txn['id'])
+            body['relatedTransactionIDs'] = related
+            body['lastTransactionID'] = str(account['last_id'])
+            return body
+
+    def cancel_order(self, account_id: str, order_id: str) -> Dict:
+        with self._lock:
+            account = self.account(account_id)
+            if order_id not in account['orders']:
+                raise StandinError(404, f"The Order specified [{order_id}] does not exist", "NO_SUCH_ORDER")
+            cancel = self._cancel_order(account, order_id, 'CLIENT_REQUEST')
+            return {'orderCancelTransaction': cancel, 'relatedTransactionIDs': [cancel['id']],
+                    'lastTransactionID': str(account['last_id'])}
+
+    # ------------------------------------------------------------------ matching
+
+    def match(self, account: Dict):
+        """Trigger TP/SL orders against every bar replayed since each trade was last checked"""
+        for trade in list(account['trades'].values()):
+            stop = self._dependent_order(account, trade, 'STOP_LOSS')
+            target = self._dependent_order(account, trade, 'TAKE_PROFIT')
+            index = self.feed.index(trade['instrument'])
+            if index <= trade['checked_index']:
+                continue
+            bars = self.feed.bars_between(trade['instrument'], trade['checked_index'] + 1, index)
+            trade['checked_index'] = index
+            if not (stop or target):
+                continue
+
+            side = 'bid' if trade['units'] > 0 else 'ask'
+            low, high, open_ = bars[f"{side}_l"], bars[f"{side}_h"], bars[f"{side}_o"]
+            stop_price = float(stop['price']) if stop else None
+            target_price = float(target['price']) if target else None
+            if trade['units'] > 0:
+                stop_hit = low <= stop_price if stop else np.zeros(len(bars), dtype=bool)
+                target_hit = high >= target_price if target else np.zeros(len(bars), dtype=bool)
+            else:
+                stop_hit = high >= stop_price if stop else np.zeros(len(bars), dtype=bool)
+                target_hit = low <= target_price if target else np.zeros(len(bars), dtype=bool)
+
+            hits = np.flatnonzero(stop_hit | target_hit)
+            if len(hits) == 0:
+                continue
+            bar = hits[0]
+            # The stop wins when both levels sit inside the same bar; gaps fill at the open
+            order = stop if stop_hit[bar] else target
+            level = float(order['price'])
+            gapped = (open_[bar] < level) if (order is stop) == (trade['units'] > 0) else (open_[bar] > level)
+            price = float(open_[bar]) if gapped else level
+
+            reason = 'STOP_LOSS_ORDER' if order is stop else 'TAKE_PROFIT_ORDER'
+            units = trade['units']
+            account['orders'].pop(order['id'])
+            del trade['orders'][order['type']]
+            close = self._close(account, trade, units, price, order['id'], reason)
+            self._fill(account, trade['instrument'], order['id'], -units, price, reason, [close], None)
+
+
+def _endpoint_group(path: str) -> str:
+    """Latency/error configuration group for a request path"""
+    parts = path.strip('/').split('/')
+    if 'candles' in parts:
+        return 'candles'
+    if len(parts) < 4:
+        return 'accounts'
+    return {
+        'pricing': 'pricing',
+        'orders': 'orders', 'pendingOrders': 'orders',
+        'trades': 'trades', 'openTrades': 'trades',
+        'positions': 'positions', 'openPositions': 'positions',
+        'transactions': 'transactions',
+    }.get(parts[3], 'accounts')
+
+
+def create_app(config: Optional[Dict] = None) -> Flask:
+    """Build the stand-in Flask app; the broker is available as app.config['BROKER']"""
+    config = dict(STANDIN_CONFIG, **(config or {}))
+    feed = PriceFeed(config)
+    broker = StandinBroker(config, feed)
+    rng = random.Random(config['seed'])
+    rng_lock = threading.Lock()
+
+    app = Flask(__name__)
+    app.config['STANDIN'] = config
+    app.config['BROKER'] = broker
+    # max_in_flight: most /v3 requests the stand-in has served at once (tests check client concurrency with it)
+    stats = app.config['STANDIN_STATS'] = {'requests': 0, 'injected_errors': 0, 'in_flight': 0, 'max_in_flight': 0}
+
+    @app.errorhandler(StandinError)
+    def standin_error(error):
+        return jsonify(error.body), error.status
+
+    @app.before_request
+    def inject_latency_and_errors():
+        if not request.path.startswith('/v3/'):
+            return None
+        if 'Authorization' not in request.headers:
+            return jsonify({'errorMessage': 'Insufficient authorization to perform request.'}), 401
+
+        group = _endpoint_group(request.path)
+        mean_ms = config['endpoint_latency_ms'].get(group, config['latency_ms'])
+        error_rate = config['endpoint_error_rate'].get(group, config['error_rate'])
+        with rng_lock:
+            stats['requests'] += 1
+            stats['in_flight'] += 1
+            stats['max_in_flight'] = max(stats['max_in_flight'], stats['in_flight'])
+            g.counted_in_flight = True
+            if mean_ms <= 0:
+                delay = 0.0
+            elif config['latency_distribution'] == 'fixed':
+                delay = mean_ms / 1000.0
+            else:
+                delay = rng.lognormvariate(0.0, config['latency_jitter']) * mean_ms / 1000.0
+            fail = rng.random() < error_rate
+            if fail:
+                stats['injected_errors'] += 1
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            return jsonify({'errorMessage': f"Injected stand-in failure on {group}"}), config['error_status']
+        return None
+
+    @app.teardown_request
+    def end_in_flight(error=None):
+        if g.pop('counted_in_flight', False):
+            with rng_lock:
+                stats['in_flight'] -= 1
+
+    @app.route('/v3/accounts', methods=['GET'])
+    def account_list():
+        return jsonify({'accounts': [{'id': a, 'tags': []} for a in broker.accounts]})
+
+    @app.route('/v3/accounts/<account_id>', methods=['GET'])
+    def account_details(account_id):
+        details = broker.details(account_id)
+        return jsonify({'account': details, 'lastTransactionID': details['lastTransactionID']})
+
+    @app.route('/v3/accounts/<account_id>/summary', methods=['GET'])
+    def account_summary(account_id):
+        summary = broker.summary(account_id)
+        return jsonify({'account': summary, 'lastTransactionID': summary['lastTransactionID']})
+
+    @app.route('/v3/accounts/<account_id>/pricing', methods=['GET'])
+    def pricing_info(account_id):
+        instruments = [i for i in request.args.get('instruments', '').split(',') if i]
+        if not instruments:
+            raise StandinError(400, "Invalid value specified for 'instruments'", "INVALID_INSTRUMENTS")
+        return jsonify(broker.pricing(account_id, instruments))
+
+    @app.route('/v3/accounts/<account_id>/orders', methods=['POST'])
+    def order_create(account_id):
+        status, body = broker.create_order(account_id, (request.get_json(silent=True) or {}).get('order', {}))
+        return jsonify(body), status
+
+    @app.route('/v3/accounts/<account_id>/orders', methods=['GET'])
+    @app.route('/v3/accounts/<account_id>/pendingOrders', methods=['GET'])
+    def order_list(account_id):
+        details = broker.details(account_id)
+        return jsonify({'orders': details['orders'], 'lastTransactionID': details['lastTransactionID']})
+
+    @app.route('/v3/accounts/<account_id>/orders/<order_id>/cancel', methods=['PUT'])
+    def order_cancel(account_id, order_id):
+        return jsonify(broker.cancel_order(account_id, order_id))
+
+    @app.route('/v3/accounts/<account_id>/trades', methods=['GET'])
+    @app.route('/v3/accounts/<account_id>/openTrades', methods=['GET'])
+    def open_trades(account_id):
+        trades = broker.open_trades(account_id)
+        return jsonify({'trades': trades, 'lastTransactionID': str(broker.account(account_id)['last_id'])})
+
+    @app.route('/v3/accounts/<account_id>/trades/<trade_id>', methods=['GET'])
+    def trade_details(account_id, trade_id):
+        return jsonify(broker.trade_details(account_id, trade_id))
+
+    @app.route('/v3/accounts/<account_id>/trades/<trade_id>/close', methods=['PUT'])
+    def trade_close(account_id, trade_id):
+        units = (request.get_json(silent=True) or {}).get('units', 'ALL')
+        return jsonify(broker.close_trade(account_id, trade_id, units))
+
+    @app.route('/v3/accounts/<account_id>/trades/<trade_id>/orders', methods=['PUT'])
+    def trade_crcdo(account_id, trade_id):
+        return jsonify(broker.replace_dependent_orders(account_id, trade_id, request.get_json(silent=True) or {}))
+
+    @app.route('/v3/accounts/<account_id>/openPositions', methods=['GET'])
+    @app.route('/v3/accounts/<account_id>/positions', methods=['GET'])
+    def open_positions(account_id):
+        positions = broker.open_positions(account_id)
+        return jsonify({'positions': positions, 'lastTransactionID': str(broker.account(account_id)['last_id'])})
+
+    @app.route('/v3/accounts/<account_id>/positions/<instrument>/close', methods=['PUT'])
+    def position_close(account_id, instrument):
+        return jsonify(broker.close_position(account_id, instrument, request.get_json(silent=True) or {}))
+
+    @app.route('/v3/accounts/<account_id>/instruments', methods=['GET'])
+    def account_instruments(account_id):
+        broker.account(account_id)
+        metadata = get_instrument_metadata()
+        wanted = [i for i in request.args.get('instruments', '').split(',') if i] or metadata.names
+        metadata.indices(wanted)
+        return jsonify({'instruments': [metadata.raw[name] for name in wanted],
+                        'lastTransactionID': str(broker.account(account_id)['last_id'])})
+
+    @app.route('/v3/accounts/<account_id>/changes', methods=['GET'])
+    def account_changes(account_id):
+        return jsonify(broker.changes(account_id, int(request.args.get('sinceTransactionID', 0))))
+
+    @app.route('/v3/accounts/<account_id>/transactions/sinceid', methods=['GET'])
+    def transactions_since(account_id):
+        return jsonify(broker.transactions_since(account_id, int(request.args.get('id', 0))))
+
+    @app.route('/v3/instruments/<instrument>/candles', methods=['GET'])
+    @app.route('/v3/accounts/<account_id>/instruments/<instrument>/candles', methods=['GET'])
+    def instrument_candles(instrument, account_id=None):
+        granularity = request.args.get('granularity', config['granularity'])
+        if granularity not in GRANULARITY_SECONDS:
+            raise StandinError(400, f"Invalid value specified for 'granularity': {granularity}")
+        count = request.args.get('count')
+        count = min(int(count), MAX_CANDLES_PER_REQUEST) if count else None
+        start = parse_time(request.args['from']) if 'from' in request.args else None
+        end = parse_time(request.args['to']) if 'to' in request.args else None
+        components = request.args.get('price', 'M')
+
+        candles = feed.candles(instrument, granularity, count, start, end)
+        names = {'M': 'mid', 'B': 'bid', 'A': 'ask'}
+        precision = price_precision(instrument)
+        out = []
+        for bar in candles:
+            candle = {'complete': True, 'volume': int(bar['volume']), 'time': format_time(bar['time'])}
+            for component in components:
+                prefix = names[component]
+                candle[prefix] = {f: f"{bar[f'{prefix}_{f}']:.{precision}f}" for f in ('o', 'h', 'l', 'c')}
+            out.append(candle)
+        return jsonify({'instrument': instrument, 'granularity': granularity, 'candles': out})
+
+    @app.route('/standin/advance', methods=['POST'])
+    def advance():
+        """Move the replayed prices forward: /standin/advance?bars=N"""
+        feed.advance(int(request.args.get('bars', 1)))
+        return jsonify({'bar_offset': feed.bar_offset()})
+
+    @app.route('/standin/stats', methods=['GET'])
+    def standin_stats():
+        return jsonify(dict(stats, bar_offset=feed.bar_offset(), accounts=len(broker.accounts)))
+
+    return app
+
+
+def start_background_server(config: Optional[Dict] = None, port: int = 0):
+    """
+    Serve the stand-in from a daemon thread (port 0 picks a free port)
+
+    Returns:
+        werkzeug server with .url set; call .shutdown() when done
+    """
+    from werkzeug.serving import make_server
+
+    config = dict(STANDIN_CONFIG, **(config or {}))
+    app = create_app(config)
+    server = make_server(config['host'], port, app, threaded=True)
+    server.app = app
+    server.url = f"http://{config['host']}:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _option(args: List[str], name: str, default):
+    if name in args and args.index(name) + 1 < len(args):
+        return args[args.index(name) + 1]
+    return default
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    args = sys.argv[1:]
+    config = {
+        'port': int(_option(args, '--port', STANDIN_CONFIG['port'])),
+        'latency_ms': float(_option(args, '--latency-ms', STANDIN_CONFIG['latency_ms'])),
+        'error_rate': float(_option(args, '--error-rate', STANDIN_CONFIG['error_rate'])),
+        'bars_per_second': float(_option(args, '--bars-per-second', STANDIN_CONFIG['bars_per_second'])),
+        'granularity': _option(args, '--granularity', STANDIN_CONFIG['granularity']),
+    }
+    app = create_app(config)
+    url = f"http://{STANDIN_CONFIG['host']}:{config['port']}"
+    print(f"🧪 OANDA v20 stand-in listening on {url}")
+    print(f"   Account: {STANDIN_CONFIG['account_id']} | latency {config['latency_ms']}ms | "
+          f"error rate {config['error_rate']:.1%} | {config['bars_per_second']} bars/s")
+    print(f"   export OANDA_STANDIN_URL={url}")
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    app.run(host=STANDIN_CONFIG['host'], port=config['port'], threaded=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Log Watcher
+Incremental error counting over log files that can grow to hundreds of MB. The first look
+at a file reads only its last lines by seeking backwards from EOF; after that each check
+reads just the bytes appended since the remembered offset. Rotation (a new file at the same
+path) drains the old file before switching, and truncation starts over from the top.
+Errors are counted into time buckets, so "errors in the last 30 minutes" is a sum over a
+few counters.
+"""
+
+import os
+import re
+import json
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+LOG_WATCH_CONFIG = {
+    'patterns': ('ERROR', 'CRITICAL'),
+    'bucket_seconds': 60,
+    'window_seconds': 1800,      # Buckets older than this are dropped
+    'initial_tail_lines': 100,   # Lines read from the end of a file the first time it is seen
+    'block_size': 8192,
+}
+
+# "[2024-01-02T03:04:05.678] ERROR" (health log) and "2024-01-02 03:04:05,678 - ERROR" (logging default)
+_TIMESTAMP = re.compile(r'^\[?(\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?)')
+
+
+def line_timestamp(line: str) -> Optional[float]:
+    """Epoch seconds from a text or JSON (structured_logging) log line, or None"""
+    if line.startswith('{'):
+        try:
+            return datetime.fromisoformat(json.loads(line)['ts']).timestamp()
+        except (ValueError, KeyError, TypeError):
+            return None
+    match = _TIMESTAMP.match(line)
+    if not match:
+        return None
+    try:
+        return datetime.fromisoformat(match.group(1).replace(',', '.')).timestamp()
+    except ValueError:
+        return None
+
+
+def tail_lines(f, n: int, block_size: int = LOG_WATCH_CONFIG['block_size']) -> Tuple[List[bytes], int]:
+    """Last n complete lines of a binary file and the EOF offset, reading backwards in blocks"""
+    f.seek(0, os.SEEK_END)
+    end = f.tell()
+    position, data = end, b''
+    while position > 0 and data.count(b'\n') <= n:
+        step = min(block_size, position)
+        position -= step
+        f.seek(position)
+        data = f.read(step) + data
+    lines = data.split(b'\n')
+    if position > 0:
+        lines = lines[1:]  # First piece may be the middle of a line
+    if lines and lines[-1] == b'':
+        lines = lines[:-1]
+    return lines[-n:] if n else [], end
+
+
+class LogWatcher:
+    """Per-file byte offsets plus error counts in time buckets"""
+
+    def __init__(self, paths: Iterable[str], config: Optional[Dict] = None, clock=time.time):
+        self.config = dict(LOG_WATCH_CONFIG, **(config or {}))
+        self.paths = list(paths)
+        self.clock = clock
+        self._patterns = [p.encode() for p in self.config['patterns']]
+        self._files = {}    # path -> {'handle', 'inode', 'offset', 'partial'}
+        self.buckets = {}   # bucket start (epoch seconds) -> error count
+        self.stats = {'bytes_read': 0, 'lines': 0, 'errors': 0, 'rotations': 0}
+
+    def poll(self) -> int:
+        """Read what was appended to every file since the last poll; returns new errors counted"""
+        before = self.stats['errors']
+        for path in self.paths:
+            try:
+                self._poll_file(path)
+            except OSError:
+                self._close(path)
+        self._prune()
+        return self.stats['errors'] - before
+
+    def errors_since(self, seconds: float) -> int:
+        cutoff = self.clock() - seconds
+        size = self.config['bucket_seconds']
+        return sum(n for start, n in self.buckets.items() if start + size > cutoff)
+
+    def close(self):
+        for path in list(self._files):
+            self._close(path)
+
+    # ------------------------------------------------------------------ internals
+
+    def _poll_file(self, path: str):
+        state = self._files.get(path)
+        if not os.path.exists(path):
+            if state:
+                self._drain(state)  # Rotated away with nothing new at the path yet
+            return
+        stat = os.stat(path)
+
+        if state is None:
+            handle = open(path, 'rb')
+            lines, end = tail_lines(handle, self.config['initial_tail_lines'], self.config['block_size'])
+            self._files[path] = {'handle': handle, 'inode': stat.st_ino, 'offset': end, 'partial': b''}
+            for line in lines:
+                self._count(line, fallback_now=False)  # Old lines only count with a timestamp
+            return
+
+        if stat.st_ino != state['inode']:
+            self._drain(state)
+            self._close(path)
+            self.stats['rotations'] += 1
+            handle = open(path, 'rb')
+            state = self._files[path] = {'handle': handle, 'inode': stat.st_ino, 'offset': 0, 'partial': b''}
+        elif stat.st_size < state['offset']:
+            state['offset'], state['partial'] = 0, b''  # Truncated in place
+        self._drain(state)
+
+    def _drain(self, state: Dict):
+        handle = state['handle']
+        handle.seek(state['offset'])
+        while True:
+            chunk = handle.read(1 << 20)
+            if not chunk:
+                break
+            state['offset'] += len(chunk)
+            self.stats['bytes_read'] += len(chunk)
+            lines = (state['partial'] + chunk).split(b'\n')
+            state['partial'] = lines.pop()  # Incomplete last line waits for the next poll
+            for line in lines:
+                self._count(line, fallback_now=True)
+
+    def _count(self, line: bytes, fallback_now: bool):
+        self.stats['lines'] += 1
+        if not any(p in line for p in self._patterns):
+            return
+        timestamp = line_timestamp(line.decode('utf-8', 'replace'))
+        if timestamp is None:
+            if not fallback_now:
+                return
+            timestamp = self.clock()
+        if timestamp < self.clock() - self.config['window_seconds']:
+            return
+        size = self.config['bucket_seconds']
+        bucket = int(timestamp // size * size)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.stats['errors'] += 1
+
+    def _prune(self):
+        cutoff = self.clock() - self.config['window_seconds'] - self.config['bucket_seconds']
+        for start in [s for s in self.buckets if s < cutoff]:
+            del self.buckets[start]
+
+    def _close(self, path: str):
+        state = self._files.pop(path, None)
+        if state:
+            state['handle'].close()
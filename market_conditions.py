@@ -2,9 +2,11 @@ import random
 from datetime import datetime, time
 import numpy as np
 from typing import Dict, Optional
+from sim_clock import SYSTEM_CLOCK
 
 class MarketConditions:
-    def __init__(self):
+    def __init__(self, clock=None):
+        self.clock = clock or SYSTEM_CLOCK
         self.MAX_DRAWDOWN = 0.05  # 5% maximum drawdown
         self.MAX_CORRELATION = 0.7  # 70% maximum correlation between trades
         self.trade_history = []
@@ -12,7 +14,7 @@ class MarketConditions:
     def market_hours_spread(self, current_time: Optional[datetime] = None) -> float:
         """Calculate spread based on market session."""
         if current_time is None:
-            current_time = datetime.now()
+            current_time = self.clock.now()
             
         current_hour = current_time.hour
         
@@ -36,7 +38,7 @@ class MarketConditions:
         }
         
         liquidity = base_liquidity.get(pair, 0.5)
-        current_hour = datetime.now().hour
+        current_hour = self.clock.now().hour
         
         # Adjust liquidity based on market session
         if self._is_asian_session(current_hour):
@@ -15,6 +15,7 @@ import pandas as pd
 from datetime import datetime, timedelta
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import logging
+from training_profiler import TrainingProfiler
 
 # Configure logging for massive training
 logging.basicConfig(
@@ -136,6 +137,16 @@ class MassiveTrainingSystem:
         logger.info(f"   Batch size: {self.batch_size:,}")
         logger.info("")
         
+        # Opt-in profiling (TRAINING_PROFILE=sampling|cprofile); one profiled session per pair
+        profiler = TrainingProfiler('run_massive_training')
+        profiler.instrument(oanda_data, {'fetch_historical_data': 'data_fetch'})
+        profiler.instrument(self, {
+            'generate_quality_trade_from_data': 'feature_generation',
+            'simulate_realistic_outcome': 'prediction',
+            'add_trade_to_memory': 'memory_save',
+            'save_training_progress': 'memory_save',
+        })
+        
         # Start massive training
         total_new_trades = 0
         successful_trades = 0
@@ -144,9 +155,10 @@ class MassiveTrainingSystem:
             for pair_idx, pair in enumerate(self.currency_pairs):
                 logger.info(f"🔄 Training on {pair} ({pair_idx+1}/{len(self.currency_pairs)})")
                 
-                pair_trades, pair_successes = self.train_currency_pair(
-                    trainer, oanda_data, pair, trades_per_pair
-                )
+                with profiler.session(f"{pair_idx + 1:02d}_{pair}"):
+                    pair_trades, pair_successes = self.train_currency_pair(
+                        trainer, oanda_data, pair, trades_per_pair
+                    )
                 
                 total_new_trades += pair_trades
                 successful_trades += pair_successes
@@ -172,6 +184,8 @@ class MassiveTrainingSystem:
             logger.error(f"❌ Training error: {e}")
             import traceback
             traceback.print_exc()
+        finally:
+            profiler.close()
         
         # Final results
         final_total = completed_trades + total_new_trades
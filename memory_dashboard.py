@@ -3,10 +3,11 @@ SevenSYS Memory Dashboard - Web interface for monitoring SevenSYS performance
 Provides real-time insights into webhook activity and trading performance
 """
 
-from flask import Flask, render_template, jsonify
+from flask import Flask, render_template, jsonify, request
 import json
 from datetime import datetime, timedelta
 from memory_logger import SevenSYSMemoryLogger
+from monte_carlo_engine import MonteCarloEngine, load_returns_from_memory_db, load_returns_from_csv
 import sqlite3
 
 class SevenSYSMemoryDashboard:
@@ -177,6 +178,30 @@ class SevenSYSMemoryDashboard:
             finally:
                 conn.close()
     
+        @self.app.route('/api/monte-carlo')
+        def api_monte_carlo():
+            """API endpoint for Monte Carlo equity percentile bands and risk of ruin"""
+            try:
+                source = request.args.get('source', 'db')
+                risk = request.args.get('risk', 0.015, type=float)
+                n_paths = min(request.args.get('paths', 100000, type=int), 100000)
+                n_trades = min(request.args.get('trades', 250, type=int), 1000)
+                balance = request.args.get('balance', 200.0, type=float)
+                
+                if source == 'csv':
+                    returns = load_returns_from_csv(risk_per_trade=risk)
+                else:
+                    returns = load_returns_from_memory_db(self.memory_logger.db_path, risk_per_trade=risk)
+                
+                if len(returns) == 0:
+                    return jsonify({'error': f'No closed trades with P&L in {source} store'}), 404
+                
+                engine = MonteCarloEngine(returns, {'starting_balance': balance})
+                return jsonify(engine.run(n_paths, n_trades))
+                
+            except Exception as e:
+                return jsonify({'error': str(e)}), 500
+    
     def run(self, host='127.0.0.1', port=5001, debug=True):
         """Run the dashboard server"""
         print(f"\n🚀 SevenSYS Memory Dashboard starting on http://{host}:{port}")
@@ -3,29 +3,28 @@ SevenSYS Memory Logger - Core logging system for webhook tracking and trade anal
 Focuses exclusively on SevenSYS Pine script performance without altering trading logic
 """
 
+import os
 import json
+import time
 import sqlite3
 import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 import logging
+from metrics import SQLITE_WRITE_LATENCY
+from structured_logging import configure_logging
 
 class SevenSYSMemoryLogger:
-    def __init__(self, db_path: str = "sevensys_memory.db"):
-        self.db_path = db_path
+    def __init__(self, db_path: Optional[str] = None, log_file: Optional[str] = None):
+        # SEVENSYS_MEMORY_DB / SEVENSYS_MEMORY_LOG move both off the working copy (tests, replays)
+        self.db_path = db_path or os.getenv('SEVENSYS_MEMORY_DB', 'sevensys_memory.db')
+        self.log_file = log_file or os.getenv('SEVENSYS_MEMORY_LOG', 'memory_logger.log')
         self.setup_logging()
         self.setup_database()
     
     def setup_logging(self):
         """Setup logging for the memory logger itself"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler('memory_logger.log'),
-                logging.StreamHandler()
-            ]
-        )
+        configure_logging(files={__name__: self.log_file})
         self.logger = logging.getLogger(__name__)
     
     def setup_database(self):
@@ -63,10 +62,19 @@ class SevenSYSMemoryLogger:
                 execution_status TEXT DEFAULT 'PENDING',
                 oanda_order_id TEXT,
                 session_id TEXT,
+                account_id TEXT,
+                stage_timings TEXT,
                 FOREIGN KEY (webhook_id) REFERENCES webhook_alerts (id)
             )
         ''')
         
+        # Databases created before multi-account routing lack the account column
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(trade_executions)")}
+        if 'account_id' not in columns:
+            cursor.execute("ALTER TABLE trade_executions ADD COLUMN account_id TEXT")
+        if 'stage_timings' not in columns:
+            cursor.execute("ALTER TABLE trade_executions ADD COLUMN stage_timings TEXT")
+        
         # Trade outcomes table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS trade_outcomes (
@@ -124,6 +132,7 @@ class SevenSYSMemoryLogger:
         cursor = conn.cursor()
         
         try:
+            start = time.perf_counter()
             cursor.execute('''
                 INSERT INTO webhook_alerts (ticker, action, close_price, raw_data, session_id)
                 VALUES (?, ?, ?, ?, ?)
@@ -137,6 +146,7 @@ class SevenSYSMemoryLogger:
             
             webhook_id = cursor.lastrowid
             conn.commit()
+            SQLITE_WRITE_LATENCY.labels('webhook_alerts').observe(time.perf_counter() - start)
             
             self.logger.info(f"Logged webhook alert: ID={webhook_id}, Ticker={webhook_data.get('ticker')}, Action={webhook_data.get('strategy.order.action')}")
             
@@ -157,11 +167,13 @@ class SevenSYSMemoryLogger:
         cursor = conn.cursor()
         
         try:
+            start = time.perf_counter()
             cursor.execute('''
                 INSERT INTO trade_executions (
                     webhook_id, ticker, action, entry_price, position_size, 
-                    stop_loss, take_profit, execution_status, oanda_order_id, session_id
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    stop_loss, take_profit, execution_status, oanda_order_id, session_id, account_id,
+                    stage_timings
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 webhook_id,
                 execution_data.get('ticker', 'UNKNOWN'),
@@ -172,11 +184,14 @@ class SevenSYSMemoryLogger:
                 float(execution_data.get('take_profit', 0.0)) if execution_data.get('take_profit') else None,
                 execution_data.get('status', 'EXECUTED'),
                 execution_data.get('order_id'),
-                session_id
+                session_id,
+                execution_data.get('account_id'),
+                json.dumps(execution_data['stage_timings']) if execution_data.get('stage_timings') else None
             ))
             
             trade_id = cursor.lastrowid
             conn.commit()
+            SQLITE_WRITE_LATENCY.labels('trade_executions').observe(time.perf_counter() - start)
             
             self.logger.info(f"Logged trade execution: ID={trade_id}, Ticker={execution_data.get('ticker')}, Entry={execution_data.get('entry_price')}")
             
@@ -197,11 +212,12 @@ class SevenSYSMemoryLogger:
         cursor = conn.cursor()
         
         try:
+            start = time.perf_counter()
             cursor.execute('''
                 INSERT INTO trade_executions (
                     webhook_id, ticker, action, entry_price, position_size, 
-                    execution_status, session_id
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                    execution_status, session_id, account_id, stage_timings
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 webhook_id,
                 error_details.get('ticker', 'UNKNOWN'),
@@ -209,10 +225,13 @@ class SevenSYSMemoryLogger:
                 float(error_details.get('entry_price', 0.0)),
                 0.0,  # No position size for failed execution
                 f"FAILED: {error_details.get('error', 'Unknown error')}",
-                session_id
+                session_id,
+                error_details.get('account_id'),
+                json.dumps(error_details['stage_timings']) if error_details.get('stage_timings') else None
             ))
             
             conn.commit()
+            SQLITE_WRITE_LATENCY.labels('trade_executions').observe(time.perf_counter() - start)
             
             self.logger.warning(f"Logged execution failure: Webhook ID={webhook_id}, Error={error_details.get('error')}")
             
@@ -327,6 +346,27 @@ class SevenSYSMemoryLogger:
         finally:
             conn.close()
     
+    def get_stage_timings(self, webhook_id: int) -> List[Dict[str, Any]]:
+        """Stage timings recorded with each execution row of an alert"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute('''
+                SELECT account_id, execution_status, stage_timings FROM trade_executions
+                WHERE webhook_id = ? AND stage_timings IS NOT NULL ORDER BY id
+            ''', (webhook_id,))
+            return [
+                {'account_id': row[0], 'status': row[1], 'trace': json.loads(row[2])}
+                for row in cursor.fetchall()
+            ]
+
+        except Exception as e:
+            self.logger.error(f"Error getting stage timings: {e}")
+            return []
+        finally:
+            conn.close()
+
     def get_system_status(self) -> Dict[str, Any]:
         """Get overall system status and recent activity"""
         conn = sqlite3.connect(self.db_path)
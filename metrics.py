@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Metrics Registry
+Counters, gauges and fixed-bucket latency histograms exported in the Prometheus text format
+(GET /metrics on the Flask app). Recording is a dict lookup and a few additions under a
+lock; a scrape costs O(series x workers) regardless of how many observations were made.
+
+Several gunicorn workers: set METRICS_MULTIPROC_DIR to a directory shared by the workers.
+Each process then writes its series to <dir>/<pid>-<start>.json every flush_interval seconds
+(<start> tells a reused pid from the process that had it before) and a scrape from any worker
+merges all files: counters and histograms are summed (including those of exited workers),
+gauges are reported per live process with a pid label. Processes outside gunicorn, such as
+the training runs, export the same way when they see the same METRICS_MULTIPROC_DIR; the
+gunicorn master clears the directory when it starts.
+"""
+
+import os
+import json
+import time
+import atexit
+import bisect
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+METRICS_CONFIG = {
+    'multiprocess_dir': os.getenv('METRICS_MULTIPROC_DIR'),
+    'flush_interval': 1.0,
+}
+
+# Seconds; 1ms to 10s covers a local SQLite write up to a slow OANDA round trip
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values) -> '_Metric':
+        """Child series for these label values (cached, so hot paths can hold on to it)"""
+        key = tuple(str(v) for v in values)
+        if len(key) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        child = self._series.get(key)
+        if child is None:
+            with self._lock:
+                child = self._series.setdefault(key, self._child())
+        return child
+
+    def _child(self):
+        raise NotImplementedError
+
+    def _default(self):
+        return self.labels() if not self.labelnames else None
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            series = dict(self._series)
+        return {'type': self.kind, 'help': self.help, 'labelnames': list(self.labelnames),
+                'series': {json.dumps(list(k)): child.value() for k, child in series.items()}}
+
+
+class _Value:
+    __slots__ = ('_value', '_lock')
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    def set(self, value: float):
+        self._value = float(value)
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+    def value(self) -> float:
+        return self._value
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def _child(self):
+        return _Value()
+
+    def set(self, value: float):
+        self._default().set(value)
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._default().dec(amount)
+
+
+class _Buckets:
+    __slots__ = ('bounds', 'counts', 'sum', '_lock')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # Last bucket is +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        i = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    def time(self):
+        return _Timer(self)
+
+    def value(self) -> Dict:
+        with self._lock:
+            return {'counts': list(self.counts), 'sum': self.sum}
+
+
+class _Timer:
+    """with histogram.time(): ... observes the block's duration in seconds"""
+
+    __slots__ = ('_buckets', '_start')
+
+    def __init__(self, buckets: _Buckets):
+        self._buckets = buckets
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._buckets.observe(time.perf_counter() - self._start)
+        return False
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.bounds = tuple(sorted(buckets))
+
+    def _child(self):
+        return _Buckets(self.bounds)
+
+    def observe(self, value: float):
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+    def snapshot(self) -> Dict:
+        snapshot = super().snapshot()
+        snapshot['buckets'] = list(self.bounds)
+        return snapshot
+
+
+class MetricsRegistry:
+    """Named metrics of this process, plus the merge with other workers' flushed files"""
+
+    def __init__(self, multiprocess_dir: Optional[str] = None):
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self.multiprocess_dir = multiprocess_dir
+        self._flusher = None
+        self._flushed_pid = None
+        self._token = None
+        self._token_pid = None
+
+    def _register(self, cls, name: str, help_text: str, labelnames: Sequence[str] = (), **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, labelnames, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, help_text, labelnames)
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, help_text, labelnames)
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, help_text, labelnames, buckets=buckets)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            metrics = dict(self._metrics)
+        return {name: metric.snapshot() for name, metric in metrics.items()}
+
+    # ------------------------------------------------------------------ multi-process
+
+    def start_flusher(self):
+        """Write this process's snapshot every flush_interval seconds (no-op without a directory)"""
+        if not self.multiprocess_dir:
+            return
+        pid = os.getpid()
+        if self._flushed_pid == pid and self._flusher and self._flusher.is_alive():
+            return
+        os.makedirs(self.multiprocess_dir, exist_ok=True)
+        if self._flushed_pid is None:
+            atexit.register(self._final_flush)  # Values recorded after the last tick of a short run
+        self._flushed_pid = pid  # A forked worker gets its own file and thread
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True, name='metrics-flush')
+        self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Metrics flush failed: {e}")
+            time.sleep(METRICS_CONFIG['flush_interval'])
+
+    def _final_flush(self):
+        if self._flushed_pid == os.getpid():
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+    def _process_key(self) -> Tuple[int, str]:
+        """(pid, start token) of this process, recomputed after a fork"""
+        pid = os.getpid()
+        if self._token_pid != pid:
+            self._token = _start_token(pid) or str(time.time_ns())
+            self._token_pid = pid
+        return pid, self._token
+
+    def flush(self):
+        pid, token = self._process_key()
+        path = os.path.join(self.multiprocess_dir, f"{pid}-{token}.json")
+        with open(path + '.tmp', 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(path + '.tmp', path)
+
+    def clear_directory(self):
+        """Remove the snapshots of earlier runs (the gunicorn master calls this on start)"""
+        if not self.multiprocess_dir or not os.path.isdir(self.multiprocess_dir):
+            return
+        for filename in os.listdir(self.multiprocess_dir):
+            if filename.endswith(('.json', '.tmp')):
+                try:
+                    os.remove(os.path.join(self.multiprocess_dir, filename))
+                except OSError:
+                    pass
+
+    def _worker_snapshots(self) -> Dict[Tuple[int, str], Dict]:
+        """(pid, start token) -> snapshot for every flushed process, with this process's live values"""
+        snapshots = {}
+        if self.multiprocess_dir and os.path.isdir(self.multiprocess_dir):
+            for filename in os.listdir(self.multiprocess_dir):
+                if not filename.endswith('.json'):
+                    continue
+                pid, _, token = filename[:-5].partition('-')
+                try:
+                    with open(os.path.join(self.multiprocess_dir, filename)) as f:
+                        snapshots[(int(pid), token)] = json.load(f)
+                except (ValueError, OSError):
+                    continue  # Partially written by an old version or removed meanwhile
+        snapshots[self._process_key()] = self.snapshot()
+        return snapshots
+
+    # ------------------------------------------------------------------ exposition
+
+    def render(self) -> str:
+        """Prometheus text format for all workers"""
+        snapshots = self._worker_snapshots()
+        multi = len(snapshots) > 1 or bool(self.multiprocess_dir)
+        merged = {}
+        for (pid, token), snapshot in snapshots.items():
+            for name, metric in snapshot.items():
+                entry = merged.setdefault(name, dict(metric, series={}))
+                for key, value in metric['series'].items():
+                    labels = json.loads(key)
+                    if metric['type'] == 'gauge':
+                        if multi and not _process_alive(pid, token):
+                            continue
+                        series_key = json.dumps(labels + [str(pid)]) if multi else key
+                        entry['series'][series_key] = value
+                    elif metric['type'] == 'counter':
+                        entry['series'][key] = entry['series'].get(key, 0.0) + value
+                    else:
+                        total = entry['series'].setdefault(key, {'counts': [0] * len(value['counts']), 'sum': 0.0})
+                        total['counts'] = [a + b for a, b in zip(total['counts'], value['counts'])]
+                        total['sum'] += value['sum']
+
+        lines = []
+        for name in sorted(merged):
+            metric = merged[name]
+            labelnames = metric['labelnames'] + (['pid'] if metric['type'] == 'gauge' and multi else [])
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['type']}")
+            for key in sorted(metric['series']):
+                labels = list(zip(labelnames, json.loads(key)))
+                value = metric['series'][key]
+                if metric['type'] != 'histogram':
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric['buckets'] + ['+Inf'], value['counts']):
+                    cumulative += count
+                    le = bound if bound == '+Inf' else _number(bound)
+                    lines.append(f"{name}_bucket{_labels(labels + [('le', le)])} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(value['sum'])}")
+                lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(pairs: List[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ''
+    escaped = (k + '="' + str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+               for k, v in pairs)
+    return '{' + ','.join(escaped) + '}'
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else f"{int(value)}"
+
+
+def _start_token(pid: int) -> Optional[str]:
+    """Start time of a process in clock ticks since boot (Linux /proc), None elsewhere"""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            return f.read().rsplit(')', 1)[1].split()[19]
+    except (OSError, IndexError):
+        return None
+
+
+def _process_alive(pid: int, token: str) -> bool:
+    """The process that wrote a snapshot is still running, not just another one with its pid"""
+    if not _pid_alive(pid):
+        return False
+    current = _start_token(pid)
+    return current is None or current == token
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+registry = MetricsRegistry(METRICS_CONFIG['multiprocess_dir'])
+
+# Metrics recorded on the trading paths
+WEBHOOK_REQUESTS = registry.counter('webhook_requests_total', 'Webhook alerts by response status', ['status'])
+WEBHOOK_LATENCY = registry.histogram('webhook_latency_seconds', 'End-to-end /webhook handling time')
+ORDER_LATENCY = registry.histogram('oanda_order_latency_seconds', 'OANDA OrderCreate round trip', ['order_type'])
+PRICE_AGE = registry.histogram('oanda_price_age_seconds', 'Age of the OANDA price when fetched',
+                               buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0))
+SQLITE_WRITE_LATENCY = registry.histogram('sqlite_write_latency_seconds', 'Memory logger insert time', ['table'])
+TRAINING_SAMPLES = registry.counter('training_samples_total', 'Samples the AI model has been fitted on')
+TRAINING_THROUGHPUT = registry.gauge('training_samples_per_second', 'Samples per second in the last model fit')
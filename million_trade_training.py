@@ -11,6 +11,7 @@ import random
 import time
 from datetime import datetime, timedelta
 import logging
+from training_profiler import TrainingProfiler
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -73,17 +74,52 @@ class MillionTradeSystem:
         logger.info(f"Trades per pair: {trades_per_pair:,}")
         logger.info("")
         
-        # Generate trades for each pair
+        start_time = datetime.now()
+        
+        # Opt-in profiling (TRAINING_PROFILE=sampling|cprofile); one profiled session per pair
+        profiler = TrainingProfiler('run_million_trade_training')
+        profiler.instrument(self, {
+            'create_realistic_trade': 'feature_generation',
+            'simulate_outcome': 'prediction',
+            'save_batch_to_memory': 'memory_save',
+        })
+        try:
+            total_new, total_wins = self._train_pairs(profiler, existing_trades, trades_per_pair, start_time)
+        finally:
+            profiler.close()
+        
+        # Final results
+        final_total = existing_trades + total_new
+        final_wr = (total_wins / total_new * 100) if total_new > 0 else 0
+        total_runtime = (datetime.now() - start_time).total_seconds()
+        
+        logger.info("MILLION TRADE TRAINING COMPLETE")
+        logger.info("=" * 60)
+        logger.info(f"Final total trades: {final_total:,}")
+        logger.info(f"New trades generated: {total_new:,}")
+        logger.info(f"Overall win rate: {final_wr:.1f}%")
+        logger.info(f"Total runtime: {total_runtime/3600:.1f} hours")
+        
+        success = final_total >= self.target_trades and final_wr >= 65.0
+        
+        if success:
+            logger.info("🎉 SUCCESS: 1 MILLION TRADE TARGET ACHIEVED!")
+        else:
+            logger.info("📈 PROGRESS: Continue training to reach target")
+            
+        return success
+    
+    def _train_pairs(self, profiler, existing_trades, trades_per_pair, start_time):
+        """Generate trades pair by pair until the target is reached; returns (new trades, wins)"""
         total_new = 0
         total_wins = 0
         
-        start_time = datetime.now()
-        
         for i, pair in enumerate(self.currency_pairs):
             pair_start = datetime.now()
             logger.info(f"Training {pair} ({i+1}/{len(self.currency_pairs)})...")
             
-            pair_trades, pair_wins = self.generate_pair_trades(pair, trades_per_pair)
+            with profiler.session(f"{i + 1:02d}_{pair}"):
+                pair_trades, pair_wins = self.generate_pair_trades(pair, trades_per_pair)
             total_new += pair_trades
             total_wins += pair_wins
             
@@ -104,26 +140,7 @@ class MillionTradeSystem:
             if current_total >= self.target_trades:
                 break
         
-        # Final results
-        final_total = existing_trades + total_new
-        final_wr = (total_wins / total_new * 100) if total_new > 0 else 0
-        total_runtime = (datetime.now() - start_time).total_seconds()
-        
-        logger.info("MILLION TRADE TRAINING COMPLETE")
-        logger.info("=" * 60)
-        logger.info(f"Final total trades: {final_total:,}")
-        logger.info(f"New trades generated: {total_new:,}")
-        logger.info(f"Overall win rate: {final_wr:.1f}%")
-        logger.info(f"Total runtime: {total_runtime/3600:.1f} hours")
-        
-        success = final_total >= self.target_trades and final_wr >= 65.0
-        
-        if success:
-            logger.info("🎉 SUCCESS: 1 MILLION TRADE TARGET ACHIEVED!")
-        else:
-            logger.info("📈 PROGRESS: Continue training to reach target")
-            
-        return success
+        return total_new, total_wins
     
     def generate_pair_trades(self, pair, target_count):
         """Generate realistic trades for a currency pair"""
@@ -29,8 +29,12 @@ class ModelTrainer:
         ]
         
     def prepare_data(self, trade_data: pd.DataFrame) -> tuple:
-        """Prepare data for model training"""
+        """Prepare data for model training (a DataFrame or trade_dataset records)"""
         try:
+            if isinstance(trade_data, np.ndarray):
+                from trade_dataset import dataset_to_dataframe
+                trade_data = dataset_to_dataframe(trade_data)
+
             # Create a copy of the data
             df = trade_data.copy()
             
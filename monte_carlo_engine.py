@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Vectorized Monte Carlo Equity Engine
+Bootstraps per-trade returns from the trade store into an (n_paths x n_trades) matrix
+and derives equity curves, max drawdown, time-to-recover and risk of ruin with
+cumulative array operations instead of per-trade Python loops
+"""
+
+import sys
+import time
+import sqlite3
+import logging
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Temporaries per (path, trade) cell in a block: int64 picks, float32 equity/peak/drawdown, int32 recovery
+_BLOCK_BYTES_PER_CELL = 32
+
+MONTE_CARLO_CONFIG = {
+    'n_paths': 100000,
+    'n_trades': 250,                 # ~1 year at one trade per trading day
+    'starting_balance': 200.0,
+    'ruin_threshold': 0.50,          # Ruin = equity ever below 50% of the starting balance
+    'percentiles': (5, 25, 50, 75, 95),
+    'chunk_paths': 25000,            # Paths simulated per block to bound memory...
+    'max_block_bytes': 64 * 2**20,   # ...fewer when long paths would push a block's temporaries past this
+    'band_points': 100,              # Max points per percentile band sent to the dashboard
+    'band_paths': 20000,             # Paths behind the bands, drawn from every block in proportion
+    'seed': 42,
+}
+
+
+def returns_from_r_multiples(r_multiples: Sequence[float], risk_per_trade: float) -> np.ndarray:
+    """Convert R-multiples into fractional equity returns at a fixed risk per trade (e.g. 0.015)"""
+    return np.asarray(r_multiples, dtype=np.float64) * risk_per_trade
+
+
+def load_returns_from_memory_db(db_path: str = "sevensys_memory.db", risk_per_trade: float = 0.015) -> np.ndarray:
+    """
+    Per-trade returns from SevenSYSMemoryLogger outcomes
+    Each P&L is expressed in R (P&L / money at risk at the stop) and rescaled to risk_per_trade
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute('''
+            SELECT o.pnl, e.entry_price, e.stop_loss, e.position_size
+            FROM trade_outcomes o
+            JOIN trade_executions e ON e.id = o.trade_id
+            WHERE o.pnl IS NOT NULL
+        ''').fetchall()
+    finally:
+        conn.close()
+
+    if not rows:
+        return np.array([], dtype=np.float64)
+    data = np.array(rows, dtype=np.float64)
+    pnl, entry, stop, size = data.T
+    risk = np.abs(entry - np.nan_to_num(stop, nan=0.0)) * size
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r_multiples = np.where(risk > 0, pnl / risk, np.nan)
+    return returns_from_r_multiples(r_multiples[np.isfinite(r_multiples)], risk_per_trade)
+
+
+def load_returns_from_csv(csv_path: str = "data/historical_trades.csv", risk_per_trade: float = 0.015) -> np.ndarray:
+    """Per-trade returns from a trade CSV with 'profitable' and 'risk_reward_ratio' columns"""
+    df = pd.read_csv(csv_path, usecols=['profitable', 'risk_reward_ratio'])
+    won = df['profitable'].astype(str).str.lower().isin(['true', '1'])
+    r_multiples = np.where(won, df['risk_reward_ratio'].astype(float), -1.0)
+    return returns_from_r_multiples(r_multiples, risk_per_trade)
+
+
+def returns_from_backtest(trades: pd.DataFrame) -> np.ndarray:
+    """Per-trade returns from a SevenSYSBacktester trades DataFrame"""
+    balance_before = trades['balance'] - trades['pnl']
+    return (trades['pnl'] / balance_before).to_numpy(dtype=np.float64)
+
+
+class MonteCarloEngine:
+    """Bootstrap Monte Carlo over a sample of per-trade fractional returns"""
+
+    def __init__(self, trade_returns: Sequence[float], config: Optional[Dict] = None):
+        """
+        Args:
+            trade_returns: Fractional equity return of each historical trade (0.03 = +3%)
+            config: Overrides for MONTE_CARLO_CONFIG
+        """
+        self.config = dict(MONTE_CARLO_CONFIG, **(config or {}))
+        returns = np.asarray(trade_returns, dtype=np.float64)
+        returns = returns[np.isfinite(returns)]
+        if len(returns) == 0:
+            raise ValueError("Monte Carlo needs at least one trade return")
+        # Log returns turn compounding into a cumulative sum; clip so a -100% trade stays finite
+        self.log_returns = np.log1p(np.clip(returns, -0.999999, None)).astype(np.float32)
+
+    def run(self, n_paths: Optional[int] = None, n_trades: Optional[int] = None) -> Dict:
+        """
+        Simulate resampled equity paths
+
+        Returns:
+            dict with summary statistics, per-path distributions and percentile bands
+        """
+        cfg = self.config
+        n_paths = int(n_paths or cfg['n_paths'])
+        n_trades = int(n_trades or cfg['n_trades'])
+        start_time = time.perf_counter()
+        rng = np.random.default_rng(cfg['seed'])
+        log_ruin = np.float32(np.log(cfg['ruin_threshold']))
+
+        final_log = np.empty(n_paths, dtype=np.float32)
+        max_drawdown = np.empty(n_paths, dtype=np.float32)
+        longest_underwater = np.empty(n_paths, dtype=np.int32)
+        ruined = np.empty(n_paths, dtype=bool)
+        columns = np.unique(np.linspace(0, n_trades - 1, min(n_trades, cfg['band_points'])).astype(int))
+        band_rows = min(n_paths, int(cfg['band_paths']))
+        band_log_equity = np.empty((band_rows, len(columns)), dtype=np.float32)
+
+        steps = np.arange(1, n_trades + 1, dtype=np.int32)
+        chunk = max(1, min(cfg['chunk_paths'], cfg['max_block_bytes'] // (n_trades * _BLOCK_BYTES_PER_CELL)))
+        for start in range(0, n_paths, chunk):
+            end = min(n_paths, start + chunk)
+
+            # (paths x trades) log-equity relative to the starting balance
+            picks = rng.integers(0, len(self.log_returns), size=(end - start, n_trades))
+            log_equity = np.cumsum(self.log_returns[picks], axis=1)
+            running_peak = np.maximum(np.maximum.accumulate(log_equity, axis=1), 0.0)
+            underwater = log_equity - running_peak
+
+            final_log[start:end] = log_equity[:, -1]
+            max_drawdown[start:end] = 1.0 - np.exp(underwater.min(axis=1))
+            ruined[start:end] = log_equity.min(axis=1) < log_ruin
+
+            # Trades since the last equity high; the maximum is the longest time to recover
+            at_peak = underwater >= 0
+            last_peak = np.maximum.accumulate(np.where(at_peak, steps, 0), axis=1)
+            longest_underwater[start:end] = (steps - last_peak).max(axis=1)
+
+            # Each (already random) block adds its share of band paths, so the band sample keeps its
+            # size however small max_block_bytes makes the blocks
+            lo, hi = start * band_rows // n_paths, end * band_rows // n_paths
+            band_log_equity[lo:hi] = log_equity[:hi - lo, columns]
+
+        final_equity = cfg['starting_balance'] * np.exp(final_log.astype(np.float64))
+        percentiles = cfg['percentiles']
+        elapsed = time.perf_counter() - start_time
+
+        return {
+            'summary': {
+                'n_paths': n_paths,
+                'n_trades': n_trades,
+                'sample_size': len(self.log_returns),
+                'starting_balance': cfg['starting_balance'],
+                'median_final_balance': float(np.median(final_equity)),
+                'mean_final_balance': float(final_equity.mean()),
+                'probability_of_profit': float((final_log > 0).mean() * 100),
+                'risk_of_ruin': float(ruined.mean() * 100),
+                'ruin_threshold': cfg['ruin_threshold'],
+                'median_max_drawdown_pct': float(np.median(max_drawdown) * 100),
+                'worst_max_drawdown_pct': float(max_drawdown.max() * 100),
+                'median_time_to_recover_trades': float(np.median(longest_underwater)),
+                'elapsed_seconds': round(elapsed, 4),
+            },
+            'final_balance_percentiles': dict(zip(
+                [f"p{p}" for p in percentiles], np.percentile(final_equity, percentiles).round(2).tolist())),
+            'max_drawdown_percentiles': dict(zip(
+                [f"p{p}" for p in percentiles], (np.percentile(max_drawdown, percentiles) * 100).round(2).tolist())),
+            'time_to_recover_percentiles': dict(zip(
+                [f"p{p}" for p in percentiles], np.percentile(longest_underwater, percentiles).tolist())),
+            'equity_bands': self._percentile_bands(band_log_equity, columns),
+        }
+
+    def _percentile_bands(self, log_equity: np.ndarray, columns: np.ndarray) -> Dict:
+        """Equity percentile bands at the sampled trade indexes, with the number of paths behind them"""
+        cfg = self.config
+        values = cfg['starting_balance'] * np.exp(
+            np.percentile(log_equity, cfg['percentiles'], axis=0).astype(np.float64))
+
+        bands = {'trade': (columns + 1).tolist(), 'paths': len(log_equity)}
+        for p, row in zip(cfg['percentiles'], values):
+            bands[f"p{p}"] = row.round(2).tolist()
+        return bands
+
+
+def main():
+    """python monte_carlo_engine.py [csv|db] [n_paths] [n_trades]"""
+    logging.basicConfig(level=logging.INFO)
+    source = sys.argv[1] if len(sys.argv) > 1 else "csv"
+    n_paths = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    n_trades = int(sys.argv[3]) if len(sys.argv) > 3 else None
+
+    returns = load_returns_from_memory_db() if source == "db" else load_returns_from_csv()
+    if len(returns) == 0:
+        print(f"❌ No trade returns found in {source} store")
+        return
+
+    result = MonteCarloEngine(returns).run(n_paths, n_trades)
+    summary = result['summary']
+
+    print(f"\n🎲 MONTE CARLO: {summary['n_paths']:,} paths x {summary['n_trades']} trades "
+          f"(bootstrapped from {summary['sample_size']:,} trades)")
+    print("=" * 60)
+    print(f"Median Final Balance:   ${summary['median_final_balance']:,.2f}")
+    print(f"Probability of Profit:  {summary['probability_of_profit']:.1f}%")
+    print(f"Risk of Ruin (-{(1 - summary['ruin_threshold']) * 100:.0f}%):   {summary['risk_of_ruin']:.2f}%")
+    print(f"Median Max Drawdown:    {summary['median_max_drawdown_pct']:.1f}%")
+    print(f"Median Time to Recover: {summary['median_time_to_recover_trades']:.0f} trades")
+    print(f"Final Balance Bands:    {result['final_balance_percentiles']}")
+    print(f"Elapsed:                {summary['elapsed_seconds']:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
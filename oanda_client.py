@@ -4,17 +4,39 @@ import oandapyV20.endpoints.orders as orders
 import oandapyV20.endpoints.trades as trades
 import oandapyV20.endpoints.pricing as pricing
 from oandapyV20.exceptions import V20Error
+import time
 import logging
-from typing import Dict, Optional
-from datetime import datetime
+from typing import Dict, List, Optional
+from datetime import datetime, timezone
+from latency_trace import span
+from metrics import ORDER_LATENCY, PRICE_AGE
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+STANDIN_ENVIRONMENT = "standin"
+
+def resolve_environment(default: str) -> str:
+    """Return the oandapyV20 environment to use, registering OANDA_STANDIN_URL (local_oanda_server.py) when set"""
+    standin_url = os.getenv('OANDA_STANDIN_URL')
+    if not standin_url:
+        return default
+    standin_url = standin_url.rstrip('/')
+    oandapyV20.oandapyV20.TRADING_ENVIRONMENTS[STANDIN_ENVIRONMENT] = {'api': standin_url, 'stream': standin_url}
+    return STANDIN_ENVIRONMENT
+
+def _rfc3339_epoch(timestamp: str) -> float:
+    """Epoch seconds of an OANDA time ('2024-01-02T03:04:05.123456789Z' or a UNIX string)"""
+    if 'T' not in timestamp:
+        return float(timestamp)
+    seconds, _, fraction = timestamp.rstrip('Z').partition('.')
+    epoch = datetime.strptime(seconds, '%Y-%m-%dT%H:%M:%S').replace(tzinfo=timezone.utc).timestamp()
+    return epoch + (float('0.' + fraction) if fraction else 0.0)
+
 class OandaClient:
-    def __init__(self):
-        self.api_key = os.getenv('OANDA_API_KEY')
-        self.account_id = os.getenv('OANDA_ACCOUNT_ID')
+    def __init__(self, api_key: Optional[str] = None, account_id: Optional[str] = None):
+        """Credentials default to OANDA_API_KEY / OANDA_ACCOUNT_ID (pass both for extra accounts)"""
+        self.api_key = api_key or os.getenv('OANDA_API_KEY')
+        self.account_id = account_id or os.getenv('OANDA_ACCOUNT_ID')
         self.is_live = os.getenv('OANDA_LIVE', 'false').lower() == 'true'
         
         if not self.api_key or not self.account_id:
@@ -31,6 +53,12 @@ class OandaClient:
                 self.api_url = "api-fxpractice.oanda.com"
                 self.is_live = False
             
+            # Offline runs against the local stand-in server
+            if resolve_environment(self.environment) == STANDIN_ENVIRONMENT:
+                self.environment = STANDIN_ENVIRONMENT
+                self.api_url = os.getenv('OANDA_STANDIN_URL')
+                self.is_live = False
+            
             # Clean and validate API key
             if not self.api_key:
                 raise ValueError("OANDA API key is not set")
@@ -59,13 +87,7 @@ class OandaClient:
     def get_account_details(self) -> Dict:
         """Get account details and balance"""
         try:
-            import oandapyV20.endpoints.accounts as accounts
-            
-            # Get account details
-            r = accounts.AccountDetails(accountID=self.account_id)
-            response = self.client.request(r)
-            
-            account_data = response.get('account', {})
+            account_data = self.get_account_snapshot()
             
             return {
                 'balance': float(account_data.get('balance', 0)),
@@ -84,12 +106,22 @@ class OandaClient:
             logger.error(f"Error getting account details: {str(e)}")
             raise
 
+    def get_account_snapshot(self) -> Dict:
+        """Raw AccountDetails account (with positions and trades) tagged with lastTransactionID"""
+        import oandapyV20.endpoints.accounts as accounts
+        response = self.client.request(accounts.AccountDetails(accountID=self.account_id))
+        account = response.get('account', {})
+        account.setdefault('lastTransactionID', response.get('lastTransactionID'))
+        return account
+
     def place_trade(self, trade_data: Dict) -> Dict:
         """Place a trade on OANDA"""
         try:
             # Get current market price first
-            current_price = self.get_current_price(trade_data['symbol'])
-            logger.info(f"Current market price for {trade_data['symbol']}: {current_price.get('bid', 'N/A')}/{current_price.get('ask', 'N/A')}")
+            with span('oanda.pricing'):
+                current_price = self.get_current_price(trade_data['symbol'])
+            logger.debug("Current market price for %s: %s/%s", trade_data['symbol'],
+                         current_price.get('bid', 'N/A'), current_price.get('ask', 'N/A'))
             
             # Place market order WITHOUT TP/SL first (to avoid direction issues)
             order_data = {
@@ -102,19 +134,19 @@ class OandaClient:
                 }
             }
             
-            logger.info(f"Placing trade: {trade_data['units']} units of {trade_data['symbol']}")
+            logger.info("Placing trade: %s units of %s", trade_data['units'], trade_data['symbol'])
             
             # Create and process the order request
             r = orders.OrderCreate(self.account_id, data=order_data)
-            response = self.client.request(r)
+            with span('oanda.order_create'), ORDER_LATENCY.labels('MARKET').time():
+                response = self.client.request(r)
             
-            logger.info(f"Trade placed successfully: {response}")
+            logger.debug("Trade placed: %s", response)
             
             # Now try to add TP/SL based on actual fill price
             if response.get('orderFillTransaction'):
                 trade_id = response['orderFillTransaction']['tradeOpened']['tradeID']
                 
-                logger.info(f"Adding TP/SL to trade {trade_id}")
                 
                 self.add_tp_sl_to_trade(trade_id, trade_data['symbol'], trade_data['close_price'], 
                                        trade_data['stop_loss'], trade_data['take_profit'], trade_data['units'])
@@ -125,6 +157,7 @@ class OandaClient:
                 return {
                     'status': 'success',
                     'order_id': response['orderFillTransaction']['id'],
+                    'trade_id': response['orderFillTransaction'].get('tradeOpened', {}).get('tradeID'),
                     'filled_price': response['orderFillTransaction']['price'],
                     'timestamp': datetime.now().isoformat()
                 }
@@ -172,7 +205,8 @@ class OandaClient:
             
             # Get the actual fill price
             trade_details = trades.TradeDetails(accountID=self.account_id, tradeID=trade_id)
-            trade_response = self.client.request(trade_details)
+            with span('oanda.trade_details'):
+                trade_response = self.client.request(trade_details)
             fill_price = float(trade_response['trade']['price'])
             
             # Calculate distances from SevenSYS close price
@@ -191,13 +225,14 @@ class OandaClient:
                 new_stop_loss = fill_price + sl_distance
                 new_take_profit = fill_price - tp_distance
             
-            # Round to 5 decimal places
-            new_stop_loss = round(new_stop_loss, 5)
-            new_take_profit = round(new_take_profit, 5)
+            # Round to the instrument's display precision (5 for EUR_USD, 3 for USD_JPY)
+            from instrument_metadata import get_instrument_metadata
+            instruments = get_instrument_metadata()
+            new_stop_loss = instruments.round_price(symbol, new_stop_loss)
+            new_take_profit = instruments.round_price(symbol, new_take_profit)
             
-            logger.info(f"Adding TP/SL to trade {trade_id}: SL={new_stop_loss}, TP={new_take_profit}")
-            logger.info(f"Fill price: {fill_price}, Close price: {close_price}")
-            logger.info(f"SL distance: {sl_distance:.5f}, TP distance: {tp_distance:.5f}")
+            logger.info("Adding TP/SL to trade %s: SL=%s TP=%s (fill %s, close %s)",
+                        trade_id, new_stop_loss, new_take_profit, fill_price, close_price)
             
             # Add Stop Loss
             sl_data = {
@@ -210,8 +245,9 @@ class OandaClient:
             }
             
             sl_request = orders.OrderCreate(accountID=self.account_id, data=sl_data)
-            sl_response = self.client.request(sl_request)
-            logger.info(f"Stop Loss order created: {sl_response}")
+            with span('oanda.sl_create'), ORDER_LATENCY.labels('STOP_LOSS').time():
+                sl_response = self.client.request(sl_request)
+            logger.debug("Stop Loss order created: %s", sl_response)
             
             # Add Take Profit
             tp_data = {
@@ -224,8 +260,9 @@ class OandaClient:
             }
             
             tp_request = orders.OrderCreate(accountID=self.account_id, data=tp_data)
-            tp_response = self.client.request(tp_request)
-            logger.info(f"Take Profit order created: {tp_response}")
+            with span('oanda.tp_create'), ORDER_LATENCY.labels('TAKE_PROFIT').time():
+                tp_response = self.client.request(tp_request)
+            logger.debug("Take Profit order created: %s", tp_response)
             
             return True
             
@@ -248,21 +285,17 @@ class OandaClient:
         try:
             # Ensure the pair is properly formatted
             formatted_pair = pair.replace('/', '_').upper()
-            logger.info(f"Fetching price for {formatted_pair}")
             
             # Create the pricing request
             params = {"instruments": formatted_pair}
             r = pricing.PricingInfo(accountID=self.account_id, params=params)
             
             # Make the request with full debugging
-            logger.info(f"Making pricing request for {formatted_pair}")
-            logger.debug(f"Request parameters: {params}")
+            logger.debug("Pricing request for %s on %s (%s)", formatted_pair, self.environment, self.account_id)
             
             try:
-                logger.info(f"Sending request to OANDA for {formatted_pair}")
-                logger.info(f"Environment: {self.environment} (detected from account ID), Account ID: {self.account_id}")
                 response = self.client.request(r)
-                logger.debug(f"Raw response: {response}")
+                logger.debug("Raw response: %s", response)
             except oandapyV20.exceptions.V20Error as v20_error:
                 error_msg = str(v20_error)
                 logger.error("OANDA API error details:")
@@ -288,7 +321,8 @@ class OandaClient:
                     'ask': float(price_data['asks'][0]['price']),
                     'timestamp': price_data['time']
                 }
-                logger.info(f"Price data received for {pair}: Bid={result['bid']}, Ask={result['ask']}")
+                PRICE_AGE.observe(max(0.0, time.time() - _rfc3339_epoch(price_data['time'])))
+                logger.debug("Price for %s: bid=%s ask=%s", pair, result['bid'], result['ask'])
                 return result
             else:
                 error_msg = f"No price data available for {pair}"
@@ -301,6 +335,147 @@ class OandaClient:
             logger.error(f"Error getting price for {pair}: {str(e)}")
             raise
 
+    def get_open_trades(self) -> Dict:
+        """Open trades plus the lastTransactionID they are consistent with (one request)"""
+        try:
+            r = trades.OpenTrades(accountID=self.account_id)
+            return self.client.request(r)
+        except Exception as e:
+            logger.error(f"Error getting open trades: {str(e)}")
+            raise
+
+    def get_account_changes(self, since_transaction_id: str) -> Dict:
+        """Trades/orders changed and transactions recorded since a transaction ID (one request)"""
+        try:
+            import oandapyV20.endpoints.accounts as accounts
+            r = accounts.AccountChanges(accountID=self.account_id,
+                                        params={'sinceTransactionID': str(since_transaction_id)})
+            return self.client.request(r)
+        except Exception as e:
+            logger.error(f"Error getting account changes: {str(e)}")
+            raise
+
+    def get_open_positions(self) -> list:
+        """Positions with a non-zero long or short side"""
+        try:
+            import oandapyV20.endpoints.positions as positions
+            r = positions.OpenPositions(accountID=self.account_id)
+            return self.client.request(r).get('positions', [])
+        except Exception as e:
+            logger.error(f"Error getting open positions: {str(e)}")
+            raise
+
+    def get_pending_orders(self) -> list:
+        try:
+            r = orders.OrdersPending(accountID=self.account_id)
+            return self.client.request(r).get('orders', [])
+        except Exception as e:
+            logger.error(f"Error getting pending orders: {str(e)}")
+            raise
+
+    def get_account_summary(self) -> Dict:
+        """Raw AccountSummary (balance, NAV, open trade/position/order counts)"""
+        try:
+            import oandapyV20.endpoints.accounts as accounts
+            r = accounts.AccountSummary(accountID=self.account_id)
+            return self.client.request(r).get('account', {})
+        except Exception as e:
+            logger.error(f"Error getting account summary: {str(e)}")
+            raise
+
+    def close_position(self, instrument: str, long_units: str = 'ALL', short_units: str = 'ALL') -> Dict:
+        """PositionClose for one instrument; pass 'NONE' for a side that is not held"""
+        try:
+            import oandapyV20.endpoints.positions as positions
+            data = {}
+            if long_units != 'NONE':
+                data['longUnits'] = str(long_units)
+            if short_units != 'NONE':
+                data['shortUnits'] = str(short_units)
+            r = positions.PositionClose(accountID=self.account_id, instrument=instrument, data=data)
+            response = self.client.request(r)
+            logger.info(f"Position closed: {instrument} ({data})")
+            return {'status': 'success', 'instrument': instrument, 'response': response}
+        except Exception as e:
+            logger.error(f"Error closing position {instrument}: {str(e)}")
+            raise
+
+    def cancel_order(self, order_id: str) -> Dict:
+        try:
+            r = orders.OrderCancel(accountID=self.account_id, orderID=order_id)
+            return self.client.request(r)
+        except Exception as e:
+            logger.error(f"Error cancelling order {order_id}: {str(e)}")
+            raise
+
+    def flatten_account(self, instruments: Optional[List[str]] = None, max_workers: int = 16) -> Dict:
+        """
+        Close every position and cancel every pending entry order as fast as possible
+
+        Reads one account snapshot (positions and pending orders at one transaction ID), then
+        issues one PositionClose per instrument (only the sides held) and one OrderCancel per
+        entry order all at once, and verifies against a second snapshot. TP/SL orders are left
+        to OANDA, which cancels them with their trades.
+
+        Args:
+            instruments: Only flatten these instruments (e.g. one chart's close_all); all by default
+
+        Returns:
+            {'status': 'flat'|'incomplete', 'closed', 'cancelled', 'errors', 'remaining', 'summary',
+             'elapsed_ms'}; 'flat' needs no errors and no position or entry order left in scope
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        scope = set(instruments) if instruments else None
+
+        def in_scope(instrument: str) -> bool:
+            return scope is None or instrument in scope
+
+        def held_positions(snapshot: Dict) -> list:
+            # AccountDetails also lists instruments traded earlier with both sides at zero
+            return [p for p in snapshot.get('positions', []) if in_scope(p['instrument'])
+                    and (float(p['long']['units']) != 0 or float(p['short']['units']) != 0)]
+
+        def entry_orders(snapshot: Dict) -> list:
+            # Dependent TP/SL go with their trade
+            return [o for o in snapshot.get('orders', [])
+                    if o.get('tradeID') is None and in_scope(o.get('instrument'))]
+
+        start = datetime.now()
+        snapshot = self.get_account_snapshot()
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='flatten') as pool:
+            jobs = {}
+            for position in held_positions(snapshot):
+                long_units = 'ALL' if float(position['long']['units']) != 0 else 'NONE'
+                short_units = 'ALL' if float(position['short']['units']) != 0 else 'NONE'
+                jobs[('close', position['instrument'])] = pool.submit(
+                    self.close_position, position['instrument'], long_units, short_units)
+            for order in entry_orders(snapshot):
+                jobs[('cancel', order['id'])] = pool.submit(self.cancel_order, order['id'])
+
+            result = {'closed': [], 'cancelled': [], 'errors': {}}
+            for (kind, key), future in jobs.items():
+                try:
+                    future.result()
+                    result['closed' if kind == 'close' else 'cancelled'].append(key)
+                except Exception as e:
+                    result['errors'][key] = str(e)
+
+        summary = self.get_account_snapshot()
+        result['remaining'] = {
+            'positions': [p['instrument'] for p in held_positions(summary)],
+            'orders': [o['id'] for o in entry_orders(summary)],
+        }
+
+        flat = not result['errors'] and not result['remaining']['positions'] and not result['remaining']['orders']
+        result['status'] = 'flat' if flat else 'incomplete'
+        result['summary'] = {k: summary.get(k) for k in ('balance', 'NAV', 'openTradeCount',
+                                                        'openPositionCount', 'pendingOrderCount')}
+        result['elapsed_ms'] = round((datetime.now() - start).total_seconds() * 1000, 1)
+        logger.info(f"Flatten {result['status']}: {len(result['closed'])} positions closed, "
+                    f"{len(result['cancelled'])} orders cancelled, {len(result['errors'])} errors "
+                    f"in {result['elapsed_ms']}ms")
+        return result
+
     def close_trade(self, trade_id: str) -> Dict:
         """Close a specific trade"""
         try:
@@ -43,10 +43,9 @@ class OandaHistoricalData:
         self.api_key = api_key
         self.account_id = account_id
         
-        if environment == "practice":
-            self.api = oandapyV20.API(access_token=api_key, environment="practice")
-        else:
-            self.api = oandapyV20.API(access_token=api_key, environment="live")
+        from oanda_client import resolve_environment
+        environment = resolve_environment("practice" if environment == "practice" else "live")
+        self.api = oandapyV20.API(access_token=api_key, environment=environment)
         
         # Data cache to avoid repeated API calls
         self.data_cache = {}
@@ -7,8 +7,14 @@ from collections import deque
 logger = logging.getLogger(__name__)
 
 class PositionManager:
-    def __init__(self, risk_manager):
+    def __init__(self, risk_manager, broker=None):
+        """
+        Args:
+            risk_manager: Sizes new positions
+            broker: Optional AsyncOandaClient; without one orders are simulated locally
+        """
         self.risk_manager = risk_manager
+        self.broker = broker
         self.positions = {}
         self.pending_orders = {}
         self.position_history = deque(maxlen=1000)
@@ -79,34 +85,34 @@ class PositionManager:
             return False
             
     async def emergency_close_all(self) -> bool:
-        """Emergency closure of all positions"""
+        """Emergency closure of all positions, all closes in flight at once"""
         logger.warning("Emergency closing all positions...")
-        success = True
-        
-        for position_id in list(self.positions.keys()):
-            for attempt in range(self.max_retry_attempts):
-                try:
-                    if await self.close_position(position_id, emergency=True):
-                        break
-                except Exception as e:
-                    logger.error(f"Emergency close attempt {attempt + 1} failed for {position_id}: {str(e)}")
-                    if attempt == self.max_retry_attempts - 1:
-                        success = False
-                        
-                await asyncio.sleep(1)  # Brief delay between attempts
+        
+        position_ids = list(self.positions.keys())
+        results = await asyncio.gather(*(self._emergency_close(pid) for pid in position_ids))
+        success = all(results)
                 
         # Cancel all pending orders
         await self.cancel_all_pending()
         
         return success and not self.positions
         
+    async def _emergency_close(self, position_id: str) -> bool:
+        """Close one position, retrying after a brief delay"""
+        for attempt in range(self.max_retry_attempts):
+            try:
+                if await self.close_position(position_id, emergency=True):
+                    return True
+            except Exception as e:
+                logger.error(f"Emergency close attempt {attempt + 1} failed for {position_id}: {str(e)}")
+            if attempt < self.max_retry_attempts - 1:
+                await asyncio.sleep(1)  # Brief delay between attempts
+        return False
+        
     async def cancel_all_pending(self) -> bool:
         """Cancel all pending orders"""
-        success = True
-        for order_id in list(self.pending_orders.keys()):
-            if not await self._cancel_order(order_id):
-                success = False
-        return success
+        results = await asyncio.gather(*(self._cancel_order(oid) for oid in list(self.pending_orders.keys())))
+        return all(results)
         
     async def update_position(self, position_id: str, updates: Dict) -> bool:
         """Update position parameters (e.g., stop loss, take profit)"""
@@ -156,20 +162,42 @@ class PositionManager:
         return f"pos_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
         
     async def _execute_order(self, position: Dict) -> Optional[Dict]:
-        """Execute a new order - implement broker-specific logic here"""
-        # Placeholder for broker integration
+        """Execute a new order on the broker (simulated fill without one)"""
+        if self.broker is None:
+            position['status'] = 'open'
+            return position
+        
+        units = position['size'] if position['direction'] == 'long' else -position['size']
+        result = await self.broker.place_trade({
+            'symbol': position['symbol'],
+            'units': int(units),
+            'close_price': position['entry_price'],
+            'stop_loss': position['stop_loss'],
+            'take_profit': position['take_profit'],
+        })
+        if result.get('status') != 'success':
+            logger.error(f"Order rejected for {position['symbol']}: {result.get('error')}")
+            return None
+        position['trade_id'] = result.get('trade_id')
+        position['entry_price'] = float(result['filled_price'])
         position['status'] = 'open'
         return position
         
     async def _execute_close_order(self, position: Dict, emergency: bool = False) -> bool:
-        """Execute a close order - implement broker-specific logic here"""
-        # Placeholder for broker integration
-        return True
+        """Execute a close order on the broker (always succeeds without one)"""
+        if self.broker is None or not position.get('trade_id'):
+            return True
+        result = await self.broker.close_trade(position['trade_id'])
+        position['close_price'] = float(result['close_price'])
+        return result.get('status') == 'success'
         
     async def _update_order(self, position: Dict) -> bool:
-        """Update an existing order - implement broker-specific logic here"""
-        # Placeholder for broker integration
-        return True
+        """Push stop loss / take profit changes to the broker"""
+        if self.broker is None or not position.get('trade_id'):
+            return True
+        result = await self.broker.modify_trade(position['trade_id'], position.get('stop_loss'),
+                                                position.get('take_profit'))
+        return result.get('status') == 'success'
         
     async def _cancel_order(self, order_id: str) -> bool:
         """Cancel a pending order - implement broker-specific logic here"""
@@ -1,11 +1,16 @@
 from typing import Dict, List, Optional
+import heapq
+import itertools
 import numpy as np
 from datetime import datetime, timedelta
 from config import RISK_CONFIG, PREMIUM_TRADING_HOURS, SIGNAL_QUALITY_CONFIG
+from instrument_metadata import get_instrument_metadata
+from sim_clock import SYSTEM_CLOCK
 
 class RiskManager:
-    def __init__(self, initial_balance: float = 200.0):
+    def __init__(self, initial_balance: float = 200.0, clock=None):
         self.initial_balance = initial_balance
+        self.clock = clock or SYSTEM_CLOCK  # Simulators pass their VirtualClock
         self.current_balance = initial_balance
         # ENHANCED RISK PARAMETERS FOR 65%+ WIN RATE
         self.max_drawdown = RISK_CONFIG['max_drawdown']  # 12% maximum drawdown
@@ -16,8 +21,13 @@ class RiskManager:
         self.correlation_threshold = 0.7  # Stricter correlation control
         self.max_daily_trades = 3  # Quality over quantity
         self.min_trades_for_correlation = 2
+        self.history_limit = RISK_CONFIG.get('trade_history_limit', 1000)
         self.trade_history: List[Dict] = []
-        self.daily_trades: List[Dict] = []
+        # Incrementally maintained risk state so validate_trade stays O(1) however long the history
+        self.peak_balance = initial_balance
+        self.daily_trades: List[tuple] = []  # Heap of (timestamp, seq, trade) from the last 24 hours
+        self.daily_risk = 0.0                # sum(abs(profit)) over daily_trades
+        self._daily_seq = itertools.count()
         
     def validate_trade(self, trade: Dict, market_conditions: Dict) -> tuple[bool, str]:
         """
@@ -69,7 +79,7 @@ class RiskManager:
     def _is_premium_trading_time(self) -> bool:
         """Check if current time is within premium trading hours"""
         try:
-            current_time = datetime.now()
+            current_time = self.clock.now()
             current_hour = current_time.hour
             current_day = current_time.strftime('%A').lower()
             
@@ -139,24 +149,16 @@ class RiskManager:
         """Calculate safe position size based on risk parameters and Oanda requirements."""
         entry = trade['entry']
         stop_loss = trade['stop_loss']
+        instruments = get_instrument_metadata()
         
-        # Calculate pip size for the currency pair
-        if trade['pair'].endswith('JPY'):
-            pip_size = 0.01
-        else:
-            pip_size = 0.0001
-            
         # Calculate stop loss in pips
-        stop_loss_pips = abs(entry - stop_loss) / pip_size
+        stop_loss_pips = abs(entry - stop_loss) / instruments.pip_size_of(trade['pair'])
         
         # Calculate risk amount in account currency (5% of balance)
         risk_amount = self.current_balance * self.max_risk_per_trade
         
-        # Calculate pip value for minimum position size (1 unit)
-        if trade['pair'].endswith('JPY'):
-            pip_value_per_unit = 0.01 / entry  # Convert to USD
-        else:
-            pip_value_per_unit = 0.0001  # USD pairs
+        # Calculate pip value for minimum position size (1 unit), in account currency
+        pip_value_per_unit = instruments.pip_values([trade['pair']], [entry])[0]
             
         # Calculate position size
         if stop_loss_pips > 0:
@@ -175,7 +177,15 @@ class RiskManager:
     def update_trade_history(self, trade: Dict):
         """Update trade history and recalculate metrics."""
         self.trade_history.append(trade)
-        self.daily_trades.append(trade)
+        if len(self.trade_history) > 2 * self.history_limit:
+            # Trim in blocks so appends stay amortised O(1)
+            del self.trade_history[:-self.history_limit]
+
+        if trade.get('balance') is not None:
+            self.peak_balance = max(self.peak_balance, trade['balance'])
+        heapq.heappush(self.daily_trades,
+                       (datetime.fromisoformat(trade['timestamp']), next(self._daily_seq), trade))
+        self.daily_risk += abs(trade['profit'])
         
         # Update current balance
         self.current_balance += trade['profit']
@@ -188,17 +198,15 @@ class RiskManager:
         if not self.trade_history:
             return False
             
-        peak_balance = max(self.initial_balance, max(t['balance'] for t in self.trade_history))
-        current_drawdown = (peak_balance - self.current_balance) / peak_balance
+        current_drawdown = (self.peak_balance - self.current_balance) / self.peak_balance
         
         return current_drawdown > self.max_drawdown
         
     def _check_daily_risk(self, new_trade: Dict) -> bool:
         """Check if adding this trade would exceed daily risk limit."""
-        daily_risk = sum(abs(t['profit']) for t in self.daily_trades)
         new_risk = abs(new_trade['entry'] - new_trade['stop_loss'])
         
-        return (daily_risk + new_risk) > (self.current_balance * self.max_daily_risk)
+        return (self.daily_risk + new_risk) > (self.current_balance * self.max_daily_risk)
         
     def _validate_market_conditions(self, conditions: Dict) -> bool:
         """Validate if market conditions are suitable for trading."""
@@ -306,30 +314,12 @@ class RiskManager:
         # Default to allowing the trade
         return False
         
-    def _calculate_pip_value(self, pair: str) -> float:
-        """Calculate pip value for given currency pair based on Oanda standards."""
-        # Standard pip values for $1000 position size
-        base_pip_values = {
-            "EUR_USD": 0.0001,  # $0.10 per pip per 1000 units
-            "GBP_USD": 0.0001,  # $0.10 per pip per 1000 units
-            "USD_JPY": 0.01,    # ¥1.00 per pip per 1000 units ≈ $0.09
-            "USD_CHF": 0.0001,  # CHF0.10 per pip per 1000 units
-            "AUD_USD": 0.0001,  # $0.10 per pip per 1000 units
-            "NZD_USD": 0.0001   # $0.10 per pip per 1000 units
-        }
-        
-        # Get base pip value and adjust for actual position size
-        pip_size = base_pip_values.get(pair, 0.0001)
-        
-        # For USD pairs, 1 pip = $0.0001 per unit
-        if pair.endswith('USD'):
-            return pip_size * 0.0001
-        # For JPY pairs, 1 pip = ¥0.01 per unit ≈ $0.00009
-        elif pair.endswith('JPY'):
-            return pip_size * 0.00009
-        # Default for other pairs
-        else:
-            return pip_size * 0.0001
+    def _calculate_pip_value(self, pair: str, price: Optional[float] = None) -> float:
+        """Pip value per unit in account currency (quote currency when no price is given)."""
+        instruments = get_instrument_metadata()
+        if price is None:
+            return instruments.pip_size_of(pair)
+        return float(instruments.pip_values([pair], [price])[0])
         
     def _round_position_size(self, size: float) -> float:
         """Round position size to nearest standard lot size."""
@@ -338,11 +328,12 @@ class RiskManager:
         
     def _cleanup_daily_trades(self):
         """Remove trades older than 24 hours from daily trades list."""
-        current_time = datetime.now()
-        self.daily_trades = [
-            trade for trade in self.daily_trades
-            if datetime.fromisoformat(trade['timestamp']) > current_time - timedelta(days=1)
-        ]
+        cutoff = self.clock.now() - timedelta(days=1)
+        while self.daily_trades and self.daily_trades[0][0] <= cutoff:
+            _, _, trade = heapq.heappop(self.daily_trades)
+            self.daily_risk -= abs(trade['profit'])
+        if not self.daily_trades:
+            self.daily_risk = 0.0  # Drop accumulated rounding error whenever the window empties
         
     def _calculate_trade_correlation(self, trade: Dict) -> float:
         """Calculate correlation of new trade with existing trades."""
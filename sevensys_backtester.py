@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+"""
+SevenSYS Vectorized Backtester
+Computes the SevenSYS.pine long/short signal strengths for every bar of a candle
+history in one pass and simulates ATR stop/target exits on bid/ask prices from
+cached OANDA MBA candles, so parameter changes can be validated before editing Pine
+"""
+
+import sys
+import time
+import logging
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# SevenSYS.pine inputs (plus the SevenSYS_NEWS news inputs) with their Pine defaults
+SEVENSYS_PARAMS = {
+    'risk_per_trade': 1.5,          # riskPerTrade (%) of current equity risked at the stop
+    'min_signal_strength': 55.0,    # minSignalStrength
+    'max_drawdown': 10.0,           # Safety stop once equity falls this % below initial capital
+    'atr_multiplier': 2.0,          # stop_distance = atr * atr_multiplier
+    'tp_multiplier': 2.5,           # profit_distance = stop_distance * tp_multiplier
+    'news_bias': 0.0,               # news_bias input (-20 to +20)
+    'news_filter': True,            # news_filter input
+    'major_event_mode': False,      # major_event_mode input (higher base strength, wider stops)
+    'initial_balance': 10000.0,
+    'account_currency': 'USD',
+    'warmup_bars': 200,             # Bars skipped while EMA200/HTF trend settle
+}
+
+# Pine session strings as (start_minute, end_minute, timezone)
+SESSIONS = {
+    'london': (8 * 60, 16 * 60, 'Europe/London'),
+    'newyork': (13 * 60, 22 * 60, 'America/New_York'),
+    'asian': (22 * 60, 6 * 60, 'Asia/Tokyo'),
+}
+
+HTF_SECONDS = 4 * 3600  # request.security(..., "240", ...)
+HIGH_VOLATILITY_ATR_PCT = 2.0
+
+
+def _ema(values: np.ndarray, length: int) -> np.ndarray:
+    """Pine ta.ema (alpha = 2 / (length + 1), seeded with the first value)"""
+    return pd.Series(values).ewm(span=length, adjust=False).mean().to_numpy()
+
+
+def _rma(values: np.ndarray, length: int) -> np.ndarray:
+    """Pine ta.rma (Wilder smoothing) used by ta.rsi and ta.atr"""
+    return pd.Series(values).ewm(alpha=1.0 / length, adjust=False).mean().to_numpy()
+
+
+def _session_mask(times: pd.DatetimeIndex, start_minute: int, end_minute: int, tz: str) -> np.ndarray:
+    """True where the bar opens inside a Pine "HHMM-HHMM" session in the given timezone"""
+    local = times.tz_convert(tz)
+    minute = np.asarray(local.hour * 60 + local.minute)
+    if start_minute < end_minute:
+        return (minute >= start_minute) & (minute < end_minute)
+    return (minute >= start_minute) | (minute < end_minute)  # Overnight session
+
+
+def quote_conversion(instrument: str, account_currency: str, price):
+    """
+    Factor converting P&L in the instrument's quote currency into the account currency
+    Crosses without the account currency fall back to 1.0
+    """
+    base, _, quote = instrument.replace('/', '_').upper().partition('_')
+    if quote == account_currency:
+        return 1.0
+    if base == account_currency:
+        return 1.0 / price
+    return 1.0
+
+
+def compute_indicators(candles) -> Dict[str, np.ndarray]:
+    """
+    Compute every SevenSYS indicator for all bars at once
+
+    Args:
+        candles: CANDLE_DTYPE records (see candle_cache) or a DataFrame with the same columns
+
+    Returns:
+        dict of per-bar NumPy arrays; parameter-independent, so it can be reused across runs
+    """
+    close = np.asarray(candles['mid_c'], dtype=float)
+    high = np.asarray(candles['mid_h'], dtype=float)
+    low = np.asarray(candles['mid_l'], dtype=float)
+    open_ = np.asarray(candles['mid_o'], dtype=float)
+    volume = np.asarray(candles['volume'], dtype=float)
+    epoch = np.asarray(candles['time'], dtype=np.int64)
+    times = pd.DatetimeIndex(pd.to_datetime(epoch, unit='s', utc=True))
+
+    ind = {
+        'close': close,
+        'open': open_,
+        'ema8': _ema(close, 8),
+        'ema21': _ema(close, 21),
+        'ema50': _ema(close, 50),
+        'ema200': _ema(close, 200),
+    }
+
+    # HTF trend: EMA21 of 4H closes, taken from the last completed 4H bar (no lookahead)
+    bucket = epoch // HTF_SECONDS
+    _, first_idx, inverse = np.unique(bucket, return_index=True, return_inverse=True)
+    last_idx = np.append(first_idx[1:], len(close)) - 1
+    htf_ema = _ema(close[last_idx], 21)
+    htf_prev = np.concatenate(([np.nan], htf_ema[:-1]))
+    ind['htf_trend'] = htf_prev[inverse]
+
+    # RSI(14)
+    delta = np.diff(close, prepend=close[0])
+    up = _rma(np.maximum(delta, 0.0), 14)
+    down = _rma(np.maximum(-delta, 0.0), 14)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ind['rsi'] = np.where(down == 0, 100.0, 100.0 - 100.0 / (1.0 + up / down))
+
+    # MACD(12, 26, 9)
+    macd = _ema(close, 12) - _ema(close, 26)
+    signal = _ema(macd, 9)
+    hist = macd - signal
+    ind['macd'] = macd
+    ind['macd_signal'] = signal
+    ind['macd_hist'] = hist
+    ind['macd_hist_prev'] = np.concatenate(([np.nan], hist[:-1]))
+
+    # Volume and session-anchored VWAP (FX trading day rolls at 17:00 New York)
+    ind['volume'] = volume
+    ind['volume_ma'] = pd.Series(volume).rolling(20).mean().to_numpy()
+    ny = times.tz_convert('America/New_York')
+    trading_day = pd.factorize((ny + pd.Timedelta(hours=7)).normalize())[0]
+    hlc3 = (high + low + close) / 3.0
+    pv = pd.Series(hlc3 * volume).groupby(trading_day).cumsum().to_numpy()
+    vol_cum = pd.Series(volume).groupby(trading_day).cumsum().to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ind['vwap'] = np.where(vol_cum > 0, pv / vol_cum, close)
+
+    # ATR(14)
+    prev_close = np.concatenate(([close[0]], close[:-1]))
+    true_range = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+    ind['atr'] = _rma(true_range, 14)
+    ind['atr_pct'] = ind['atr'] / close * 100.0
+
+    # Sessions
+    london = _session_mask(times, *SESSIONS['london'])
+    newyork = _session_mask(times, *SESSIONS['newyork'])
+    asian = _session_mask(times, *SESSIONS['asian'])
+    ind['london_ny_overlap'] = london & newyork
+    ind['active_session'] = london | newyork | asian
+
+    return ind
+
+
+def compute_signals(ind: Dict[str, np.ndarray], params: Optional[Dict] = None) -> Dict[str, np.ndarray]:
+    """
+    Vectorized SevenSYS scoring: trend, momentum, price action, signal strengths and entries
+
+    Returns:
+        dict with per-bar 'trend_strength', 'momentum_score', 'pa_score',
+        'signal_strength_long', 'signal_strength_short', 'enter_long', 'enter_short', 'safety_stop'
+    """
+    p = dict(SEVENSYS_PARAMS, **(params or {}))
+    close = ind['close']
+    ema8, ema21, ema50, ema200 = ind['ema8'], ind['ema21'], ind['ema50'], ind['ema200']
+
+    # Trend
+    ema_bull_basic = (ema8 > ema21) & (ema21 > ema50) & (close > ema21)
+    ema_bear_basic = (ema8 < ema21) & (ema21 < ema50) & (close < ema21)
+    ema_strong_bull = (ema8 > ema21) & (ema21 > ema50) & (ema50 > ema200) & (close > ema8)
+    ema_strong_bear = (ema8 < ema21) & (ema21 < ema50) & (ema50 < ema200) & (close < ema8)
+    htf_trend_bull = close > ind['htf_trend'] * 0.999
+    htf_trend_bear = close < ind['htf_trend'] * 1.001
+
+    trend_strength = np.select(
+        [ema_strong_bull & htf_trend_bull, ema_strong_bear & htf_trend_bear,
+         ema_bull_basic & htf_trend_bull, ema_bear_basic & htf_trend_bear,
+         (ema8 > ema21) & (close > ema50), (ema8 < ema21) & (close < ema50)],
+        [15.0, -15.0, 8.0, -8.0, 4.0, -4.0], default=0.0)
+
+    # Momentum
+    rsi = ind['rsi']
+    rsi_bullish = (rsi > 40) & (rsi < 80)
+    rsi_bearish = (rsi < 60) & (rsi > 20)
+    rsi_strong_bullish = (rsi > 60) & (rsi < 85)
+    rsi_strong_bearish = (rsi < 40) & (rsi > 15)
+    rsi_neutral = (rsi >= 30) & (rsi <= 70)
+
+    hist, hist_prev = ind['macd_hist'], ind['macd_hist_prev']
+    macd_bullish = (ind['macd'] > ind['macd_signal']) & (hist > 0)
+    macd_bearish = (ind['macd'] < ind['macd_signal']) & (hist < 0)
+    macd_strong_bull = macd_bullish & (hist > hist_prev)
+    macd_strong_bear = macd_bearish & (hist < hist_prev)
+
+    momentum_score = np.select(
+        [rsi_strong_bullish & macd_strong_bull, rsi_strong_bearish & macd_strong_bear,
+         rsi_bullish & macd_bullish, rsi_bearish & macd_bearish,
+         rsi_neutral & macd_bullish, rsi_neutral & macd_bearish],
+        [15.0, -15.0, 8.0, -8.0, 4.0, -4.0], default=0.0)
+
+    # Volume & price action
+    volume, volume_ma = ind['volume'], ind['volume_ma']
+    volume_above_avg = volume > volume_ma
+    volume_strong = volume > volume_ma * 1.5
+    above_vwap = close > ind['vwap']
+    below_vwap = close < ind['vwap']
+    bullish_candle = close > ind['open']
+    bearish_candle = close < ind['open']
+
+    pa_score = np.select(
+        [volume_strong & bullish_candle & above_vwap, volume_strong & bearish_candle & below_vwap,
+         volume_above_avg & bullish_candle & above_vwap, volume_above_avg & bearish_candle & below_vwap],
+        [10.0, -10.0, 5.0, -5.0], default=0.0)
+
+    # News integration (SevenSYS_NEWS)
+    news_bias = float(p['news_bias'])
+    news_filter = bool(p['news_filter'])
+    if news_filter:
+        trend_strength = trend_strength + news_bias * 0.3
+        momentum_score = momentum_score + news_bias * 0.2
+    news_boost_long = news_bias * 1.5 if news_bias > 0 else 0.0
+    news_boost_short = abs(news_bias) * 1.5 if news_bias < 0 else 0.0
+    news_allows_long = not news_filter or news_bias >= -0.3
+    news_allows_short = not news_filter or news_bias <= 0.3
+
+    # Volatility & sessions
+    atr_pct = ind['atr_pct']
+    normal_volatility = (atr_pct > 0.01) & (atr_pct < 3.0)
+    overlap, active = ind['london_ny_overlap'], ind['active_session']
+    session_points = np.where(overlap, 12.0, np.where(active, 6.0, 0.0))
+
+    # Signal strength
+    base_strength = 40.0 if p['major_event_mode'] else 30.0
+    signal_strength_long = (base_strength
+                            + np.where(trend_strength > 0, trend_strength * 1.5, 0.0)
+                            + np.where(momentum_score > 0, momentum_score * 1.2, 0.0)
+                            + session_points
+                            + np.where(pa_score > 0, pa_score, 0.0)
+                            + news_boost_long)
+    signal_strength_short = (base_strength
+                             + np.where(trend_strength < 0, -trend_strength * 1.5, 0.0)
+                             + np.where(momentum_score < 0, -momentum_score * 1.2, 0.0)
+                             + session_points
+                             + np.where(pa_score < 0, -pa_score, 0.0)
+                             + news_boost_short)
+
+    # Entry conditions
+    min_strength = float(p['min_signal_strength'])
+    long_basic = ema_bull_basic & (trend_strength > 0) & (momentum_score >= 0) & above_vwap & normal_volatility & active
+    long_strong = ema_strong_bull & (trend_strength > 5) & (momentum_score > 5) & above_vwap & normal_volatility & overlap
+    short_basic = ema_bear_basic & (trend_strength < 0) & (momentum_score <= 0) & below_vwap & normal_volatility & active
+    short_strong = ema_strong_bear & (trend_strength < -5) & (momentum_score < -5) & below_vwap & normal_volatility & overlap
+
+    enter_long = ((long_strong & (signal_strength_long >= min_strength))
+                  | (long_basic & (signal_strength_long >= min_strength + 10))) & news_allows_long
+    enter_short = ((short_strong & (signal_strength_short >= min_strength))
+                   | (short_basic & (signal_strength_short >= min_strength + 10))) & news_allows_short
+
+    warmup = int(p['warmup_bars'])
+    enter_long[:warmup] = False
+    enter_short[:warmup] = False
+
+    return {
+        'trend_strength': trend_strength,
+        'momentum_score': momentum_score,
+        'pa_score': pa_score,
+        'signal_strength_long': signal_strength_long,
+        'signal_strength_short': signal_strength_short,
+        'enter_long': enter_long,
+        'enter_short': enter_short,
+        'safety_stop': atr_pct > HIGH_VOLATILITY_ATR_PCT,
+    }
+
+
+class SevenSYSBacktester:
+    """
+    Bar-accurate SevenSYS backtest over MBA candles
+    Signals are computed for every bar up front; only the trade loop (one iteration per
+    trade, not per bar) is sequential, and each exit is located with array searches
+    """
+
+    def __init__(self, params: Optional[Dict] = None):
+        self.params = dict(SEVENSYS_PARAMS, **(params or {}))
+
+    def run(self, candles, instrument: str = "EUR_USD",
+            indicators: Optional[Dict[str, np.ndarray]] = None) -> Dict:
+        """
+        Backtest SevenSYS over a candle history
+
+        Args:
+            candles: CANDLE_DTYPE records or DataFrame with mid/bid/ask OHLC, volume and time
+            instrument: OANDA instrument, used for P&L currency conversion
+            indicators: Precomputed compute_indicators() output to reuse across parameter sets
+
+        Returns:
+            dict with 'summary', 'trades' (DataFrame), 'equity_curve' and 'signals'
+        """
+        start_time = time.perf_counter()
+        ind = indicators if indicators is not None else compute_indicators(candles)
+        signals = compute_signals(ind, self.params)
+        trades = self._simulate(candles, ind, signals, instrument)
+        elapsed = time.perf_counter() - start_time
+
+        equity_curve = self.params['initial_balance'] + np.cumsum(trades['pnl'].to_numpy()) \
+            if len(trades) else np.array([], dtype=float)
+        summary = self._summarize(trades, equity_curve, len(ind['close']), elapsed)
+        summary['instrument'] = instrument
+
+        return {
+            'summary': summary,
+            'trades': trades,
+            'equity_curve': equity_curve,
+            'signals': signals,
+        }
+
+    def _simulate(self, candles, ind: Dict[str, np.ndarray], signals: Dict[str, np.ndarray],
+                  instrument: str) -> pd.DataFrame:
+        p = self.params
+        bid = {f: np.asarray(candles[f"bid_{f}"], dtype=float) for f in ('o', 'h', 'l', 'c')}
+        ask = {f: np.asarray(candles[f"ask_{f}"], dtype=float) for f in ('o', 'h', 'l', 'c')}
+        times = np.asarray(candles['time'], dtype=np.int64)
+        n = len(times)
+
+        enter_long = signals['enter_long']
+        safety_stop = signals['safety_stop']
+        candidates = np.flatnonzero((enter_long | signals['enter_short']) & ~safety_stop)
+        candidates = candidates[candidates < n - 1]
+
+        atr_multiplier = max(p['atr_multiplier'], 3.0) if p['major_event_mode'] else p['atr_multiplier']
+        risk_fraction = p['risk_per_trade'] / 100.0
+        equity_floor = p['initial_balance'] * (1.0 - p['max_drawdown'] / 100.0)
+        equity = p['initial_balance']
+
+        records = []
+        next_bar = 0
+        while True:
+            k = np.searchsorted(candidates, next_bar)
+            if k >= len(candidates):
+                break
+            i = int(candidates[k])
+            direction = 1 if enter_long[i] else -1
+            close = ind['close'][i]
+            stop_distance = ind['atr'][i] * atr_multiplier
+            profit_distance = stop_distance * p['tp_multiplier']
+
+            if direction == 1:
+                entry_price = ask['o'][i + 1]
+                stop, target = close - stop_distance, close + profit_distance
+                side = bid
+            else:
+                entry_price = bid['o'][i + 1]
+                stop, target = close + stop_distance, close - profit_distance
+                side = ask
+
+            conversion = quote_conversion(instrument, p['account_currency'], entry_price)
+            units = np.floor(equity * risk_fraction / (stop_distance * conversion)) if stop_distance > 0 else 0
+            if units < 1:
+                next_bar = i + 1
+                continue
+
+            exit_bar, exit_price, reason = self._find_exit(side, safety_stop, i + 1, direction, stop, target)
+            pnl = direction * units * (exit_price - entry_price) * \
+                quote_conversion(instrument, p['account_currency'], exit_price)
+            equity += pnl
+
+            records.append((times[i], times[exit_bar], 'buy' if direction == 1 else 'sell',
+                            entry_price, exit_price, stop, target, units, pnl, equity, reason,
+                            exit_bar - i,
+                            signals['signal_strength_long' if direction == 1 else 'signal_strength_short'][i]))
+
+            if equity < equity_floor:
+                logger.info(f"Safety stop: equity {equity:.2f} below {equity_floor:.2f}, halting backtest")
+                break
+            next_bar = exit_bar
+
+        trades = pd.DataFrame.from_records(records, columns=[
+            'signal_time', 'exit_time', 'action', 'entry_price', 'exit_price', 'stop_loss',
+            'take_profit', 'units', 'pnl', 'balance', 'exit_reason', 'bars_held', 'signal_strength'])
+        trades['signal_time'] = pd.to_datetime(trades['signal_time'], unit='s', utc=True)
+        trades['exit_time'] = pd.to_datetime(trades['exit_time'], unit='s', utc=True)
+        return trades
+
+    @staticmethod
+    def _find_exit(side: Dict[str, np.ndarray], safety_stop: np.ndarray, start: int,
+                   direction: int, stop: float, target: float):
+        """
+        Locate the first bar at or after `start` that closes the trade
+
+        Long trades exit on bid prices and shorts on ask prices. Gaps through a level fill
+        at the open; when one bar touches both levels the Pine broker emulator rule applies
+        (the extreme nearer the open is assumed to trade first). A safety stop on the
+        previous bar closes the trade at this bar's open.
+        """
+        n = len(side['o'])
+        window = 256
+        s = start
+        while s < n:
+            e = min(n, s + window)
+            o, h, l = side['o'][s:e], side['h'][s:e], side['l'][s:e]
+            if direction == 1:
+                gap_stop, gap_target = o <= stop, o >= target
+                hit_stop, hit_target = l <= stop, h >= target
+            else:
+                gap_stop, gap_target = o >= stop, o <= target
+                hit_stop, hit_target = h >= stop, l <= target
+            safety_exit = safety_stop[s - 1:e - 1]
+
+            hits = gap_stop | gap_target | hit_stop | hit_target | safety_exit
+            if hits.any():
+                j = int(np.argmax(hits))
+                bar = s + j
+                if safety_exit[j]:
+                    return bar, o[j], 'SAFETY_STOP'
+                if gap_stop[j]:
+                    return bar, o[j], 'STOP_LOSS'
+                if gap_target[j]:
+                    return bar, o[j], 'TAKE_PROFIT'
+                if hit_stop[j] and hit_target[j]:
+                    high_first = (h[j] - o[j]) < (o[j] - l[j])
+                    stop_first = high_first if direction == -1 else not high_first
+                    return (bar, stop, 'STOP_LOSS') if stop_first else (bar, target, 'TAKE_PROFIT')
+                if hit_stop[j]:
+                    return bar, stop, 'STOP_LOSS'
+                return bar, target, 'TAKE_PROFIT'
+            s = e
+            window *= 2
+
+        return n - 1, side['c'][n - 1], 'END_OF_DATA'
+
+    def _summarize(self, trades: pd.DataFrame, equity_curve: np.ndarray, bars: int, elapsed: float) -> Dict:
+        initial = self.params['initial_balance']
+        summary = {
+            'bars': bars,
+            'total_trades': len(trades),
+            'elapsed_seconds': round(elapsed, 4),
+            'initial_balance': initial,
+            'final_balance': float(equity_curve[-1]) if len(equity_curve) else initial,
+        }
+        if len(trades) == 0:
+            summary.update({'win_rate': 0.0, 'net_profit': 0.0, 'return_pct': 0.0,
+                            'profit_factor': 0.0, 'max_drawdown_pct': 0.0,
+                            'avg_win': 0.0, 'avg_loss': 0.0, 'wins': 0, 'losses': 0})
+            return summary
+
+        pnl = trades['pnl'].to_numpy()
+        wins, losses = pnl[pnl > 0], pnl[pnl <= 0]
+        peaks = np.maximum.accumulate(np.concatenate(([initial], equity_curve)))
+        drawdowns = (peaks[1:] - equity_curve) / peaks[1:]
+
+        summary.update({
+            'wins': len(wins),
+            'losses': len(losses),
+            'win_rate': len(wins) / len(pnl) * 100,
+            'net_profit': float(pnl.sum()),
+            'return_pct': float(pnl.sum() / initial * 100),
+            'profit_factor': float(wins.sum() / abs(losses.sum())) if losses.sum() != 0 else float('inf'),
+            'max_drawdown_pct': float(drawdowns.max() * 100),
+            'avg_win': float(wins.mean()) if len(wins) else 0.0,
+            'avg_loss': float(losses.mean()) if len(losses) else 0.0,
+        })
+        return summary
+
+
+def main():
+    """Backtest one instrument: python sevensys_backtester.py EUR_USD M5 [--synthetic]"""
+    from dotenv import load_dotenv
+    from candle_cache import CandleCache, generate_synthetic_candles
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    instrument = args[0] if len(args) > 0 else "EUR_USD"
+    granularity = args[1] if len(args) > 1 else "M5"
+
+    if '--synthetic' in sys.argv:
+        candles = generate_synthetic_candles(n_bars=75000, granularity=granularity)
+    else:
+        candles = CandleCache().get(instrument, granularity)
+
+    result = SevenSYSBacktester().run(candles, instrument)
+    summary = result['summary']
+
+    print(f"\n📊 SevenSYS BACKTEST: {instrument} {granularity}")
+    print("=" * 50)
+    print(f"Bars:           {summary['bars']:,}")
+    print(f"Trades:         {summary['total_trades']}")
+    print(f"Win Rate:       {summary['win_rate']:.1f}%")
+    print(f"Net Profit:     ${summary['net_profit']:,.2f} ({summary['return_pct']:+.2f}%)")
+    print(f"Profit Factor:  {summary['profit_factor']:.2f}")
+    print(f"Max Drawdown:   {summary['max_drawdown_pct']:.2f}%")
+    print(f"Elapsed:        {summary['elapsed_seconds']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+SevenSYS Walk-Forward Optimizer
+Grid or random search over the SevenSYS inputs on rolling in-sample/out-of-sample
+windows. Evaluations fan out across a process pool that memory-maps the candle and
+indicator arrays, and every result is cached by parameter hash so repeated sweeps
+skip points that were already evaluated
+"""
+
+import os
+import sys
+import json
+import random
+import hashlib
+import logging
+import itertools
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from sevensys_backtester import SEVENSYS_PARAMS, SevenSYSBacktester, compute_indicators
+
+logger = logging.getLogger(__name__)
+
+# Search ranges follow the Pine input minval/maxval/step
+PARAM_SPACE = {
+    'risk_per_trade': (0.5, 3.0, 0.1),
+    'min_signal_strength': (45.0, 75.0, 1.0),
+    'atr_multiplier': (1.0, 4.0, 0.25),
+    'tp_multiplier': (1.5, 4.0, 0.25),
+    'news_bias': (-20.0, 20.0, 1.0),
+}
+
+DEFAULT_GRID = {
+    'min_signal_strength': [50.0, 55.0, 60.0, 65.0],
+    'atr_multiplier': [1.5, 2.0, 2.5, 3.0],
+    'tp_multiplier': [2.0, 2.5, 3.0],
+}
+
+OPTIMIZER_CONFIG = {
+    'in_sample_bars': 30000,        # ~5 months of M5
+    'out_of_sample_bars': 7500,     # ~1 month of M5
+    'objective': 'return_over_drawdown',
+    'min_trades': 20,               # In-sample results with fewer trades are ignored
+    'cache_path': 'data/optimizer_cache.json',
+}
+
+# Worker-process state, set once per worker by _init_worker
+_WORKER_CANDLES = None
+_WORKER_INDICATORS = None
+
+
+def param_hash(params: Dict) -> str:
+    """Stable hash of a parameter set"""
+    return hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def grid_search_space(grid: Optional[Dict[str, List]] = None) -> List[Dict]:
+    """Every combination of the grid values"""
+    grid = grid or DEFAULT_GRID
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+def random_search_space(n_samples: int, space: Optional[Dict] = None, seed: int = 42) -> List[Dict]:
+    """Random points on the Pine input step lattice, de-duplicated"""
+    space = space or PARAM_SPACE
+    rng = random.Random(seed)
+    samples = {}
+    for _ in range(n_samples * 10):
+        params = {}
+        for name, (low, high, step) in sorted(space.items()):
+            steps = int(round((high - low) / step))
+            params[name] = round(low + rng.randint(0, steps) * step, 4)
+        samples[param_hash(params)] = params
+        if len(samples) >= n_samples:
+            break
+    return list(samples.values())
+
+
+def walk_forward_windows(n_bars: int, in_sample: int, out_of_sample: int, start: int = 0) -> List[Dict]:
+    """Rolling windows: each out-of-sample block directly follows its in-sample block"""
+    windows = []
+    is_start = start
+    while is_start + in_sample + out_of_sample <= n_bars:
+        is_end = is_start + in_sample
+        windows.append({
+            'in_sample': (is_start, is_end),
+            'out_of_sample': (is_end, is_end + out_of_sample),
+        })
+        is_start += out_of_sample
+    return windows
+
+
+def _indicator_path(candle_path: str) -> str:
+    return candle_path[:-len('.npy')] + "_indicators.npy" if candle_path.endswith('.npy') \
+        else candle_path + "_indicators.npy"
+
+
+def save_indicators(indicators: Dict[str, np.ndarray], path: str):
+    """Pack compute_indicators() output into one record array so workers can memory-map it"""
+    dtype = np.dtype([(name, arr.dtype) for name, arr in indicators.items()])
+    packed = np.empty(len(next(iter(indicators.values()))), dtype=dtype)
+    for name, arr in indicators.items():
+        packed[name] = arr
+    np.save(path, packed)
+
+
+def _init_worker(candle_path: str, indicator_path: str):
+    """Map the shared arrays read-only; pages are shared through the OS page cache"""
+    global _WORKER_CANDLES, _WORKER_INDICATORS
+    _WORKER_CANDLES = np.load(candle_path, mmap_mode='r')
+    _WORKER_INDICATORS = np.load(indicator_path, mmap_mode='r')
+
+
+def _evaluate(task) -> Dict:
+    """Backtest one parameter set on one bar range inside a worker"""
+    instrument, params, (start, end) = task
+    indicators = {name: _WORKER_INDICATORS[name][start:end] for name in _WORKER_INDICATORS.dtype.names}
+    # Indicators are computed over the full history, so only the very first bars need warmup
+    run_params = dict(params, warmup_bars=max(0, SEVENSYS_PARAMS['warmup_bars'] - start))
+    summary = SevenSYSBacktester(run_params).run(_WORKER_CANDLES[start:end], instrument, indicators)['summary']
+    return {k: v for k, v in summary.items() if isinstance(v, (int, float, str))}
+
+
+def score(summary: Dict, objective: str, min_trades: int) -> float:
+    """Objective value for a backtest summary (higher is better)"""
+    if summary.get('total_trades', 0) < min_trades:
+        return float('-inf')
+    if objective == 'return_over_drawdown':
+        return summary['return_pct'] / max(summary['max_drawdown_pct'], 1.0)
+    value = summary.get(objective, float('-inf'))
+    return float(value) if np.isfinite(value) else float('-inf')
+
+
+class WalkForwardOptimizer:
+    """Walk-forward parameter search for SevenSYS over one cached instrument"""
+
+    def __init__(self, candle_path: str, instrument: str = "EUR_USD", granularity: str = "M5",
+                 config: Optional[Dict] = None, workers: Optional[int] = None):
+        """
+        Args:
+            candle_path: CandleCache .npy file (see CandleCache.path_for)
+            instrument: OANDA instrument for P&L conversion
+            config: Overrides for OPTIMIZER_CONFIG
+            workers: Process pool size (defaults to the CPU count)
+        """
+        self.candle_path = candle_path
+        self.instrument = instrument
+        self.granularity = granularity
+        self.config = dict(OPTIMIZER_CONFIG, **(config or {}))
+        self.workers = workers or os.cpu_count() or 1
+        self.indicator_path = _indicator_path(candle_path)
+
+        candles = np.load(candle_path, mmap_mode='r')
+        self.n_bars = len(candles)
+        # Cache keys include a fingerprint of the data so a refreshed cache invalidates results
+        self.data_key = f"{instrument}:{granularity}:{self.n_bars}:{int(candles['time'][0])}:{int(candles['time'][-1])}"
+        self._prepare_indicators(candles)
+        self.cache = self._load_cache()
+
+    def _prepare_indicators(self, candles):
+        if os.path.exists(self.indicator_path) and \
+                os.path.getmtime(self.indicator_path) >= os.path.getmtime(self.candle_path):
+            return
+        logger.info(f"Computing indicators for {self.n_bars} bars -> {self.indicator_path}")
+        save_indicators(compute_indicators(candles), self.indicator_path)
+
+    def _load_cache(self) -> Dict:
+        try:
+            with open(self.config['cache_path'], 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_cache(self):
+        path = self.config['cache_path']
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.cache, f)
+        os.replace(tmp_path, path)
+
+    def _cache_key(self, params: Dict, bar_range) -> str:
+        return f"{self.data_key}:{bar_range[0]}:{bar_range[1]}:{param_hash(params)}"
+
+    def evaluate_many(self, tasks: List[tuple]) -> List[Dict]:
+        """
+        Evaluate (params, bar_range) pairs, running only cache misses in the pool
+
+        Returns:
+            Summaries in the same order as tasks
+        """
+        keys = [self._cache_key(params, bar_range) for params, bar_range in tasks]
+        missing = [(key, task) for key, task in zip(keys, tasks) if key not in self.cache]
+
+        if missing:
+            logger.info(f"Evaluating {len(missing)} points ({len(tasks) - len(missing)} cached) "
+                        f"on {self.workers} workers")
+            jobs = [(self.instrument, params, bar_range) for _, (params, bar_range) in missing]
+            if self.workers > 1:
+                with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                         initargs=(self.candle_path, self.indicator_path)) as pool:
+                    chunksize = max(1, len(jobs) // (self.workers * 4))
+                    results = list(pool.map(_evaluate, jobs, chunksize=chunksize))
+            else:
+                _init_worker(self.candle_path, self.indicator_path)
+                results = [_evaluate(job) for job in jobs]
+
+            for (key, _), summary in zip(missing, results):
+                self.cache[key] = summary
+            self._save_cache()
+
+        return [self.cache[key] for key in keys]
+
+    def optimize(self, candidates: List[Dict]) -> Dict:
+        """
+        Run the walk-forward: pick the best candidate in-sample, then score it out-of-sample
+
+        Returns:
+            dict with per-window picks and the aggregated out-of-sample performance
+        """
+        objective, min_trades = self.config['objective'], self.config['min_trades']
+        windows = walk_forward_windows(self.n_bars, self.config['in_sample_bars'],
+                                       self.config['out_of_sample_bars'])
+        if not windows:
+            raise ValueError(f"Not enough bars ({self.n_bars}) for one in-sample/out-of-sample window")
+
+        # All in-sample evaluations go to the pool in one batch
+        is_tasks = [(params, window['in_sample']) for window in windows for params in candidates]
+        is_results = self.evaluate_many(is_tasks)
+
+        picks = []
+        for w, window in enumerate(windows):
+            window_results = is_results[w * len(candidates):(w + 1) * len(candidates)]
+            scores = [score(summary, objective, min_trades) for summary in window_results]
+            best = int(np.argmax(scores))
+            picks.append((candidates[best], window, window_results[best], scores[best]))
+
+        oos_results = self.evaluate_many([(params, window['out_of_sample']) for params, window, _, _ in picks])
+
+        report_windows = []
+        for (params, window, is_summary, is_score), oos_summary in zip(picks, oos_results):
+            report_windows.append({
+                'in_sample_bars': window['in_sample'],
+                'out_of_sample_bars': window['out_of_sample'],
+                'params': params,
+                'in_sample_score': is_score,
+                'in_sample': is_summary,
+                'out_of_sample': oos_summary,
+            })
+
+        oos_returns = [w['out_of_sample']['return_pct'] for w in report_windows]
+        oos_trades = sum(w['out_of_sample']['total_trades'] for w in report_windows)
+        return {
+            'instrument': self.instrument,
+            'granularity': self.granularity,
+            'objective': objective,
+            'candidates': len(candidates),
+            'windows': report_windows,
+            'out_of_sample_total_return_pct': float(np.sum(oos_returns)),
+            'out_of_sample_trades': oos_trades,
+            'out_of_sample_profitable_windows': int(sum(r > 0 for r in oos_returns)),
+            'timestamp': datetime.now().isoformat(),
+        }
+
+
+def main():
+    """python sevensys_optimizer.py EUR_USD M5 [--random N] [--workers N] [--synthetic]"""
+    from dotenv import load_dotenv
+    from candle_cache import CandleCache, generate_synthetic_candles
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+
+    args = sys.argv[1:]
+
+    def option(name, default):
+        return int(args[args.index(name) + 1]) if name in args else default
+
+    positional = [a for i, a in enumerate(args) if not a.startswith('--')
+                  and (i == 0 or args[i - 1] not in ('--random', '--workers'))]
+    instrument = positional[0] if len(positional) > 0 else "EUR_USD"
+    granularity = positional[1] if len(positional) > 1 else "M5"
+
+    cache = CandleCache()
+    if '--synthetic' in args:
+        instrument = "SYNTH_USD"
+        cache.save(instrument, granularity, generate_synthetic_candles(n_bars=75000, granularity=granularity))
+    else:
+        cache.get(instrument, granularity)
+
+    n_random = option('--random', 0)
+    candidates = random_search_space(n_random) if n_random else grid_search_space()
+
+    optimizer = WalkForwardOptimizer(cache.path_for(instrument, granularity), instrument, granularity,
+                                     workers=option('--workers', None))
+    report = optimizer.optimize(candidates)
+
+    os.makedirs('logs', exist_ok=True)
+    report_path = f"logs/walk_forward_{instrument}_{granularity}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2, default=str)
+
+    print(f"\n🔬 SevenSYS WALK-FORWARD: {instrument} {granularity} ({len(candidates)} candidates)")
+    print("=" * 70)
+    for w in report['windows']:
+        oos = w['out_of_sample']
+        start, end = w['out_of_sample_bars']
+        print(f"OOS bars {start}-{end} | {json.dumps(w['params'])} | "
+              f"trades {oos['total_trades']:3d} | return {oos['return_pct']:+.2f}%")
+    print(f"\nOut-of-sample return: {report['out_of_sample_total_return_pct']:+.2f}% "
+          f"over {report['out_of_sample_trades']} trades "
+          f"({report['out_of_sample_profitable_windows']}/{len(report['windows'])} windows profitable)")
+    print(f"📄 Report saved: {report_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Simulation Clock
+The simulators, the risk manager and the session/market-hours checks read the time and wait
+through a clock instead of datetime.now() and time.sleep(). Batch runs use a VirtualClock:
+sleep() advances simulated time instantly, so an 8000-trade run is CPU-bound instead of
+taking a day. Demo mode keeps the same virtual timeline but also waits on the wall clock,
+scaled by SIM_CLOCK_SPEED, so results are identical in both modes.
+
+    python enhanced_trade_simulator.py                               # batch, instant
+    SIM_CLOCK=demo SIM_CLOCK_SPEED=10 python enhanced_trade_simulator.py
+    SIM_CLOCK_START=2024-03-04T08:00:00 python adaptive_test_8000_clean.py
+
+Live code keeps the default WallClock.
+"""
+
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+CLOCK_CONFIG = {
+    'mode': os.getenv('SIM_CLOCK', 'virtual'),                # 'virtual' (batch) or 'demo'
+    'speed': float(os.getenv('SIM_CLOCK_SPEED', '1')),        # Demo mode: simulated seconds per wall second
+    'start': os.getenv('SIM_CLOCK_START', ''),                # ISO start of simulated time, default now
+}
+
+
+class WallClock:
+    """Real time: now() is datetime.now(), sleep() blocks"""
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+
+
+class VirtualClock:
+    """Simulated time that only moves when slept on; speed throttles sleeps on the wall clock (demo mode)"""
+
+    def __init__(self, start: Optional[datetime] = None, speed: Optional[float] = None):
+        self.start = start or datetime.now()
+        self.speed = speed
+        self.elapsed = 0.0  # Simulated seconds slept so far
+
+    def now(self) -> datetime:
+        return self.start + timedelta(seconds=self.elapsed)
+
+    def sleep(self, seconds: float):
+        self.elapsed += seconds
+        if self.speed:
+            time.sleep(seconds / self.speed)
+
+
+SYSTEM_CLOCK = WallClock()
+
+
+def simulation_clock(config: Optional[Dict] = None) -> VirtualClock:
+    """Clock for a simulator run: instant in batch mode, throttled by 'speed' in demo mode"""
+    config = dict(CLOCK_CONFIG, **(config or {}))
+    start = datetime.fromisoformat(config['start']) if config['start'] else None
+    speed = config['speed'] if config['mode'] == 'demo' else None
+    return VirtualClock(start, speed)
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Structured Logging
+One-time, per-process logging setup that keeps log I/O off the request thread: the root
+logger gets a QueueHandler, and a QueueListener thread formats each record as one line of
+JSON and writes it to the console (and optional files). High-volume debug lines can be
+sampled per module, and per-module levels are applied to the loggers so disabled calls
+return before any formatting.
+
+    LOG_LEVEL=INFO LOG_LEVELS="oanda_client=WARNING,werkzeug=WARNING" LOG_FILE=app.log
+    LOG_SAMPLE="oanda_client=10"   # keep 1 in 10 DEBUG records from oanda_client
+"""
+
+import os
+import sys
+import copy
+import json
+import queue
+import atexit
+import logging
+import logging.handlers
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+LOGGING_CONFIG = {
+    'level': os.getenv('LOG_LEVEL', 'INFO'),
+    'module_levels': os.getenv('LOG_LEVELS', ''),   # "name=LEVEL,name=LEVEL"
+    'sample_every': os.getenv('LOG_SAMPLE', ''),    # "name=N,..." keeps 1 in N DEBUG records
+    'log_file': os.getenv('LOG_FILE'),
+    'json': os.getenv('LOG_FORMAT', 'json') == 'json',
+    'queue_size': 10000,                            # Records beyond this are dropped, never blocking
+}
+
+_STANDARD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def _pairs(spec) -> Dict[str, str]:
+    if isinstance(spec, dict):
+        return dict(spec)
+    return dict(item.split('=', 1) for item in spec.split(',') if '=' in item)
+
+
+class JsonFormatter(logging.Formatter):
+    """{"ts", "level", "logger", "msg", ...extra fields, "exc"} on one line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str, separators=(',', ':'))
+
+
+class SamplingFilter(logging.Filter):
+    """Keep 1 in N DEBUG-and-below records for the configured logger prefixes"""
+
+    def __init__(self, sample_every: Dict[str, int]):
+        super().__init__()
+        self.sample_every = {name: int(n) for name, n in sample_every.items() if int(n) > 1}
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or not self.sample_every:
+            return True
+        for prefix, every in self.sample_every.items():
+            if record.name == prefix or record.name.startswith(prefix + '.'):
+                with self._lock:
+                    seen = self._seen[prefix] = self._seen.get(prefix, 0) + 1
+                return seen % every == 1
+        return True
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Drops (and counts) records when the queue is full instead of stalling the caller"""
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Resolve the message and traceback now (args may change later), leave JSON to the listener"""
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _NonBlockingQueueHandler.dropped += 1
+
+
+_state = {'pid': None, 'listener': None, 'queue_handler': None, 'files': set()}
+_setup_lock = threading.Lock()
+
+
+def configure_logging(level: Optional[str] = None, module_levels=None, sample_every=None,
+                      log_file: Optional[str] = None, files: Optional[Dict[str, str]] = None) -> logging.Logger:
+    """
+    Install the queue-based setup once per process (again after a fork); later calls only
+    add per-logger files and level overrides
+
+    Args:
+        files: logger name -> path, for modules that keep their own log file
+    """
+    with _setup_lock:
+        if _state['pid'] != os.getpid():
+            _install(level or LOGGING_CONFIG['level'],
+                     _pairs(LOGGING_CONFIG['sample_every'] if sample_every is None else sample_every),
+                     log_file or LOGGING_CONFIG['log_file'])
+        levels = _pairs(LOGGING_CONFIG['module_levels'])
+        levels.update(_pairs(module_levels or {}))
+        for name, module_level in levels.items():
+            logging.getLogger(name).setLevel(module_level.upper())
+        for name, path in (files or {}).items():
+            if (name, path) not in _state['files']:
+                _state['files'].add((name, path))
+                handler = _file_handler(path)
+                handler.addFilter(logging.Filter(name))
+                listener = _state['listener']
+                listener.handlers = listener.handlers + (handler,)
+    return logging.getLogger()
+
+
+def _file_handler(path: str) -> logging.Handler:
+    handler = logging.FileHandler(path)
+    handler.setFormatter(_formatter())
+    return handler
+
+
+def _formatter() -> logging.Formatter:
+    if LOGGING_CONFIG['json']:
+        return JsonFormatter()
+    return logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+
+def _install(level: str, sample_every: Dict[str, str], log_file: Optional[str]):
+    records = queue.Queue(LOGGING_CONFIG['queue_size'])
+    console = logging.StreamHandler(sys.stderr)
+    console.setFormatter(_formatter())
+    handlers = [console]
+    if log_file:
+        handlers.append(_file_handler(log_file))
+
+    queue_handler = _NonBlockingQueueHandler(records)
+    if sample_every:
+        queue_handler.addFilter(SamplingFilter(sample_every))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)  # Replaces any basicConfig handlers installed earlier
+    root.addHandler(queue_handler)
+    root.setLevel(level.upper())
+
+    listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    _state.update(pid=os.getpid(), listener=listener, queue_handler=queue_handler, files=set())
+
+
+def dropped_records() -> int:
+    return _NonBlockingQueueHandler.dropped
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Test multi-account routing and concurrent order fan-out"""
+import os
+import time
+import sqlite3
+import tempfile
+from unittest.mock import patch
+from account_router import AccountRouter
+from webhook_replay import StubOandaClient
+
+
+def _accounts(latencies):
+    accounts = {}
+    for i, latency in enumerate(latencies):
+        client = StubOandaClient(latency_ms=latency, latency_jitter=0.0, seed=i)
+        client.account_id = f"101-000-00000000-00{i + 1}"
+        accounts[f"acct{i + 1}"] = {'client': client, 'sizing': {'mode': 'risk', 'balance': 45.0 * (i + 1),
+                                                                  'risk_percent': 2.0, 'max_units': 1000}}
+    return accounts
+
+
+def _record_calls(client, calls):
+    """Wrap a stub's broker round trip to record when each call was in flight"""
+    round_trip = client._round_trip
+
+    def timed(endpoint):
+        start = time.perf_counter()
+        try:
+            return round_trip(endpoint)
+        finally:
+            calls.append((start, time.perf_counter()))
+    client._round_trip = timed
+
+
+def test_fan_out_costs_slowest_account():
+    """Three accounts' orders are in flight together, each sized by its own rule"""
+    accounts = _accounts([10, 20, 40])
+    accounts['acct3']['sizing'] = {'mode': 'fixed', 'units': 250}
+    calls = {name: [] for name in accounts}
+    for name, account in accounts.items():
+        _record_calls(account['client'], calls[name])
+    router = AccountRouter(accounts, {'EUR_USD': ['acct1', 'acct2', 'acct3'], 'default': ['acct1']})
+    trade = {'symbol': 'EUR_USD', 'action': 'sell', 'close_price': 1.1,
+             'stop_loss': 1.1050, 'take_profit': 1.09}
+
+    assert router.accounts_for('EURUSD') == ['acct1', 'acct2', 'acct3']
+    assert router.accounts_for('GBPUSD') == ['acct1']
+    start = time.perf_counter()
+    fills = router.execute(trade, 'EURUSD')
+    elapsed = time.perf_counter() - start
+    router.close()
+
+    assert [f['units'] for f in fills] == [-180, -360, -250]
+    assert all(f['result']['status'] == 'success' for f in fills)
+    # Every account's calls started before any account finished: the fan-out overlaps, not queues
+    assert max(c[0][0] for c in calls.values()) < min(c[-1][1] for c in calls.values())
+    print(f"✅ 3 accounts in {elapsed*1000:.0f}ms (slowest {max(f['elapsed_ms'] for f in fills):.0f}ms)")
+
+
+def test_webhook_logs_each_account():
+    """One SevenSYS alert records a fill per account, and a failing account is reported"""
+    # Import without init_worker() (no repo database, OANDA sync or warm-up); the overrides end with the import
+    with patch.dict(os.environ, {'OANDA_API_KEY': 'router-test', 'OANDA_ACCOUNT_ID': '101-000-00000000-001',
+                                 'PRELOAD_APP': '1'}):
+        import app as webhook_app
+    from memory_logger import SevenSYSMemoryLogger
+
+    accounts = _accounts([0, 0])
+    accounts['acct2']['client'].failure_rate = 1.0
+    original = webhook_app.account_router, webhook_app.memory_logger
+    directory = tempfile.mkdtemp()
+    db_path = os.path.join(directory, 'memory.db')
+    webhook_app.account_router = AccountRouter(accounts, {'default': ['acct1', 'acct2']})
+    webhook_app.memory_logger = SevenSYSMemoryLogger(db_path, os.path.join(directory, 'memory_logger.log'))
+    try:
+        response = webhook_app.app.test_client().post('/webhook', json={
+            'ticker': 'EURUSD', 'strategy.order.action': 'buy', 'close': 1.1,
+            'stop_loss': 1.095, 'take_profit': 1.11})
+        body = response.get_json()
+        assert response.status_code == 200 and body['status'] == 'partial'
+
+        conn = sqlite3.connect(db_path)
+        rows = dict(conn.execute("SELECT account_id, execution_status FROM trade_executions").fetchall())
+        conn.close()
+        assert rows['101-000-00000000-001'] == 'EXECUTED'
+        assert rows['101-000-00000000-002'].startswith('FAILED')
+        print("✅ Per-account fill and failure recorded for one alert")
+    finally:
+        webhook_app.account_router.close()
+        webhook_app.account_router, webhook_app.memory_logger = original
+
+
+if __name__ == "__main__":
+    print("🔍 Testing account router...")
+    test_fan_out_costs_slowest_account()
+    test_webhook_logs_each_account()
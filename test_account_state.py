@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Test the account state cache against the local OANDA v20 stand-in"""
+import os
+import tempfile
+from contextlib import contextmanager
+from unittest.mock import patch
+from local_oanda_server import start_background_server
+from account_state import AccountState
+from account_router import AccountRouter, DEFAULT_SIZING
+
+ACCOUNT_ID = "101-000-00000000-001"
+
+
+@contextmanager
+def _standin():
+    server = start_background_server({'bars_per_second': 0, 'cache_dir': tempfile.mkdtemp()})
+    try:
+        with patch.dict(os.environ, {'OANDA_STANDIN_URL': server.url, 'OANDA_API_KEY': 'standin-test',
+                                    'OANDA_ACCOUNT_ID': ACCOUNT_ID}):
+            from oanda_client import OandaClient
+            yield server, OandaClient()
+    finally:
+        server.shutdown()
+
+
+def _market(broker, instrument, units):
+    status, body = broker.create_order(ACCOUNT_ID, {'type': 'MARKET', 'instrument': instrument, 'units': str(units)})
+    assert status == 201
+    return body['orderFillTransaction']
+
+
+def test_state_tracks_account_with_one_call_per_refresh():
+    """Balance, NAV, margin and net positions match the broker after fills, one AccountChanges each"""
+    with _standin() as (server, client):
+        broker = server.app.config['BROKER']
+        _market(broker, 'EUR_USD', 1000)
+        state = AccountState(client).refresh()
+        assert state.ready() and state.position('EUR_USD') == 1000
+
+        _market(broker, 'GBP_USD', -2000)
+        _market(broker, 'EUR_USD', 400)
+        broker.feed.advance(5)
+        _market(broker, 'EUR_USD', -1400)  # Flat on EUR_USD with realized P&L
+        calls = state.stats['api_calls']
+        state.refresh()
+        assert state.stats['api_calls'] - calls == 1
+
+        summary = broker.summary(ACCOUNT_ID)
+        assert state.balance == float(summary['balance'])
+        assert abs(state.nav - float(summary['NAV'])) < 1e-6
+        assert abs(state.margin_used - float(summary['marginUsed'])) < 1e-6
+        assert state.positions == {'GBP_USD': -2000}
+        assert state.snapshot()['last_transaction_id'] == summary['lastTransactionID']
+        print(f"✅ Balance {state.balance} and positions tracked with one call per refresh")
+
+
+def test_router_sizes_from_live_balance():
+    """'live' sizing reads the cached balance, and the fallback until the cache is ready"""
+    with _standin() as (server, client):
+        router = AccountRouter.single(client)
+        assert router.balance('default') == DEFAULT_SIZING['fallback_balance']
+        router.states['default'].refresh()
+        balance = float(server.app.config['BROKER'].summary(ACCOUNT_ID)['balance'])
+        assert router.balance('default') == balance
+
+        calls = router.states['default'].stats['api_calls']
+        units = router.size_units(['default'], 'EUR_USD', 1.1, 1.0)
+        assert units['default'] == 1000  # 2% of the stand-in balance over 1000 pips hits the cap
+        assert router.states['default'].stats['api_calls'] == calls
+        print(f"✅ Webhook sizing uses live balance {balance} without a request")
+
+
+if __name__ == "__main__":
+    test_state_tracks_account_with_one_call_per_refresh()
+    test_router_sizes_from_live_balance()
+    print("\n🎉 Account state tests passed")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Test the EWMA covariance engine behind AdvancedRiskManager"""
+import numpy as np
+from advanced_risk_manager import AdvancedRiskManager, EWMACovariance
+
+
+def _correlated_closes(n_bars=3000, rho=0.8, seed=5):
+    rng = np.random.default_rng(seed)
+    a = rng.standard_normal(n_bars) * 0.002
+    b = rho * a + np.sqrt(1 - rho ** 2) * rng.standard_normal(n_bars) * 0.002
+    return {'EUR_USD': 1.1 * np.exp(np.cumsum(a)), 'GBP_USD': 1.27 * np.exp(np.cumsum(b))}
+
+
+def test_fit_matches_incremental_updates():
+    """The batch warm-up gives the same matrix as bar-by-bar updates"""
+    closes = _correlated_closes(500)
+    batch = EWMACovariance(['EUR/USD', 'GBP/USD'])
+    batch.fit(closes)
+
+    incremental = EWMACovariance(['EUR/USD', 'GBP/USD'])
+    for i in range(500):
+        incremental.update_prices({pair: series[i] for pair, series in closes.items()})
+
+    assert np.allclose(batch.covariance, incremental.covariance)
+    print(f"✅ fit == update_prices: corr {batch.correlation('EUR_USD', 'GBP/USD'):.3f}")
+
+
+def test_correlation_learned_from_returns():
+    """Data overrides the prior: GBP/USD vs AUD/USD prior is 0.70, the data says ~0"""
+    risk = AdvancedRiskManager()
+    rng = np.random.default_rng(1)
+    closes = _correlated_closes(3000, rho=0.8)
+    closes['AUD_USD'] = 0.66 * np.exp(np.cumsum(rng.standard_normal(3000) * 0.002))
+    risk.warm_up(closes)
+
+    assert abs(risk.get_correlation('EUR/USD', 'GBP/USD') - 0.8) < 0.15
+    assert abs(risk.get_correlation('GBP/USD', 'AUD/USD')) < 0.3
+    print(f"✅ Learned correlations: EUR/GBP-USD {risk.get_correlation('EUR/USD', 'GBP/USD'):.2f}, "
+          f"GBP/AUD {risk.get_correlation('GBP/USD', 'AUD/USD'):.2f}")
+
+
+def test_portfolio_var_is_quadratic_form():
+    """Portfolio VaR equals 1.645 * sqrt(w'Sw), so a hedge lowers it"""
+    risk = AdvancedRiskManager()
+    risk.warm_up(_correlated_closes())
+    risk.add_position('EUR/USD', 1000, 1.1, 0.6)
+    long_only = risk.portfolio_var
+    risk.add_position('GBP/USD', 1000, 1.27, 0.6, direction=-1)
+
+    cov = risk.covariance
+    w = np.zeros(len(cov.index))
+    w[cov.index['EUR/USD']], w[cov.index['GBP/USD']] = 1000, -1000
+    assert np.isclose(risk.portfolio_var, 1.645 * np.sqrt(w @ cov.covariance @ w))
+    assert risk.portfolio_var < long_only * np.sqrt(2)
+    print(f"✅ Portfolio VaR {risk.portfolio_var:.2f} (single position {long_only:.2f})")
+
+
+def test_sizing_decision_cost_independent_of_instruments():
+    """Heat checks read cached exposure: no rebuild per decision as k grows, only when positions change"""
+    for k in (10, 200):
+        risk = AdvancedRiskManager()
+        rng = np.random.default_rng(k)
+        risk.warm_up({f"X{i:03d}_USD": np.exp(np.cumsum(rng.standard_normal(300) * 0.002)) for i in range(k)})
+        risk.add_position('X001/USD', 10, 1.0, 0.7)
+        first = risk.optimize_position_size('X002/USD', 10, 0.7, 'normal')
+        version, refreshes = risk.covariance.version, risk.stats['exposure_refreshes']
+
+        decisions = [risk.optimize_position_size('X002/USD', 10, 0.7, 'normal') for _ in range(2000)]
+        assert risk.covariance.version == version
+        assert risk.stats['exposure_refreshes'] == refreshes
+        assert all(d == first for d in decisions)
+
+        risk.add_position('X003/USD', 10, 1.0, 0.7)
+        risk.optimize_position_size('X002/USD', 10, 0.7, 'normal')
+        assert risk.stats['exposure_refreshes'] == refreshes + 1
+    print("✅ 2,000 sizing decisions at k=10 and k=200 on one cached exposure, rebuilt once per position change")
+
+
+def test_heat_is_linear_correlated_sum():
+    """Heat keeps its linear meaning against the 6% limit: new risk plus |correlation|- or 0.5-weighted risks"""
+    # EUR/GBP vs GBP/USD is -0.80 in the prior; the other pairs are below 0.5 and count at half
+    cases = ((['EUR/USD', 'GBP/USD', 'AUD/USD', 'NZD/USD'], 0.024 + 0.8 * 0.024 + 3 * 0.5 * 0.024, False),
+             (['EUR/USD', 'GBP/USD'], 0.024 + 0.8 * 0.024 + 0.5 * 0.024, True))
+    for open_pairs, heat, approved in cases:
+        risk = AdvancedRiskManager()
+        for pair in open_pairs:
+            risk.add_position(pair, 1.2, 1.0, 0.6)
+        assert np.isclose(risk.calculate_portfolio_heat('EUR/GBP', 1.2, 0.024), heat)
+        assert risk.should_take_position('EUR/GBP', 1.2, 0.6, 'normal')[0] is approved
+    print("✅ Heat limit rejects EUR/GBP against 4 open positions (0.079) and approves it against 2 (0.055)")
+
+if __name__ == "__main__":
+    print("🔍 Testing advanced risk manager...")
+    test_fit_matches_incremental_updates()
+    test_correlation_learned_from_returns()
+    test_portfolio_var_is_quadratic_form()
+    test_sizing_decision_cost_independent_of_instruments()
+    test_heat_is_linear_correlated_sum()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Test the async OANDA client and concurrent emergency close against the local stand-in"""
+import os
+import time
+import asyncio
+import tempfile
+from contextlib import contextmanager
+from unittest.mock import patch
+from local_oanda_server import start_background_server
+from risk_manager import RiskManager
+from position_manager import PositionManager
+
+ACCOUNT_ID = "101-000-00000000-001"
+LATENCY_MS = 80
+
+
+@contextmanager
+def _standin():
+    server = start_background_server({'bars_per_second': 0, 'cache_dir': tempfile.mkdtemp(),
+                                      'latency_distribution': 'fixed', 'latency_ms': LATENCY_MS})
+    try:
+        with patch.dict(os.environ, {'OANDA_STANDIN_URL': server.url, 'OANDA_API_KEY': 'standin-test',
+                                    'OANDA_ACCOUNT_ID': ACCOUNT_ID}):
+            from async_oanda_client import AsyncOandaClient
+            broker = AsyncOandaClient()
+            try:
+                yield server, broker
+            finally:
+                broker.close()
+    finally:
+        server.shutdown()
+
+
+def test_emergency_close_all_in_one_round_trip():
+    """Eight positions flatten in about one request latency rather than eight"""
+    with _standin() as (server, broker):
+        async def scenario():
+            manager = PositionManager(RiskManager(initial_balance=10000.0), broker=broker)
+            price = await broker.get_current_price('EUR_USD')
+            opened = await asyncio.gather(*(manager.open_position({
+                'pair': 'EUR_USD', 'entry': price['ask'], 'stop_loss': price['ask'] - 0.0050,
+                'take_profit': price['ask'] + 0.0100}) for _ in range(8)))
+            assert all(p and p['trade_id'] for p in opened)
+
+            stats['max_in_flight'] = 0
+            start = time.perf_counter()
+            assert await manager.emergency_close_all()
+            return time.perf_counter() - start
+
+        stats = server.app.config['STANDIN_STATS']
+        elapsed = asyncio.run(scenario())
+        assert not server.app.config['BROKER'].open_trades(ACCOUNT_ID)
+        assert stats['max_in_flight'] >= 8  # Every close was in flight at the same time
+        print(f"✅ 8 positions closed in {elapsed*1000:.0f}ms ({LATENCY_MS}ms per request, "
+              f"{stats['max_in_flight']} requests at once)")
+
+
+def test_batch_pricing_and_close_errors():
+    """Multi-pair pricing is one request; a failed close is reported, not raised"""
+    with _standin() as (server, broker):
+        stats = server.app.config['STANDIN_STATS']
+
+        async def scenario():
+            requests = stats['requests']
+            prices = await broker.get_prices(['EUR/USD', 'USD_JPY', 'GBP_USD'])
+            pricing_requests = stats['requests'] - requests
+            results = await broker.close_trades(['999'])
+            return prices, pricing_requests, results
+
+        prices, pricing_requests, results = asyncio.run(scenario())
+        assert set(prices) == {'EUR_USD', 'USD_JPY', 'GBP_USD'}
+        assert prices['USD_JPY']['ask'] > prices['USD_JPY']['bid'] > 50
+        assert pricing_requests == 1
+        assert results['999']['status'] == 'error'
+        print("✅ 3 prices in one request, unknown trade close reported as error")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing async OANDA client...")
+    test_emergency_close_all_in_one_round_trip()
+    test_batch_pricing_and_close_errors()
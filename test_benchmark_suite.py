@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""Test the benchmark suite's result format and baseline comparison"""
+import json
+from benchmark_suite import run_benchmarks, compare
+
+
+def _results(values, sizes=None):
+    return {'sizes': sizes or {'n': 1},
+            'results': {name: {'value': value, 'unit': unit, 'higher_is_better': higher}
+                        for name, (value, unit, higher) in values.items()}}
+
+
+def test_compare_flags_regressions():
+    """Slower latency or lower throughput beyond the tolerance is a regression, improvements are not"""
+    baseline = _results({'latency': (10.0, 'ms', False), 'throughput': (1000.0, 'ops/s', True),
+                         'stable': (5.0, 'ms', False)})
+    current = _results({'latency': (13.0, 'ms', False), 'throughput': (1500.0, 'ops/s', True),
+                        'stable': (5.5, 'ms', False), 'new': (1.0, 'ms', False)})
+    comparisons = {c['name']: c for c in compare(current, baseline, tolerance=0.25)}
+
+    assert set(comparisons) == {'latency', 'throughput', 'stable'}  # No baseline, no comparison
+    assert comparisons['latency']['regression'] and abs(comparisons['latency']['change'] - 0.3) < 1e-9
+    assert not comparisons['throughput']['regression']
+    assert not comparisons['stable']['regression']
+    assert compare(_results({'throughput': (700.0, 'ops/s', True)}), baseline)[0]['regression']
+    assert not compare(current, _results({'latency': (10.0, 'ms', False)}, {'n': 2}))[0]['sizes_match']
+    print("✅ Baseline comparison")
+
+
+def test_run_is_machine_readable_and_seeded():
+    """Small runs produce JSON-serialisable results with every run recorded"""
+    results = run_benchmarks(['memory_logger', 'trade_store'],
+                             {'repeat': 2, 'sizes': {'memory_writes': 50, 'store_trades': 2000}})
+    json.loads(json.dumps(results))
+    assert results['sizes']['memory_writes'] == 50 and results['seed'] == 42
+    for name in ('memory_logger', 'trade_store'):
+        result = results['results'][name]
+        assert result['value'] > 0 and len(result['runs']) == 2
+    assert results['results']['memory_logger']['higher_is_better']
+    assert not results['results']['trade_store']['higher_is_better']
+    print(f"✅ Benchmark run ({results['results']['memory_logger']['value']:.0f} writes/s)")
+
+
+if __name__ == "__main__":
+    test_compare_flags_regressions()
+    test_run_is_machine_readable_and_seeded()
+    print("\n🎉 Benchmark suite tests passed")
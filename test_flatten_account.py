@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Test account flattening via bulk PositionClose against the local OANDA v20 stand-in"""
+import os
+import tempfile
+from contextlib import contextmanager
+from unittest.mock import patch
+from local_oanda_server import start_background_server
+
+ACCOUNT_ID = "101-000-00000000-001"
+INSTRUMENTS = ['EUR_USD', 'GBP_USD', 'USD_JPY', 'AUD_USD', 'USD_CAD', 'NZD_USD']
+
+
+@contextmanager
+def _standin(latency_ms=0.0):
+    server = start_background_server({'bars_per_second': 0, 'cache_dir': tempfile.mkdtemp(),
+                                      'latency_ms': latency_ms, 'latency_distribution': 'fixed'})
+    try:
+        with patch.dict(os.environ, {'OANDA_STANDIN_URL': server.url, 'OANDA_API_KEY': 'standin-test',
+                                     'OANDA_ACCOUNT_ID': ACCOUNT_ID}):
+            from oanda_client import OandaClient
+            yield server, OandaClient()
+    finally:
+        server.shutdown()
+
+
+def _open(broker, instrument, units):
+    status, _ = broker.create_order(ACCOUNT_ID, {'type': 'MARKET', 'instrument': instrument, 'units': str(units),
+                                                 'stopLossOnFill': {'distance': '0.5'}})
+    assert status == 201
+
+
+def test_close_position_sides():
+    """PositionClose closes only the requested side and rejects sides that are not held"""
+    with _standin() as (server, client):
+        broker = server.app.config['BROKER']
+        _open(broker, 'EUR_USD', 1000)
+        _open(broker, 'EUR_USD', 500)
+        result = client.close_position('EUR_USD', long_units='ALL', short_units='NONE')
+        assert result['status'] == 'success'
+        assert result['response']['longOrderFillTransaction']['units'] == '-1500'
+        assert client.get_open_positions() == []
+
+        try:
+            client.close_position('EUR_USD', long_units='NONE', short_units='ALL')
+            assert False, "closing a side that is not held should be rejected"
+        except Exception as e:
+            assert 'CLOSEOUT_POSITION_DOESNT_EXIST' in str(e) or '400' in str(e)
+        print("✅ PositionClose per side")
+
+
+def test_flatten_is_concurrent_and_verified():
+    """Longs and shorts on many instruments close in three waves of requests, not one per position"""
+    latency_ms = 80
+    with _standin(latency_ms) as (server, client):
+        broker = server.app.config['BROKER']
+        for i, instrument in enumerate(INSTRUMENTS):
+            _open(broker, instrument, 1000 if i % 2 else -1000)
+        _open(broker, 'EUR_USD', 2000)  # Extra long on a short instrument nets it to long
+
+        stats = server.app.config['STANDIN_STATS']
+        requests, stats['max_in_flight'] = stats['requests'], 0
+        result = client.flatten_account()
+        assert result['status'] == 'flat', result
+        assert sorted(result['closed']) == sorted(INSTRUMENTS)
+        assert result['errors'] == {}
+        assert result['summary']['openTradeCount'] == 0
+        assert result['summary']['pendingOrderCount'] == 0  # Stops went with their trades
+        # One snapshot, one PositionClose per instrument (all in flight together), one verifying snapshot
+        assert stats['requests'] - requests == len(INSTRUMENTS) + 2
+        assert stats['max_in_flight'] == len(INSTRUMENTS)
+
+        again = client.flatten_account()
+        assert again['status'] == 'flat' and again['closed'] == []
+        print(f"✅ Flattened {len(INSTRUMENTS)} positions in {result['elapsed_ms']:.0f}ms at {latency_ms}ms latency")
+
+
+def _limit(broker, instrument, units, price):
+    status, body = broker.create_order(ACCOUNT_ID, {'type': 'LIMIT', 'instrument': instrument,
+                                                    'units': str(units), 'price': str(price)})
+    assert status == 201
+    return body['orderCreateTransaction']['id']
+
+
+def test_flatten_scoped_to_instruments():
+    """An instruments filter leaves other positions and entry orders alone"""
+    with _standin() as (server, client):
+        broker = server.app.config['BROKER']
+        _open(broker, 'EUR_USD', 1000)
+        _open(broker, 'GBP_USD', -1000)
+        _limit(broker, 'EUR_USD', 1000, 1.0)
+        gbp_order = _limit(broker, 'GBP_USD', 1000, 1.0)
+
+        result = client.flatten_account(['EUR_USD'])
+        assert result['status'] == 'flat', result
+        assert result['closed'] == ['EUR_USD'] and len(result['cancelled']) == 1
+        assert [p['instrument'] for p in client.get_open_positions()] == ['GBP_USD']
+        assert [o['id'] for o in client.get_pending_orders() if o.get('tradeID') is None] == [gbp_order]
+        print("✅ Flatten scoped to EUR_USD")
+
+
+def test_failed_cancel_is_incomplete():
+    """A cancel that fails leaves an entry order behind, so the account is not reported flat"""
+    from local_oanda_server import StandinError
+    with _standin() as (server, client):
+        broker = server.app.config['BROKER']
+        _open(broker, 'EUR_USD', 1000)
+        _limit(broker, 'EUR_USD', 1000, 1.0)
+        stuck = _limit(broker, 'USD_JPY', 1000, 100.0)
+        cancel_order = broker.cancel_order
+
+        def failing_cancel(account_id, order_id):
+            if order_id == stuck:
+                raise StandinError(503, "Injected cancel failure", "SERVICE_UNAVAILABLE")
+            return cancel_order(account_id, order_id)
+
+        broker.cancel_order = failing_cancel
+        result = client.flatten_account()
+        assert result['status'] == 'incomplete', result
+        assert list(result['errors']) == [stuck]
+        assert result['remaining'] == {'positions': [], 'orders': [stuck]}
+        assert result['summary']['openPositionCount'] == 0
+        print("✅ Failed cancel reported as incomplete")
+
+
+def test_webhook_close_all_is_per_chart():
+    """SevenSYS close_all from one chart only flattens that chart's instrument"""
+    with _standin() as (server, client):
+        broker = server.app.config['BROKER']
+        # Import without init_worker(): no repo database, OANDA sync or warm-up
+        with patch.dict(os.environ, {'PRELOAD_APP': '1'}):
+            import app as webhook_app
+        from account_router import AccountRouter
+
+        original = webhook_app.account_router
+        webhook_app.account_router = AccountRouter.single(client, {'mode': 'fixed', 'units': 1000, 'balance': 45.0})
+        try:
+            _open(broker, 'EUR_USD', 1000)
+            _open(broker, 'GBP_USD', 1000)
+            gbp_order = _limit(broker, 'GBP_USD', 1000, 1.0)
+            response = webhook_app.app.test_client().post('/webhook', json={
+                'ticker': 'EURUSD', 'strategy.order.action': 'close_all'})
+            assert response.status_code == 200, response.get_json()
+            assert response.get_json()['accounts']['default']['closed'] == ['EUR_USD']
+            assert [p['instrument'] for p in client.get_open_positions()] == ['GBP_USD']
+            assert gbp_order in [o['id'] for o in client.get_pending_orders()]
+            print("✅ close_all flattened EUR_USD only")
+        finally:
+            webhook_app.account_router.close()
+            webhook_app.account_router = original
+
+
+if __name__ == "__main__":
+    test_close_position_sides()
+    test_flatten_is_concurrent_and_verified()
+    test_flatten_scoped_to_instruments()
+    test_failed_cancel_is_incomplete()
+    test_webhook_close_all_is_per_chart()
+    print("\n🎉 Flatten tests passed")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Import-time budget and readiness for the web entry point (python -X importtime -c "import app")"""
+import os
+import sys
+import json
+import tempfile
+import subprocess
+from local_oanda_server import start_background_server
+
+IMPORT_BUDGET = {
+    'module': 'app',
+    'budget_ms': 600,   # Cumulative import time of app; ~250 ms today, mostly flask and oandapyV20
+    # Only imported on first use (sizing, training, reports), never by the web process at start
+    'deferred': ('numpy', 'pandas', 'sklearn', 'scipy', 'ta', 'matplotlib', 'colorama', 'psutil'),
+}
+
+
+def _env(**extra):
+    # The child runs init_worker() at import; keep its database and log out of the working copy
+    scratch = tempfile.mkdtemp()
+    env = dict(os.environ, OANDA_API_KEY='import-time-test', OANDA_ACCOUNT_ID='101-000-00000000-001',
+               PRELOAD_APP='0', SEVENSYS_MEMORY_DB=os.path.join(scratch, 'memory.db'),
+               SEVENSYS_MEMORY_LOG=os.path.join(scratch, 'memory_logger.log'))
+    env.update(extra)
+    return env
+
+
+def import_times(module=IMPORT_BUDGET['module'], env=None):
+    """{module name: cumulative microseconds} from -X importtime for a fresh interpreter"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True, env=env or _env(), timeout=60,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert result.returncode == 0, result.stderr[-2000:]
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_import_budget():
+    """Importing app stays under budget and pulls in none of the deferred heavy modules"""
+    times = import_times()
+    loaded = sorted(name for name in times if name.split('.')[0] in IMPORT_BUDGET['deferred'])
+    assert not loaded, f"Imported at startup, should be deferred to first use: {loaded}"
+    total_ms = times[IMPORT_BUDGET['module']] / 1000
+    slowest = sorted(((us, name) for name, us in times.items() if '.' not in name), reverse=True)[:5]
+    assert total_ms < IMPORT_BUDGET['budget_ms'], \
+        f"import app took {total_ms:.0f} ms (budget {IMPORT_BUDGET['budget_ms']} ms), slowest: {slowest}"
+    print(f"✅ import app: {total_ms:.0f} ms, no deferred modules loaded")
+
+
+def test_ready_after_warm_up():
+    """/ready is 503 while the OANDA connection warms up, then 200 with both checks done"""
+    server = start_background_server({'bars_per_second': 0, 'cache_dir': tempfile.mkdtemp(),
+                                      'latency_ms': 300, 'latency_distribution': 'fixed'})
+    script = (
+        "import json, time, app\n"
+        "client = app.app.test_client()\n"
+        "first = client.get('/ready').status_code\n"
+        "deadline = time.time() + 15\n"
+        "while client.get('/ready').status_code != 200 and time.time() < deadline:\n"
+        "    time.sleep(0.05)\n"
+        "response = client.get('/ready')\n"
+        "print(json.dumps({'first': first, 'status': response.status_code, 'body': response.get_json(),\n"
+        "                  'health': client.get('/health').status_code}))\n"
+    )
+    try:
+        result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, timeout=60,
+                                env=_env(OANDA_STANDIN_URL=server.url, LOG_LEVEL='WARNING'),
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+    finally:
+        server.shutdown()
+    assert result.returncode == 0, result.stderr[-2000:]
+    outcome = json.loads(result.stdout.strip().splitlines()[-1])
+    assert outcome['first'] == 503
+    assert outcome['status'] == 200 and outcome['health'] == 200
+    assert outcome['body']['oanda'] and outcome['body']['memory_logger']
+    assert outcome['body']['ready_ms'] >= 300
+    print(f"✅ Ready after {outcome['body']['ready_ms']:.0f} ms")
+
+
+if __name__ == "__main__":
+    test_import_budget()
+    test_ready_after_warm_up()
+    print("\n🎉 Import-time tests passed")
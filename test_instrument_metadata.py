@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Test the array-backed instrument metadata table and batch position sizing"""
+import tempfile
+import numpy as np
+from instrument_metadata import InstrumentMetadata, DEFAULT_INSTRUMENTS
+
+
+def test_precision_and_pips():
+    """JPY pairs round to 3 decimals and use 0.01 pips; majors use 5 and 0.0001"""
+    table = InstrumentMetadata(DEFAULT_INSTRUMENTS)
+    assert table.round_price("USD_JPY", 151.123456) == 151.123
+    assert table.round_price("EURUSD", 1.0842567) == 1.08426
+    assert table.pip_size_of("eur/jpy") == 0.01
+    assert table.pip_size_of("GBP_USD") == 0.0001
+    assert table.precision_of("CAD_JPY") == 3  # Unknown instrument gets a derived row
+    print("✅ Precision and pip sizes per instrument")
+
+
+def test_batch_sizing_converts_quote_currency():
+    """Risking $10 on a 50-pip stop gives ~2,000 EUR_USD units and ~3,000 USD_JPY units at 150"""
+    table = InstrumentMetadata(DEFAULT_INSTRUMENTS)
+    units = table.position_sizes(["EUR_USD", "USD_JPY", "EUR_USD"],
+                                 [1.1000, 150.00, 1.1000], [1.0950, 149.50, 1.1000], 10.0)
+    assert units[0] == 2000
+    assert units[1] == 3000
+    assert units[2] == 0  # Zero stop distance
+    values = table.pip_values(["EUR_USD", "USD_JPY"], [1.1, 150.0])
+    assert np.allclose(values, [0.0001, 0.01 / 150.0])
+    print(f"✅ Batch sizing: {units.tolist()} units")
+
+
+class _CheckedIndex(dict):
+    """Index that asserts, as each entry is published, that a lock-free reader could already use it"""
+
+    def __init__(self, table):
+        super().__init__(table.index)
+        self.table = table
+
+    def __setitem__(self, name, row):
+        t = self.table
+        assert t.names[row] == name and name in t.raw
+        assert all(len(a) > row for a in (t.pip_location, t.pip_size, t.display_precision, t.units_precision,
+                                           t.min_trade_size, t.margin_rate, t.base, t.quote))
+        super().__setitem__(name, row)
+
+
+def test_rows_complete_before_published():
+    """Unknown instruments added on the fly are fully built before other threads can look them up"""
+    table = InstrumentMetadata(DEFAULT_INSTRUMENTS)
+    table.index = _CheckedIndex(table)
+    units = table.position_sizes(["CAD_JPY", "NZD_CHF", "EUR_USD"], [110.0, 0.55, 1.1], [109.5, 0.545, 1.095], 10.0)
+    assert units[2] == 2000 and table.pip_size_of("CAD_JPY") == 0.01
+    print("✅ Rows published after their arrays")
+
+
+def test_cache_round_trip():
+    """A saved table reloads with identical arrays"""
+    path = tempfile.mkdtemp() + "/instruments.json"
+    InstrumentMetadata(DEFAULT_INSTRUMENTS).save(path)
+    reloaded = InstrumentMetadata.load(path)
+    assert reloaded.names == [i['name'] for i in DEFAULT_INSTRUMENTS]
+    assert (reloaded.display_precision == InstrumentMetadata(DEFAULT_INSTRUMENTS).display_precision).all()
+    print(f"✅ {len(reloaded.names)} instruments reloaded from cache")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing instrument metadata...")
+    test_precision_and_pips()
+    test_batch_sizing_converts_quote_currency()
+    test_rows_complete_before_published()
+    test_cache_round_trip()
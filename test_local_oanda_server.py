@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Test OandaClient and CandleCache end to end against the local OANDA v20 stand-in"""
+import os
+import tempfile
+from contextlib import contextmanager
+from unittest.mock import patch
+from datetime import datetime, timezone
+from local_oanda_server import start_background_server
+
+ACCOUNT_ID = "101-000-00000000-001"
+
+
+@contextmanager
+def _standin(config=None):
+    """Stand-in on a free port with frozen prices, and an OandaClient pointed at it; env restored on exit"""
+    server = start_background_server(dict({'bars_per_second': 0, 'cache_dir': tempfile.mkdtemp()}, **(config or {})))
+    try:
+        with patch.dict(os.environ, {'OANDA_STANDIN_URL': server.url, 'OANDA_API_KEY': 'standin-test',
+                                    'OANDA_ACCOUNT_ID': ACCOUNT_ID}):
+            from oanda_client import OandaClient
+            yield server, OandaClient()
+    finally:
+        server.shutdown()
+
+
+def test_place_trade_with_tp_sl():
+    """The webhook's full OandaClient.place_trade flow fills and attaches TP/SL"""
+    with _standin() as (server, client):
+        assert client.environment == "standin"
+        price = client.get_current_price("EUR/USD")
+        assert price['ask'] > price['bid']
+
+        result = client.place_trade({'symbol': 'EUR_USD', 'units': 1000, 'close_price': price['ask'],
+                                     'stop_loss': price['ask'] - 0.0050, 'take_profit': price['ask'] + 0.0100})
+        assert result['status'] == 'success'
+
+        account = client.get_account_details()
+        assert account['open_trades'] == 1
+        trade = server.app.config['BROKER'].open_trades(ACCOUNT_ID)[0]
+        assert 'stopLossOrder' in trade and 'takeProfitOrder' in trade
+
+        client.modify_trade(trade['id'], stop_loss=round(price['bid'] - 0.0030, 5))
+        closed = client.close_trade(trade['id'])
+        assert float(closed['close_price']) > 0
+        assert client.get_account_details()['open_trades'] == 0
+        print(f"✅ place_trade -> TP/SL -> CRCDO -> close round trip at {result['filled_price']}")
+
+
+def test_stop_loss_triggers_on_replay():
+    """A tight stop is filled once the replayed prices move through it"""
+    with _standin() as (server, client):
+        broker = server.app.config['BROKER']
+        price = client.get_current_price("EUR_USD")
+        status, body = broker.create_order(ACCOUNT_ID, {
+            'type': 'MARKET', 'instrument': 'EUR_USD', 'units': '1000',
+            'stopLossOnFill': {'distance': '0.00030'}, 'takeProfitOnFill': {'distance': '0.00030'}})
+        assert status == 201 and 'tradeOpened' in body['orderFillTransaction']
+
+        for _ in range(200):
+            broker.feed.advance(1)
+            if not broker.open_trades(ACCOUNT_ID):
+                break
+        assert not broker.open_trades(ACCOUNT_ID)
+        fills = [t for t in broker.accounts[ACCOUNT_ID]['transactions']
+                 if t['type'] == 'ORDER_FILL' and t['reason'] in ('STOP_LOSS_ORDER', 'TAKE_PROFIT_ORDER')]
+        assert len(fills) == 1
+        print(f"✅ {fills[0]['reason']} filled at {fills[0]['price']} after replay (entry ask {price['ask']})")
+
+
+def test_candles_and_error_injection():
+    """CandleCache fetches through the stand-in; injected errors surface as OANDA errors"""
+    with _standin({'endpoint_error_rate': {'pricing': 1.0}, 'start_bar': 3000}) as (server, client):
+        from candle_cache import CandleCache
+        cache = CandleCache(tempfile.mkdtemp())
+        candles = cache.fetch("EUR_USD", "M5", start=datetime(2024, 1, 1, tzinfo=timezone.utc),
+                              end=datetime(2024, 1, 10, tzinfo=timezone.utc))
+        assert len(candles) > 1000
+        assert (candles['ask_c'] > candles['bid_c']).all()
+
+        try:
+            client.get_current_price("EUR_USD")
+            raise AssertionError("expected an injected pricing failure")
+        except Exception as e:
+            assert 'Injected' in str(e)
+        print(f"✅ {len(candles)} candles cached through the stand-in, pricing failure injected")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing local OANDA stand-in...")
+    test_place_trade_with_tp_sl()
+    test_stop_loss_triggers_on_replay()
+    test_candles_and_error_injection()
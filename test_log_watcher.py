@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Test incremental, rotation-aware log scanning"""
+import os
+import tempfile
+from datetime import datetime, timedelta
+from log_watcher import LogWatcher, line_timestamp
+
+NOW = datetime(2026, 3, 2, 12, 0, 0)
+
+
+def _line(level, minutes_ago=0, text="message"):
+    stamp = (NOW - timedelta(minutes=minutes_ago)).strftime('%Y-%m-%d %H:%M:%S,%f')[:-3]
+    return f"{stamp} - {level} - {text}\n"
+
+
+def test_timestamp_formats():
+    assert line_timestamp("[2026-03-02T12:00:00.5] ERROR: x") == NOW.timestamp() + 0.5
+    assert line_timestamp(_line('ERROR')) == NOW.timestamp()
+    assert line_timestamp('{"ts":"2026-03-02T12:00:00","level":"ERROR"}') == NOW.timestamp()
+    assert line_timestamp("Traceback (most recent call last):") is None
+    print("✅ Text, bracketed and JSON timestamps")
+
+
+def test_tail_then_incremental_with_rotation():
+    """First poll reads only the tail; later polls read appended bytes and follow rotation"""
+    path = os.path.join(tempfile.mkdtemp(), 'live_trading.log')
+    with open(path, 'w') as f:
+        for i in range(200000):
+            f.write(_line('ERROR' if i % 1000 == 0 else 'INFO', minutes_ago=90))
+        f.write(_line('ERROR', minutes_ago=5))
+    size = os.path.getsize(path)
+
+    watcher = LogWatcher([path], clock=lambda: NOW.timestamp())
+    assert watcher.poll() == 1  # Only the recent error in the last 100 lines counts
+    assert watcher.stats['lines'] == 100 and watcher.stats['bytes_read'] == 0
+    assert size > 5_000_000
+
+    with open(path, 'a') as f:
+        f.write(_line('ERROR', 1) + _line('CRITICAL', 1) + _line('INFO', 1) + "2026-03-02 11:59:30,000 - ERR")
+    assert watcher.poll() == 2
+    with open(path, 'a') as f:
+        f.write("OR - split across polls\n")
+    assert watcher.poll() == 1
+    appended = watcher.stats['bytes_read']
+    assert appended < 300
+
+    # Rotation: a last write to the old file, then a new file at the same path
+    with open(path, 'a') as f:
+        f.write(_line('ERROR', 0))
+    os.rename(path, path + '.1')
+    with open(path, 'w') as f:
+        f.write(_line('ERROR', 0) + _line('INFO', 0))
+    assert watcher.poll() == 2 and watcher.stats['rotations'] == 1
+
+    # Truncation in place starts again from the top
+    with open(path, 'w') as f:
+        f.write(_line('ERROR', 0))
+    assert watcher.poll() == 1
+    assert watcher.errors_since(30 * 60) == 7
+    assert watcher.errors_since(3 * 60) == 6
+    watcher.close()
+    print(f"✅ {size / 1e6:.0f}MB file scanned by tail then {watcher.stats['bytes_read']} appended bytes")
+
+
+def test_window_drops_old_buckets():
+    clock = [NOW.timestamp()]
+    path = os.path.join(tempfile.mkdtemp(), 'error.log')
+    open(path, 'w').close()
+    watcher = LogWatcher([path], clock=lambda: clock[0])
+    watcher.poll()
+    with open(path, 'a') as f:
+        f.write(_line('ERROR', 0))
+    watcher.poll()
+    clock[0] += 3600
+    watcher.poll()
+    assert watcher.errors_since(1800) == 0 and watcher.buckets == {}
+    print("✅ Old buckets expire")
+
+
+if __name__ == "__main__":
+    test_timestamp_formats()
+    test_tail_then_incremental_with_rotation()
+    test_window_drops_old_buckets()
+    print("\n🎉 Log watcher tests passed")
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Test the autonomous engine's concurrent pair scan: deadline, busy pairs, timings and ranking"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+import autonomous_trading_engine
+from autonomous_trading_engine import AutonomousTradingEngine
+
+CONFIDENCE = {'EUR_USD': 0.75, 'GBP_USD': 0.92, 'USD_JPY': 0.81, 'AUD_USD': 0.97, 'USD_CAD': 0.71}
+SLOW = 'NZD_USD'
+
+
+class _Analyzer:
+    def analyze_trade(self, pair, signal):
+        return {'prediction': {'recommended': True}}
+
+
+def _signal(pair, price_data):
+    return {'pair': pair, 'signal': 'buy', 'confidence': CONFIDENCE[pair]}
+
+
+def _engine(release):
+    engine = AutonomousTradingEngine.__new__(AutonomousTradingEngine)  # No OANDA client or market data feed
+    engine.config = {'active_pairs': list(CONFIDENCE) + [SLOW], 'scan_deadline': 1.0}
+    engine._scan_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='pair-scan')
+    engine._scan_inflight = {}
+    engine.last_scan = {}
+    engine.trade_analyzer = _Analyzer()
+    engine.fetches = []
+    candles = pd.DataFrame({'close': np.linspace(1.1, 1.2, 60)})
+
+    def get_market_data(pair, periods=100):
+        engine.fetches.append(pair)
+        if pair == SLOW:
+            release.wait(10)  # Holds its worker well past the deadline
+        return candles
+    engine._get_market_data = get_market_data
+    return engine
+
+
+def test_slow_pair_dropped_then_busy():
+    """A pair past scan_deadline is dropped, then reported busy without being queued again"""
+    release = threading.Event()
+    engine = _engine(release)
+    try:
+        with patch.object(autonomous_trading_engine.trading_strategy, 'generate_trade_signal', _signal):
+            top = engine._scan_market_opportunities()
+            first = engine.last_scan
+            assert [o['pair'] for o in top] == ['AUD_USD', 'GBP_USD', 'USD_JPY']
+            assert first['pairs'][SLOW] == {'status': 'timeout'} and first['dropped'] == [SLOW]
+            for pair in CONFIDENCE:
+                timings = first['pairs'][pair]
+                assert timings['status'] == 'ok'
+                assert {'market_data_ms', 'signal_ms', 'analysis_ms', 'total_ms'} <= set(timings)
+
+            engine._scan_market_opportunities()
+            second = engine.last_scan
+            assert second['pairs'][SLOW] == {'status': 'busy'} and second['dropped'] == [SLOW]
+            assert engine.fetches.count(SLOW) == 1
+            assert all(engine.fetches.count(pair) == 2 for pair in CONFIDENCE)
+    finally:
+        release.set()
+        engine._scan_pool.shutdown(wait=True)
+    print(f"✅ {SLOW} dropped at the deadline, then skipped as busy; top 3 by confidence")
+
+
+if __name__ == "__main__":
+    test_slow_pair_dropped_then_busy()
+    print("\n🎉 Market scan tests passed")
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Test the metrics registry and the /metrics endpoint"""
+import os
+import sys
+import json
+import time
+import tempfile
+import subprocess
+import multiprocessing
+from unittest.mock import patch
+from metrics import MetricsRegistry
+
+
+def _lines(text):
+    return {line.rsplit(' ', 1)[0]: float(line.rsplit(' ', 1)[1])
+            for line in text.splitlines() if line and not line.startswith('#')}
+
+
+def test_exposition_format():
+    """Counters, gauges and cumulative histogram buckets in Prometheus text format"""
+    registry = MetricsRegistry()
+    requests = registry.counter('requests_total', 'Requests', ['status'])
+    latency = registry.histogram('latency_seconds', 'Latency', buckets=(0.01, 0.1, 1.0))
+    registry.gauge('queue_depth', 'Depth').set(3)
+    requests.labels(200).inc()
+    requests.labels(200).inc()
+    requests.labels('a"b').inc()
+    for value in (0.005, 0.05, 0.05, 5.0):
+        latency.observe(value)
+
+    text = registry.render()
+    samples = _lines(text)
+    assert '# TYPE latency_seconds histogram' in text
+    assert samples['requests_total{status="200"}'] == 2
+    assert samples['requests_total{status="a\\"b"}'] == 1
+    assert samples['queue_depth'] == 3
+    assert samples['latency_seconds_bucket{le="0.01"}'] == 1
+    assert samples['latency_seconds_bucket{le="0.1"}'] == 3
+    assert samples['latency_seconds_bucket{le="+Inf"}'] == 4
+    assert samples['latency_seconds_count'] == 4
+    assert abs(samples['latency_seconds_sum'] - 5.105) < 1e-9
+    print("✅ Prometheus exposition")
+
+
+def _worker(directory, n):
+    registry = MetricsRegistry(directory)
+    registry.counter('orders_total', 'Orders').inc(n)
+    registry.histogram('order_latency_seconds', 'Latency').observe(0.2)
+    registry.gauge('worker_up', 'Up').set(1)
+    registry.flush()
+
+
+def test_workers_merge():
+    """Counters and histograms sum across worker files; gauges of exited workers are dropped"""
+    directory = tempfile.mkdtemp()
+    ctx = multiprocessing.get_context('fork')
+    workers = [ctx.Process(target=_worker, args=(directory, n)) for n in (2, 5)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    registry = MetricsRegistry(directory)
+    registry.counter('orders_total', 'Orders').inc(1)
+    registry.gauge('worker_up', 'Up').set(1)
+    samples = _lines(registry.render())
+    assert samples['orders_total'] == 8
+    assert samples['order_latency_seconds_count'] == 2
+    assert [k for k in samples if k.startswith('worker_up')] == [f'worker_up{{pid="{os.getpid()}"}}']
+    print("✅ Three processes merged into one scrape")
+
+
+def test_reused_pid_and_old_runs():
+    """A dead process's file survives a new process with its pid; the master clears earlier runs"""
+    directory = tempfile.mkdtemp()
+    stale = {'orders_total': {'type': 'counter', 'help': 'Orders', 'labelnames': [], 'series': {'[]': 3}},
+             'worker_up': {'type': 'gauge', 'help': 'Up', 'labelnames': [], 'series': {'[]': 7}}}
+    with open(os.path.join(directory, f"{os.getpid()}-0.json"), 'w') as f:
+        json.dump(stale, f)  # Written by an earlier process that had this pid
+
+    registry = MetricsRegistry(directory)
+    registry.counter('orders_total', 'Orders').inc(2)
+    registry.gauge('worker_up', 'Up').set(1)
+    registry.flush()
+    assert len(os.listdir(directory)) == 2
+    samples = _lines(registry.render())
+    assert samples['orders_total'] == 5
+    assert [(k, v) for k, v in samples.items() if k.startswith('worker_up')] == [(f'worker_up{{pid="{os.getpid()}"}}', 1)]
+
+    registry.clear_directory()
+    assert not os.listdir(directory)
+    assert _lines(registry.render())['orders_total'] == 2
+    print("✅ Reused pid and earlier runs")
+
+
+_TRAINING = """
+import sys, numpy as np
+from train_and_trade_100_sessions import ContinuousTrainingSystem
+system = ContinuousTrainingSystem.__new__(ContinuousTrainingSystem)
+rng = np.random.default_rng(0)
+system.training_data = [{'features': list(rng.random(26)), 'outcome': int(rng.random() < 0.5)} for _ in range(300)]
+system.model_performance_history = []
+system.train_ai_model()
+print('trained', flush=True)
+sys.stdin.read()
+"""
+
+
+def test_training_series_on_web_metrics():
+    """A training run in its own process shows up in the web process's scrape of the shared directory"""
+    directory = tempfile.mkdtemp()
+    trainer = subprocess.Popen([sys.executable, '-c', _TRAINING], cwd=os.path.dirname(os.path.abspath(__file__)),
+                               env=dict(os.environ, METRICS_MULTIPROC_DIR=directory),
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    try:
+        assert any(line.startswith('trained') for line in trainer.stdout)
+        web = MetricsRegistry(directory)
+        deadline, samples = time.time() + 10, {}
+        while time.time() < deadline and 'training_samples_total' not in samples:
+            time.sleep(0.05)
+            samples = _lines(web.render())
+        assert samples['training_samples_total'] > 0
+        assert samples[f'training_samples_per_second{{pid="{trainer.pid}"}}'] > 0
+    finally:
+        trainer.stdin.close()
+        trainer.wait(timeout=10)
+    assert _lines(web.render())['training_samples_total'] > 0  # Counters outlive the run
+    print("✅ Training series on the web /metrics")
+
+
+def test_metrics_endpoint():
+    """/metrics reports webhook latency and status after an alert"""
+    # Import without init_worker() (no repo database, OANDA sync or warm-up); the overrides end with the import
+    with patch.dict(os.environ, {'OANDA_API_KEY': 'metrics-test', 'OANDA_ACCOUNT_ID': '101-000-00000000-001',
+                                 'PRELOAD_APP': '1'}):
+        import app as webhook_app
+    client = webhook_app.app.test_client()
+    client.post('/webhook', json={})
+    response = client.get('/metrics')
+    assert response.status_code == 200 and response.mimetype == 'text/plain'
+    samples = _lines(response.get_data(as_text=True))
+    assert samples['webhook_requests_total{status="400"}'] >= 1
+    assert samples['webhook_latency_seconds_count'] >= 1
+    assert '# TYPE sqlite_write_latency_seconds histogram' in response.get_data(as_text=True)
+    print("✅ /metrics endpoint")
+
+
+if __name__ == "__main__":
+    test_exposition_format()
+    test_workers_merge()
+    test_reused_pid_and_old_runs()
+    test_training_series_on_web_metrics()
+    test_metrics_endpoint()
+    print("\n🎉 Metrics tests passed")
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Test the vectorized Monte Carlo equity engine"""
+import time
+import numpy as np
+from monte_carlo_engine import MonteCarloEngine, returns_from_r_multiples
+
+
+def test_known_outcomes():
+    """All-winning trades never draw down; all-losing trades always hit ruin"""
+    winners = MonteCarloEngine([0.01, 0.02], {'starting_balance': 100.0}).run(1000, 50)
+    losers = MonteCarloEngine([-0.05], {'starting_balance': 100.0}).run(1000, 50)
+
+    assert winners['summary']['risk_of_ruin'] == 0.0
+    assert winners['summary']['worst_max_drawdown_pct'] == 0.0
+    assert losers['summary']['risk_of_ruin'] == 100.0
+    assert np.isclose(losers['summary']['median_final_balance'], 100.0 * 0.95 ** 50, rtol=1e-4)
+    assert losers['summary']['median_time_to_recover_trades'] == 50
+    print("✅ Deterministic edge cases match closed-form results")
+
+
+def test_percentile_bands_are_ordered():
+    """Percentile bands must be monotone across percentiles at every point"""
+    returns = returns_from_r_multiples(np.where(np.arange(100) % 3 == 0, -1.0, 2.0), 0.015)
+    bands = MonteCarloEngine(returns).run(5000, 120)['equity_bands']
+
+    assert len(bands['trade']) == len(bands['p50'])
+    assert all(lo <= mid <= hi for lo, mid, hi in zip(bands['p5'], bands['p50'], bands['p95']))
+    print(f"✅ {len(bands['trade'])} band points, ordered p5 <= p50 <= p95")
+
+
+def test_blocks_bound_memory_not_results():
+    """Long paths shrink the block instead of growing it; the block size never changes the results"""
+    returns = np.random.default_rng(1).normal(0.001, 0.02, 500)
+    default = MonteCarloEngine(returns).run(3000, 400)
+    small = MonteCarloEngine(returns, {'max_block_bytes': 400 * 32 * 7}).run(3000, 400)  # 7 paths per block
+
+    assert default['summary']['median_final_balance'] == small['summary']['median_final_balance']
+    assert default['summary']['risk_of_ruin'] == small['summary']['risk_of_ruin']
+    assert default['max_drawdown_percentiles'] == small['max_drawdown_percentiles']
+    print("✅ Block size bounded by max_block_bytes, results unchanged")
+
+
+def test_bands_cover_every_block():
+    """Bands sample paths from every block, so they agree with the final balances at any block size"""
+    returns = np.random.default_rng(2).normal(0.001, 0.02, 500)
+    small_blocks = {'max_block_bytes': 400 * 32 * 7}
+    full = MonteCarloEngine(returns, small_blocks).run(3000, 400)
+    sampled = MonteCarloEngine(returns, dict(small_blocks, band_paths=1000)).run(3000, 400)
+
+    assert full['equity_bands']['paths'] == 3000 and sampled['equity_bands']['paths'] == 1000
+    assert full['equity_bands']['trade'][-1] == 400
+    for name, final in full['final_balance_percentiles'].items():
+        assert np.isclose(full['equity_bands'][name][-1], final, rtol=1e-3)
+        assert np.isclose(sampled['equity_bands'][name][-1], final, rtol=0.1)
+    print(f"✅ Bands from {sampled['equity_bands']['paths']} paths across 7-path blocks match final balances")
+
+
+def test_100k_paths_under_a_second():
+    """100k paths x 250 trades should finish in about a second"""
+    rng = np.random.default_rng(0)
+    returns = rng.normal(0.002, 0.015, 5000)
+    start = time.perf_counter()
+    MonteCarloEngine(returns).run(100000, 250)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 3.0
+    print(f"✅ 100,000 paths in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing Monte Carlo engine...")
+    test_known_outcomes()
+    test_percentile_bands_are_ordered()
+    test_blocks_bound_memory_not_results()
+    test_bands_cover_every_block()
+    test_100k_paths_under_a_second()
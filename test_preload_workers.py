@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Test preforked gunicorn workers: shared artifacts from the master, per-worker state after the fork"""
+import os
+import sys
+import time
+import json
+import socket
+import tempfile
+import subprocess
+import urllib.request
+from urllib.error import URLError, HTTPError
+from local_oanda_server import start_background_server
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _get(url):
+    try:
+        with urllib.request.urlopen(url, timeout=2) as response:
+            return response.status, json.loads(response.read())
+    except HTTPError as e:
+        return e.code, None
+    except URLError:
+        return None, None
+
+
+def _memory_kb(pid):
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        fields = dict(line.split(':', 1) for line in f if ':' in line and not line[0].isdigit())
+    return {key: int(fields[key].split()[0]) for key in ('Rss', 'Private_Dirty')}
+
+
+def test_preloaded_workers():
+    """Workers come up ready with their own session, and most of their memory stays shared with the master"""
+    server = start_background_server({'bars_per_second': 0, 'cache_dir': tempfile.mkdtemp()})
+    port = _free_port()
+    scratch = tempfile.mkdtemp()  # Workers' memory database and log, away from the working copy
+    env = dict(os.environ, OANDA_STANDIN_URL=server.url, OANDA_API_KEY='preload-test',
+               OANDA_ACCOUNT_ID='101-000-00000000-001', WEB_CONCURRENCY='2', PORT=str(port),
+               PRELOAD_APP='1', LOG_LEVEL='WARNING', METRICS_MULTIPROC_DIR=tempfile.mkdtemp(),
+               SEVENSYS_MEMORY_DB=os.path.join(scratch, 'memory.db'),
+               SEVENSYS_MEMORY_LOG=os.path.join(scratch, 'memory_logger.log'))
+    log = tempfile.TemporaryFile('w+')
+    master = subprocess.Popen([sys.executable, '-m', 'gunicorn', 'app:app'], env=env,
+                              cwd=os.path.dirname(os.path.abspath(__file__)),
+                              stdout=subprocess.DEVNULL, stderr=log)
+    try:
+        deadline, status = time.time() + 20, None
+        while time.time() < deadline and status != 200:
+            time.sleep(0.05)
+            status = _get(f'http://127.0.0.1:{port}/ready')[0]
+        assert status == 200, "no worker reported ready"
+        sessions = {_get(f'http://127.0.0.1:{port}/health')[1]['session_id'] for _ in range(10)}
+
+        workers = []
+        while time.time() < deadline and len(workers) < 2:  # gunicorn staggers worker spawns
+            workers = subprocess.run(['pgrep', '-P', str(master.pid)], capture_output=True, text=True).stdout.split()
+            time.sleep(0.05)
+        assert len(workers) == 2
+        if os.path.exists(f'/proc/{master.pid}/smaps_rollup'):
+            for pid in workers:
+                memory = _memory_kb(pid)
+                assert memory['Private_Dirty'] < memory['Rss'] / 2, memory  # The rest is shared with the master
+                print(f"   worker {pid}: RSS {memory['Rss'] / 1024:.1f} MB, "
+                      f"private {memory['Private_Dirty'] / 1024:.1f} MB")
+    finally:
+        master.terminate()
+        master.wait(timeout=10)
+        server.shutdown()
+    log.seek(0)
+    assert 'Preloaded shared artifacts' in log.read()
+    print(f"✅ Preloaded workers ready ({len(sessions)} session(s) seen)")
+
+
+if __name__ == "__main__":
+    test_preloaded_workers()
+    print("\n🎉 Preload worker tests passed")
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Test RiskManager's incremental drawdown/daily-risk state against full recomputation"""
+import random
+from datetime import datetime, timedelta
+from risk_manager import RiskManager
+from sim_clock import VirtualClock
+
+
+def _trade(rng, balance, timestamp):
+    entry = 1.1 + rng.uniform(-0.01, 0.01)
+    return {
+        'entry': entry,
+        'stop_loss': entry - rng.uniform(0.0005, 0.003),
+        'take_profit': entry + 0.005,
+        'profit': rng.uniform(-4, 6),
+        'balance': balance,
+        'timestamp': timestamp.isoformat(),
+    }
+
+
+def test_decisions_match_full_recomputation():
+    """Running peak and rolling daily risk give the same answers as re-scanning every trade"""
+    rng = random.Random(3)
+    rm = RiskManager(initial_balance=200.0)
+    all_trades = []
+    now = datetime.now()
+
+    for i in range(3000):
+        # Timestamps drift from 3 days ago to now, slightly out of order
+        stamp = now - timedelta(hours=72 * (1 - i / 3000)) + timedelta(minutes=rng.uniform(-30, 30))
+        trade = _trade(rng, rm.current_balance, stamp)
+        rm.update_trade_history(trade)
+        all_trades.append(trade)
+
+        if i % 50 == 0:
+            probe = _trade(rng, rm.current_balance, now)
+            peak = max(rm.initial_balance, max(t['balance'] for t in all_trades))
+            expected_drawdown = (peak - rm.current_balance) / peak > rm.max_drawdown
+            cutoff = datetime.now() - timedelta(days=1)
+            daily = [t for t in all_trades if datetime.fromisoformat(t['timestamp']) > cutoff]
+            expected_daily = (sum(abs(t['profit']) for t in daily) + abs(probe['entry'] - probe['stop_loss'])) > \
+                rm.current_balance * rm.max_daily_risk
+
+            assert rm._check_drawdown() == expected_drawdown
+            assert rm._check_daily_risk(probe) == expected_daily
+            assert abs(rm.daily_risk - sum(abs(t['profit']) for t in daily)) < 1e-6
+
+    assert len(rm.trade_history) <= 2 * rm.history_limit
+    print(f"✅ 3,000 trades: peak {rm.peak_balance:.2f}, {len(rm.daily_trades)} trades in the 24h window")
+
+
+def test_state_stays_bounded_over_long_histories():
+    """100k trades over ~6 simulated days: history trimmed at 2x limit, daily heap holds only the last 24h"""
+    rng = random.Random(9)
+    clock = VirtualClock(datetime(2024, 3, 4))
+    rm = RiskManager(initial_balance=200.0, clock=clock)
+    balances, recent = [], []
+    for i in range(100000):
+        trade = _trade(rng, rm.current_balance, clock.now())
+        rm.update_trade_history(trade)
+        balances.append(trade['balance'])
+        recent.append((clock.now(), abs(trade['profit'])))
+        assert len(rm.trade_history) <= 2 * rm.history_limit
+
+        if i % 5000 == 4999:
+            cutoff = clock.now() - timedelta(days=1)
+            window = [risk for stamp, risk in recent if stamp > cutoff]
+            assert len(rm.trade_history) >= rm.history_limit
+            assert len(rm.daily_trades) == len(window) and rm.daily_trades[0] == min(rm.daily_trades)
+            assert all(stamp > cutoff for stamp, _, _ in rm.daily_trades)
+            assert abs(rm.daily_risk - sum(window)) < 1e-6
+            assert rm.peak_balance == max(rm.initial_balance, max(balances))
+            recent = [(stamp, risk) for stamp, risk in recent if stamp > cutoff]
+        clock.sleep(5)
+    print(f"✅ 100,000 trades: {len(rm.trade_history)} kept in history, {len(rm.daily_trades)} in the 24h heap")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing RiskManager incremental state...")
+    test_decisions_match_full_recomputation()
+    test_state_stays_bounded_over_long_histories()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Test the SevenSYS walk-forward optimizer and its result cache"""
+import os
+import tempfile
+from candle_cache import CandleCache, generate_synthetic_candles
+from sevensys_optimizer import WalkForwardOptimizer, grid_search_space, walk_forward_windows
+
+
+def test_walk_forward_windows_roll_forward():
+    """Out-of-sample blocks follow their in-sample block and never overlap each other"""
+    windows = walk_forward_windows(10000, in_sample=4000, out_of_sample=1000)
+
+    assert len(windows) == 6
+    for window in windows:
+        assert window['in_sample'][1] == window['out_of_sample'][0]
+    assert windows[1]['out_of_sample'][0] == windows[0]['out_of_sample'][1]
+    print(f"✅ {len(windows)} walk-forward windows")
+
+
+def test_repeated_sweep_is_served_from_cache():
+    """A second sweep over the same points must not re-evaluate anything"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = CandleCache(cache_dir=tmp)
+        cache.save("SYNTH_USD", "M5", generate_synthetic_candles(n_bars=12000, seed=5))
+        config = {'in_sample_bars': 6000, 'out_of_sample_bars': 2000, 'min_trades': 1,
+                  'cache_path': os.path.join(tmp, 'optimizer_cache.json')}
+        candidates = grid_search_space({'min_signal_strength': [50.0, 60.0], 'atr_multiplier': [2.0, 3.0]})
+
+        first = WalkForwardOptimizer(cache.path_for("SYNTH_USD", "M5"), "SYNTH_USD", config=config, workers=1)
+        report = first.optimize(candidates)
+        evaluated = len(first.cache)
+
+        second = WalkForwardOptimizer(cache.path_for("SYNTH_USD", "M5"), "SYNTH_USD", config=config, workers=1)
+        second.evaluate_many = _fail_on_misses(second)
+        repeat = second.optimize(candidates)
+
+        assert len(report['windows']) == 3
+        assert repeat['out_of_sample_total_return_pct'] == report['out_of_sample_total_return_pct']
+        print(f"✅ {evaluated} evaluations cached and reused")
+
+
+def test_pool_matches_single_process():
+    """A 2-worker pool evaluates every point exactly as the in-process path does"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = CandleCache(cache_dir=tmp)
+        cache.save("SYNTH_USD", "M5", generate_synthetic_candles(n_bars=8000, seed=11))
+        candidates = grid_search_space({'min_signal_strength': [50.0, 60.0], 'atr_multiplier': [2.0, 3.0]})
+        runs = {}
+        for workers in (1, 2):
+            config = {'in_sample_bars': 4000, 'out_of_sample_bars': 2000, 'min_trades': 1,
+                      'cache_path': os.path.join(tmp, f'optimizer_cache_{workers}.json')}
+            optimizer = WalkForwardOptimizer(cache.path_for("SYNTH_USD", "M5"), "SYNTH_USD",
+                                             config=config, workers=workers)
+            report = optimizer.optimize(candidates)
+            runs[workers] = report, {key: _without_timing(summary) for key, summary in optimizer.cache.items()}
+
+        (single, single_cache), (pooled, pooled_cache) = runs[1], runs[2]
+        assert pooled_cache == single_cache
+        assert [w['params'] for w in pooled['windows']] == [w['params'] for w in single['windows']]
+        assert pooled['out_of_sample_total_return_pct'] == single['out_of_sample_total_return_pct']
+        assert pooled['out_of_sample_trades'] == single['out_of_sample_trades']
+        print(f"✅ {len(pooled_cache)} evaluations identical on 1 and 2 workers")
+
+
+def _without_timing(summary):
+    return {key: value for key, value in summary.items() if key != 'elapsed_seconds'}
+
+
+def _fail_on_misses(optimizer):
+    original = optimizer.evaluate_many
+
+    def evaluate_many(tasks):
+        keys = [optimizer._cache_key(params, bar_range) for params, bar_range in tasks]
+        assert all(key in optimizer.cache for key in keys), "cache miss on repeated sweep"
+        return original(tasks)
+    return evaluate_many
+
+
+if __name__ == "__main__":
+    print("🔍 Testing SevenSYS walk-forward optimizer...")
+    test_walk_forward_windows_roll_forward()
+    test_repeated_sweep_is_served_from_cache()
+    test_pool_matches_single_process()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Test the simulation clock: instant batch runs, throttled demo runs, identical results"""
+import random
+import logging
+from unittest.mock import patch
+from datetime import datetime, timedelta
+from sim_clock import VirtualClock, simulation_clock
+from risk_manager import RiskManager
+from market_conditions import MarketConditions
+from adaptive_test_8000_clean import TradeSimulator
+
+START = datetime(2024, 3, 4, 12, 0)  # A Monday, an hour before the London/NY overlap
+
+
+def _run(clock, trades=300):
+    random.seed(7)
+    simulator = TradeSimulator(clock=clock)
+    return simulator.simulate_trades(trades)
+
+
+def test_batch_and_demo_runs_match():
+    """The 10 s wait per trade is simulated; demo mode only adds wall-clock throttling"""
+    logging.getLogger('adaptive_test_8000_clean').setLevel(logging.WARNING)
+    batch = VirtualClock(START)
+    with patch('sim_clock.time') as wall:
+        batch_history = _run(batch)
+    assert not wall.sleep.called  # Batch mode never waits on the wall clock
+
+    demo = simulation_clock({'mode': 'demo', 'speed': 100000, 'start': START.isoformat()})
+    with patch('sim_clock.time') as wall:
+        demo_history = _run(demo)
+    waits = [c.args[0] for c in wall.sleep.call_args_list]
+
+    assert batch_history == demo_history
+    assert batch.elapsed == demo.elapsed == 3000 and batch.now() == START + timedelta(minutes=50)
+    assert len(waits) == 300 and all(w == 10 / 100000 for w in waits)
+    assert simulation_clock({'mode': 'virtual', 'speed': 1}).speed is None
+    print(f"✅ 300 trades, 50 simulated minutes: no wall-clock waits in batch, {len(waits)} scaled waits in demo")
+
+
+def test_risk_and_session_checks_follow_the_clock():
+    """Premium hours, the 24h daily-risk window and session liquidity read simulated time"""
+    clock = VirtualClock(START)
+    rm = RiskManager(initial_balance=200.0, clock=clock)
+    markets = MarketConditions(clock=clock)
+    assert not rm._is_premium_trading_time()
+    asian_depth = MarketConditions(clock=VirtualClock(datetime(2024, 3, 4, 22, 0))).calculate_market_depth()
+
+    clock.sleep(3600)
+    assert rm._is_premium_trading_time()
+    assert markets.calculate_market_depth() > asian_depth
+
+    rm.update_trade_history({'profit': -3.0, 'balance': 197.0, 'timestamp': clock.now().isoformat()})
+    assert len(rm.daily_trades) == 1 and rm.daily_risk == 3.0
+    clock.sleep(24 * 3600)
+    rm._cleanup_daily_trades()
+    assert not rm.daily_trades and rm.daily_risk == 0.0
+    print("✅ Risk manager and market sessions on simulated time")
+
+
+if __name__ == "__main__":
+    test_batch_and_demo_runs_match()
+    test_risk_and_session_checks_follow_the_clock()
+    print("\n🎉 Simulation clock tests passed")
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Test the queue-based JSON logging setup"""
+import os
+import json
+import time
+import queue
+import logging
+import tempfile
+from structured_logging import configure_logging, SamplingFilter, _NonBlockingQueueHandler
+
+
+def _wait_for_lines(path, n, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if os.path.exists(path):
+            with open(path) as f:
+                lines = f.read().splitlines()
+            if len(lines) >= n:
+                return lines
+        time.sleep(0.01)
+    raise AssertionError(f"Expected {n} lines in {path}")
+
+
+def test_configured_once_with_json_lines():
+    """Repeated setup keeps one queue handler; records land as one-line JSON via the listener"""
+    path = os.path.join(tempfile.mkdtemp(), 'component.log')
+    configure_logging()
+    configure_logging(files={'component': path}, module_levels={'component.noisy': 'WARNING'})
+    configure_logging(files={'component': path})
+    queue_handlers = [h for h in logging.getLogger().handlers if isinstance(h, _NonBlockingQueueHandler)]
+    assert len(queue_handlers) == 1
+
+    logger = logging.getLogger('component')
+    logger.info("order %s filled", 42, extra={'account_id': '101-001'})
+    logging.getLogger('component.noisy').info("suppressed by its level")
+    logging.getLogger('elsewhere').warning("not routed to the component file")
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("failed")
+
+    records = [json.loads(line) for line in _wait_for_lines(path, 2)]
+    assert records[0]['msg'] == 'order 42 filled' and records[0]['account_id'] == '101-001'
+    assert records[0]['logger'] == 'component' and records[0]['level'] == 'INFO'
+    assert records[1]['msg'] == 'failed' and 'ValueError: boom' in records[1]['exc']
+    assert len(records) == 2
+    print("✅ One-line JSON records written off-thread")
+
+
+class _NeverBlockQueue(queue.Queue):
+    """Fails the test if anything waits on the queue instead of dropping"""
+
+    def put(self, item, block=True, timeout=None):
+        assert not block, "log handler blocked on a full queue"
+        return super().put(item, block, timeout)
+
+
+def test_sampling_and_backpressure():
+    """Debug lines are sampled per module and a full queue drops instead of blocking"""
+    sampler = SamplingFilter({'oanda_client': 10})
+    make = lambda name, level: logging.LogRecord(name, level, '', 0, 'price', (), None)
+    kept = sum(sampler.filter(make('oanda_client', logging.DEBUG)) for _ in range(100))
+    assert kept == 10
+    assert sampler.filter(make('oanda_client', logging.WARNING))
+    assert sampler.filter(make('app', logging.DEBUG))
+
+    handler = _NonBlockingQueueHandler(_NeverBlockQueue(5))
+    dropped = _NonBlockingQueueHandler.dropped
+    for _ in range(50):
+        handler.handle(make('app', logging.INFO))
+    assert _NonBlockingQueueHandler.dropped - dropped == 45
+    print("✅ Sampling and non-blocking enqueue")
+
+
+if __name__ == "__main__":
+    test_configured_once_with_json_lines()
+    test_sampling_and_backpressure()
+    print("\n🎉 Structured logging tests passed")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Test the vectorized trade dataset: seeded chunked output, the row-wise outcome model, training consumers"""
+import os
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from trade_dataset import write_dataset, load_dataset, dataset_to_dataframe, export_csv, PAIRS, TRENDS
+from generate_training_data import TradeDataGenerator
+from model_trainer import ModelTrainer
+import learner
+
+START = datetime(2024, 1, 1)
+
+
+def test_seeded_chunks_match_row_model():
+    """Same seed, same file; every record agrees with TradeDataGenerator.simulate_trade_outcome"""
+    directory = tempfile.mkdtemp()
+    start = time.perf_counter()
+    first = write_dataset(200000, os.path.join(directory, 'a.npy'), {'seed': 7, 'chunk_size': 30000}, start=START)
+    seconds = time.perf_counter() - start
+    second = write_dataset(200000, os.path.join(directory, 'b.npy'), {'seed': 7, 'chunk_size': 30000}, start=START)
+    with open(first, 'rb') as a, open(second, 'rb') as b:
+        assert a.read() == b.read()
+
+    records = load_dataset(first)
+    assert isinstance(records, np.memmap) and len(records) == 200000
+    assert np.array_equal(records['hour_of_day'], records['timestamp'].astype('M8[h]').astype(np.int64) % 24)
+    buy = records['direction'] == 1
+    assert (records['stop_loss'][buy] < records['entry'][buy]).all()
+    assert (records['take_profit'][~buy] < records['entry'][~buy]).all()
+    jpy = records['pair'] == PAIRS.index('USD_JPY')
+    assert np.abs(records['entry'] - records['stop_loss'])[jpy].min() >= 0.1 - 1e-9
+
+    generator = TradeDataGenerator()
+    for record in records[:500]:
+        action = 'buy' if record['direction'] == 1 else 'sell'
+        setup = {'action': action, 'entry': record['entry'],
+                 'stop_loss': record['stop_loss'], 'take_profit': record['take_profit']}
+        conditions = {'trend': TRENDS[record['trend']], 'volatility': float(record['volatility']),
+                      'volume_analysis': float(record['volume']), 'indicators': {'rsi_14': float(record['rsi'])}}
+        expected = generator.simulate_trade_outcome(setup, conditions)['success_probability']
+        assert abs(expected - record['success_probability']) < 1e-5
+    win_rate = records['profitable'].mean()
+    assert abs(win_rate - records['success_probability'].mean()) < 0.01
+    print(f"✅ 200,000 trades in {seconds*1000:.0f}ms, win rate {win_rate*100:.1f}%")
+
+
+def test_csv_and_training_consumers():
+    """CSV keeps the historical_trades.csv layout; ModelTrainer and learner train straight from the records"""
+    directory = tempfile.mkdtemp()
+    path = write_dataset(5000, os.path.join(directory, 'trades.npy'), {'seed': 3}, start=START)
+    records = load_dataset(path)
+
+    csv_path = export_csv(records, os.path.join(directory, 'trades.csv'), chunk_size=2000)
+    exported = pd.read_csv(csv_path)
+    assert list(exported.columns) == TradeDataGenerator().columns and len(exported) == 5000
+    assert set(exported['pair']) <= set(PAIRS)
+    assert dataset_to_dataframe(records)['trend'].cat.categories.tolist() == list(TRENDS)
+
+    X_train, X_test, y_train, y_test = ModelTrainer().prepare_data(records)
+    assert X_train.shape == (4000, 13) and len(y_test) == 1000
+
+    cwd = os.getcwd()
+    os.chdir(directory)  # learner writes ai_model.pkl to the working directory
+    try:
+        assert learner.train_ai(path).startswith("Model trained")
+    finally:
+        os.chdir(cwd)
+    print("✅ CSV export, ModelTrainer.prepare_data and learner.train_ai")
+
+
+if __name__ == "__main__":
+    test_seeded_chunks_match_row_model()
+    test_csv_and_training_consumers()
+    print("\n🎉 Trade dataset tests passed")
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Test batch trade reconciliation against the local OANDA v20 stand-in"""
+import os
+import tempfile
+from contextlib import contextmanager
+from unittest.mock import patch
+from local_oanda_server import start_background_server
+from trade_reconciler import TradeReconciler
+
+ACCOUNT_ID = "101-000-00000000-001"
+
+
+@contextmanager
+def _standin():
+    server = start_background_server({'bars_per_second': 0, 'cache_dir': tempfile.mkdtemp()})
+    try:
+        with patch.dict(os.environ, {'OANDA_STANDIN_URL': server.url, 'OANDA_API_KEY': 'standin-test',
+                                    'OANDA_ACCOUNT_ID': ACCOUNT_ID}):
+            from oanda_client import OandaClient
+            yield server, OandaClient()
+    finally:
+        server.shutdown()
+
+
+def _open(broker, units, distance=None, instrument='EUR_USD'):
+    order = {'type': 'MARKET', 'instrument': instrument, 'units': str(units)}
+    if distance:
+        order['stopLossOnFill'] = {'distance': distance}
+        order['takeProfitOnFill'] = {'distance': distance}
+    status, body = broker.create_order(ACCOUNT_ID, order)
+    assert status == 201
+    return body['orderFillTransaction']['tradeOpened']['tradeID']
+
+
+def test_one_call_per_sync_regardless_of_positions():
+    """Closes of any number of trades cost one AccountChanges call and carry realized P&L"""
+    with _standin() as (server, client):
+        broker = server.app.config['BROKER']
+        reconciler = TradeReconciler(client)
+        reconciler.sync()
+        for n in (3, 30):
+            ids = [_open(broker, 1000 + i) for i in range(n)]
+            calls = reconciler.stats['api_calls']
+            assert reconciler.sync() == []
+            assert set(ids) <= set(reconciler.trades)
+
+            broker.feed.advance(5)
+            for trade_id in ids:
+                broker.close_trade(ACCOUNT_ID, trade_id)
+            events = reconciler.sync()
+            assert reconciler.stats['api_calls'] - calls == 2
+            assert sorted(e['trade_id'] for e in events) == sorted(ids)
+            balance_change = sum(e['realized_pl'] for e in events)
+            assert abs(balance_change - sum(float(t['realizedPL']) for t in broker.accounts[ACCOUNT_ID]['transactions']
+                                             if t['type'] == 'ORDER_FILL' for t in t.get('tradesClosed', [])
+                                             if t['tradeID'] in ids)) < 1e-6
+            assert not reconciler.trades
+        print(f"✅ 3 and 30 trades closed, 2 syncs each, {reconciler.stats['transactions']} transactions applied")
+
+
+def test_partial_close_and_stop_loss_reason():
+    """Reductions accumulate into the final P&L; broker-side stop fills report their reason"""
+    with _standin() as (server, client):
+        broker = server.app.config['BROKER']
+        reconciler = TradeReconciler(client)
+        seen = []
+        reconciler.on_close(seen.append)
+        reconciler.sync()
+
+        partial = _open(broker, 2000)
+        stopped = _open(broker, -1000, distance='0.00030', instrument='GBP_USD')
+        reconciler.sync()
+        broker.feed.advance(3)
+        broker.close_trade(ACCOUNT_ID, partial, units='500')
+        reconciler.sync()
+        assert reconciler.trades[partial]['units'] == 1500
+
+        for _ in range(200):
+            broker.feed.advance(1)
+            if stopped not in {t['id'] for t in broker.open_trades(ACCOUNT_ID)}:
+                break
+        broker.close_trade(ACCOUNT_ID, partial)
+        reconciler.sync()
+        events = {e['trade_id']: e for e in seen}
+
+        assert events[stopped]['reason'] in ('STOP_LOSS_ORDER', 'TAKE_PROFIT_ORDER')
+        realized = sum(float(c['realizedPL']) for t in broker.accounts[ACCOUNT_ID]['transactions']
+                       if t['type'] == 'ORDER_FILL'
+                       for c in t.get('tradesClosed', []) + ([t['tradeReduced']] if t.get('tradeReduced') else [])
+                       if c['tradeID'] == partial)
+        assert abs(events[partial]['realized_pl'] - realized) < 1e-6
+        assert len(seen) == 2
+        print(f"✅ Partial close P&L {events[partial]['realized_pl']:.2f}, stop trade closed by {events[stopped]['reason']}")
+
+
+def test_open_and_close_within_one_window():
+    """A trade opened and closed between syncs is listed in tradesOpened too, and still closes once"""
+    with _standin() as (server, client):
+        broker = server.app.config['BROKER']
+        reconciler = TradeReconciler(client)
+        seen = []
+        reconciler.on_close(seen.append)
+        reconciler.sync()
+        kept = _open(broker, 1000)
+        flipped = _open(broker, 2000, instrument='GBP_USD')
+        broker.feed.advance(3)
+        broker.close_trade(ACCOUNT_ID, flipped)
+
+        changes = client.get_account_changes(reconciler.last_transaction_id)['changes']
+        assert flipped in {t['id'] for t in changes['tradesOpened']} & {t['id'] for t in changes['tradesClosed']}
+        events = reconciler.sync()
+        assert [e['trade_id'] for e in seen] == [e['trade_id'] for e in events] == [flipped]
+        assert events[0]['reason'] != 'RECONCILED' and events[0]['units'] == 2000
+        assert set(reconciler.trades) == {kept}
+        assert reconciler.sync() == [] and len(seen) == 1
+        print("✅ Trade opened and closed in one window closed once")
+
+
+class _IdleScheduler:
+    def run(self):
+        pass
+
+    def start_ticks(self):
+        pass
+
+    def notify_positions_changed(self):
+        pass
+
+
+def test_trade_closed_before_first_tick_after_start():
+    """start_trading baselines the reconciler, so a trade that opens and closes before any tick still closes"""
+    with _standin() as (server, client):
+        broker = server.app.config['BROKER']
+        from autonomous_trading_engine import AutonomousTradingEngine
+        engine = AutonomousTradingEngine.__new__(AutonomousTradingEngine)  # Without its analyzer and market data
+        engine.oanda_client = client
+        engine.reconciler = TradeReconciler(client)
+        engine.scheduler = _IdleScheduler()
+        engine.active_trades = {}
+        engine.daily_stats = {'trades_count': 0, 'profit_loss': 0.0, 'wins': 0, 'losses': 0}
+        engine._system_health_check = lambda: True
+        assert engine.start_trading()
+
+        trade_id = _open(broker, 1000, distance='0.00030')
+        engine.active_trades[trade_id] = {'pair': 'EUR_USD', 'status': 'open'}
+        for _ in range(200):
+            broker.feed.advance(1)
+            if not broker.open_trades(ACCOUNT_ID):
+                break
+        assert not broker.open_trades(ACCOUNT_ID)
+
+        engine._update_active_trades()  # The first sync after start
+        assert not engine.active_trades
+        assert engine.daily_stats['wins'] + engine.daily_stats['losses'] == 1
+        assert engine.daily_stats['profit_loss'] != 0.0
+        print(f"✅ Trade closed before the first tick recorded ({engine.daily_stats['profit_loss']:+.2f})")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing trade reconciler...")
+    test_one_call_per_sync_regardless_of_positions()
+    test_partial_close_and_stop_loss_reason()
+    test_open_and_close_within_one_window()
+    test_trade_closed_before_first_tick_after_start()
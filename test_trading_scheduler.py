@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Test candle-close alignment and event dispatch in the trading scheduler"""
+from datetime import datetime, timezone
+from trading_scheduler import TradingScheduler, is_market_open, next_candle_close
+
+
+def _ts(*args):
+    return datetime(*args, tzinfo=timezone.utc).timestamp()
+
+
+class FakeClock:
+    def __init__(self, start):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+
+def test_candle_close_alignment():
+    """Minute bars align to UTC, H4 bars to 17:00 New York, and the weekend is skipped"""
+    assert next_candle_close('M5', _ts(2024, 3, 5, 10, 3, 20)) == _ts(2024, 3, 5, 10, 5)
+    assert next_candle_close('M15', _ts(2024, 3, 5, 10, 15)) == _ts(2024, 3, 5, 10, 30)
+    # 17:00 New York is 22:00 UTC in winter (EST), so H4 closes at 02:00, 06:00, ... UTC
+    assert next_candle_close('H4', _ts(2024, 1, 9, 3, 0)) == _ts(2024, 1, 9, 6, 0)
+    assert next_candle_close('D', _ts(2024, 7, 9, 3, 0)) == _ts(2024, 7, 9, 21, 0)  # EDT
+
+    assert is_market_open(_ts(2024, 3, 8, 20, 0))        # Friday 15:00 New York
+    assert not is_market_open(_ts(2024, 3, 9, 12, 0))    # Saturday
+    scheduler = TradingScheduler(config={'close_delay': 0})
+    friday_close = _ts(2024, 3, 8, 21, 55)               # Friday 16:55 New York
+    assert scheduler._next_close('M5', friday_close) == _ts(2024, 3, 8, 22, 0)
+    assert scheduler._next_close('M5', _ts(2024, 3, 8, 22, 0)) == _ts(2024, 3, 10, 21, 5)  # Sunday 17:05 EDT
+    print("✅ Candle closes align to OANDA boundaries and skip the weekend")
+
+
+def test_jobs_fire_once_per_close():
+    """One wakeup per bar for a group of instruments, interval jobs in between"""
+    clock = FakeClock(_ts(2024, 3, 5, 10, 0, 30))
+    scheduler = TradingScheduler(config={'close_delay': 2.0}, clock=clock)
+    closes, news = [], []
+    scheduler.on_candle_close(['EUR_USD', 'GBP_USD'], 'M5', lambda i, g, t: closes.append((tuple(i), t)))
+    scheduler.every(120, lambda: news.append(clock.now))
+
+    for _ in range(20 * 60):  # 20 minutes in one-second steps
+        clock.now += 1
+        scheduler.run_pending()
+
+    assert [t.minute for _, t in closes] == [5, 10, 15, 20]
+    assert all(i == ('EUR_USD', 'GBP_USD') for i, _ in closes)
+    assert len(news) == 10
+    assert scheduler.stats['wakeups'] == 14
+    print(f"✅ {len(closes)} candle-close wakeups and {len(news)} interval jobs over 20 minutes")
+
+
+def test_ticks_coalesce_for_open_instruments():
+    """Ticks run on the timer thread, only for held instruments, newest price only"""
+    clock = FakeClock(_ts(2024, 3, 5, 10, 0))
+    scheduler = TradingScheduler(clock=clock)
+    held, seen = {'EUR_USD'}, []
+    scheduler.on_tick(lambda: held, lambda inst, price: seen.append((inst, price['bid'])))
+
+    for bid in (1.1, 1.2, 1.3):
+        scheduler._dispatch_tick('EUR_USD', {'bid': bid, 'ask': bid + 0.0001, 'time': ''})
+    scheduler._dispatch_tick('USD_JPY', {'bid': 150.0, 'ask': 150.01, 'time': ''})
+    assert scheduler._open_instruments() == ['EUR_USD']
+    scheduler.run_pending()
+
+    assert seen == [('EUR_USD', 1.3)]
+    assert scheduler.stats['ticks'] == 4
+    print("✅ Ticks coalesced to the latest price for open instruments")
+
+
+def test_cycle_minutes_map_to_published_candles():
+    """Cycle lengths map to the OANDA candle that closes that often; others fail before the scheduler starts"""
+    from fully_automated_sevensys import FullyAutomatedSevenSYS, cycle_granularity
+    assert [cycle_granularity(m) for m in (1, 15, 30, 60, 240, 1440)] == ['M1', 'M15', 'M30', 'H1', 'H4', 'D']
+    for minutes in (20, 45, 90, 300):
+        try:
+            cycle_granularity(minutes)
+            assert False, f"{minutes} minutes should be rejected"
+        except ValueError as e:
+            assert str(minutes) in str(e)
+
+    trader = FullyAutomatedSevenSYS.__new__(FullyAutomatedSevenSYS)  # No OANDA client or memory database
+    for kwargs in ({'cycle_minutes': 90}, {'granularity': 'H5'}):
+        try:
+            trader.start_automated_trading(['EUR_USD'], **kwargs)
+            assert False, f"{kwargs} should be rejected"
+        except ValueError:
+            pass
+        assert not hasattr(trader, 'scheduler') and not getattr(trader, 'is_running', False)
+    print("✅ Cycle lengths mapped to OANDA granularities, unsupported ones rejected up front")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing trading scheduler...")
+    test_candle_close_alignment()
+    test_jobs_fire_once_per_close()
+    test_ticks_coalesce_for_open_instruments()
+    test_cycle_minutes_map_to_published_candles()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Test the opt-in training profiler: phase timers, collapsed stacks and per-session files"""
+import os
+import json
+import time
+import pstats
+import tempfile
+from training_profiler import TrainingProfiler
+
+
+class _Trainer:
+    def fetch(self):
+        time.sleep(0.02)
+
+    def features(self):
+        time.sleep(0.01)
+
+    def predict(self):
+        self.features()  # Nested phase: its time is not counted again as prediction self time
+        time.sleep(0.03)
+
+    def run_session(self):
+        for _ in range(3):
+            self.fetch()
+            self.predict()
+
+
+def _instrumented(profiler):
+    trainer = _Trainer()
+    profiler.instrument(trainer, {'fetch': 'data_fetch', 'features': 'feature_generation', 'predict': 'prediction'})
+    return trainer
+
+
+def test_phases_and_collapsed_stacks():
+    """Self time excludes nested phases, and each session writes collapsed stacks and phase timers"""
+    profiler = TrainingProfiler('unit', {'mode': 'sampling', 'interval_ms': 2, 'output_dir': tempfile.mkdtemp()})
+    trainer = _instrumented(profiler)
+    for n in range(2):
+        with profiler.session(f"session_{n}"):
+            trainer.run_session()
+    directory = profiler.close()
+
+    phases = profiler.summary()['phases']
+    assert phases['prediction']['calls'] == 6 and phases['feature_generation']['calls'] == 6
+    assert phases['prediction']['total'] >= phases['prediction']['self'] + phases['feature_generation']['self'] * 0.9
+    assert 0.15 < phases['prediction']['self'] < 0.4
+    assert 0.1 < phases['data_fetch']['self'] < 0.3
+
+    files = set(os.listdir(directory))
+    assert {'session_0.collapsed', 'session_1.collapsed', 'session_0.phases.json', 'all.collapsed',
+            'summary.json'} <= files
+    with open(os.path.join(directory, 'all.collapsed')) as f:
+        lines = f.read().splitlines()
+    stack, count = lines[0].rsplit(' ', 1)
+    assert int(count) > 0 and ';' in stack
+    assert any('test_training_profiler.py:predict' in line for line in lines)
+    with open(os.path.join(directory, 'session_1.phases.json')) as f:
+        assert json.load(f)['phases']['data_fetch']['calls'] == 3
+    print(f"✅ Phases and collapsed stacks ({len(lines)} distinct stacks)")
+
+
+def test_cprofile_sessions_and_disabled_mode():
+    """cprofile mode adds a loadable .prof per session; with profiling off methods stay unwrapped"""
+    profiler = TrainingProfiler('unit', {'mode': 'cprofile', 'interval_ms': 5, 'output_dir': tempfile.mkdtemp()})
+    trainer = _instrumented(profiler)
+    with profiler.session('session_0'):
+        trainer.run_session()
+    directory = profiler.close()
+    stats = pstats.Stats(os.path.join(directory, 'session_0.prof'))
+    assert any(name == 'predict' for (_, _, name) in stats.stats)
+
+    disabled = TrainingProfiler('unit', {'mode': ''})
+    plain = _instrumented(disabled)
+    assert 'fetch' not in vars(plain)  # Still the class method, no wrapper
+    with disabled.session('session_0'):
+        plain.run_session()
+    assert disabled.close() is None and not disabled.phases
+    print("✅ cProfile sessions and disabled mode")
+
+
+if __name__ == "__main__":
+    test_phases_and_collapsed_stacks()
+    test_cprofile_sessions_and_disabled_mode()
+    print("\n🎉 Training profiler tests passed")
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""Test the webhook replay harness against app.app with the stand-in broker"""
+import os
+from webhook_replay import StubOandaClient, WebhookReplayer, schedule_offsets, synthetic_alerts
+
+
+def test_schedule_offsets():
+    """Recorded gaps are kept at 1x, compressed at N x and dropped at max speed"""
+    alerts = [{'timestamp': t, 'payload': {}} for t in (100.0, 110.0, 130.0)]
+
+    assert schedule_offsets(alerts, 1) == [0.0, 10.0, 30.0]
+    assert schedule_offsets(alerts, 10) == [0.0, 1.0, 3.0]
+    assert schedule_offsets(alerts, 'max') == [0.0, 0.0, 0.0]
+    print("✅ Replay schedule honours speed factor")
+
+
+def test_replay_reports_latency_and_errors():
+    """Replay through the Flask test client; injected broker failures surface as 500s"""
+    environ = dict(os.environ)
+    healthy = WebhookReplayer({'concurrency': 4}, broker=StubOandaClient(latency_ms=0))
+    report = healthy.replay(synthetic_alerts(40))
+    assert report['requests'] == 40
+    assert report['error_rate'] == 0.0
+    assert report['latency_ms']['p50'] <= report['latency_ms']['p99']
+    assert report['broker_calls'] == 40 * 5
+
+    failing = WebhookReplayer({'concurrency': 4}, broker=StubOandaClient(latency_ms=0, failure_rate=1.0))
+    report = failing.replay(synthetic_alerts(10))
+    assert report['error_rate'] == 100.0
+    assert dict(os.environ) == environ  # Import overrides (PRELOAD_APP, placeholder credentials) are undone
+    print(f"✅ Replay report: p50 {report['latency_ms']['p50']:.1f}ms, errors surfaced")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing webhook replay harness...")
+    test_schedule_offsets()
+    test_replay_reports_latency_and_errors()
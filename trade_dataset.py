@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Synthetic Trade Dataset
+Array-based version of generate_training_data.TradeDataGenerator: draws whole chunks of
+trades at once from a seeded NumPy generator with the same distributions and outcome model,
+and writes them to a single .npy file of TRADE_DTYPE records that can be memory-mapped for
+training. CSV export (the historical_trades.csv layout) is optional.
+
+    python trade_dataset.py 5000000
+    python trade_dataset.py 8000 --output data/test_trades_8000.npy --csv data/test_trades_8000.csv
+"""
+
+import os
+import logging
+import argparse
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DATASET_CONFIG = {
+    'seed': 42,
+    'chunk_size': 1_000_000,
+    'output_path': 'data/historical_trades.npy',
+    'days': 365,
+}
+
+PAIRS = ('EUR_USD', 'GBP_USD', 'USD_JPY', 'AUD_USD', 'USD_CAD')
+TRENDS = ('uptrend', 'downtrend', 'sideways')  # Category order matches ModelTrainer's trend_* feature names
+ACTIONS = ('sell', 'buy')                      # Indexed by (direction + 1) // 2
+UNIT_SIZES = np.array([1000, 2000, 5000, 10000], dtype=np.int32)
+
+# One record per trade; pair and trend are indexes into PAIRS and TRENDS, direction is +1 buy / -1 sell
+TRADE_DTYPE = np.dtype([
+    ('timestamp', 'M8[s]'),
+    ('pair', 'u1'), ('trend', 'u1'), ('direction', 'i1'), ('hour_of_day', 'u1'),
+    ('volatility', 'f4'), ('volume', 'f4'), ('rsi', 'f4'), ('macd_diff', 'f4'),
+    ('price_to_sma20', 'f4'), ('price_to_sma50', 'f4'), ('atr', 'f4'), ('cci', 'f4'),
+    ('risk_reward_ratio', 'f4'), ('confidence', 'f4'), ('units', 'i4'),
+    ('entry', 'f8'), ('stop_loss', 'f8'), ('take_profit', 'f8'), ('profit', 'f8'),
+    ('profitable', '?'), ('success_probability', 'f4'),
+])
+
+# The layout generate_historical_trades writes to data/historical_trades.csv
+CSV_COLUMNS = [
+    'timestamp', 'pair', 'trend', 'volatility', 'volume',
+    'rsi', 'macd_diff', 'price_to_sma20', 'price_to_sma50',
+    'atr', 'cci', 'risk_reward_ratio', 'hour_of_day',
+    'profit', 'profitable', 'success_probability'
+]
+
+
+def generate_trades(n: int, rng: np.random.Generator, start: datetime) -> np.ndarray:
+    """
+    n trades in one vectorized pass, following TradeDataGenerator's market conditions,
+    trade setup and outcome model
+    """
+    out = np.zeros(n, dtype=TRADE_DTYPE)
+    pair = rng.integers(0, len(PAIRS), n)
+    out['pair'] = pair
+    out['timestamp'] = np.datetime64(start, 's') + rng.integers(0, 525601, n) * np.timedelta64(60, 's')
+    out['hour_of_day'] = (out['timestamp'].astype(np.int64) // 3600) % 24
+
+    # Market conditions
+    trend = rng.integers(0, len(TRENDS), n)
+    volatility = rng.uniform(0.1, 0.9, n)
+    volume = rng.uniform(0.2, 1.0, n)
+    rsi = rng.uniform(20, 80, n)
+    entry = rng.uniform(1.0500, 1.1500, n)
+    out['trend'] = trend
+    out['volatility'] = volatility
+    out['volume'] = volume
+    out['rsi'] = rsi
+    out['macd_diff'] = rng.uniform(-0.002, 0.002, n) - rng.uniform(-0.002, 0.002, n)
+    out['price_to_sma20'] = entry / rng.uniform(1.0500, 1.1500, n)
+    out['price_to_sma50'] = entry / rng.uniform(1.0400, 1.1600, n)
+    out['atr'] = rng.uniform(0.0005, 0.0020, n)
+    out['cci'] = rng.uniform(-200, 200, n)
+
+    # Trade setup
+    buy = rng.integers(0, 2, n).astype(bool)
+    direction = np.where(buy, 1, -1)
+    jpy = np.array(['JPY' in p for p in PAIRS])[pair]
+    stop_distance = rng.uniform(10, 30, n) * np.where(jpy, 0.01, 0.0001)
+    profit_distance = stop_distance * rng.uniform(1.5, 2.5, n)
+    out['direction'] = direction
+    out['entry'] = entry
+    out['stop_loss'] = entry - direction * stop_distance
+    out['take_profit'] = entry + direction * profit_distance
+    out['units'] = UNIT_SIZES[rng.integers(0, len(UNIT_SIZES), n)]
+    out['confidence'] = rng.uniform(0.6, 0.95, n)
+    out['risk_reward_ratio'] = profit_distance / stop_distance
+
+    # Outcome: same weights as TradeDataGenerator.simulate_trade_outcome
+    sell = ~buy
+    trend_alignment = np.where((buy & (trend == 0)) | (sell & (trend == 1)), 0.7, 0.3)
+    volatility_fit = np.where((volatility >= 0.3) & (volatility <= 0.7), 0.6, 0.4)
+    indicator_signals = np.where((buy & (rsi < 40)) | (sell & (rsi > 60)), 0.8, 0.3)
+    success_prob = 0.3 * trend_alignment + 0.2 * volatility_fit + 0.3 * indicator_signals + 0.2 * volume
+    profitable = rng.random(n) < success_prob
+    out['success_probability'] = success_prob
+    out['profitable'] = profitable
+    out['profit'] = np.where(profitable, profit_distance, -stop_distance)
+    return out
+
+
+def write_dataset(num_trades: int, path: Optional[str] = None, config: Optional[Dict] = None,
+                  start: Optional[datetime] = None) -> str:
+    """
+    Generate num_trades trades chunk by chunk straight into a memory-mapped .npy file
+
+    Returns:
+        The dataset path
+    """
+    config = dict(DATASET_CONFIG, **(config or {}))
+    path = path or config['output_path']
+    start = start or datetime.now() - timedelta(days=config['days'])
+    rng = np.random.default_rng(config['seed'])
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    tmp_path = path + ".tmp.npy"
+    records = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=TRADE_DTYPE, shape=(num_trades,))
+    for offset in range(0, num_trades, config['chunk_size']):
+        stop = min(offset + config['chunk_size'], num_trades)
+        records[offset:stop] = generate_trades(stop - offset, rng, start)
+        logger.info(f"Generated {stop:,}/{num_trades:,} trades")
+    records.flush()
+    del records
+    os.replace(tmp_path, path)
+    logger.info(f"Wrote {num_trades:,} trades -> {path}")
+    return path
+
+
+def load_dataset(path: str = DATASET_CONFIG['output_path'], mmap: bool = True) -> np.ndarray:
+    """TRADE_DTYPE records, memory-mapped read-only by default"""
+    return np.load(path, mmap_mode='r' if mmap else None)
+
+
+def dataset_to_dataframe(records: np.ndarray) -> pd.DataFrame:
+    """
+    Records as a DataFrame with the historical_trades.csv columns plus the trade setup
+    (action, entry, stop_loss, take_profit, units, confidence); pair, trend and action are categoricals
+    """
+    df = pd.DataFrame({name: np.asarray(records[name]) for name in TRADE_DTYPE.names})
+    df['pair'] = pd.Categorical.from_codes(df['pair'], categories=PAIRS)
+    df['trend'] = pd.Categorical.from_codes(df['trend'], categories=TRENDS)
+    df['action'] = pd.Categorical.from_codes((df.pop('direction') + 1) // 2, categories=ACTIONS)
+    return df
+
+
+def export_csv(records: np.ndarray, path: str, chunk_size: int = DATASET_CONFIG['chunk_size']) -> str:
+    """Append records to a CSV in the historical_trades.csv layout, one chunk at a time"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    for offset in range(0, max(len(records), 1), chunk_size):
+        chunk = dataset_to_dataframe(records[offset:offset + chunk_size])[CSV_COLUMNS]
+        chunk.to_csv(path, mode='w' if offset == 0 else 'a', header=offset == 0, index=False)
+    logger.info(f"Exported {len(records):,} trades -> {path}")
+    return path
+
+
+def main():
+    """Generate a dataset: python trade_dataset.py 5000000 [--seed 42] [--output ...] [--csv ...]"""
+    parser = argparse.ArgumentParser(description="Generate a synthetic trade dataset")
+    parser.add_argument('trades', type=int, nargs='?', default=8000)
+    parser.add_argument('--seed', type=int, default=DATASET_CONFIG['seed'])
+    parser.add_argument('--chunk-size', type=int, default=DATASET_CONFIG['chunk_size'])
+    parser.add_argument('--output', default=DATASET_CONFIG['output_path'])
+    parser.add_argument('--csv', help="Also export the historical_trades.csv layout to this path")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    path = write_dataset(args.trades, args.output, {'seed': args.seed, 'chunk_size': args.chunk_size})
+    records = load_dataset(path)
+    if args.csv:
+        export_csv(records, args.csv, args.chunk_size)
+    print(f"✅ {len(records):,} trades ({os.path.getsize(path) / 1e6:.1f} MB) at {path}, "
+          f"win rate {records['profitable'].mean() * 100:.2f}%")
+
+
+if __name__ == "__main__":
+    main()
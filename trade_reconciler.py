@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Trade Reconciler
+Keeps a local copy of the account's open trades in step with OANDA using one AccountChanges
+request per sync (open trades are fetched once to bootstrap), and emits a close event with
+realized P&L for every trade that closed since the last seen transaction. API calls per
+sync are constant no matter how many positions are open.
+"""
+
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TradeReconciler:
+    """
+    Local open-trade state driven by the OANDA transaction log
+
+    trades: trade_id -> {'instrument', 'units', 'price', 'open_time', 'realized_pl'}
+    Close events: {'trade_id', 'instrument', 'units', 'open_price', 'close_price',
+                   'realized_pl', 'reason', 'time', 'transaction_id'}
+    """
+
+    def __init__(self, oanda, on_close: Optional[Callable[[Dict], None]] = None):
+        self.oanda = oanda
+        self.trades = {}
+        self.last_transaction_id = None
+        self._callbacks = [on_close] if on_close else []
+        self._lock = threading.Lock()
+        self.stats = {'syncs': 0, 'api_calls': 0, 'transactions': 0, 'closes': 0}
+
+    def on_close(self, callback: Callable[[Dict], None]):
+        """Register callback(event) for every closed trade"""
+        self._callbacks.append(callback)
+
+    def open_instruments(self) -> set:
+        with self._lock:
+            return {t['instrument'] for t in self.trades.values()}
+
+    def sync(self) -> List[Dict]:
+        """Pull everything since the last seen transaction and return the close events"""
+        with self._lock:
+            self.stats['syncs'] += 1
+            if self.last_transaction_id is None:
+                self._bootstrap()
+                return []
+
+            response = self.oanda.get_account_changes(self.last_transaction_id)
+            self.stats['api_calls'] += 1
+            changes = response.get('changes', {})
+            events = self.apply_transactions(changes.get('transactions', []))
+
+            # Trades the transaction window did not explain (e.g. opened elsewhere) are taken from the diff.
+            # A trade opened and closed inside the window is listed in both and was already closed above
+            closed_ids = {t['id'] for t in changes.get('tradesClosed', [])} | {e['trade_id'] for e in events}
+            for trade in changes.get('tradesOpened', []):
+                if trade['id'] not in closed_ids:
+                    self.trades.setdefault(trade['id'], self._from_trade(trade))
+            for trade in changes.get('tradesClosed', []):
+                if trade['id'] in self.trades:
+                    events.append(self._close_event(trade['id'], {
+                        'price': trade.get('averageClosePrice'), 'realizedPL': trade.get('realizedPL', 0),
+                    }, reason='RECONCILED', txn={'id': response.get('lastTransactionID'),
+                                                 'time': trade.get('closeTime')}, total=True))
+            self.last_transaction_id = response.get('lastTransactionID', self.last_transaction_id)
+
+        for event in events:
+            for callback in self._callbacks:
+                try:
+                    callback(event)
+                except Exception as e:
+                    logger.error(f"Close handler failed for trade {event['trade_id']}: {e}")
+        return events
+
+    def _bootstrap(self):
+        response = self.oanda.get_open_trades()
+        self.stats['api_calls'] += 1
+        self.trades = {t['id']: self._from_trade(t) for t in response.get('trades', [])}
+        self.last_transaction_id = response.get('lastTransactionID')
+        logger.info(f"Reconciler tracking {len(self.trades)} open trades from transaction "
+                    f"{self.last_transaction_id}")
+
+    @staticmethod
+    def _from_trade(trade: Dict) -> Dict:
+        return {
+            'instrument': trade['instrument'],
+            'units': float(trade.get('currentUnits', trade.get('initialUnits', 0))),
+            'price': float(trade['price']),
+            'open_time': trade.get('openTime'),
+            'realized_pl': float(trade.get('realizedPL', 0)),
+        }
+
+    def apply_transactions(self, transactions: List[Dict]) -> List[Dict]:
+        """Apply ORDER_FILL transactions in ID order to local state; returns close events"""
+        events = []
+        for txn in sorted(transactions, key=lambda t: int(t['id'])):
+            self.stats['transactions'] += 1
+            if txn.get('type') != 'ORDER_FILL':
+                continue
+            reason = txn.get('reason', '')
+            for closed in txn.get('tradesClosed', []):
+                events.append(self._close_event(closed['tradeID'], closed, reason, txn))
+            reduced = txn.get('tradeReduced')
+            if reduced and reduced['tradeID'] in self.trades:
+                trade = self.trades[reduced['tradeID']]
+                trade['units'] += float(reduced['units'])
+                trade['realized_pl'] += float(reduced.get('realizedPL', 0))
+            opened = txn.get('tradeOpened')
+            if opened:
+                self.trades[opened['tradeID']] = {
+                    'instrument': txn['instrument'],
+                    'units': float(opened['units']),
+                    'price': float(opened.get('price', txn.get('price', 0))),
+                    'open_time': txn.get('time'),
+                    'realized_pl': 0.0,
+                }
+        return events
+
+    def _close_event(self, trade_id: str, closed: Dict, reason: str, txn: Dict, total: bool = False) -> Dict:
+        """Drop a trade from local state; realizedPL is the final fill unless `total`"""
+        trade = self.trades.pop(trade_id, {})
+        realized = float(closed.get('realizedPL') or 0)
+        if not total:
+            realized += trade.get('realized_pl', 0.0)
+        self.stats['closes'] += 1
+        return {
+            'trade_id': trade_id,
+            'instrument': trade.get('instrument', txn.get('instrument')),
+            'units': trade.get('units'),
+            'open_price': trade.get('price'),
+            'close_price': float(closed['price']) if closed.get('price') else None,
+            'realized_pl': realized,
+            'reason': reason,
+            'time': txn.get('time'),
+            'transaction_id': txn.get('id'),
+        }
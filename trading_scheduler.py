@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Event-driven Trading Scheduler
+Wakes strategies when a candle closes for an instrument/granularity (aligned the way OANDA
+aligns candles, skipping the weekend closure), streams prices only for instruments that
+currently have open positions, and runs periodic jobs, all from one heap-ordered timer
+instead of per-strategy sleep loops.
+"""
+
+import time
+import heapq
+import logging
+import threading
+import itertools
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional
+from zoneinfo import ZoneInfo
+
+import oandapyV20.endpoints.pricing as pricing
+
+from candle_cache import GRANULARITY_SECONDS
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_CONFIG = {
+    'close_delay': 2.0,                   # Seconds after the boundary so OANDA has published the complete candle
+    'daily_alignment_hour': 17,           # OANDA dailyAlignment for H2 and above
+    'alignment_timezone': 'America/New_York',
+    'skip_market_closed': True,           # No candle-close events between Friday and Sunday 17:00 New York
+    'tick_poll_interval': 5.0,            # Pricing poll interval when the price stream is unavailable
+    'idle_recheck': 30.0,                 # Seconds between open-position checks while nothing is held
+}
+
+
+def is_market_open(timestamp: float, config: Optional[Dict] = None) -> bool:
+    """Forex trades from Sunday 17:00 to Friday 17:00 New York time"""
+    cfg = dict(SCHEDULER_CONFIG, **(config or {}))
+    local = datetime.fromtimestamp(timestamp, ZoneInfo(cfg['alignment_timezone']))
+    weekday, hour = local.weekday(), local.hour
+    if weekday == 5:
+        return False
+    if weekday == 4 and hour >= cfg['daily_alignment_hour']:
+        return False
+    if weekday == 6 and hour < cfg['daily_alignment_hour']:
+        return False
+    return True
+
+
+def next_candle_close(granularity: str, now: float, config: Optional[Dict] = None) -> float:
+    """
+    Epoch seconds of the next candle close after `now`
+    Sub-hourly candles align to the UTC clock; H1 and above align to the daily alignment hour
+    """
+    cfg = dict(SCHEDULER_CONFIG, **(config or {}))
+    if granularity not in GRANULARITY_SECONDS or granularity == 'W':
+        raise ValueError(f"Unsupported granularity for candle-close events: {granularity}")
+    step = GRANULARITY_SECONDS[granularity]
+    if step < 3600:
+        return (now // step + 1) * step
+
+    local = datetime.fromtimestamp(now, ZoneInfo(cfg['alignment_timezone']))
+    anchor = local.replace(hour=cfg['daily_alignment_hour'], minute=0, second=0, microsecond=0)
+    if anchor.timestamp() > now:
+        anchor -= timedelta(days=1)
+    start = anchor.timestamp()
+    return start + ((now - start) // step + 1) * step
+
+
+class TradingScheduler:
+    """
+    Single-threaded timer for candle-close and periodic jobs, plus a price-tick thread
+    All callbacks run on the timer thread; ticks that arrive while a callback is busy are
+    coalesced to the latest price per instrument
+
+    Callbacks:
+        on_candle_close: callback(instruments, granularity, close_time) once per bar for the group
+        every:           callback()
+        on_tick:         callback(instrument, {'bid', 'ask', 'time'}) for instruments with open positions
+    """
+
+    def __init__(self, oanda=None, config: Optional[Dict] = None, clock: Callable[[], float] = time.time):
+        """
+        Args:
+            oanda: OandaClient used for the price stream (ticks are disabled without one)
+            config: Overrides for SCHEDULER_CONFIG
+            clock: Epoch-seconds clock, replaceable for simulations
+        """
+        self.oanda = oanda
+        self.config = dict(SCHEDULER_CONFIG, **(config or {}))
+        self.clock = clock
+        self._jobs = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._positions_changed = threading.Event()
+        self._tick_subscriptions = []
+        self._latest_ticks = {}
+        self._ticks_pending = False
+        self._threads = []
+        self.stats = {'wakeups': 0, 'jobs_run': 0, 'ticks': 0, 'last_close_latency_ms': {}}
+
+    # ------------------------------------------------------------------ registration
+
+    def on_candle_close(self, instruments: Iterable[str], granularity: str, callback: Callable):
+        """Call callback(instruments, granularity, close_time) when each bar of `granularity` closes"""
+        job = {'kind': 'candle', 'name': f"{granularity} close", 'instruments': list(instruments),
+               'granularity': granularity, 'callback': callback}
+        self._schedule(job, self._next_close(granularity, self.clock()))
+
+    def every(self, seconds: float, callback: Callable, name: Optional[str] = None, run_now: bool = False):
+        """Call callback() every `seconds`"""
+        job = {'kind': 'interval', 'name': name or getattr(callback, '__name__', 'job'),
+               'seconds': seconds, 'callback': callback}
+        self._schedule(job, self.clock() if run_now else self.clock() + seconds)
+
+    def on_tick(self, open_instruments: Callable[[], Iterable[str]], callback: Callable):
+        """
+        Stream prices for whatever open_instruments() returns and call callback per tick
+        Nothing is requested while it returns no instruments
+        """
+        self._tick_subscriptions.append({'instruments': open_instruments, 'callback': callback})
+
+    def notify_positions_changed(self):
+        """Re-read open instruments now (call after opening or closing a trade)"""
+        self._positions_changed.set()
+
+    def _schedule(self, job: Dict, when: float):
+        with self._lock:
+            heapq.heappush(self._jobs, (when, next(self._seq), job))
+        self._wakeup.set()
+
+    def _next_close(self, granularity: str, now: float) -> float:
+        close = next_candle_close(granularity, now, self.config)
+        step = GRANULARITY_SECONDS[granularity]
+        # Bars that would open inside the weekend closure never print; jump straight past them
+        while self.config['skip_market_closed'] and not is_market_open(close - step, self.config):
+            close = next_candle_close(granularity, close, self.config)
+        return close + self.config['close_delay']
+
+    # ------------------------------------------------------------------ running
+
+    def run(self):
+        """Run due jobs until stop(); blocks the calling thread"""
+        self._stop.clear()
+        while not self._stop.is_set():
+            self._wakeup.clear()  # Before reading the heap, so a job added meanwhile still wakes us
+            with self._lock:
+                when = self._jobs[0][0] if self._jobs else None
+            timeout = None if when is None else when - self.clock()
+            if timeout is None or timeout > 0:
+                self._wakeup.wait(timeout)
+                continue  # Woken by a new job, a stop request or the deadline; re-read the heap
+            self.run_pending()
+
+    def run_pending(self) -> int:
+        """Run every job that is due now; returns how many ran"""
+        now = self.clock()
+        due = []
+        with self._lock:
+            while self._jobs and self._jobs[0][0] <= now:
+                due.append(heapq.heappop(self._jobs))
+        if due:
+            self.stats['wakeups'] += 1
+
+        for when, _, job in due:
+            if job['kind'] == 'ticks':
+                self._run_ticks()
+                continue
+            try:
+                if job['kind'] == 'candle':
+                    close_time = when - self.config['close_delay']
+                    self.stats['last_close_latency_ms'][job['name']] = round((self.clock() - close_time) * 1000, 1)
+                    job['callback'](job['instruments'], job['granularity'],
+                                    datetime.fromtimestamp(close_time, timezone.utc))
+                else:
+                    job['callback']()
+                self.stats['jobs_run'] += 1
+            except Exception as e:
+                logger.error(f"Scheduled job {job['name']} failed: {e}")
+            finally:
+                if job['kind'] == 'candle':
+                    self._schedule(job, self._next_close(job['granularity'], self.clock()))
+                else:
+                    self._schedule(job, when + job['seconds'])
+        return len(due)
+
+    def start(self):
+        """Run the timer and tick loops in daemon threads"""
+        self._stop.clear()
+        timer = threading.Thread(target=self.run, daemon=True, name='trading-scheduler')
+        timer.start()
+        self._threads.append(timer)
+        self.start_ticks()
+
+    def start_ticks(self):
+        """Run only the tick loop in a daemon thread (when run() is driven by the caller)"""
+        self._stop.clear()
+        if self._tick_subscriptions and self.oanda is not None:
+            ticks = threading.Thread(target=self._tick_loop, daemon=True, name='price-ticks')
+            ticks.start()
+            self._threads.append(ticks)
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        self._positions_changed.set()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout=5)
+        self._threads = []
+
+    # ------------------------------------------------------------------ ticks
+
+    def _open_instruments(self) -> List[str]:
+        instruments = set()
+        for subscription in self._tick_subscriptions:
+            instruments.update(subscription['instruments']())
+        return sorted(instruments)
+
+    def _dispatch_tick(self, instrument: str, price: Dict):
+        """Hand a tick to the timer thread, keeping only the newest price per instrument"""
+        self.stats['ticks'] += 1
+        with self._lock:
+            self._latest_ticks[instrument] = price
+            if self._ticks_pending:
+                return
+            self._ticks_pending = True
+        self._schedule({'kind': 'ticks', 'name': 'ticks'}, self.clock())
+
+    def _run_ticks(self):
+        with self._lock:
+            ticks, self._latest_ticks, self._ticks_pending = self._latest_ticks, {}, False
+        for instrument, price in ticks.items():
+            for subscription in self._tick_subscriptions:
+                try:
+                    if instrument in subscription['instruments']():
+                        subscription['callback'](instrument, price)
+                except Exception as e:
+                    logger.error(f"Tick handler failed for {instrument}: {e}")
+
+    def _tick_loop(self):
+        """Stream (or, failing that, poll) prices for instruments with open positions only"""
+        while not self._stop.is_set():
+            instruments = self._open_instruments()
+            self._positions_changed.clear()
+            if not instruments:
+                self._positions_changed.wait(self.config['idle_recheck'])
+                continue
+            try:
+                self._stream(instruments)
+            except Exception as e:
+                logger.warning(f"Price stream unavailable ({e}); polling {','.join(instruments)}")
+                self._poll(instruments)
+
+    def _stream(self, instruments: List[str]):
+        request = pricing.PricingStream(accountID=self.oanda.account_id,
+                                        params={'instruments': ','.join(instruments)})
+        for message in self.oanda.client.request(request):
+            if message.get('type') == 'PRICE':
+                self._dispatch_tick(message['instrument'], {
+                    'bid': float(message['bids'][0]['price']),
+                    'ask': float(message['asks'][0]['price']),
+                    'time': message['time'],
+                })
+            # Heartbeats arrive every few seconds, so a changed position set is picked up promptly
+            if self._stop.is_set() or self._positions_changed.is_set():
+                request.terminate("positions changed")
+                return
+
+    def _poll(self, instruments: List[str]):
+        """One PricingInfo call per interval for all open instruments, until positions change"""
+        while not self._stop.is_set() and not self._positions_changed.is_set():
+            request = pricing.PricingInfo(accountID=self.oanda.account_id,
+                                          params={'instruments': ','.join(instruments)})
+            try:
+                for price in self.oanda.client.request(request).get('prices', []):
+                    self._dispatch_tick(price['instrument'], {
+                        'bid': float(price['bids'][0]['price']),
+                        'ask': float(price['asks'][0]['price']),
+                        'time': price['time'],
+                    })
+            except Exception as e:
+                logger.error(f"Pricing poll failed: {e}")
+            self._positions_changed.wait(self.config['tick_poll_interval'])
@@ -22,6 +22,8 @@ from config import RISK_CONFIG, SIGNAL_QUALITY_CONFIG, PREMIUM_TRADING_HOURS
 from news_aware_trading import NewsAwareTrading
 from market_microstructure import MarketMicrostructure
 from advanced_risk_manager import AdvancedRiskManager
+from metrics import TRAINING_SAMPLES, TRAINING_THROUGHPUT, registry as metrics_registry
+from training_profiler import TrainingProfiler
 
 # OANDA Integration for Real Historical Data
 try:
@@ -1167,7 +1169,11 @@ class ContinuousTrainingSystem:
                 random_state=42
             )
             
+            fit_start = time.perf_counter()
             self.ai_model.fit(X_train, y_train)
+            TRAINING_SAMPLES.inc(len(X_train))
+            TRAINING_THROUGHPUT.set(len(X_train) / max(time.perf_counter() - fit_start, 1e-9))
+            metrics_registry.start_flusher()  # Into METRICS_MULTIPROC_DIR, where the web workers' /metrics reads them
             
             # Verify the model was fitted properly
             if not hasattr(self.ai_model, 'n_features_in_'):
@@ -1223,6 +1229,21 @@ class ContinuousTrainingSystem:
         target_sessions = 100
         
         self.training_start_time = datetime.now().isoformat()
+        metrics_registry.start_flusher()  # Training series on the web /metrics (needs METRICS_MULTIPROC_DIR)
+        
+        # Opt-in profiling (TRAINING_PROFILE=sampling|cprofile); leaves methods untouched otherwise
+        profiler = TrainingProfiler('run_100_sessions')
+        profiler.instrument(self, {
+            'generate_simulated_market_data': 'data_fetch',
+            'generate_ai_features': 'feature_generation',
+            'ai_predict_outcome': 'prediction',
+            'save_ai_memory': 'memory_save',
+            'save_session_results': 'memory_save',
+            'save_progress': 'memory_save',
+            'train_ai_model': 'retraining',
+            'retrain_ai_for_new_features': 'retraining',
+        })
+        profiler.instrument(self.oanda_data, {'get_realistic_market_data': 'data_fetch'})
         
         print(f"\n{Fore.YELLOW}🎯 TARGET: {target_sessions} Sessions")
         print(f"{Fore.WHITE}📊 Starting from Session #{start_session}")
@@ -1235,13 +1256,14 @@ class ContinuousTrainingSystem:
                 
                 print(f"\n{Style.BRIGHT}{Fore.MAGENTA}📍 SESSION {session_num}/{start_session + target_sessions - 1}")
                 
-                # Run session
-                session_results = self.run_single_session()
-                
-                # Save memory after each session
-                self.save_ai_memory()
-                self.save_session_results()
-                self.save_progress(session_num + 1, target_sessions)
+                with profiler.session(f"session_{session_num:04d}"):
+                    # Run session
+                    session_results = self.run_single_session()
+                    
+                    # Save memory after each session
+                    self.save_ai_memory()
+                    self.save_session_results()
+                    self.save_progress(session_num + 1, target_sessions)
                 
                 # Show overall progress
                 completed = session_num - start_session + 1
@@ -1269,6 +1291,8 @@ class ContinuousTrainingSystem:
         except Exception as e:
             print(f"\n{Fore.RED}❌ Error during training: {e}")
             completed = session_num - start_session + 1
+        finally:
+            profiler.close()
         
         # Final summary
         final_lifetime_wr = (self.lifetime_wins / max(self.lifetime_trades, 1)) * 100
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Training Profiler
+Opt-in profiling for the long training runs (run_100_sessions, run_massive_training,
+run_million_trade_training). A background thread samples the training thread's stack every
+few milliseconds into collapsed stacks (flamegraph.pl / speedscope format), sessions can
+additionally be wrapped in cProfile, and per-phase timers record where the wall time goes:
+data fetch, feature generation, prediction, memory save and retraining.
+
+    TRAINING_PROFILE=sampling python train_and_trade_100_sessions.py
+    TRAINING_PROFILE=cprofile TRAINING_PROFILE_INTERVAL_MS=5 python million_trade_training.py
+    flamegraph.pl profiles/<run>/all.collapsed > flame.svg
+
+Off (the default) it adds nothing: instrument() leaves methods untouched and session() is an
+empty context.
+"""
+
+import os
+import sys
+import json
+import time
+import cProfile
+import threading
+import contextlib
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Optional
+
+PROFILING_CONFIG = {
+    'mode': os.getenv('TRAINING_PROFILE', ''),                        # '', 'sampling' or 'cprofile'
+    'interval_ms': float(os.getenv('TRAINING_PROFILE_INTERVAL_MS', '10')),
+    'output_dir': os.getenv('TRAINING_PROFILE_DIR', 'profiles'),
+    'max_depth': 128,
+}
+
+PHASES = ('data_fetch', 'feature_generation', 'prediction', 'memory_save', 'retraining')
+
+
+def collapse_stack(frame, max_depth: int = PROFILING_CONFIG['max_depth']) -> str:
+    """'outer;...;inner' with file:function names, root first, as flame graph tools expect"""
+    names = []
+    while frame is not None and len(names) < max_depth:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class StackSampler:
+    """Samples one thread's stack on a timer; counts are kept per session and for the whole run"""
+
+    def __init__(self, thread_id: int, interval_ms: float, max_depth: int = PROFILING_CONFIG['max_depth']):
+        self.thread_id = thread_id
+        self.interval = interval_ms / 1000.0
+        self.max_depth = max_depth
+        self.total = Counter()
+        self.session = Counter()
+        self.samples = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name='stack-sampler')
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+    def take_session(self) -> Counter:
+        with self._lock:
+            session, self.session = self.session, Counter()
+        return session
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = collapse_stack(frame, self.max_depth)
+            with self._lock:
+                self.total[stack] += 1
+                self.session[stack] += 1
+                self.samples += 1
+
+
+def write_collapsed(path: str, counts: Counter):
+    with open(path, 'w') as f:
+        for stack, count in counts.most_common():
+            f.write(f"{stack} {count}\n")
+
+
+class TrainingProfiler:
+    """Phase timers, stack sampling and optional cProfile for one training run"""
+
+    def __init__(self, run_name: str, config: Optional[Dict] = None):
+        self.config = dict(PROFILING_CONFIG, **(config or {}))
+        self.enabled = self.config['mode'] in ('sampling', 'cprofile')
+        self.run_name = run_name
+        self.output_dir = os.path.join(self.config['output_dir'],
+                                       f"{run_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        self.phases = {}            # name -> {'calls', 'total', 'self'} seconds for the whole run
+        self.sessions = []
+        self._session_phases = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._sampler = None
+        self._started = time.perf_counter()
+
+    # ------------------------------------------------------------------ phases
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        """Time a block; nested phases are subtracted from their parent's self time"""
+        if not self.enabled:
+            yield
+            return
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        entry = [name, time.perf_counter(), 0.0]  # name, start, time spent in child phases
+        stack.append(entry)
+        try:
+            yield
+        finally:
+            stack.pop()
+            elapsed = time.perf_counter() - entry[1]
+            if stack:
+                stack[-1][2] += elapsed
+            self._record(name, elapsed, elapsed - entry[2])
+
+    def _record(self, name: str, total: float, own: float):
+        with self._lock:
+            for table in (self.phases, self._session_phases):
+                timer = table.setdefault(name, {'calls': 0, 'total': 0.0, 'self': 0.0})
+                timer['calls'] += 1
+                timer['total'] += total
+                timer['self'] += own
+
+    def instrument(self, obj, phases: Dict[str, str]):
+        """Wrap obj's methods (method name -> phase name) in phase timers; a no-op when disabled"""
+        if not self.enabled or obj is None:
+            return obj
+        for method_name, phase_name in phases.items():
+            method = getattr(obj, method_name, None)
+            if method is not None:
+                setattr(obj, method_name, self._timed(method, phase_name))
+        return obj
+
+    def _timed(self, method, phase_name: str):
+        def timed(*args, **kwargs):
+            with self.phase(phase_name):
+                return method(*args, **kwargs)
+        timed.__wrapped__ = method
+        return timed
+
+    # ------------------------------------------------------------------ sessions
+
+    @contextlib.contextmanager
+    def session(self, label: str):
+        """Profile one session: <label>.collapsed, <label>.phases.json and, in cprofile mode, <label>.prof"""
+        if not self.enabled:
+            yield
+            return
+        os.makedirs(self.output_dir, exist_ok=True)
+        if self._sampler is None:
+            self._sampler = StackSampler(threading.get_ident(), self.config['interval_ms'], self.config['max_depth'])
+            self._sampler.start()
+        self._sampler.take_session()
+        with self._lock:
+            self._session_phases = {}
+        profile = cProfile.Profile() if self.config['mode'] == 'cprofile' else None
+        start = time.perf_counter()
+        if profile:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile:
+                profile.disable()
+                profile.dump_stats(os.path.join(self.output_dir, f"{label}.prof"))
+            seconds = time.perf_counter() - start
+            write_collapsed(os.path.join(self.output_dir, f"{label}.collapsed"), self._sampler.take_session())
+            with self._lock:
+                phases = self._session_phases
+            with open(os.path.join(self.output_dir, f"{label}.phases.json"), 'w') as f:
+                json.dump({'session': label, 'seconds': seconds, 'phases': phases}, f, indent=2)
+            self.sessions.append({'session': label, 'seconds': round(seconds, 3),
+                                  'phases': {n: round(t['self'], 3) for n, t in phases.items()}})
+
+    def close(self) -> Optional[str]:
+        """Stop sampling, write all.collapsed and summary.json, print the phase table; returns the directory"""
+        if not self.enabled:
+            return None
+        os.makedirs(self.output_dir, exist_ok=True)
+        if self._sampler:
+            self._sampler.stop()
+            write_collapsed(os.path.join(self.output_dir, 'all.collapsed'), self._sampler.total)
+        summary = self.summary()
+        with open(os.path.join(self.output_dir, 'summary.json'), 'w') as f:
+            json.dump(summary, f, indent=2)
+
+        print(f"\n⏱️  Profile for {self.run_name} ({summary['wall_seconds']:.1f}s, "
+              f"{summary['samples']} stack samples)")
+        print(f"   {'Phase':<20} {'Calls':>10} {'Self (s)':>10} {'Share':>7}")
+        for name, timer in sorted(summary['phases'].items(), key=lambda item: -item[1]['self']):
+            print(f"   {name:<20} {timer['calls']:>10,} {timer['self']:>10.2f} {timer['share']:>7.1%}")
+        print(f"   📄 {self.output_dir}")
+        return self.output_dir
+
+    def summary(self) -> Dict:
+        wall = time.perf_counter() - self._started
+        with self._lock:
+            phases = {name: dict(timer, share=timer['self'] / wall if wall > 0 else 0.0)
+                      for name, timer in self.phases.items()}
+        return {
+            'run': self.run_name,
+            'mode': self.config['mode'],
+            'wall_seconds': round(wall, 3),
+            'samples': self._sampler.samples if self._sampler else 0,
+            'interval_ms': self.config['interval_ms'],
+            'phases': phases,
+            'sessions': self.sessions,
+        }
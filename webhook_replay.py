@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Webhook Replay Harness
+Replays recorded SevenSYS alerts (webhook_alerts.raw_data in sevensys_memory.db or a
+JSONL file) against app.app through the Flask test client or over HTTP, at recorded
+speed, N x speed or flat out, and reports ingress latency percentiles, throughput and
+error rates. The broker side is a local OANDA stand-in with injectable latency and failures
+
+Usage:
+    python webhook_replay.py [--source sevensys_memory.db|alerts.jsonl|synthetic]
+                             [--speed 1|N|max] [--concurrency N] [--target testclient|http://host:port]
+                             [--latency-ms MS] [--failure-rate P] [--limit N] [--output report.json]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import logging
+import tempfile
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from unittest.mock import patch
+
+import numpy as np
+
+from latency_trace import span
+
+logger = logging.getLogger(__name__)
+
+REPLAY_CONFIG = {
+    'source': 'sevensys_memory.db',
+    'speed': 'max',             # 1 = recorded pace, N = N x faster, 'max' = no waiting
+    'concurrency': 8,
+    'target': 'testclient',     # 'testclient' or a base URL such as http://localhost:5000
+    'latency_ms': 40.0,         # Mean stand-in broker latency per REST call
+    'latency_jitter': 0.5,      # Lognormal sigma of the broker latency
+    'failure_rate': 0.0,        # Fraction of broker calls that raise
+    'limit': None,
+    'timeout': 30,
+}
+
+
+class StubOandaClient:
+    """
+    In-process OANDA stand-in with the OandaClient surface used by app.webhook
+    Every broker call sleeps for a lognormal latency and fails with failure_rate probability
+    """
+
+    def __init__(self, latency_ms: float = 40.0, latency_jitter: float = 0.5,
+                 failure_rate: float = 0.0, seed: int = 42):
+        self.environment = "practice"
+        self.account_id = "101-000-00000000-001"
+        self.api_url = "stub-oanda.local"
+        self.latency_ms = latency_ms
+        self.latency_jitter = latency_jitter
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._next_id = 1000
+        self.calls = 0
+
+    def _round_trip(self, endpoint: str):
+        with self._lock:
+            self.calls += 1
+            delay = self._rng.lognormvariate(0.0, self.latency_jitter) * self.latency_ms / 1000.0 \
+                if self.latency_ms > 0 else 0.0
+            fail = self._rng.random() < self.failure_rate
+            self._next_id += 1
+            txn_id = str(self._next_id)
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            raise Exception(f"Injected OANDA failure on {endpoint}")
+        return txn_id
+
+    def get_current_price(self, pair: str) -> Dict:
+        self._round_trip("pricing")
+        return {'bid': 1.10000, 'ask': 1.10012, 'timestamp': datetime.now().isoformat()}
+
+    def get_account_details(self) -> Dict:
+        self._round_trip("account")
+        return {'balance': 10000.0, 'currency': 'USD', 'margin_used': 0.0, 'margin_available': 10000.0,
+                'open_positions': 0, 'open_trades': 0, 'unrealized_pl': 0.0}
+
+    def place_trade(self, trade_data: Dict) -> Dict:
+        # Same round trips as OandaClient.place_trade: price, order, trade details, SL, TP
+        with span('oanda.pricing'):
+            self.get_current_price(trade_data['symbol'])
+        with span('oanda.order_create'):
+            order_id = self._round_trip("orders")
+        self.add_tp_sl_to_trade(order_id, trade_data['symbol'], trade_data['close_price'],
+                                trade_data['stop_loss'], trade_data['take_profit'], trade_data['units'])
+        return {
+            'status': 'success',
+            'order_id': order_id,
+            'filled_price': trade_data['close_price'],
+            'timestamp': datetime.now().isoformat()
+        }
+
+    def add_tp_sl_to_trade(self, trade_id: str, symbol: str, close_price: float,
+                           stop_loss: float, take_profit: float, units: int) -> bool:
+        try:
+            for stage, endpoint in (("trade_details", "trade_details"), ("sl_create", "orders"),
+                                    ("tp_create", "orders")):
+                with span(f'oanda.{stage}'):
+                    self._round_trip(endpoint)
+            return True
+        except Exception:
+            return False
+
+    def close_trade(self, trade_id: str) -> Dict:
+        self._round_trip("trade_close")
+        return {'status': 'success', 'close_price': 1.1, 'timestamp': datetime.now().isoformat()}
+
+    def modify_trade(self, trade_id: str, stop_loss: Optional[float] = None,
+                     take_profit: Optional[float] = None) -> Dict:
+        self._round_trip("trade_crcdo")
+        return {'status': 'success', 'trade_id': trade_id, 'timestamp': datetime.now().isoformat()}
+
+
+def load_alerts_from_db(db_path: str = "sevensys_memory.db", limit: Optional[int] = None) -> List[Dict]:
+    """Recorded alerts as [{'timestamp': epoch_seconds, 'payload': dict}] in arrival order"""
+    conn = sqlite3.connect(db_path)
+    try:
+        query = "SELECT timestamp, raw_data FROM webhook_alerts WHERE raw_data IS NOT NULL ORDER BY id"
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        rows = conn.execute(query).fetchall()
+    finally:
+        conn.close()
+
+    alerts = []
+    for timestamp, raw in rows:
+        try:
+            alerts.append({'timestamp': _to_epoch(timestamp), 'payload': json.loads(raw)})
+        except (TypeError, ValueError):
+            continue
+    return alerts
+
+
+def load_alerts_from_jsonl(path: str, limit: Optional[int] = None) -> List[Dict]:
+    """
+    Alerts from JSONL: each line is either a raw webhook payload or
+    {"timestamp": ..., "payload": {...}}
+    """
+    alerts = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if 'payload' in record:
+                alerts.append({'timestamp': _to_epoch(record.get('timestamp')), 'payload': record['payload']})
+            else:
+                alerts.append({'timestamp': None, 'payload': record})
+            if limit and len(alerts) >= limit:
+                break
+    return alerts
+
+
+def synthetic_alerts(n: int = 200, seed: int = 42, interval_seconds: float = 1.0) -> List[Dict]:
+    """SevenSYS-format alerts with plausible ATR stops, for runs without recorded traffic"""
+    rng = random.Random(seed)
+    tickers = {'EURUSD': 1.0850, 'GBPUSD': 1.2700, 'AUDUSD': 0.6600, 'USDJPY': 150.00}
+    start = time.time()
+    alerts = []
+    for i in range(n):
+        ticker = rng.choice(list(tickers))
+        close = tickers[ticker] * (1 + rng.uniform(-0.002, 0.002))
+        stop_distance = close * rng.uniform(0.0008, 0.002)
+        action = rng.choice(['buy', 'sell'])
+        sign = 1 if action == 'buy' else -1
+        alerts.append({
+            'timestamp': start + i * interval_seconds,
+            'payload': {
+                'ticker': ticker,
+                'strategy.order.action': action,
+                'close': round(close, 5),
+                'strategy': 'SevenSYS',
+                'signal_strength': round(rng.uniform(55, 80), 1),
+                'stop_loss': round(close - sign * stop_distance, 5),
+                'take_profit': round(close + sign * stop_distance * 2.5, 5),
+            }
+        })
+    return alerts
+
+
+def _to_epoch(value) -> Optional[float]:
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+def schedule_offsets(alerts: List[Dict], speed) -> List[float]:
+    """Send offsets in seconds from replay start for 1x, N x or 'max' speed"""
+    if speed == 'max' or not alerts:
+        return [0.0] * len(alerts)
+    factor = float(speed)
+    stamps = [a['timestamp'] for a in alerts]
+    if any(s is None for s in stamps):
+        logger.warning("Alerts without timestamps are replayed back to back")
+        return [0.0] * len(alerts)
+    first = stamps[0]
+    return [max(0.0, (s - first) / factor) for s in stamps]
+
+
+class WebhookReplayer:
+    """Replays alerts against /webhook and measures ingress latency"""
+
+    def __init__(self, config: Optional[Dict] = None, broker=None):
+        """
+        Args:
+            config: Overrides for REPLAY_CONFIG
+            broker: Stand-in broker for test-client runs (defaults to StubOandaClient)
+        """
+        self.config = dict(REPLAY_CONFIG, **(config or {}))
+        self.broker = broker
+        self._app = None
+        self._thread_local = threading.local()
+
+    def _prepare_app(self):
+        """Import app.app with the stand-in broker and a throwaway memory database"""
+        # Scoped to the import: PRELOAD_APP skips init_worker() (the harness supplies broker and
+        # logger), and placeholder credentials fill in only where none are configured
+        with patch.dict(os.environ, {'OANDA_API_KEY': os.getenv('OANDA_API_KEY', 'replay-harness'),
+                                     'OANDA_ACCOUNT_ID': os.getenv('OANDA_ACCOUNT_ID', '101-000-00000000-001'),
+                                     'PRELOAD_APP': '1'}):
+            import app as webhook_app
+        from account_router import AccountRouter, DEFAULT_SIZING
+        from memory_logger import SevenSYSMemoryLogger
+
+        self.broker = self.broker or StubOandaClient(self.config['latency_ms'],
+                                                     self.config['latency_jitter'],
+                                                     self.config['failure_rate'])
+        webhook_app.oanda = self.broker
+        webhook_app.account_router = AccountRouter.single(self.broker, dict(DEFAULT_SIZING, balance=45.0))
+        replay_dir = tempfile.mkdtemp(prefix="webhook_replay_")
+        self._replay_db = os.path.join(replay_dir, "replay_memory.db")
+        webhook_app.memory_logger = SevenSYSMemoryLogger(self._replay_db, os.path.join(replay_dir, "memory_logger.log"))
+        self._app = webhook_app.app
+
+    def _post(self, payload: Dict):
+        """POST one alert; returns (status_code, seconds)"""
+        target = self.config['target']
+        start = time.perf_counter()
+        if target == 'testclient':
+            client = getattr(self._thread_local, 'client', None)
+            if client is None:
+                client = self._thread_local.client = self._app.test_client()
+            status = client.post('/webhook', json=payload).status_code
+        else:
+            import requests
+            session = getattr(self._thread_local, 'session', None)
+            if session is None:
+                session = self._thread_local.session = requests.Session()
+            try:
+                status = session.post(target.rstrip('/') + '/webhook', json=payload,
+                                      timeout=self.config['timeout']).status_code
+            except requests.RequestException:
+                status = 0
+        return status, time.perf_counter() - start
+
+    def replay(self, alerts: List[Dict]) -> Dict:
+        """Replay alerts and return the latency/throughput/error report"""
+        if self.config['target'] == 'testclient' and self._app is None:
+            self._prepare_app()
+
+        offsets = schedule_offsets(alerts, self.config['speed'])
+        results = [None] * len(alerts)
+        start = time.perf_counter()
+
+        def send(index):
+            delay = offsets[index] - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+            results[index] = self._post(alerts[index]['payload'])
+
+        with ThreadPoolExecutor(max_workers=self.config['concurrency']) as pool:
+            list(pool.map(send, range(len(alerts))))
+
+        wall_time = time.perf_counter() - start
+        return self._report(results, wall_time)
+
+    def _report(self, results: List, wall_time: float) -> Dict:
+        statuses = np.array([status for status, _ in results], dtype=int)
+        latencies_ms = np.array([seconds for _, seconds in results], dtype=float) * 1000.0
+        codes, counts = np.unique(statuses, return_counts=True)
+        errors = int((statuses >= 400).sum() + (statuses == 0).sum())
+
+        report = {
+            'requests': len(results),
+            'wall_time_seconds': round(wall_time, 3),
+            'throughput_rps': round(len(results) / wall_time, 2) if wall_time > 0 else 0.0,
+            'error_rate': round(errors / len(results) * 100, 2) if results else 0.0,
+            'status_codes': {str(c): int(n) for c, n in zip(codes, counts)},
+            'latency_ms': {},
+            'config': {k: v for k, v in self.config.items()},
+            'timestamp': datetime.now().isoformat(),
+        }
+        if len(latencies_ms):
+            p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+            report['latency_ms'] = {
+                'p50': round(float(p50), 2), 'p95': round(float(p95), 2), 'p99': round(float(p99), 2),
+                'mean': round(float(latencies_ms.mean()), 2), 'max': round(float(latencies_ms.max()), 2),
+            }
+        if isinstance(self.broker, StubOandaClient):
+            report['broker_calls'] = self.broker.calls
+        return report
+
+
+def _option(args: List[str], name: str, default):
+    if name in args and args.index(name) + 1 < len(args):
+        return args[args.index(name) + 1]
+    return default
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING)
+    args = sys.argv[1:]
+
+    limit = _option(args, '--limit', None)
+    speed = _option(args, '--speed', REPLAY_CONFIG['speed'])
+    config = {
+        'source': _option(args, '--source', REPLAY_CONFIG['source']),
+        'speed': speed if speed == 'max' else float(speed),
+        'concurrency': int(_option(args, '--concurrency', REPLAY_CONFIG['concurrency'])),
+        'target': _option(args, '--target', REPLAY_CONFIG['target']),
+        'latency_ms': float(_option(args, '--latency-ms', REPLAY_CONFIG['latency_ms'])),
+        'failure_rate': float(_option(args, '--failure-rate', REPLAY_CONFIG['failure_rate'])),
+        'limit': int(limit) if limit else None,
+    }
+
+    source = config['source']
+    if source == 'synthetic':
+        alerts = synthetic_alerts(config['limit'] or 200)
+    elif source.endswith('.db'):
+        alerts = load_alerts_from_db(source, config['limit'])
+    else:
+        alerts = load_alerts_from_jsonl(source, config['limit'])
+
+    if not alerts:
+        print(f"❌ No alerts found in {source} (try --source synthetic)")
+        return
+
+    print(f"🔁 Replaying {len(alerts)} alerts from {source} -> {config['target']} "
+          f"(speed {config['speed']}, concurrency {config['concurrency']})")
+    report = WebhookReplayer(config).replay(alerts)
+
+    latency = report['latency_ms']
+    print("=" * 60)
+    print(f"Requests:    {report['requests']} in {report['wall_time_seconds']:.2f}s "
+          f"({report['throughput_rps']:.1f} req/s)")
+    print(f"Latency:     p50 {latency.get('p50', 0):.1f}ms | p95 {latency.get('p95', 0):.1f}ms | "
+          f"p99 {latency.get('p99', 0):.1f}ms")
+    print(f"Error Rate:  {report['error_rate']:.2f}%  {report['status_codes']}")
+
+    output = _option(args, '--output', None)
+    if output:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"📄 Report saved: {output}")
+
+
+if __name__ == "__main__":
+    main()